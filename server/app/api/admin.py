@@ -5,6 +5,7 @@ from app.db import crud, schemas
 from app.config import get_db
 from app.db.models import StatementUpload, Company, EarnedCommission, User, UserSession, AllowedDomain
 from app.dependencies.auth_dependencies import get_admin_user, get_current_user
+from app.services.auth_cache import auth_cache
 from app.db.schemas import DomainManagementRequest, AllowedDomainResponse
 from typing import List, Dict, Any, Optional
 from uuid import UUID
@@ -21,6 +22,7 @@ async def delete_user_related_data(db: AsyncSession, user_id: UUID, operation_na
     )
     user_uploads = uploads_result.scalars().all()
     upload_ids = [str(upload.id) for upload in user_uploads]
+    dashboard_cells = crud.dashboard_cells_by_user(statements=user_uploads)
 
     print(f"🎯 {operation_name}: Found {len(upload_ids)} uploads to delete for user {user_id}")
 
@@ -70,6 +72,9 @@ async def delete_user_related_data(db: AsyncSession, user_id: UUID, operation_na
     )
     print(f"🎯 {operation_name}: Deleted {len(upload_ids)} statement uploads")
     
+    # 7. Statement counts of the user (and their company) on the dashboard
+    await crud.refresh_dashboard_for_users(db, dashboard_cells)
+    
     return len(upload_ids)
 
 @router.post("/admin/cleanup-orphaned-statements")
@@ -128,6 +133,8 @@ async def cleanup_orphaned_statements(
         
         # Delete related data first (to avoid foreign key constraints)
         if deleted_ids:
+            dashboard_cells = crud.dashboard_cells_by_user(statements=orphaned_statements)
+            
             # 1. Delete edited tables
             await db.execute(
                 text("DELETE FROM edited_tables WHERE upload_id = ANY(:upload_ids)"),
@@ -161,6 +168,7 @@ async def cleanup_orphaned_statements(
                 )
             )
             
+            await crud.refresh_dashboard_for_users(db, dashboard_cells)
             await db.commit()
             print(f"✅ Successfully deleted {len(orphaned_statements)} orphaned statements")
         
@@ -510,6 +518,7 @@ async def update_user_status(
         user.updated_at = datetime.utcnow()
 
         await db.commit()
+        auth_cache.invalidate_user(email=user.email)
         await db.refresh(user)
 
         return {
@@ -552,6 +561,7 @@ async def update_user_role(
         user.updated_at = datetime.utcnow()
 
         await db.commit()
+        auth_cache.invalidate_user(email=user.email)
         await db.refresh(user)
 
         return {
@@ -602,6 +612,7 @@ async def delete_user(
         print(f"🎯 Delete User: Deleted user {user_id}")
 
         await db.commit()
+        auth_cache.invalidate_user(email=user.email, user_id=user_id)
         print(f"🎯 Delete User: Successfully deleted user {user_id} and all related data")
 
         return {"message": "User deleted successfully"}
@@ -10,7 +10,7 @@ import logging
 from datetime import datetime
 from app.services.websocket_service import connection_manager
 from app.services.upload_cache import upload_cache
-from app.services.summary_row_refiner import row_looks_like_summary
+from app.services.summary_row_refiner import summary_row_mask
 
 router = APIRouter(prefix="/api/auto-approve", tags=["auto-approval"])
 logger = logging.getLogger(__name__)
@@ -416,9 +416,10 @@ async def _run_auto_approval(
                     rows = table.get("rows", [])
                     logger.info(f"💰 Auto-approval: Table has {len(rows)} rows, {len(summary_rows)} summary rows to skip")
                     
+                    looks_like_summary = summary_row_mask(rows)
                     row_count = 0
                     for row_idx, row in enumerate(rows):
-                        row_is_summary = row_idx in summary_rows or row_looks_like_summary(row)
+                        row_is_summary = row_idx in summary_rows or looks_like_summary[row_idx]
                         if row_is_summary:
                             logger.debug(f"💰 Auto-approval: Skipping summary row {row_idx}")
                             if row_idx not in summary_rows:
@@ -508,9 +509,10 @@ async def _run_auto_approval(
                     summary_rows = set(table.get("summaryRows", []) or table.get("summary_rows", []))
                     rows = table.get("rows", [])
                     
+                    looks_like_summary = summary_row_mask(rows)
                     row_count = 0
                     for row_idx, row in enumerate(rows):
-                        row_is_summary = row_idx in summary_rows or row_looks_like_summary(row)
+                        row_is_summary = row_idx in summary_rows or looks_like_summary[row_idx]
                         if row_is_summary:
                             if row_idx not in summary_rows:
                                 summary_rows.add(row_idx)
@@ -619,6 +621,7 @@ async def _run_auto_approval(
         # Get the upload record that was created by approve_statement
         result = await db.execute(
             select(StatementUploadModel).where(StatementUploadModel.id == UUID(request.upload_id))
+            .options(crud.with_payloads())
         )
         db_upload = result.scalar_one_or_none()
         
@@ -647,13 +650,17 @@ async def _run_auto_approval(
                 f"📝 Auto-approval COMPLETED with review flag: Learned format applied successfully, "
                 f"but totals don't match. User can review and remap if needed."
             )
+            # No commission data for needs_review, but the pending review count changes
+            from app.db.crud.dashboard_aggregates import refresh_dashboard_aggregates
+            await refresh_dashboard_aggregates(db, db_upload.user_id, [(db_upload.environment_id, None, None)])
         else:
             # Status is already 'Approved' from approve_statement(), but let's be explicit
             db_upload.status = 'Approved'
             logger.info(f"✅ Auto-approval: Totals match perfectly, status set to 'Approved'")
         
         await db.commit()
-        await db.refresh(db_upload)
+        # A plain refresh would leave final_data unloaded for bulk_process_commissions below
+        await crud.refresh_upload(db, db_upload)
         
         logger.info(f"✅ Updated DB record with auto-approval metadata")
         
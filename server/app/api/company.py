@@ -130,6 +130,7 @@ async def delete_company(
     # This prevents foreign key constraint violations for both pending and approved statements
     if all_statements:
         statement_ids = [str(stmt.id) for stmt in all_statements]
+        dashboard_cells = crud.dashboard_cells_by_user(statements=all_statements)
         
         # 1. Delete edited tables (references statement_uploads)
         from sqlalchemy import text, delete as sql_delete
@@ -162,6 +163,7 @@ async def delete_company(
         await db.execute(
             sql_delete(StatementUpload).where(StatementUpload.id.in_([stmt.id for stmt in all_statements]))
         )
+        await crud.refresh_dashboard_for_users(db, dashboard_cells)
         
         print(f"✅ Deleted {len(statement_ids)} statement uploads and related data for carrier {company_id}")
     
@@ -222,6 +224,7 @@ async def delete_multiple_companies(
                 # This prevents foreign key constraint violations
                 if all_statements:
                     statement_ids = [str(stmt.id) for stmt in all_statements]
+                    dashboard_cells = crud.dashboard_cells_by_user(statements=all_statements)
                     
                     # 1. Delete edited tables (references statement_uploads)
                     from sqlalchemy import text
@@ -255,6 +258,7 @@ async def delete_multiple_companies(
                     await db.execute(
                         sql_delete(StatementUpload).where(StatementUpload.id.in_([stmt.id for stmt in all_statements]))
                     )
+                    await crud.refresh_dashboard_for_users(db, dashboard_cells)
                     
                     print(f"✅ Deleted {len(statement_ids)} statement uploads and related data for carrier {company_id}")
                 
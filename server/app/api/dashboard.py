@@ -4,7 +4,10 @@ from sqlalchemy import func, select, and_, or_, cast, Text
 from app.db import crud, schemas
 from app.config import get_db
 from app.db.models import StatementUpload, Company, EarnedCommission, User
+from app.db.crud.dashboard_aggregates import get_dashboard_aggregate, resolve_dashboard_scope, SCOPE_GLOBAL
 from app.dependencies.auth_dependencies import get_current_user_hybrid
+from app.db.database import AsyncSessionLocal
+from app.services.export_service import export_response, EXPORT_FORMATS
 from typing import List, Dict, Any, Optional
 from uuid import UUID
 from decimal import Decimal
@@ -12,6 +15,52 @@ from datetime import datetime
 
 router = APIRouter(prefix="/api")
 
+def _view_mode_user_ids(current_user: User, view_mode: Optional[str]):
+    """
+    User ids whose data a view mode covers:
+    - My Data: only the current user
+    - All Data: every user in the current user's company (subquery), or just the user if they have no company
+    """
+    if view_mode == "all_data" and current_user.company_id:
+        return select(User.id).where(User.company_id == current_user.company_id)
+    return [current_user.id]
+
+def _format_statement_list_item(row, company_name: Optional[str] = None) -> Dict[str, Any]:
+    """Format one row of crud.list_statements_page (list columns only, no JSON payloads)."""
+    return {
+        "id": str(row['id']),
+        "file_name": row['file_name'],
+        "gcs_key": row['file_name'],  # file_name IS the gcs_key
+        "company_name": company_name or row['company_name'],
+        "status": row['status'],
+        "uploaded_at": row['uploaded_at'].isoformat() if row['uploaded_at'] else None,
+        "last_updated": row['last_updated'].isoformat() if row['last_updated'] else None,
+        "completed_at": row['completed_at'].isoformat() if row['completed_at'] else None,
+        "rejection_reason": row['rejection_reason'],
+        "plan_types": row['plan_types'],
+        "selected_statement_date": row['selected_statement_date'],
+        "automated_approval": row['automated_approval'],
+        "automation_timestamp": row['automation_timestamp'].isoformat() if row['automation_timestamp'] else None,
+        "total_amount_match": row['total_amount_match'],
+        "extracted_total": float(row['extracted_total']) if row['extracted_total'] else None,
+        "calculated_total": float(row['calculated_total']) if row['calculated_total'] else None,
+        "extracted_invoice_total": float(row['extracted_invoice_total']) if row['extracted_invoice_total'] else None
+    }
+
+async def _statement_list_page(db: AsyncSession, limit: Optional[int], cursor: Optional[str], company_name: Optional[str] = None, **filters) -> Dict[str, Any]:
+    """Listing mode of the statement endpoints: one keyset page of list columns."""
+    try:
+        if limit is not None:
+            filters['limit'] = limit
+        page = await crud.list_statements_page(db, cursor=cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "statements": [_format_statement_list_item(row, company_name) for row in page["statements"]],
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
+    }
+
 @router.get("/dashboard/stats")
 async def get_dashboard_stats(
     environment_id: Optional[UUID] = Query(None, description="Filter by environment ID"),
@@ -25,121 +74,22 @@ async def get_dashboard_stats(
     - All Data: Shows all data from users in the same company/organization
     """
     try:
-        # Build conditions based on view mode
-        base_conditions = []
-        
-        if view_mode == "all_data":
-            # Show all data from the same company (organization)
-            if current_user.company_id:
-                users_in_company_result = await db.execute(
-                    select(User.id).where(User.company_id == current_user.company_id)
-                )
-                user_ids_in_company = [row[0] for row in users_in_company_result.all()]
-                if user_ids_in_company:
-                    base_conditions.append(StatementUpload.user_id.in_(user_ids_in_company))
-                else:
-                    base_conditions.append(StatementUpload.user_id == None)
-            else:
-                base_conditions.append(StatementUpload.user_id == current_user.id)
-        else:
-            # My Data: Show only user's own data
-            base_conditions.append(StatementUpload.user_id == current_user.id)
-        
-        # Add environment filter if provided (for both My Data and All Data views)
-        if environment_id:
-            base_conditions.append(StatementUpload.environment_id == environment_id)
-        
-        # CRITICAL FIX: Only count statements with valid statuses (Approved or needs_review)
-        VALID_STATUSES = ['Approved', 'needs_review']
-        
-        # Legacy variables for backward compatibility
-        user_condition = and_(*base_conditions) if base_conditions else True
-        environment_condition = True  # Already handled in base_conditions
-        
-        # Get total statements count - ONLY finalized statements
-        total_statements_result = await db.execute(
-            select(func.count(StatementUpload.id))
-            .where(and_(
-                user_condition,
-                StatementUpload.status.in_(VALID_STATUSES)  # Only count finalized statements
-            ))
-        )
-        total_statements = total_statements_result.scalar() or 0
+        # Single lookup into the maintained aggregates (refreshed whenever commissions or
+        # statement statuses change) instead of re-counting statement_uploads per request
+        scope_type, scope_id = resolve_dashboard_scope(current_user, view_mode)
+        stats = await get_dashboard_aggregate(db, scope_type, scope_id, environment_id=environment_id)
 
-        # Get total carriers count - ONLY from finalized statements
-        # NOTE: Use COALESCE to support both old (company_id) and new (carrier_id) data
-        # CRITICAL FIX: Exclude user companies (companies that have users) from carrier count
-        # CRITICAL FIX: Only count carriers from finalized statements
-        # Get distinct carrier IDs first
-        if view_mode == "all_data":
-            # All Data: Count all unique carriers from users in the same company
-            carrier_ids_result = await db.execute(
-                select(func.distinct(
-                    func.coalesce(StatementUpload.carrier_id, StatementUpload.company_id)
-                ))
-                .where(and_(
-                    user_condition,
-                    StatementUpload.status.in_(VALID_STATUSES)  # Only count from finalized statements
-                ))
-            )
-        else:
-            # My Data: Count only carriers the user has worked with
-            carrier_ids_result = await db.execute(
-                select(func.distinct(
-                    func.coalesce(StatementUpload.carrier_id, StatementUpload.company_id)
-                ))
-                .where(and_(
-                    user_condition,
-                    StatementUpload.status.in_(VALID_STATUSES)  # Only count from finalized statements
-                ))
-            )
-        
-        # Filter out user companies (companies that have users)
-        all_carrier_ids = [row[0] for row in carrier_ids_result.all() if row[0] is not None]
-        
-        if all_carrier_ids:
-            # Count only companies that have NO users (i.e., are actual carriers)
-            carrier_check_result = await db.execute(
-                select(Company.id)
-                .outerjoin(User, Company.id == User.company_id)
-                .where(Company.id.in_(all_carrier_ids))
-                .where(User.id.is_(None))  # Only companies with no users (carriers)
-            )
-            actual_carriers = carrier_check_result.scalars().all()
-            total_carriers = len(actual_carriers)
-        else:
-            total_carriers = 0
-
-        # CRITICAL FIX: Get pending reviews count - only needs_review status
-        # Removed 'extracted', 'success' as those are intermediate states that shouldn't be shown
-        pending_query = select(func.count(StatementUpload.id)).where(
-            and_(
-                StatementUpload.status == 'needs_review',  # Only needs_review status
-                user_condition,
-                environment_condition
-            )
-        )
-        pending_reviews_result = await db.execute(pending_query)
-        pending_reviews = pending_reviews_result.scalar() or 0
-
-        # Get approved statements count - only Approved status
-        approved_query = select(func.count(StatementUpload.id)).where(
-            and_(
-                StatementUpload.status == 'Approved',  # Only Approved status
-                user_condition,
-                environment_condition
-            )
-        )
-        approved_statements_result = await db.execute(approved_query)
-        approved_statements = approved_statements_result.scalar() or 0
+        # Only Approved and needs_review statements are persisted/finalized
+        pending_reviews = stats['needs_review_statements']
+        approved_statements = stats['approved_statements']
 
         # CRITICAL FIX: Rejected statements are no longer stored in DB
         # Set to 0 as we only keep Approved and needs_review
         rejected_statements = 0
 
         return {
-            "total_statements": total_statements,
-            "total_carriers": total_carriers,
+            "total_statements": approved_statements + pending_reviews,
+            "total_carriers": stats['statement_carriers'],
             "total_premium": None,  # Coming soon
             "policies_count": None,  # Coming soon
             "pending_reviews": pending_reviews,
@@ -152,6 +102,8 @@ async def get_dashboard_stats(
 @router.get("/dashboard/statements")
 async def get_all_statements(
     environment_id: Optional[UUID] = Query(None, description="Filter by environment ID"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Listing mode: page size (list columns only, keyset-paginated)"),
+    cursor: Optional[str] = Query(None, description="Listing mode: next_cursor from the previous page"),
     current_user: User = Depends(get_current_user_hybrid),
     db: AsyncSession = Depends(get_db)
 ):
@@ -159,6 +111,9 @@ async def get_all_statements(
     
     CRITICAL: Only returns statements with status 'Approved' or 'needs_review'.
     Pending/processing statements are NOT shown to users.
+    
+    Passing limit and/or cursor switches to listing mode: returns
+    {"statements", "next_cursor", "has_more"} with list columns only (no JSON payloads).
     """
     try:
         # For admin users, show all statements. For regular users, show only their statements
@@ -168,6 +123,14 @@ async def get_all_statements(
         # Don't show pending, processing, or any other intermediate statuses
         VALID_STATUSES = ['Approved', 'needs_review']
         
+        if limit is not None or cursor is not None:
+            return await _statement_list_page(
+                db, limit, cursor,
+                statuses=VALID_STATUSES,
+                user_id=None if is_admin else current_user.id,
+                environment_id=environment_id
+            )
+        
         # Build query with user filter
         query = select(StatementUpload, Company.name.label('company_name'))
         query = query.join(Company, StatementUpload.company_id == Company.id)
@@ -183,7 +146,9 @@ async def get_all_statements(
         if environment_id:
             query = query.where(StatementUpload.environment_id == environment_id)
         
+        # The full listing returns the table payloads too
         query = query.order_by(StatementUpload.uploaded_at.desc())
+        query = query.options(crud.with_payload_kinds('raw_data', 'edited_tables', 'final_data'))
         
         result = await db.execute(query)
         statements = result.all()
@@ -208,6 +173,8 @@ async def get_all_statements(
             })
         
         return formatted_statements
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching statements: {str(e)}")
 
@@ -215,6 +182,8 @@ async def get_all_statements(
 async def get_statements_by_status(
     status: str,
     environment_id: Optional[UUID] = Query(None, description="Filter by environment ID"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Listing mode: page size (list columns only, keyset-paginated)"),
+    cursor: Optional[str] = Query(None, description="Listing mode: next_cursor from the previous page"),
     current_user: User = Depends(get_current_user_hybrid),
     db: AsyncSession = Depends(get_db)
 ):
@@ -227,6 +196,8 @@ async def get_statements_by_status(
     - 'rejected' -> NOT SUPPORTED (we don't store rejected statements)
     
     Pending/processing uploads are NOT shown in ANY view.
+    
+    Passing limit and/or cursor switches to listing mode (see /dashboard/statements).
     """
     try:
         # CRITICAL FIX: Only allow approved and pending (needs_review) statuses
@@ -247,6 +218,14 @@ async def get_statements_by_status(
         
         db_statuses = status_mapping.get(status, [])
         
+        if limit is not None or cursor is not None:
+            return await _statement_list_page(
+                db, limit, cursor,
+                statuses=db_statuses,
+                user_id=None if is_admin else current_user.id,
+                environment_id=environment_id
+            )
+        
         query = select(StatementUpload, Company.name.label('company_name'))
         query = query.join(Company, StatementUpload.company_id == Company.id)
         query = query.where(StatementUpload.status.in_(db_statuses))
@@ -259,7 +238,9 @@ async def get_statements_by_status(
         if environment_id:
             query = query.where(StatementUpload.environment_id == environment_id)
         
+        # The full listing returns the table payloads too
         query = query.order_by(StatementUpload.uploaded_at.desc())
+        query = query.options(crud.with_payload_kinds('raw_data', 'edited_tables', 'final_data'))
         
         result = await db.execute(query)
         statements = result.all()
@@ -284,6 +265,8 @@ async def get_statements_by_status(
             })
         
         return formatted_statements
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching statements: {str(e)}")
 
@@ -300,78 +283,35 @@ async def get_carriers_with_statement_counts(
     - All Data: Shows all carriers with data from users in the same company/organization
     """
     try:
-        # Base query setup
         # CRITICAL FIX: Only count statements with valid statuses (Approved or needs_review)
         VALID_STATUSES = ['Approved', 'needs_review']
         
-        query = select(
-            Company.id,
-            Company.name,
-            func.count(StatementUpload.id).label('statement_count')
-        ).outerjoin(StatementUpload, and_(
-            or_(
-                Company.id == StatementUpload.carrier_id,
-                and_(
-                    Company.id == StatementUpload.company_id,
-                    StatementUpload.carrier_id.is_(None)
-                )
-            ),
-            StatementUpload.status.in_(VALID_STATUSES)  # Only count finalized statements
-        ))
-        
-        # Apply filter based on view mode
-        if view_mode == "all_data":
-            # Show carriers with data from all users in the same company
-            if current_user.company_id:
-                users_in_company_result = await db.execute(
-                    select(User.id).where(User.company_id == current_user.company_id)
-                )
-                user_ids_in_company = [row[0] for row in users_in_company_result.all()]
-                if user_ids_in_company:
-                    query = query.where(
-                        or_(
-                            StatementUpload.user_id.in_(user_ids_in_company),
-                            StatementUpload.id.is_(None)  # Include carriers with no statements
-                        )
-                    )
-            else:
-                # User has no company, show only their carriers
-                query = query.where(
-                    or_(
-                        StatementUpload.user_id == current_user.id,
-                        StatementUpload.id.is_(None)
-                    )
-                )
-        else:
-            # My Data: Show only carriers the user has worked with
-            query = query.where(
-                or_(
-                    StatementUpload.user_id == current_user.id,
-                    StatementUpload.id.is_(None)  # Include carriers with no statements (optional)
-                )
-            )
+        # All carrier statement counts in one grouped query (uses the coalesce(carrier_id, company_id) index)
+        statement_counts = await crud.get_carrier_statement_counts(
+            db,
+            user_ids=_view_mode_user_ids(current_user, view_mode),
+            environment_id=environment_id,
+            statuses=VALID_STATUSES
+        )
         
-        # Add environment filter if provided (for both My Data and All Data views)
-        if environment_id:
-            query = query.where(
-                or_(
-                    StatementUpload.environment_id == environment_id,
-                    StatementUpload.id.is_(None)
-                )
-            )
+        # Carriers the user/company has statements for, plus carriers with no finalized statements at all
+        carrier_key = crud.carrier_key_column()
+        no_statements = ~select(StatementUpload.id).where(and_(
+            carrier_key == Company.id,
+            StatementUpload.status.in_(VALID_STATUSES)
+        )).exists()
+        company_filter = or_(Company.id.in_(list(statement_counts)), no_statements) if statement_counts else no_statements
         
         result = await db.execute(
-            query.group_by(Company.id, Company.name).order_by(Company.name)
+            select(Company.id, Company.name).where(company_filter).order_by(Company.name)
         )
         
-        carriers = result.all()
-        
         formatted_carriers = []
-        for carrier_id, name, statement_count in carriers:
+        for carrier_id, name in result.all():
             formatted_carriers.append({
                 "id": str(carrier_id),
                 "name": name,
-                "statement_count": statement_count or 0
+                "statement_count": statement_counts.get(carrier_id, 0)
             })
         
         return formatted_carriers
@@ -382,12 +322,16 @@ async def get_carriers_with_statement_counts(
 async def get_statements_by_carrier(
     carrier_id: UUID,
     environment_id: Optional[UUID] = Query(None, description="Filter by environment ID"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Listing mode: page size (list columns only, keyset-paginated)"),
+    cursor: Optional[str] = Query(None, description="Listing mode: next_cursor from the previous page"),
     db: AsyncSession = Depends(get_db)
 ):
     """Get all statements for a specific carrier
     
     CRITICAL: Only returns statements with status 'Approved' or 'needs_review'.
     Pending/processing statements are NOT shown to users.
+    
+    Passing limit and/or cursor switches to listing mode (see /dashboard/statements).
     """
     try:
         # Get carrier name
@@ -402,6 +346,15 @@ async def get_statements_by_carrier(
         # CRITICAL FIX: Only show completed statements (Approved or needs_review)
         VALID_STATUSES = ['Approved', 'needs_review']
         
+        if limit is not None or cursor is not None:
+            return await _statement_list_page(
+                db, limit, cursor,
+                company_name=carrier_name,
+                statuses=VALID_STATUSES,
+                carrier_id=carrier_id,
+                environment_id=environment_id
+            )
+        
         # Get statements for this carrier
         # NOTE: Support both old (company_id) and new (carrier_id) format
         query = select(StatementUpload).where(
@@ -421,7 +374,10 @@ async def get_statements_by_carrier(
         if environment_id:
             query = query.where(StatementUpload.environment_id == environment_id)
         
-        result = await db.execute(query.order_by(StatementUpload.uploaded_at.desc()))
+        result = await db.execute(
+            query.order_by(StatementUpload.uploaded_at.desc())
+            .options(crud.with_payload_kinds('raw_data', 'edited_tables', 'final_data'))
+        )
         statements = result.scalars().all()
         
         formatted_statements = []
@@ -452,6 +408,8 @@ async def get_statements_by_carrier(
             })
         
         return formatted_statements
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching carrier statements: {str(e)}")
 
@@ -510,7 +468,10 @@ async def get_statements_by_carrier_and_status(
         if environment_id:
             query = query.where(StatementUpload.environment_id == environment_id)
         
-        result = await db.execute(query.order_by(StatementUpload.uploaded_at.desc()))
+        result = await db.execute(
+            query.order_by(StatementUpload.uploaded_at.desc())
+            .options(crud.with_payload_kinds('raw_data', 'edited_tables', 'final_data'))
+        )
         statements = result.scalars().all()
         
         formatted_statements = []
@@ -557,17 +518,13 @@ async def get_user_specific_companies(
         # Old format: carrier stored in company_id, carrier_id is NULL
         # New format: carrier stored in carrier_id
         
-        # Get all unique carrier IDs from both old and new format
-        query = select(
-            func.coalesce(StatementUpload.carrier_id, StatementUpload.company_id).label('carrier_id')
-        ).where(StatementUpload.user_id == current_user.id)
-        
-        # Add environment filter if provided
-        if environment_id:
-            query = query.where(StatementUpload.environment_id == environment_id)
-        
-        user_carriers_result = await db.execute(query.distinct())
-        user_carrier_ids = [row[0] for row in user_carriers_result.all() if row[0] is not None]
+        # Get all unique carrier IDs (with their statement counts) from both old and new format
+        statement_counts = await crud.get_carrier_statement_counts(
+            db,
+            user_ids=[current_user.id],
+            environment_id=environment_id
+        )
+        user_carrier_ids = list(statement_counts)
         
         if not user_carrier_ids:
             return []
@@ -583,7 +540,8 @@ async def get_user_specific_companies(
         for company_id, company_name in companies_result.all():
             companies.append({
                 "id": str(company_id),
-                "name": company_name
+                "name": company_name,
+                "statement_count": statement_counts.get(company_id, 0)
             })
         
         return companies
@@ -623,7 +581,10 @@ async def get_user_specific_company_statements(
         if environment_id:
             query = query.where(StatementUpload.environment_id == environment_id)
         
-        statements_result = await db.execute(query.order_by(StatementUpload.uploaded_at.desc()))
+        statements_result = await db.execute(
+            query.order_by(StatementUpload.uploaded_at.desc())
+            .options(crud.with_payload_kinds('raw_data', 'edited_tables', 'final_data'))
+        )
         
         statements = statements_result.scalars().all()
         
@@ -895,123 +856,17 @@ async def get_earned_commission_stats(
     - All Data: Shows all data from users in the same company/organization
     """
     try:
-        # Build base conditions
-        base_conditions = []
-        if year is not None:
-            base_conditions.append(EarnedCommission.statement_year == year)
-        
-        # Apply filter based on view mode
-        if view_mode == "all_data":
-            # Show all data from the same company (organization)
-            if current_user.company_id:
-                # Get all users from the same company
-                users_in_company_result = await db.execute(
-                    select(User.id).where(User.company_id == current_user.company_id)
-                )
-                user_ids_in_company = [row[0] for row in users_in_company_result.all()]
-                if user_ids_in_company:
-                    base_conditions.append(EarnedCommission.user_id.in_(user_ids_in_company))
-                else:
-                    # No users in company, return empty result
-                    base_conditions.append(EarnedCommission.user_id == None)
-            else:
-                # User has no company, show only their data
-                base_conditions.append(EarnedCommission.user_id == current_user.id)
-        else:
-            # My Data: Show only user's own data
-            base_conditions.append(EarnedCommission.user_id == current_user.id)
-        
-        # Apply environment filter if provided (for both My Data and All Data views)
-        if environment_id is not None:
-            base_conditions.append(EarnedCommission.environment_id == environment_id)
-
-        # Get total invoice amounts
-        if base_conditions:
-            total_invoice_result = await db.execute(
-                select(func.sum(EarnedCommission.invoice_total))
-                .where(and_(*base_conditions))
-            )
-        else:
-            total_invoice_result = await db.execute(
-                select(func.sum(EarnedCommission.invoice_total))
-            )
-        total_invoice = float(total_invoice_result.scalar() or 0)
-
-        # Get total commission earned
-        if base_conditions:
-            total_commission_result = await db.execute(
-                select(func.sum(EarnedCommission.commission_earned))
-                .where(and_(*base_conditions))
-            )
-        else:
-            total_commission_result = await db.execute(
-                select(func.sum(EarnedCommission.commission_earned))
-            )
-        total_commission = float(total_commission_result.scalar() or 0)
-
-        # Get total carriers with commission data
-        if base_conditions:
-            total_carriers_result = await db.execute(
-                select(func.count(func.distinct(EarnedCommission.carrier_id)))
-                .where(and_(*base_conditions))
-            )
-        else:
-            total_carriers_result = await db.execute(
-                select(func.count(func.distinct(EarnedCommission.carrier_id)))
-            )
-        total_carriers = total_carriers_result.scalar() or 0
-
-        # Get total companies/clients (normalized names)
-        if base_conditions:
-            total_companies_result = await db.execute(
-                select(func.count(func.distinct(func.lower(func.trim(EarnedCommission.client_name)))))
-                .where(and_(*base_conditions))
-            )
-        else:
-            total_companies_result = await db.execute(
-                select(func.count(func.distinct(func.lower(func.trim(EarnedCommission.client_name)))))
-            )
-        total_companies = total_companies_result.scalar() or 0
-
-        # For statement counts, we need to apply the same view_mode logic but to StatementUpload
-        statement_conditions = [StatementUpload.status.in_(['completed', 'Approved'])]
-        if year is not None:
-            # Note: This would require a statement_year field in StatementUpload
-            # For now, just count all approved statements
-            pass
-        
-        # Apply view mode filter for statements
-        if view_mode == "all_data":
-            if current_user.company_id:
-                users_in_company_result_stmt = await db.execute(
-                    select(User.id).where(User.company_id == current_user.company_id)
-                )
-                user_ids_in_company_stmt = [row[0] for row in users_in_company_result_stmt.all()]
-                if user_ids_in_company_stmt:
-                    statement_conditions.append(StatementUpload.user_id.in_(user_ids_in_company_stmt))
-                else:
-                    statement_conditions.append(StatementUpload.user_id == None)
-            else:
-                statement_conditions.append(StatementUpload.user_id == current_user.id)
-        else:
-            statement_conditions.append(StatementUpload.user_id == current_user.id)
-        
-        # Apply environment filter for statements (for both My Data and All Data views)
-        if environment_id is not None:
-            statement_conditions.append(StatementUpload.environment_id == environment_id)
-        
-        total_statements_result = await db.execute(
-            select(func.count(StatementUpload.id))
-            .where(and_(*statement_conditions))
-        )
-        total_statements = total_statements_result.scalar() or 0
+        # Single lookup into the maintained aggregates for this user/company, environment and year
+        scope_type, scope_id = resolve_dashboard_scope(current_user, view_mode)
+        stats = await get_dashboard_aggregate(db, scope_type, scope_id, environment_id=environment_id, year=year)
 
         return {
-            "total_invoice": total_invoice,
-            "total_commission": total_commission,
-            "total_carriers": total_carriers,
-            "total_companies": total_companies,
-            "total_statements": total_statements
+            "total_invoice": float(stats['total_invoice']),
+            "total_commission": float(stats['total_commission']),
+            "total_carriers": stats['total_carriers'],
+            "total_companies": stats['total_companies'],
+            # Statement counts are not year-specific (StatementUpload has no statement year)
+            "total_statements": stats['completed_statements'] + stats['approved_statements']
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching earned commission stats: {str(e)}")
@@ -1026,68 +881,14 @@ async def get_global_earned_commission_stats(
     try:
         # For now, allow all authenticated users to view global data
         # In production, you might want to add additional permission checks
-        
-        # Get total invoice amounts
-        if year is not None:
-            total_invoice_result = await db.execute(
-                select(func.sum(EarnedCommission.invoice_total))
-                .where(EarnedCommission.statement_year == year)
-            )
-        else:
-            total_invoice_result = await db.execute(
-                select(func.sum(EarnedCommission.invoice_total))
-            )
-        total_invoice = float(total_invoice_result.scalar() or 0)
-
-        # Get total commission earned
-        if year is not None:
-            total_commission_result = await db.execute(
-                select(func.sum(EarnedCommission.commission_earned))
-                .where(EarnedCommission.statement_year == year)
-            )
-        else:
-            total_commission_result = await db.execute(
-                select(func.sum(EarnedCommission.commission_earned))
-            )
-        total_commission = float(total_commission_result.scalar() or 0)
-
-        # Get total carriers with commission data
-        if year is not None:
-            total_carriers_result = await db.execute(
-                select(func.count(func.distinct(EarnedCommission.carrier_id)))
-                .where(EarnedCommission.statement_year == year)
-            )
-        else:
-            total_carriers_result = await db.execute(
-                select(func.count(func.distinct(EarnedCommission.carrier_id)))
-            )
-        total_carriers = total_carriers_result.scalar() or 0
-
-        # Get total companies/clients (normalized names)
-        if year is not None:
-            total_companies_result = await db.execute(
-                select(func.count(func.distinct(func.lower(func.trim(EarnedCommission.client_name)))))
-                .where(EarnedCommission.statement_year == year)
-            )
-        else:
-            total_companies_result = await db.execute(
-                select(func.count(func.distinct(func.lower(func.trim(EarnedCommission.client_name)))))
-            )
-        total_companies = total_companies_result.scalar() or 0
-
-        # Get total approved statements count from StatementUpload table
-        total_statements_result = await db.execute(
-            select(func.count(StatementUpload.id))
-            .where(StatementUpload.status.in_(['completed', 'Approved']))
-        )
-        total_statements = total_statements_result.scalar() or 0
+        stats = await get_dashboard_aggregate(db, SCOPE_GLOBAL, year=year)
 
         return {
-            "total_invoice": total_invoice,
-            "total_commission": total_commission,
-            "total_carriers": total_carriers,
-            "total_companies": total_companies,
-            "total_statements": total_statements
+            "total_invoice": float(stats['total_invoice']),
+            "total_commission": float(stats['total_commission']),
+            "total_carriers": stats['total_carriers'],
+            "total_companies": stats['total_companies'],
+            "total_statements": stats['completed_statements'] + stats['approved_statements']
         }
 
     except Exception as e:
@@ -1379,22 +1180,18 @@ async def get_carriers_with_commission_data(
         )
         
         result = await db.execute(query)
+        rows = result.all()
+        
+        # Count statements for all carriers in one grouped query
+        statement_counts = await crud.get_carrier_statement_counts(
+            db,
+            user_ids=None if is_admin else [current_user.id],
+            carrier_ids=[row.id for row in rows]
+        )
         
         carriers = []
-        for row in result.all():
-            carrier_id = row.id
-            
-            # Count statements for this carrier
-            statement_count_query = select(func.count(StatementUpload.id)).where(
-                func.coalesce(StatementUpload.carrier_id, StatementUpload.company_id) == carrier_id
-            )
-            
-            # Add user filter for non-admin users
-            if not is_admin:
-                statement_count_query = statement_count_query.where(StatementUpload.user_id == current_user.id)
-            
-            statement_count_result = await db.execute(statement_count_query)
-            statement_count = statement_count_result.scalar() or 0
+        for row in rows:
+            statement_count = statement_counts.get(row.id, 0)
             
             carriers.append({
                 "id": str(row.id),
@@ -1459,34 +1256,22 @@ async def get_carriers_with_detailed_commission_data(
         )
         
         result = await db.execute(commission_query)
+        rows = result.all()
+        
+        # Count statements for all carriers in one grouped query (same view mode and environment filters)
+        statement_counts = await crud.get_carrier_statement_counts(
+            db,
+            user_ids=_view_mode_user_ids(current_user, view_mode),
+            environment_id=environment_id,
+            carrier_ids=[row.id for row in rows]
+        )
         
         carriers = []
-        for row in result.all():
-            carrier_id = row.id
-            
-            # Count statements for this carrier
-            statement_count_query = select(func.count(StatementUpload.id)).where(
-                func.coalesce(StatementUpload.carrier_id, StatementUpload.company_id) == carrier_id
-            )
-            
-            # Apply filter based on view mode
-            if view_mode == "all_data":
-                if current_user.company_id:
-                    statement_count_query = statement_count_query.where(StatementUpload.user_id.in_(user_ids_in_company))
-                else:
-                    statement_count_query = statement_count_query.where(StatementUpload.user_id == current_user.id)
-            else:
-                statement_count_query = statement_count_query.where(StatementUpload.user_id == current_user.id)
-            
-            # Apply environment filter if provided (for both My Data and All Data views)
-            if environment_id:
-                statement_count_query = statement_count_query.where(StatementUpload.environment_id == environment_id)
-            
-            statement_count_result = await db.execute(statement_count_query)
-            statement_count = statement_count_result.scalar() or 0
+        for row in rows:
+            statement_count = statement_counts.get(row.id, 0)
             
             carriers.append({
-                "id": str(carrier_id),
+                "id": str(row.id),
                 "name": row.name,
                 "total_commission": float(row.total_commission or 0),
                 "statement_count": int(statement_count)
@@ -1589,6 +1374,31 @@ async def get_all_commission_data(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching all commission data: {str(e)}")
 
+@router.get("/earned-commission/export")
+async def export_earned_commissions(
+    format: str = Query("csv", description="csv or xlsx"),
+    year: Optional[int] = None,
+    current_user: User = Depends(get_current_user_hybrid)
+):
+    """
+    Download earned commission data as CSV or XLSX - user-specific for regular users, global for admins.
+    Streamed from a server-side cursor, so large year-end exports do not load into memory.
+    """
+    if format.lower() not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    
+    user_id = None if current_user.role == 'admin' else current_user.id
+    
+    async def export_rows():
+        yield [label for label, _ in crud.EARNED_COMMISSION_EXPORT_COLUMNS]
+        # Own session: the response body is produced after the request's dependencies have exited
+        async with AsyncSessionLocal() as db:
+            async for row in crud.stream_earned_commissions_for_export(db, user_id=user_id, year=year):
+                yield row
+    
+    filename = f"earned_commissions_{year}" if year else "earned_commissions"
+    return export_response([("Earned Commissions", export_rows())], format, filename)
+
 @router.put("/earned-commission/{commission_id}")
 async def update_commission_data(commission_id: UUID, update_data: dict, db: AsyncSession = Depends(get_db)):
     """Update commission data for a specific record"""
@@ -1637,6 +1447,8 @@ async def update_commission_data(commission_id: UUID, update_data: dict, db: Asy
         
         # Update the fields
         if 'client_name' in update_data:
+            # Keep the ledger on the record's key so removing an upload later still finds it
+            await crud.move_contributions(db, commission, {**crud.commission_key(commission), 'client_name': update_data['client_name']})
             commission.client_name = update_data['client_name']
         if 'invoice_total' in update_data:
             commission.invoice_total = Decimal(str(update_data['invoice_total']))
@@ -1646,6 +1458,7 @@ async def update_commission_data(commission_id: UUID, update_data: dict, db: Asy
         # Update the last_updated timestamp
         commission.last_updated = datetime.utcnow()
         
+        await crud.refresh_dashboard_for_users(db, crud.dashboard_cells_by_user([commission]))
         await db.commit()
         await db.refresh(commission)
         
@@ -1679,6 +1492,9 @@ async def merge_commission_records(merge_data: dict, db: AsyncSession = Depends(
         if not source_commission or not target_commission:
             raise HTTPException(status_code=404, detail="One or both commission records not found")
         
+        # The source's ledger rows now count towards the target record
+        await crud.move_contributions(db, source_commission, crud.commission_key(target_commission))
+        
         # Merge data into target record
         # Merge invoice totals
         if source_commission.invoice_total:
@@ -1720,8 +1536,10 @@ async def merge_commission_records(merge_data: dict, db: AsyncSession = Depends(
         target_commission.last_updated = datetime.utcnow()
         
         # Delete source record
+        dashboard_cells = crud.dashboard_cells_by_user([source_commission, target_commission])
         await db.delete(source_commission)
         
+        await crud.refresh_dashboard_for_users(db, dashboard_cells)
         await db.commit()
         await db.refresh(target_commission)
         
@@ -21,6 +21,7 @@ from app.db.crud.environment import (
     delete_environment as crud_delete_environment,
     get_environment_by_id
 )
+from app.db.crud.dashboard_aggregates import dashboard_cells_by_user, refresh_dashboard_for_users
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/environments", tags=["Environments"])
@@ -272,6 +273,8 @@ async def reset_environment(
     )
     tables_count = result.scalars().all()
     
+    dashboard_cells = dashboard_cells_by_user(commissions=commissions_count, statements=uploads_count)
+    
     # Delete all data in this environment
     await db.execute(
         delete(EditedTable).where(EditedTable.environment_id == environment_id)
@@ -283,6 +286,7 @@ async def reset_environment(
         delete(StatementUpload).where(StatementUpload.environment_id == environment_id)
     )
     
+    await refresh_dashboard_for_users(db, dashboard_cells)
     await db.commit()
     
     logger.info(
@@ -376,6 +376,8 @@ async def process_commission_data_with_date(
         
         # Process each row in the table data
         processed_rows = 0
+        # Dashboard rows of the records written below, refreshed once after the loop
+        dashboard_cells = set()
         for row_idx, row in enumerate(table_data):
             if len(row) != len(headers):
                 logger.warning(f"🎯 Commission Processing: Row {row_idx} length mismatch - expected {len(headers)}, got {len(row)}")
@@ -421,11 +423,14 @@ async def process_commission_data_with_date(
                 statement_month=statement_month,
                 statement_year=statement_year,
                 user_id=user_id,  # CRITICAL: Pass user_id for proper data isolation
-                environment_id=environment_id  # Pass environment_id for environment isolation
+                environment_id=environment_id,  # Pass environment_id for environment isolation
+                dashboard_cells=dashboard_cells
             )
             processed_rows += 1
             logger.info(f"🎯 Commission Processing: Successfully processed row {row_idx}")
         
+        if dashboard_cells:
+            await crud.refresh_dashboard_aggregates(db, user_id, dashboard_cells)
         logger.info(f"🎯 Commission Processing: Completed processing {processed_rows} rows with statement date {date_value}")
         print(f"Processed commission data for {len(table_data)} rows with statement date {date_value}")
         
@@ -573,11 +578,14 @@ async def create_or_update_commission_record(
     statement_month: int,
     statement_year: int,
     user_id: UUID = None,
-    environment_id: UUID = None
+    environment_id: UUID = None,
+    dashboard_cells: Optional[set] = None
 ):
     """
     Create or update commission record with monthly breakdown.
     Includes user_id and environment_id for proper data isolation in multi-user and multi-environment setups.
+    The (environment_id, carrier_id, statement_year) cells the write changes are added to
+    dashboard_cells when given, for the caller's dashboard refresh.
     """
     try:
         logger.info(f"🎯 Commission Record: Creating/updating record for {carrier_id} - {client_name} - {statement_date} - user: {user_id}")
@@ -592,6 +600,11 @@ async def create_or_update_commission_record(
             user_id=user_id  # CRITICAL: Filter by user_id for proper data isolation
         )
         
+        if dashboard_cells is not None:
+            dashboard_cells.add((environment_id, carrier_id, statement_year))
+            if existing_record:
+                dashboard_cells.add((existing_record.environment_id, existing_record.carrier_id, existing_record.statement_year))
+        
         if existing_record:
             logger.info(f"🎯 Commission Record: Updating existing record ID {existing_record.id}")
             # Update existing record
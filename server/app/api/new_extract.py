@@ -8,8 +8,9 @@ from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import crud, schemas
 from app.services.enhanced_extraction_service import EnhancedExtractionService
-from app.config import get_db
+from app.config import get_db, AsyncSessionLocal
 from app.utils.db_retry import with_db_retry
+from app.utils.upload_utils import spool_upload_to_disk
 from app.dependencies.auth_dependencies import get_current_user_hybrid
 from app.db.models import User
 from app.services.audit_logging_service import AuditLoggingService
@@ -24,14 +25,15 @@ from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 from fastapi.responses import JSONResponse
 import re
-import hashlib
 import copy
 from pypdf import PdfReader
 from app.services.cancellation_manager import cancellation_manager
 from app.constants.statuses import VALID_PERSISTENT_STATUSES
-from app.services.summary_row_refiner import refine_summary_rows, row_looks_like_summary
+from app.services.summary_row_refiner import refine_summary_rows, summary_row_mask
 from app.services.extraction_utils import resolve_carrier_broker_roles
 from app.services.upload_cache import upload_cache
+from app.services.extraction_job_queue import extraction_job_queue, ExtractionJobCancelled, ExtractionJobLeaseLost
+from app.services.pdf_document import PDFDocument
 
 router = APIRouter(prefix="/api", tags=["new-extract"])
 logger = logging.getLogger(__name__)
@@ -111,17 +113,43 @@ class TotalCandidate:
     source: str
 
 
-def guess_carrier_from_pdf(file_path: str) -> Optional[str]:
+def upload_file_path(upload_uuid: UUID, filename: str) -> str:
+    """Local path of an upload: one directory per upload, so same-name files never collide."""
+    return os.path.join(UPLOAD_DIR, str(upload_uuid), os.path.basename(filename))
+
+
+def remove_upload_file(file_path: str) -> bool:
+    """Delete an upload's local file and its per-upload directory. Returns whether the file existed."""
+    existed = os.path.exists(file_path)
+    if existed:
+        os.remove(file_path)
+    directory = os.path.dirname(file_path)
+    # Files queued before per-upload directories sit directly in UPLOAD_DIR, which stays
+    if os.path.abspath(directory) != os.path.abspath(UPLOAD_DIR):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+    return existed
+
+
+def _first_page_text(file_path: str, document: Optional[PDFDocument] = None) -> Optional[str]:
+    """pypdf text of the first page, or None for an empty PDF."""
+    if document is not None:
+        return document.page_text(0) if document.page_count else None
+    reader = PdfReader(file_path)
+    if not reader.pages:
+        return None
+    return reader.pages[0].extract_text() or ""
+
+
+def guess_carrier_from_pdf(file_path: str, document: Optional[PDFDocument] = None) -> Optional[str]:
     """
     Attempt to infer the carrier name directly from the PDF text layer.
     Focuses on the first page and filters out common header keywords.
     """
     try:
-        reader = PdfReader(file_path)
-        if not reader.pages:
-            return None
-        first_page = reader.pages[0]
-        text = first_page.extract_text() or ""
+        text = _first_page_text(file_path, document)
         if not text:
             return None
         
@@ -163,16 +191,18 @@ def guess_carrier_from_pdf(file_path: str) -> Optional[str]:
         return None
 
 
-def extract_pdf_text_snippet(file_path: str, max_chars: int = 1500) -> Optional[str]:
+def extract_pdf_text_snippet(
+    file_path: str,
+    max_chars: int = 1500,
+    document: Optional[PDFDocument] = None
+) -> Optional[str]:
     """
     Extract a small text snippet from the first page of a PDF for carrier detection.
     """
     try:
-        reader = PdfReader(file_path)
-        if not reader.pages:
+        text = _first_page_text(file_path, document)
+        if text is None:
             return None
-        first_page = reader.pages[0]
-        text = first_page.extract_text() or ""
         snippet = text.replace('\r', '\n').strip()
         if not snippet:
             return None
@@ -187,7 +217,8 @@ async def validate_carrier_metadata_with_db(
     document_metadata: Dict[str, Any],
     fallback_carrier_name: Optional[str],
     file_path: str,
-    pdf_text_snippet: Optional[str] = None
+    pdf_text_snippet: Optional[str] = None,
+    document: Optional[PDFDocument] = None
 ) -> Dict[str, Any]:
     """
     Cross-check extracted carrier/broker names against known companies in the database.
@@ -197,7 +228,7 @@ async def validate_carrier_metadata_with_db(
         return document_metadata
     
     if pdf_text_snippet is None:
-        pdf_text_snippet = extract_pdf_text_snippet(file_path)
+        pdf_text_snippet = extract_pdf_text_snippet(file_path, document=document)
     
     metadata, disambig = resolve_carrier_broker_roles(
         document_metadata,
@@ -300,7 +331,7 @@ async def validate_carrier_metadata_with_db(
                     "⚠️ Carrier '%s' matches broker profile in DB. Reclassifying as broker.",
                     extracted_carrier
                 )
-                inferred_carrier = fallback_carrier_name or guess_carrier_from_pdf(file_path)
+                inferred_carrier = fallback_carrier_name or guess_carrier_from_pdf(file_path, document)
                 metadata['broker_company'] = metadata.get('broker_company') or extracted_carrier
                 metadata['broker_confidence'] = max(
                     metadata.get('broker_confidence', 0.6),
@@ -613,8 +644,9 @@ def _calculate_detail_commission_total(
     total = 0.0
     detail_rows = 0
     
+    looks_like_summary = summary_row_mask(rows)
     for row_idx, row in enumerate(rows):
-        row_is_summary = row_idx in summary_indices or row_looks_like_summary(row)
+        row_is_summary = row_idx in summary_indices or looks_like_summary[row_idx]
         if row_is_summary:
             if row_idx not in summary_indices:
                 augmented_indices.add(row_idx)
@@ -757,6 +789,8 @@ async def extract_tables_smart(
     - Scanned PDFs: Uses existing extraction pipeline (Google DocAI + Docling)
     - Includes format learning integration for automatic settings application
     - Supports real-time progress tracking via WebSocket
+    - Extraction runs as a durable background job (run_smart_extraction_job): the endpoint
+      returns 202 once the file is stored, and results arrive via WebSocket
     - Enhanced mode: Uses 3-phase intelligent extraction for Google Gemini-quality results
     
     New Parameters:
@@ -789,12 +823,9 @@ async def extract_tables_smart(
             detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
         )
     
-    # ✅ STEP 1: Read file content FIRST (required for hash calculation)
-    file_content = await file.read()
-    
-    # ✅ STEP 2: Calculate file hash IMMEDIATELY (before any other operations)
-    file_size = len(file_content)
-    file_hash = hashlib.sha256(file_content).hexdigest()
+    # ✅ STEP 1+2: Stream the upload to a spool file on disk, hashing it chunk by chunk
+    # (the whole file is never held in memory)
+    spool_path, file_size, file_hash = await spool_upload_to_disk(file, UPLOAD_DIR, suffix=f".{file_ext}")
     
     logger.info(f"📁 File: {file.filename}, Size: {file_size} bytes, Hash: {file_hash[:16]}..., User: {current_user.id}")
     
@@ -804,13 +835,18 @@ async def extract_tables_smart(
     # CRITICAL: Use correct status values from constants module
     logger.info("🔍 Checking for duplicates BEFORE proceeding with upload...")
     
-    existing_upload = await crud.get_statement_by_file_hash_and_status(
-        db=db,
-        file_hash=file_hash,
-        valid_statuses=VALID_PERSISTENT_STATUSES  # ✅ Use correct status constants: ['Approved', 'needs_review']
-    )
+    try:
+        existing_upload = await crud.get_statement_by_file_hash_and_status(
+            db=db,
+            file_hash=file_hash,
+            valid_statuses=VALID_PERSISTENT_STATUSES  # ✅ Use correct status constants: ['Approved', 'needs_review']
+        )
+    except Exception:
+        os.remove(spool_path)
+        raise
     
     if existing_upload:
+        os.remove(spool_path)
         logger.warning(f"🚫 DUPLICATE DETECTED: File hash {file_hash[:16]}... already exists (upload_id: {existing_upload.id})")
         
         # Generate GCS URL for the existing file
@@ -850,14 +886,15 @@ async def extract_tables_smart(
     logger.info(f"✅ No duplicate found - proceeding with upload for file: {file.filename}")
     
     # Prepare file path for saving (only if not a duplicate)
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+    file_path = upload_file_path(upload_id_uuid, file.filename)
+    gcs_key = None
     
     try:
         logger.info(f"🚀 Starting extraction: {file.filename} (ID: {upload_id_str})")
         
-        # Save uploaded file to disk (only after duplicate check passes)
-        with open(file_path, "wb") as buffer:
-            buffer.write(file_content)
+        # Move the spooled upload into place (only after duplicate check passes)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(spool_path, file_path)
 
         # Handle company_id - if not provided, we'll extract it from the document
         if not company_id:
@@ -876,7 +913,7 @@ async def extract_tables_smart(
         # Get company info with retry
         company = await with_db_retry(db, crud.get_company_by_id, company_id=company_id)
         if not company:
-            os.remove(file_path)
+            remove_upload_file(file_path)
             raise HTTPException(status_code=404, detail="Company not found")
 
         uploader_company_name = None
@@ -893,7 +930,8 @@ async def extract_tables_smart(
         if not gcs_service.is_available():
             raise HTTPException(status_code=503, detail="Cloud storage service is not available. Please contact support.")
         
-        if not upload_file_to_gcs(file_path, gcs_key) or not gcs_service.file_exists(gcs_key):
+        # Streamed from disk in resumable chunks, off the event loop
+        if not await asyncio.to_thread(upload_file_to_gcs, file_path, gcs_key) or not gcs_service.file_exists(gcs_key):
             raise HTTPException(status_code=500, detail="Failed to upload file to GCS.")
         
         logger.info(f"✅ Uploaded to GCS: {gcs_key}")
@@ -904,6 +942,130 @@ async def extract_tables_smart(
             # Fallback to public URL if signed URL generation fails
             gcs_url = get_gcs_file_url(gcs_key)
 
+        # Run the extraction as a durable job; progress and results are sent over the WebSocket
+        job = await extraction_job_queue.enqueue(
+            upload_id=upload_id_str,
+            upload_uuid=upload_id_uuid,
+            handler=SMART_EXTRACTION_JOB,
+            user_id=current_user.id,
+            payload={
+                'upload_id': upload_id,
+                'upload_id_str': upload_id_str,
+                'upload_uuid': str(upload_id_uuid),
+                'user_id': str(current_user.id),
+                'file_path': file_path,
+                'filename': file.filename,
+                'file_ext': file_ext,
+                'file_hash': file_hash,
+                'file_size': file_size,
+                'company_id': str(company_id),
+                'uploader_company_name': uploader_company_name,
+                'extraction_method': extraction_method,
+                'environment_id': environment_id,
+                'use_enhanced': use_enhanced,
+                'gcs_key': gcs_key,
+                'gcs_url': gcs_url,
+                'start_time': start_time.isoformat()
+            }
+        )
+        
+        return JSONResponse(
+            status_code=202,
+            content={
+                "success": True,
+                "status": job['status'],
+                "job_id": str(job['id']),
+                "upload_id": str(upload_id_uuid),
+                "tracking_id": upload_id_str,
+                "gcs_url": gcs_url,
+                "gcs_key": gcs_key
+            }
+        )
+        
+    except HTTPException:
+        # CRITICAL CHANGE: No DB record to cleanup anymore
+        # Just clean up GCS files and local files
+        _delete_extraction_files(gcs_key, file_path)
+        raise
+    except Exception as e:
+        logger.error(f"❌ Smart extraction error: {str(e)}")
+        
+        # CRITICAL CHANGE: No DB record to cleanup anymore
+        # Just clean up GCS files and local files
+        _delete_extraction_files(gcs_key, file_path)
+        
+        raise HTTPException(status_code=500, detail=f"Smart extraction failed: {str(e)}")
+
+
+SMART_EXTRACTION_JOB = 'smart_extraction'
+
+
+def _delete_extraction_files(gcs_key: Optional[str], file_path: str) -> None:
+    """Remove an upload's GCS object and local file after a failed or cancelled extraction."""
+    try:
+        if gcs_key:
+            from app.services.gcs_utils import delete_gcs_file
+            delete_gcs_file(gcs_key)
+            logger.info(f"🗑️ Deleted GCS file: {gcs_key}")
+    except Exception as gcs_error:
+        logger.warning(f"⚠️ Failed to delete GCS file: {gcs_error}")
+    
+    # Clean up local file on error
+    if remove_upload_file(file_path):
+        logger.info(f"🗑️ Deleted local file: {file_path}")
+
+
+async def run_smart_extraction_job(job: Dict[str, Any]):
+    """
+    Extraction job handler for uploads accepted by extract_tables_smart.
+
+    Runs on whichever worker claimed the job; the file is downloaded from GCS if it is not
+    on this worker's disk.
+    """
+    payload = job['payload']
+    try:
+        async with AsyncSessionLocal() as db:
+            current_user = await db.get(User, UUID(payload['user_id']))
+            if current_user is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            return await _run_smart_extraction(db, current_user, job)
+    except HTTPException as e:
+        if e.status_code == 499:
+            raise ExtractionJobCancelled() from e
+        raise
+
+
+async def _run_smart_extraction(db: AsyncSession, current_user: User, job: Dict[str, Any]):
+    payload = job['payload']
+    upload_id = payload['upload_id']
+    upload_id_str = payload['upload_id_str']
+    upload_id_uuid = UUID(payload['upload_uuid'])
+    file_path = payload['file_path']
+    filename = payload['filename']
+    file_ext = payload['file_ext']
+    file_hash = payload['file_hash']
+    file_size = payload['file_size']
+    company_id = payload['company_id']
+    uploader_company_name = payload['uploader_company_name']
+    extraction_method = payload['extraction_method']
+    environment_id = payload['environment_id']
+    use_enhanced = payload['use_enhanced']
+    gcs_key = payload['gcs_key']
+    gcs_url = payload['gcs_url']
+    start_time = datetime.fromisoformat(payload['start_time'])
+    
+    if not os.path.exists(file_path):
+        # Claimed by a different worker than the one that received the upload
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if not await asyncio.to_thread(download_file_from_gcs, gcs_key, file_path):
+            raise HTTPException(status_code=500, detail="Failed to download file from GCS.")
+    
+    # Parsed once and shared by every step that reads the PDF
+    document = PDFDocument(file_path) if file_ext == 'pdf' else None
+    
+    try:
+        company = await with_db_retry(db, crud.get_company_by_id, company_id=company_id)
+
         # Emit WebSocket: Step 1 - Upload started (10% progress)
         if upload_id:
             await connection_manager.emit_upload_step(upload_id, 'upload', 10)
@@ -948,7 +1110,7 @@ async def extract_tables_smart(
         await audit_service.log_extraction_start(
             user_id=current_user.id,
             company_id=company_id,
-            file_name=file.filename,
+            file_name=filename,
             extraction_method=extraction_method,
             upload_id=upload_id_uuid
         )
@@ -976,6 +1138,10 @@ async def extract_tables_smart(
                     while True:
                         await asyncio.sleep(10)  # Every 10 seconds
                         
+                        # Real progress was sent recently - the connection is already warm
+                        if connection_manager.seconds_since_last_frame(upload_id_str) < 10:
+                            continue
+                        
                         # Cycle through progress stages
                         percentage, message = progress_stages[stage_idx % len(progress_stages)]
                         stage_idx += 1
@@ -1001,7 +1167,9 @@ async def extract_tables_smart(
                         upload_id=upload_id_str,
                         file_type=file_ext,
                         extraction_method=extraction_method,
-                        upload_id_uuid=str(upload_id_uuid)
+                        upload_id_uuid=str(upload_id_uuid),
+                        file_hash=file_hash,
+                        document=document
                     )
                     
                     logger.info("✅ Extraction completed successfully")
@@ -1027,10 +1195,12 @@ async def extract_tables_smart(
         try:
             extraction_result = await task
         except asyncio.CancelledError:
+            if not await cancellation_manager.is_cancelled(upload_id_str):
+                # Worker shutting down or job taken over: keep the files for the next attempt
+                raise
             logger.info(f"🛑 Extraction cancelled: {upload_id_str}")
             try:
                 await cleanup_failed_upload(db, upload_id_uuid)
-                await connection_manager.send_upload_complete(upload_id_str, {"status": "cancelled", "message": "Upload cancelled"})
             except Exception as e:
                 logger.warning(f"Cleanup error: {e}")
             raise HTTPException(status_code=499, detail="Extraction cancelled by user")
@@ -1106,7 +1276,7 @@ async def extract_tables_smart(
         )
         
         # Extract carrier and date information from document metadata
-        pdf_text_snippet = extract_pdf_text_snippet(file_path)
+        pdf_text_snippet = extract_pdf_text_snippet(file_path, document=document) if document else None
         document_metadata = extraction_result.get('document_metadata', {})
         document_metadata, carrier_broker_note = resolve_carrier_broker_roles(
             document_metadata,
@@ -1122,7 +1292,8 @@ async def extract_tables_smart(
             document_metadata=document_metadata,
             fallback_carrier_name=company.name if company else None,
             file_path=file_path,
-            pdf_text_snippet=pdf_text_snippet
+            pdf_text_snippet=pdf_text_snippet,
+            document=document
         )
         extraction_result['document_metadata'] = document_metadata
         
@@ -1172,7 +1343,7 @@ async def extract_tables_smart(
                         
                         # Also update the GCS key to move file to correct carrier folder
                         old_gcs_key = gcs_key
-                        new_gcs_key = f"statements/{carrier.id}/{file.filename}"
+                        new_gcs_key = f"statements/{carrier.id}/{filename}"
                         
                         # Move file in GCS (copy to new location and delete old)
                         from app.services.gcs_utils import copy_gcs_file, delete_gcs_file
@@ -1992,7 +2163,7 @@ async def extract_tables_smart(
                         summary_service.generate_conversational_summary(
                             extraction_data=extraction_data,
                             document_context={
-                                'file_name': file.filename,
+                                'file_name': filename,
                                 'page_count': len(extraction_result.get('tables', [])),
                                 'file_size': file_size,
                                 'extraction_method': extraction_method
@@ -2035,7 +2206,7 @@ async def extract_tables_smart(
             "success": True,
             "upload_id": str(upload_id_uuid),
             "tables": transformed_tables,  # ✅ Use transformed tables with summaryRows
-            "file_name": file.filename,
+            "file_name": filename,
             "gcs_url": gcs_url,  # CRITICAL: Include GCS URL for PDF preview
             "gcs_key": gcs_key,  # Include GCS key for reference
             "company_id": company_id,
@@ -2091,10 +2262,14 @@ async def extract_tables_smart(
         # Both review.py and auto_approval.py handle contribution recording after the
         # statement is persisted to the database.
         
+        # The job may have been requeued while this worker stalled; only the worker that
+        # still holds it publishes results
+        await extraction_job_queue.confirm_lease(job)
+        
         # Log file upload for audit
         await audit_service.log_file_upload(
             user_id=current_user.id,
-            file_name=file.filename,
+            file_name=filename,
             file_size=file_size,
             file_hash=file_hash,
             company_id=company_id,
@@ -2102,7 +2277,7 @@ async def extract_tables_smart(
         )
         
         # Clean up local file
-        os.remove(file_path)
+        remove_upload_file(file_path)
         
         # ===== AWAIT CONVERSATIONAL SUMMARY (WITH TIMEOUT) =====
         # Wait for summary generation to complete (max 5 seconds) - only if not already generated
@@ -2319,41 +2494,42 @@ async def extract_tables_smart(
         
         return client_response
         
+    except ExtractionJobLeaseLost:
+        # The worker now running the job still needs the stored file
+        raise
+    except asyncio.CancelledError:
+        # Cancelled after the extraction itself finished (saving, uploading or approving)
+        if not await cancellation_manager.is_cancelled(upload_id_str):
+            # Worker shutting down or job taken over: keep the files for the next attempt
+            raise
+        logger.info(f"🛑 Extraction cancelled while saving results: {upload_id_str}")
+        await db.rollback()
+        try:
+            await cleanup_failed_upload(db, upload_id_uuid)
+        except Exception as e:
+            logger.warning(f"Cleanup error: {e}")
+        _delete_extraction_files(gcs_key, file_path)
+        raise
     except HTTPException:
         # CRITICAL CHANGE: No DB record to cleanup anymore
         # Just clean up GCS files and local files
-        try:
-            if gcs_key:
-                from app.services.gcs_utils import delete_gcs_file
-                delete_gcs_file(gcs_key)
-                logger.info(f"🗑️ Deleted GCS file: {gcs_key}")
-        except Exception as gcs_error:
-            logger.warning(f"⚠️ Failed to delete GCS file: {gcs_error}")
-        
-        # Clean up local file on error
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"🗑️ Deleted local file: {file_path}")
+        _delete_extraction_files(gcs_key, file_path)
         raise
     except Exception as e:
         logger.error(f"❌ Smart extraction error: {str(e)}")
         
         # CRITICAL CHANGE: No DB record to cleanup anymore
         # Just clean up GCS files and local files
-        try:
-            if gcs_key:
-                from app.services.gcs_utils import delete_gcs_file
-                delete_gcs_file(gcs_key)
-                logger.info(f"🗑️ Deleted GCS file: {gcs_key}")
-        except Exception as gcs_error:
-            logger.warning(f"⚠️ Failed to delete GCS file: {gcs_error}")
-        
-        # Clean up local file on error
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"🗑️ Deleted local file: {file_path}")
+        _delete_extraction_files(gcs_key, file_path)
         
         raise HTTPException(status_code=500, detail=f"Smart extraction failed: {str(e)}")
+    finally:
+        if document is not None:
+            logger.debug(f"📄 PDF document stats for {upload_id_str}: {document.stats()}")
+            document.close()
+
+
+extraction_job_queue.register_handler(SMART_EXTRACTION_JOB, run_smart_extraction_job)
 
 
 async def cleanup_failed_upload(db: AsyncSession, upload_id: UUID):
@@ -2437,6 +2613,40 @@ async def cancel_extraction(
     """
     logger.info(f"🛑 Cancellation requested for upload {upload_id}")
     
+    # Queued extractions: cancellation is recorded on the job, so it reaches whichever
+    # worker runs it (upload_id is the client's tracking id here)
+    try:
+        job = await extraction_job_queue.request_cancel(upload_id)
+    except Exception as e:
+        logger.error(f"❌ Cancellation error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to cancel extraction: {str(e)}")
+    
+    if job is not None:
+        if job['status'] == 'queued':
+            # Never started: remove the stored files here
+            from app.services.gcs_utils import delete_gcs_file
+            payload = job['payload'] or {}
+            try:
+                if payload.get('gcs_key'):
+                    delete_gcs_file(payload['gcs_key'])
+                if payload.get('file_path'):
+                    remove_upload_file(payload['file_path'])
+            except Exception as cleanup_error:
+                logger.warning(f"⚠️ Failed to clean up files for cancelled job {job['id']}: {cleanup_error}")
+            await connection_manager.send_extraction_complete(
+                upload_id, {"status": "cancelled", "message": "Upload cancelled successfully"}
+            )
+        
+        return JSONResponse(
+            status_code=200,
+            content={
+                "success": True,
+                "message": f"Extraction cancellation requested for upload {upload_id}",
+                "upload_id": upload_id,
+                "job_id": str(job['id'])
+            }
+        )
+    
     try:
         upload_uuid = UUID(upload_id)
     except ValueError:
@@ -2503,6 +2713,32 @@ async def cancel_extraction(
         raise HTTPException(status_code=500, detail=f"Failed to cancel extraction: {str(e)}")
 
 
+@router.get("/extraction-jobs/{upload_id}")
+async def get_extraction_job_status(
+    upload_id: str,
+    current_user: User = Depends(get_current_user_hybrid),
+    db: AsyncSession = Depends(get_db)
+):
+    """Status and last recorded progress of the extraction job for an upload tracking id."""
+    job = await crud.get_extraction_job_by_upload_id(db, upload_id)
+    if job is None or job['user_id'] != current_user.id:
+        raise HTTPException(status_code=404, detail="Extraction job not found")
+    
+    return {
+        "job_id": str(job['id']),
+        "upload_id": job['upload_id'],
+        "status": job['status'],
+        "progress": job['progress'],
+        "message": job['progress_message'],
+        "error": job['error'],
+        "attempts": job['attempts'],
+        "cancel_requested": job['cancel_requested'],
+        "created_at": job['created_at'].isoformat() if job['created_at'] else None,
+        "started_at": job['started_at'].isoformat() if job['started_at'] else None,
+        "finished_at": job['finished_at'].isoformat() if job['finished_at'] else None
+    }
+
+
 @router.post("/extract-tables-gpt/")
 async def extract_tables_gpt(
     upload_id: str = Form(...),
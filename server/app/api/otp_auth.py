@@ -18,6 +18,7 @@ from app.services.otp_service import otp_service
 from app.services.jwt_service import jwt_service
 from app.utils.auth_utils import get_user_by_email, create_user_session, invalidate_session, check_session_inactivity, update_session_activity
 from app.services.audit_logging_service import AuditLoggingService
+from app.services.auth_cache import auth_cache
 
 router = APIRouter(prefix="/api/auth/otp", tags=["OTP Authentication"])
 security = HTTPBearer()
@@ -343,6 +344,7 @@ async def verify_otp(
         user.is_email_verified = 1
         user.email_domain = verification.email.split('@')[1].lower()
         await db.commit()
+        auth_cache.invalidate_user(email=user.email)
         await db.refresh(user)
         
         # Create tokens
@@ -577,6 +579,7 @@ async def logout(
         if payload:
             # Invalidate user session
             await invalidate_session(db, payload["sub"])
+            auth_cache.invalidate_user(email=payload.get("email"), user_id=payload["sub"])
     
     # Clear all authentication cookies with proper security settings
     is_production = os.getenv("ENVIRONMENT", "development") == "production"
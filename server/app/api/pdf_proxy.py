@@ -3,19 +3,33 @@ Minimal PDF Proxy for CORS-compliant PDF viewing
 Proxies GCS signed URLs through backend to avoid CORS issues
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import Response
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
 import logging
 from urllib.parse import urlparse, unquote
-from typing import Optional
+from typing import Dict, Optional
 
-from app.services.gcs_utils import GCSService, GCS_BUCKET_NAME
+from app.services.gcs_utils import GCS_BUCKET_NAME
+from app.services.gcs_async_client import async_gcs_client
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-gcs_service = GCSService()
+
+# Forwarded to GCS so it answers ranges (206) and revalidations (304) itself
+FORWARDED_REQUEST_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+FORWARDED_RESPONSE_HEADERS = ("content-length", "content-range", "content-encoding", "accept-ranges", "etag", "last-modified")
+# Statuses that mean the object was found (full body, partial body, not modified, bad range)
+PASSTHROUGH_STATUSES = (200, 206, 304, 416)
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization, Range, If-None-Match, If-Range",
+    # PDF viewers need these to detect range support and fetch pages lazily
+    "Access-Control-Expose-Headers": "Accept-Ranges, Content-Range, Content-Length, ETag",
+}
 
 
 def _extract_gcs_key_from_url(url: str) -> Optional[str]:
@@ -34,78 +48,95 @@ def _extract_gcs_key_from_url(url: str) -> Optional[str]:
         return None
 
 
-async def _fetch_directly_from_gcs(url: str) -> Optional[bytes]:
+async def _fetch_directly_from_gcs(url: str, headers: Dict[str, str], method: str) -> Optional[httpx.Response]:
     """
     Fallback when signed URL fetch fails (due to expiration or signature issues).
-    Downloads the PDF using the service account credentials directly from GCS.
+    Streams the PDF using the service account credentials directly from GCS.
     """
-    if not gcs_service.is_available():
-        logger.warning("GCS service unavailable - cannot perform fallback download")
-        return None
-    
     gcs_key = _extract_gcs_key_from_url(url)
     if not gcs_key:
         logger.warning("Unable to derive GCS key from URL for fallback download")
         return None
     
     logger.info(f"🔁 Falling back to direct GCS download for: {gcs_key}")
-    return await run_in_threadpool(gcs_service.download_file_bytes, gcs_key)
+    response = await async_gcs_client.open_object(gcs_key, headers, method)
+    if response is None:
+        logger.warning("GCS service unavailable - cannot perform fallback download")
+        return None
+    if response.status_code not in PASSTHROUGH_STATUSES:
+        logger.error(f"❌ Direct GCS download failed: HTTP {response.status_code}")
+        await response.aclose()
+        return None
+    return response
 
 
-def _build_pdf_response(content: bytes) -> Response:
-    return Response(
-        content=content,
+def _build_pdf_response(upstream: httpx.Response) -> StreamingResponse:
+    """Stream the upstream body through (constant memory), closing it when done."""
+    headers = {
+        **CORS_HEADERS,
+        "Content-Disposition": "inline; filename=\"document.pdf\"",
+        "Cache-Control": "public, max-age=3600",
+    }
+    for name in FORWARDED_RESPONSE_HEADERS:
+        if name in upstream.headers:
+            headers[name] = upstream.headers[name]
+    headers.setdefault("accept-ranges", "bytes")
+    
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
         media_type="application/pdf",
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
-            "Content-Disposition": "inline; filename=\"document.pdf\"",
-            "Cache-Control": "public, max-age=3600",
-        }
+        headers=headers,
+        background=BackgroundTask(upstream.aclose)
     )
 
-@router.get("/pdf-proxy")
-async def proxy_pdf(url: str = Query(..., description="GCS signed URL to proxy")):
+@router.api_route("/pdf-proxy", methods=["GET", "HEAD"])
+async def proxy_pdf(request: Request, url: str = Query(..., description="GCS signed URL to proxy")):
     """
-    Simple proxy that fetches PDF from GCS signed URL and returns it with CORS headers.
+    Streaming proxy for PDFs behind GCS signed URLs, returned with CORS headers.
     This avoids browser CORS restrictions when loading PDFs directly from GCS.
+    Range and If-None-Match are passed through, so viewers can load pages on demand
+    and revalidate with the ETag.
     """
+    if not url or not url.strip():
+        raise HTTPException(status_code=400, detail="Missing or invalid url parameter")
+    
+    # Validate it's a GCS URL
+    if "storage.googleapis.com" not in url:
+        raise HTTPException(status_code=400, detail="Invalid URL: must be a Google Cloud Storage URL")
+    
+    logger.info(f"🔄 Proxying PDF from: {url[:100]}...")
+    forwarded = {name: request.headers[name] for name in FORWARDED_REQUEST_HEADERS if name in request.headers}
+    
     try:
-        if not url or not url.strip():
-            raise HTTPException(status_code=400, detail="Missing or invalid url parameter")
+        # Fetch PDF from GCS signed URL (pooled connection, streamed)
+        upstream = await async_gcs_client.open_url(url, forwarded, request.method)
+        if upstream.status_code in PASSTHROUGH_STATUSES:
+            return _build_pdf_response(upstream)
         
-        # Validate it's a GCS URL
-        if "storage.googleapis.com" not in url:
-            raise HTTPException(status_code=400, detail="Invalid URL: must be a Google Cloud Storage URL")
+        logger.error(f"❌ Failed to fetch PDF via signed URL: HTTP {upstream.status_code}")
+        await upstream.aclose()
         
-        logger.info(f"🔄 Proxying PDF from: {url[:100]}...")
+        fallback = await _fetch_directly_from_gcs(url, forwarded, request.method)
+        if fallback is not None:
+            return _build_pdf_response(fallback)
         
-        # Fetch PDF from GCS signed URL
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.get(url)
-            
-            if response.status_code == 200:
-                return _build_pdf_response(response.content)
-            
-            logger.error(f"❌ Failed to fetch PDF via signed URL: HTTP {response.status_code}")
-            
-            fallback_bytes = await _fetch_directly_from_gcs(url)
-            if fallback_bytes:
-                return _build_pdf_response(fallback_bytes)
-            
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Failed to fetch PDF from storage: {response.status_code}"
-            )
+        raise HTTPException(
+            status_code=upstream.status_code,
+            detail=f"Failed to fetch PDF from storage: {upstream.status_code}"
+        )
             
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"❌ PDF proxy error: {e}")
-        fallback_bytes = await _fetch_directly_from_gcs(url)
-        if fallback_bytes:
-            return _build_pdf_response(fallback_bytes)
+        try:
+            fallback = await _fetch_directly_from_gcs(url, forwarded, request.method)
+        except Exception as fallback_error:
+            logger.error(f"❌ Direct GCS fallback failed: {fallback_error}")
+            fallback = None
+        if fallback is not None:
+            return _build_pdf_response(fallback)
         raise HTTPException(status_code=500, detail=f"Failed to proxy PDF: {str(e)}")
 
 @router.options("/pdf-proxy")
@@ -113,9 +144,7 @@ async def pdf_proxy_options():
     """CORS preflight handler"""
     return Response(
         headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
+            **CORS_HEADERS,
             "Access-Control-Max-Age": "86400",
         }
     )
@@ -58,6 +58,7 @@ async def get_statements_for_company(
             )
         )
         .order_by(StatementUpload.uploaded_at.desc())
+        .options(crud.with_payload_kinds('raw_data', 'edited_tables', 'final_data'))
     )
     statements_with_users = result.all()
     
@@ -14,6 +14,7 @@ from app.db import crud, schemas
 from app.config import get_db
 from app.utils.db_retry import with_db_retry
 from app.services.format_learning_service import FormatLearningService
+from app.services.export_service import export_response, aiter_rows, EXPORT_FORMATS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -426,29 +427,22 @@ async def delete_tables(upload_id: str, db: AsyncSession = Depends(get_db)):
 async def export_tables(upload_id: str, format: str = "csv", db: AsyncSession = Depends(get_db)):
     """
     Export edited tables in various formats.
+    CSV and XLSX are streamed as file downloads (one worksheet per table for XLSX).
     """
     try:
         logger.info(f"Exporting tables for upload_id: {upload_id} in format: {format}")
         
         tables = await get_edited_tables(db, upload_id)
         
-        if format.lower() == "csv":
-            # Generate CSV content
-            csv_content = ""
-            if tables:
-                for table in tables:
-                    csv_content += f"Table: {table.get('name', 'Unnamed Table')}\n"
-                    csv_content += ",".join(table.get('header', [])) + "\n"
-                    for row in table.get('rows', []):
-                        csv_content += ",".join([f'"{cell}"' for cell in row]) + "\n"
-                    csv_content += "\n"
-            
-            return JSONResponse({
-                "success": True,
-                "format": "csv",
-                "content": csv_content,
-                "filename": f"edited_tables_{upload_id}.csv"
-            })
+        if format.lower() in EXPORT_FORMATS:
+            sheets = [
+                (
+                    table.get('name') or 'Unnamed Table',
+                    aiter_rows([table.get('header', []), *table.get('rows', [])])
+                )
+                for table in tables or []
+            ]
+            return export_response(sheets, format, f"edited_tables_{upload_id}")
         
         elif format.lower() == "json":
             # Generate JSON content
@@ -472,6 +466,8 @@ async def export_tables(upload_id: str, format: str = "csv", db: AsyncSession =
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error exporting tables: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to export tables: {str(e)}")
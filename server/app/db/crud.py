@@ -39,6 +39,7 @@ __all__ = [
     # Carrier format learning operations
     'save_carrier_format_learning', 'get_carrier_format_by_signature',
     'get_carrier_formats_for_company', 'find_best_matching_format',
+    'find_best_matching_format_sync', 'invalidate_format_index',
     'calculate_header_similarity', 'calculate_structure_similarity',
     
     # Summary row patterns operations
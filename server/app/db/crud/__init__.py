@@ -21,6 +21,12 @@ from .company_mapping import (
 )
 
 from .statement_upload import (
+    with_payloads,
+    without_payloads,
+    refresh_upload,
+    with_payload_kinds,
+    get_statement_payload,
+    save_statement_payload,
     save_statement_upload,
     create_statement_upload,
     update_statement_upload,
@@ -35,6 +41,11 @@ from .statement_upload import (
     get_all_statement_reviews,
     get_statements_for_company,
     get_statements_for_carrier,
+    carrier_key_column,
+    get_carrier_statement_counts,
+    list_statements_page,
+    encode_statement_cursor,
+    decode_statement_cursor,
     get_statement_by_id,
     delete_statement,
     save_edited_tables,
@@ -75,6 +86,8 @@ from .carrier_format_learning import (
     get_carrier_format_by_signature,
     get_carrier_formats_for_company,
     find_best_matching_format,
+    find_best_matching_format_sync,
+    invalidate_format_index,
     calculate_header_similarity,
     calculate_structure_similarity
 )
@@ -94,6 +107,8 @@ from .earned_commission import (
     get_earned_commissions_by_carrier,
     get_all_earned_commissions,
     get_earned_commissions_by_carriers,
+    stream_earned_commissions_for_export,
+    EARNED_COMMISSION_EXPORT_COLUMNS,
     get_commission_record,
     recalculate_commission_totals,
     extract_commission_data_from_statement,
@@ -104,6 +119,41 @@ from .earned_commission import (
     parse_currency_amount
 )
 
+from .commission_ledger import (
+    get_upload_contributions,
+    get_upload_contribution_cells,
+    save_upload_contributions,
+    remove_upload_contributions,
+    move_contributions,
+    commission_key,
+    get_contribution_totals,
+    backfill_commission_ledger
+)
+from .dashboard_aggregates import (
+    refresh_dashboard_scope,
+    refresh_dashboard_aggregates,
+    dashboard_cells_by_user,
+    refresh_dashboard_for_users,
+    resolve_dashboard_scope,
+    schedule_dashboard_refresh,
+    schedule_global_dashboard_refresh,
+    get_dashboard_aggregate
+)
+from .extraction_cache import (
+    get_cached_extraction,
+    save_cached_extraction,
+    evict_extraction_cache
+)
+from .extraction_jobs import (
+    enqueue_extraction_job,
+    claim_extraction_job,
+    heartbeat_extraction_job,
+    finish_extraction_job,
+    request_extraction_job_cancel,
+    get_extraction_job_by_upload_id,
+    requeue_stale_extraction_jobs
+)
+
 # Export all functions
 __all__ = [
     # Company operations
@@ -116,11 +166,13 @@ __all__ = [
     'get_company_mappings', 'save_company_mapping_config',
     
     # Statement upload operations
+    'with_payloads', 'without_payloads', 'with_payload_kinds', 'refresh_upload', 'get_statement_payload', 'save_statement_payload',
     'save_statement_upload', 'create_statement_upload', 'update_statement_upload',
     'get_pending_files_for_company', 'get_pending_files_for_company_by_user', 'get_statement_upload_by_id', 'save_progress_data',
     'get_progress_data', 'resume_upload_session', 'delete_pending_upload',
     'save_statement_review', 'get_all_statement_reviews', 'get_statements_for_company',
-    'get_statements_for_carrier', 'get_statement_by_id', 'delete_statement', 'save_edited_tables', 'get_edited_tables',
+    'get_statements_for_carrier', 'carrier_key_column', 'get_carrier_statement_counts',
+    'list_statements_page', 'encode_statement_cursor', 'decode_statement_cursor', 'get_statement_by_id', 'delete_statement', 'save_edited_tables', 'get_edited_tables',
     'update_upload_tables', 'delete_edited_tables', 'get_upload_by_id', 'get_progress_summary',
     'get_statement_by_file_hash_and_status',  # ✅ ORPHAN FIX: Export new duplicate check function
     
@@ -140,6 +192,7 @@ __all__ = [
     # Carrier format learning operations
     'save_carrier_format_learning', 'get_carrier_format_by_signature',
     'get_carrier_formats_for_company', 'find_best_matching_format',
+    'find_best_matching_format_sync', 'invalidate_format_index',
     'calculate_header_similarity', 'calculate_structure_similarity',
     
     # Summary row patterns operations
@@ -149,8 +202,27 @@ __all__ = [
     # Earned commission operations
     'create_earned_commission', 'get_earned_commission_by_carrier_and_client',
     'update_earned_commission', 'upsert_earned_commission', 'get_earned_commissions_by_carrier',
-    'get_all_earned_commissions', 'get_earned_commissions_by_carriers', 'get_commission_record', 'recalculate_commission_totals',
+    'get_all_earned_commissions', 'get_earned_commissions_by_carriers', 'stream_earned_commissions_for_export',
+    'EARNED_COMMISSION_EXPORT_COLUMNS', 'get_commission_record', 'recalculate_commission_totals',
     'extract_commission_data_from_statement', 'remove_upload_from_earned_commissions',
     'create_commission_record', 'update_commission_record', 'process_commission_data_from_statement',
-    'parse_currency_amount'
+    'parse_currency_amount',
+    
+    # Commission contribution ledger operations
+    'get_upload_contributions', 'get_upload_contribution_cells', 'save_upload_contributions', 'remove_upload_contributions',
+    'move_contributions', 'commission_key',
+    'get_contribution_totals', 'backfill_commission_ledger',
+    
+    # Dashboard aggregate operations
+    'refresh_dashboard_scope', 'refresh_dashboard_aggregates', 'dashboard_cells_by_user',
+    'refresh_dashboard_for_users', 'resolve_dashboard_scope',
+    'schedule_dashboard_refresh', 'schedule_global_dashboard_refresh', 'get_dashboard_aggregate',
+    
+    # Extraction result cache operations
+    'get_cached_extraction', 'save_cached_extraction', 'evict_extraction_cache',
+    
+    # Extraction job queue operations
+    'enqueue_extraction_job', 'claim_extraction_job', 'heartbeat_extraction_job',
+    'finish_extraction_job', 'request_extraction_job_cancel', 'get_extraction_job_by_upload_id',
+    'requeue_stale_extraction_jobs'
 ]
@@ -1,14 +1,19 @@
 from ..models import CarrierFormatLearning
 from ..schemas import CarrierFormatLearningCreate, CarrierFormatLearningUpdate
+from sqlalchemy import func
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime
+from functools import lru_cache
 from uuid import UUID
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
 from app.constants.statuses import VALID_PERSISTENT_STATUSES, is_valid_persistent_status
 import re
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +80,7 @@ async def save_carrier_format_learning(db: AsyncSession, format_learning: Carrie
             existing_format.table_editor_settings = format_learning.table_editor_settings
         
         await db.commit()
+        invalidate_format_index(format_learning.company_id)
         await db.refresh(existing_format)
         return existing_format
     else:
@@ -99,6 +105,7 @@ async def save_carrier_format_learning(db: AsyncSession, format_learning: Carrie
         )
         db.add(new_format)
         await db.commit()
+        invalidate_format_index(format_learning.company_id)
         await db.refresh(new_format)
         return new_format
 
@@ -124,6 +131,161 @@ async def get_carrier_formats_for_company(db: AsyncSession, company_id: UUID):
     )
     return result.scalars().all()
 
+class FormatIndex:
+    """
+    Header index over a company's saved formats, for find_best_matching_format.
+
+    Each format's headers are normalized once. Formats are found through an inverted index
+    from normalized header to the formats containing it. Formats with no header in common
+    with the query can't reach the 0.5 match threshold, so they are never scored. The others
+    are ranked by an upper bound on their score: exact header matches count fully and
+    every header left over counts as a fuzzy match. SequenceMatcher scoring runs in that
+    order and stops once no remaining bound can beat the best score, so the result is the
+    same as scoring every format.
+    """
+
+    def __init__(self, rows, stamp=None):
+        # rows: (id, headers, table_structure), in the order ties are broken (last used first)
+        self.stamp = stamp
+        self.ids = []
+        self.normalized: List[List[str]] = []
+        self.structures: List[dict] = []
+        self.by_headers: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for idx, (format_id, headers, table_structure) in enumerate(rows):
+            normalized = _normalize_headers(headers)
+            self.ids.append(format_id)
+            self.normalized.append(normalized)
+            self.structures.append(table_structure)
+            if normalized:
+                self.by_headers[tuple(sorted(normalized))].append(idx)
+            for header, count in Counter(normalized).items():
+                self.postings[header].append((idx, count))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, headers: List[str], table_structure: dict) -> Tuple[Optional[int], float, int]:
+        """Best matching format as (index, score, formats scored); index is None if none scores above 0.5."""
+        query = _normalize_headers(headers)
+        if not query:
+            return None, 0, 0
+
+        best_idx, best_score, scored = None, 0, 0
+
+        def consider(idx, structure_similarity):
+            nonlocal best_idx, best_score, scored
+            header_similarity = _normalized_header_similarity(query, self.normalized[idx])
+            total_score = (header_similarity * 0.8) + (structure_similarity * 0.2)
+            scored += 1
+            # Ties go to the format listed first, as in a linear scan
+            if total_score > 0.5 and (total_score > best_score or (total_score == best_score and idx < best_idx)):
+                best_idx, best_score = idx, total_score
+
+        # Formats with the same normalized headers reach the highest header score; score them first
+        exact = self.by_headers.get(tuple(sorted(query)), [])
+        for idx in exact:
+            consider(idx, calculate_structure_similarity(table_structure, self.structures[idx]))
+
+        shared = defaultdict(int)
+        for header, count in Counter(query).items():
+            for idx, saved_count in self.postings.get(header, ()):
+                shared[idx] += min(count, saved_count)
+
+        candidates = []
+        exact_set = set(exact)
+        for idx, exact_matches in shared.items():
+            if idx in exact_set:
+                continue
+            saved_length = len(self.normalized[idx])
+            total_headers = max(len(query), saved_length)
+            fuzzy_matches = min(len(query), saved_length - exact_matches)
+            header_bound = (exact_matches / total_headers * 0.8) + (fuzzy_matches / total_headers * 0.2)
+            structure_similarity = calculate_structure_similarity(table_structure, self.structures[idx])
+            bound = (header_bound * 0.8) + (structure_similarity * 0.2)
+            if bound > 0.5:
+                candidates.append((-bound, idx, structure_similarity))
+
+        candidates.sort()
+        for negative_bound, idx, structure_similarity in candidates:
+            if -negative_bound < best_score:
+                break
+            consider(idx, structure_similarity)
+
+        return best_idx, best_score, scored
+
+
+_FORMAT_INDEX_CACHE_SIZE = 256
+_format_indexes: "OrderedDict[str, FormatIndex]" = OrderedDict()
+_format_indexes_lock = threading.Lock()
+
+
+def invalidate_format_index(company_id=None) -> None:
+    """Drop the cached format index of a company, or of every company."""
+    with _format_indexes_lock:
+        if company_id is None:
+            _format_indexes.clear()
+        else:
+            _format_indexes.pop(str(company_id), None)
+
+
+def _format_index_stamp_query(company_id):
+    # Formats are also written outside this module (company merges, field mapping), and by
+    # other workers, so cached indexes are checked against this on every lookup
+    return select(
+        func.count(CarrierFormatLearning.id),
+        func.max(CarrierFormatLearning.updated_at),
+        func.max(CarrierFormatLearning.last_used)
+    ).where(CarrierFormatLearning.company_id == company_id)
+
+
+def _format_index_rows_query(company_id):
+    return (
+        select(CarrierFormatLearning.id, CarrierFormatLearning.headers, CarrierFormatLearning.table_structure)
+        .where(CarrierFormatLearning.company_id == company_id)
+        .order_by(CarrierFormatLearning.last_used.desc())
+    )
+
+
+def _cached_format_index(company_id, stamp) -> Optional[FormatIndex]:
+    with _format_indexes_lock:
+        index = _format_indexes.get(str(company_id))
+        if index is None or index.stamp != stamp:
+            return None
+        _format_indexes.move_to_end(str(company_id))
+        return index
+
+
+def _cache_format_index(company_id, index: FormatIndex) -> None:
+    with _format_indexes_lock:
+        _format_indexes[str(company_id)] = index
+        _format_indexes.move_to_end(str(company_id))
+        while len(_format_indexes) > _FORMAT_INDEX_CACHE_SIZE:
+            _format_indexes.popitem(last=False)
+
+
+async def get_format_index(db: AsyncSession, company_id: UUID) -> FormatIndex:
+    """Format index of a company, rebuilt only when its saved formats changed."""
+    stamp = tuple((await db.execute(_format_index_stamp_query(company_id))).one())
+    index = _cached_format_index(company_id, stamp)
+    if index is None:
+        rows = (await db.execute(_format_index_rows_query(company_id))).all()
+        index = FormatIndex(rows, stamp)
+        _cache_format_index(company_id, index)
+    return index
+
+
+def get_format_index_sync(db: Session, company_id: UUID) -> FormatIndex:
+    """get_format_index for synchronous sessions."""
+    stamp = tuple(db.execute(_format_index_stamp_query(company_id)).one())
+    index = _cached_format_index(company_id, stamp)
+    if index is None:
+        rows = db.execute(_format_index_rows_query(company_id)).all()
+        index = FormatIndex(rows, stamp)
+        _cache_format_index(company_id, index)
+    return index
+
+
 async def find_best_matching_format(db: AsyncSession, company_id: UUID, headers: List[str], table_structure: dict):
     """
     Find the best matching format for given headers and structure with improved matching logic.
@@ -132,33 +294,36 @@ async def find_best_matching_format(db: AsyncSession, company_id: UUID, headers:
     print(f"🎯 CRUD: Input headers: {headers}")
     print(f"🎯 CRUD: Input table structure: {table_structure}")
     
-    # Get all formats for this company
-    formats = await get_carrier_formats_for_company(db, company_id)
-    print(f"🎯 CRUD: Found {len(formats)} saved formats for company")
+    index = await get_format_index(db, company_id)
+    best_idx, best_score, scored = index.search(headers, table_structure)
+    print(f"🎯 CRUD: Scored {scored} of {len(index)} saved formats for company")
     
-    best_match = None
-    best_score = 0
+    if best_idx is None:
+        return None, 0
     
-    for format_record in formats:
-        # Calculate similarity score using improved logic
-        header_similarity = calculate_header_similarity(headers, format_record.headers)
-        structure_similarity = calculate_structure_similarity(table_structure, format_record.table_structure)
-        
-        # Combined score (weighted average) - header similarity is more important
-        total_score = (header_similarity * 0.8) + (structure_similarity * 0.2)
-        
-        print(f"🎯 CRUD: Comparing with saved format:")
-        print(f"🎯 CRUD:   Saved headers: {format_record.headers}")
-        print(f"🎯 CRUD:   Header similarity: {header_similarity}")
-        print(f"🎯 CRUD:   Structure similarity: {structure_similarity}")
-        print(f"🎯 CRUD:   Total score: {total_score}")
-        
-        # Lower threshold for better matching - 0.5 instead of 0.6
-        if total_score > best_score and total_score > 0.5:  # Even more flexible threshold
-            best_score = total_score
-            best_match = format_record
-            print(f"🎯 CRUD:   -> New best match with score {total_score}")
+    best_match = await db.get(CarrierFormatLearning, index.ids[best_idx])
+    if best_match is None:
+        # Deleted since the index was built
+        invalidate_format_index(company_id)
+        return None, 0
+    print(f"🎯 CRUD:   -> Best match with score {best_score}")
+    return best_match, best_score
+
+def find_best_matching_format_sync(db: Session, company_id: UUID, headers: List[str], table_structure: dict):
+    """
+    find_best_matching_format for synchronous sessions.
+    """
+    index = get_format_index_sync(db, company_id)
+    best_idx, best_score, scored = index.search(headers, table_structure)
+    print(f"🎯 CRUD: Scored {scored} of {len(index)} saved formats for company {company_id}")
+    
+    if best_idx is None:
+        return None, 0
     
+    best_match = db.get(CarrierFormatLearning, index.ids[best_idx])
+    if best_match is None:
+        invalidate_format_index(company_id)
+        return None, 0
     return best_match, best_score
 
 def calculate_header_similarity(headers1: List[str], headers2: List[str]) -> float:
@@ -168,10 +333,18 @@ def calculate_header_similarity(headers1: List[str], headers2: List[str]) -> flo
     if not headers1 or not headers2:
         return 0.0
     
-    # Normalize headers
-    headers1_normalized = [_normalize_header(h) for h in headers1 if h]
-    headers2_normalized = [_normalize_header(h) for h in headers2 if h]
-    
+    return _normalized_header_similarity(_normalize_headers(headers1), _normalize_headers(headers2))
+
+def _normalize_headers(headers: List[str]) -> List[str]:
+    """Normalized form of the non-empty headers."""
+    if not headers:
+        return []
+    return [_normalize_header(h) for h in headers if h]
+
+def _normalized_header_similarity(headers1_normalized: List[str], headers2_normalized: List[str]) -> float:
+    """
+    calculate_header_similarity for headers already normalized with _normalize_headers.
+    """
     if not headers1_normalized or not headers2_normalized:
         return 0.0
     
@@ -217,6 +390,44 @@ def calculate_header_similarity(headers1: List[str], headers2: List[str]) -> flo
     
     return total_score
 
+# Semantic synonyms: headers that mean the same thing are given the same word
+_HEADER_SYNONYMS = {
+    'group': 'company',
+    'company': 'company',
+    'client': 'company',
+    'organization': 'company',
+    'account': 'account',
+    'policy': 'policy',
+    'plan': 'policy',
+    'premium': 'premium',
+    'commission': 'commission',
+    'earned': 'commission',
+    'payment': 'payment',
+    'paid': 'payment',
+    'amount': 'amount',
+    'total': 'total',
+    'invoice': 'invoice',
+    'billing': 'billing',
+    'period': 'period',
+    'date': 'date',
+    'number': 'number',
+    'no': 'number',
+    'name': 'name',
+    'rate': 'rate',
+    'method': 'method',
+    'calculation': 'calculation',
+    'census': 'census',
+    'subscribers': 'subscribers',
+    'stoploss': 'stoploss',
+    'adjustment': 'adjustment',
+    'adj': 'adjustment'
+}
+_HEADER_SYNONYM_PATTERNS = [
+    (re.compile(r'\b' + re.escape(synonym) + r'\b'), replacement)
+    for synonym, replacement in _HEADER_SYNONYMS.items()
+]
+
+@lru_cache(maxsize=4096)
 def _normalize_header(header: str) -> str:
     """
     Normalize a header string for better matching.
@@ -228,42 +439,8 @@ def _normalize_header(header: str) -> str:
     normalized = header.lower().strip()
     
     # Handle semantic synonyms before removing prefixes/suffixes
-    # Replace common synonyms that mean the same thing
-    synonyms = {
-        'group': 'company',
-        'company': 'company',
-        'client': 'company',
-        'organization': 'company',
-        'account': 'account',
-        'policy': 'policy',
-        'plan': 'policy',
-        'premium': 'premium',
-        'commission': 'commission',
-        'earned': 'commission',
-        'payment': 'payment',
-        'paid': 'payment',
-        'amount': 'amount',
-        'total': 'total',
-        'invoice': 'invoice',
-        'billing': 'billing',
-        'period': 'period',
-        'date': 'date',
-        'number': 'number',
-        'no': 'number',
-        'name': 'name',
-        'rate': 'rate',
-        'method': 'method',
-        'calculation': 'calculation',
-        'census': 'census',
-        'subscribers': 'subscribers',
-        'stoploss': 'stoploss',
-        'adjustment': 'adjustment',
-        'adj': 'adjustment'
-    }
-    
-    # Apply synonyms
-    for synonym, replacement in synonyms.items():
-        normalized = re.sub(r'\b' + re.escape(synonym) + r'\b', replacement, normalized)
+    for pattern, replacement in _HEADER_SYNONYM_PATTERNS:
+        normalized = pattern.sub(replacement, normalized)
     
     # Remove punctuation and extra spaces
     normalized = re.sub(r'[^\w\s]', '', normalized)
@@ -343,6 +520,7 @@ async def update_carrier_format_learning(
             if hasattr(record, key):
                 setattr(record, key, value)
         await db.commit()
+        invalidate_format_index(company_id)
         await db.refresh(record)
     
     return record
@@ -361,6 +539,7 @@ async def delete_all_carrier_format_learnings(db: AsyncSession) -> int:
         await db.delete(record)
     
     await db.commit()
+    invalidate_format_index()
     return count
 
 
@@ -379,4 +558,5 @@ async def delete_carrier_format_learnings_by_company(db: AsyncSession, company_i
         await db.delete(record)
     
     await db.commit()
+    invalidate_format_index(company_id)
     return count
@@ -0,0 +1,354 @@
+"""
+Per-upload commission contribution ledger.
+
+Every approved statement records one row per (upload, client, month) with the invoice and
+commission amounts it added to earned_commissions. Removing or re-approving an upload then
+becomes a signed delta on the affected rollup records instead of reloading and re-scanning
+the final_data JSON of every contributing statement.
+"""
+from ..models import CommissionContribution, EarnedCommission, StatementUpload as StatementUploadModel
+from .earned_commission import collect_commission_records, MONTH_COLUMNS
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, delete, insert, func, exists, cast
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+from typing import Optional, List, Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _to_uuid(value) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+def _to_decimal(value) -> Decimal:
+    if value is None:
+        return Decimal('0')
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def aggregate_contributions(commission_records: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+    """
+    Collapse per-row commission records into one contribution per earned_commissions key.
+
+    Key: (carrier_id, client_name, statement_month, statement_year, user_id, environment_id),
+    the same key prepare_bulk_operations aggregates on.
+    """
+    contributions = {}
+    for record in commission_records:
+        key = (
+            record['carrier_id'], record['client_name'], record['statement_month'],
+            record['statement_year'], record.get('user_id'), record.get('environment_id')
+        )
+        entry = contributions.get(key)
+        if entry is None:
+            entry = contributions[key] = {
+                'carrier_id': record['carrier_id'],
+                'client_name': record['client_name'],
+                'statement_month': record['statement_month'],
+                'statement_year': record['statement_year'],
+                'user_id': record.get('user_id'),
+                'environment_id': record.get('environment_id'),
+                'invoice_total': Decimal('0'),
+                'commission_earned': Decimal('0')
+            }
+        entry['invoice_total'] += _to_decimal(record['invoice_total'])
+        entry['commission_earned'] += _to_decimal(record['commission_earned'])
+    return contributions
+
+
+async def get_upload_contributions(db: AsyncSession, upload_id: str) -> List[CommissionContribution]:
+    """Get all ledger rows recorded for an upload."""
+    result = await db.execute(
+        select(CommissionContribution).where(CommissionContribution.upload_id == _to_uuid(upload_id))
+    )
+    return result.scalars().all()
+
+
+async def get_upload_contribution_cells(db: AsyncSession, upload_id: str) -> List[tuple]:
+    """Distinct (environment_id, carrier_id, statement_year) an upload contributed to, for the dashboard refresh."""
+    result = await db.execute(
+        select(
+            CommissionContribution.environment_id, CommissionContribution.carrier_id, CommissionContribution.statement_year
+        ).where(CommissionContribution.upload_id == _to_uuid(upload_id)).distinct()
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def save_upload_contributions(db: AsyncSession, upload_id: str, commission_records: List[Dict[str, Any]]) -> int:
+    """
+    Replace the ledger rows of an upload with the aggregated contributions of commission_records.
+
+    Does not commit - runs inside the caller's transaction together with the rollup writes.
+    """
+    upload_uuid = _to_uuid(upload_id)
+    await db.execute(delete(CommissionContribution).where(CommissionContribution.upload_id == upload_uuid))
+
+    contributions = aggregate_contributions(commission_records)
+    if not contributions:
+        return 0
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'upload_id': upload_uuid,
+            **contribution,
+            'created_at': now
+        }
+        for contribution in contributions.values()
+    ]
+    await db.execute(insert(CommissionContribution), rows)
+    print(f"📒 LEDGER: Recorded {len(rows)} contributions for upload {upload_id}")
+    return len(rows)
+
+
+def _record_key(record) -> tuple:
+    return (
+        record.carrier_id, record.client_name, record.statement_month,
+        record.statement_year, record.user_id, record.environment_id
+    )
+
+
+def _contribution_matches(contribution: CommissionContribution, commission: EarnedCommission) -> bool:
+    """Same key semantics as fetch_existing_commission_records_bulk: a NULL environment matches any."""
+    return (
+        (contribution.carrier_id, contribution.client_name, contribution.statement_month,
+         contribution.statement_year, contribution.user_id)
+        == (commission.carrier_id, commission.client_name, commission.statement_month,
+            commission.statement_year, commission.user_id)
+        and (contribution.environment_id is None or contribution.user_id is None
+             or contribution.environment_id == commission.environment_id)
+    )
+
+
+async def remove_upload_contributions(db: AsyncSession, upload_id: str, dashboard_cells: Optional[set] = None) -> int:
+    """
+    Subtract an upload's recorded contributions from earned_commissions and drop its ledger rows.
+
+    The records are found by upload_ids, like the legacy path. A record whose key no longer
+    matches any contribution (renamed or merged before the ledger followed such edits) has
+    the upload removed and its totals recalculated the legacy way. Records left without any
+    contributing upload are deleted. The (environment_id, carrier_id, statement_year) cell
+    of every changed record is added to dashboard_cells when given.
+
+    Returns the number of contributions applied as a delta. An upload without ledger rows
+    (approved before the ledger existed) is left alone and returns 0; callers check
+    get_upload_contribution_cells first and use the legacy path for it. Does not commit.
+    """
+    from .earned_commission import recalculate_commission_totals
+
+    contributions = await get_upload_contributions(db, upload_id)
+    if not contributions:
+        return 0
+
+    upload_id = str(upload_id)
+    result = await db.execute(
+        select(EarnedCommission).where(cast(EarnedCommission.upload_ids, JSONB).contains([upload_id]))
+    )
+    records = result.scalars().all()
+
+    now = datetime.utcnow()
+    applied_count = 0
+    deleted_count = 0
+    for commission in records:
+        if dashboard_cells is not None:
+            dashboard_cells.add((commission.environment_id, commission.carrier_id, commission.statement_year))
+
+        remaining_upload_ids = [uid for uid in (commission.upload_ids or []) if uid != upload_id]
+        matched = [c for c in contributions if _contribution_matches(c, commission)]
+        applied_count += len(matched)
+        if not remaining_upload_ids:
+            await db.delete(commission)
+            deleted_count += 1
+            continue
+
+        # Reassign (not mutate) upload_ids so the JSON column change is detected
+        commission.upload_ids = remaining_upload_ids
+        if not matched:
+            print(f"📒 LEDGER: No contribution of upload {upload_id} matches {commission.client_name} - recalculating")
+            await recalculate_commission_totals(db, commission)
+            continue
+
+        invoice_delta = sum((_to_decimal(c.invoice_total) for c in matched), Decimal('0'))
+        commission_delta = sum((_to_decimal(c.commission_earned) for c in matched), Decimal('0'))
+
+        commission.invoice_total = _to_decimal(commission.invoice_total) - invoice_delta
+        commission.commission_earned = _to_decimal(commission.commission_earned) - commission_delta
+        commission.statement_count = max(0, (commission.statement_count or 0) - 1)
+
+        month_column = MONTH_COLUMNS.get(commission.statement_month)
+        if month_column:
+            setattr(commission, month_column, _to_decimal(getattr(commission, month_column)) - commission_delta)
+
+        commission.last_updated = now
+
+    await db.execute(delete(CommissionContribution).where(CommissionContribution.upload_id == _to_uuid(upload_id)))
+
+    print(
+        f"📒 LEDGER: Reverted {applied_count} of {len(contributions)} contributions of upload {upload_id} "
+        f"across {len(records)} records ({deleted_count} records emptied and deleted)"
+    )
+    return applied_count
+
+
+async def move_contributions(db: AsyncSession, source: EarnedCommission, target_key: Dict[str, Any]) -> int:
+    """
+    Re-key the ledger rows behind source to target_key (the key columns of earned_commissions),
+    when the record is renamed or merged into another one, so removing an upload later still
+    finds its contribution. A row of an upload that already contributed to target_key is
+    summed into that row. Call before changing source. Does not commit.
+    """
+    upload_ids = []
+    for upload_id in source.upload_ids or []:
+        try:
+            upload_ids.append(_to_uuid(upload_id))
+        except ValueError:
+            continue
+    if not upload_ids:
+        return 0
+
+    result = await db.execute(select(CommissionContribution).where(CommissionContribution.upload_id.in_(upload_ids)))
+    ledger_rows = result.scalars().all()
+    source_rows = [row for row in ledger_rows if _contribution_matches(row, source)]
+    unique_key = ('carrier_id', 'client_name', 'statement_month', 'statement_year')
+    target_rows = {
+        row.upload_id: row for row in ledger_rows
+        if row not in source_rows and all(getattr(row, column) == target_key[column] for column in unique_key)
+    }
+
+    for row in source_rows:
+        existing = target_rows.get(row.upload_id)
+        if existing is not None:
+            existing.invoice_total = _to_decimal(existing.invoice_total) + _to_decimal(row.invoice_total)
+            existing.commission_earned = _to_decimal(existing.commission_earned) + _to_decimal(row.commission_earned)
+            await db.delete(row)
+        else:
+            for column, value in target_key.items():
+                setattr(row, column, value)
+    return len(source_rows)
+
+
+def commission_key(commission: EarnedCommission) -> Dict[str, Any]:
+    """Key columns of an earned_commissions record, as move_contributions takes them."""
+    return dict(zip(
+        ('carrier_id', 'client_name', 'statement_month', 'statement_year', 'user_id', 'environment_id'),
+        _record_key(commission)
+    ))
+
+
+async def get_contribution_totals(db: AsyncSession, commission: EarnedCommission) -> Optional[Dict[str, Any]]:
+    """
+    Sum the ledger rows behind an earned_commissions record.
+
+    Returns None if any upload in commission.upload_ids has no ledger row for this key,
+    in which case the totals cannot be rebuilt from the ledger alone.
+    """
+    upload_ids = []
+    for upload_id in commission.upload_ids or []:
+        try:
+            upload_ids.append(_to_uuid(upload_id))
+        except ValueError:
+            return None
+    if not upload_ids:
+        return None
+
+    conditions = [
+        CommissionContribution.upload_id.in_(upload_ids),
+        CommissionContribution.carrier_id == commission.carrier_id,
+        CommissionContribution.client_name == commission.client_name,
+        CommissionContribution.statement_month == commission.statement_month,
+        CommissionContribution.statement_year == commission.statement_year
+    ]
+    if commission.user_id is not None:
+        conditions.append(CommissionContribution.user_id == commission.user_id)
+    if commission.environment_id is not None:
+        conditions.append(CommissionContribution.environment_id == commission.environment_id)
+
+    result = await db.execute(
+        select(
+            func.count(func.distinct(CommissionContribution.upload_id)),
+            func.coalesce(func.sum(CommissionContribution.invoice_total), 0),
+            func.coalesce(func.sum(CommissionContribution.commission_earned), 0)
+        ).where(and_(*conditions))
+    )
+    covered_uploads, invoice_total, commission_earned = result.one()
+
+    if covered_uploads < len(set(upload_ids)):
+        return None
+
+    return {
+        'invoice_total': _to_decimal(invoice_total),
+        'commission_earned': _to_decimal(commission_earned),
+        'statement_count': covered_uploads
+    }
+
+
+async def backfill_commission_ledger(db: AsyncSession, batch_size: int = 50) -> Dict[str, int]:
+    """
+    One-shot backfill: build ledger rows from final_data for approved uploads that have none.
+
+    Uploads are walked in id order in batches of batch_size; each batch is committed and
+    expunged so at most one batch of final_data blobs is held in memory.
+    earned_commissions is not modified - it already includes these uploads.
+    """
+    from .company import get_company_by_id
+    from .statement_upload import with_payload_kinds
+
+    stats = {'uploads_scanned': 0, 'uploads_backfilled': 0, 'uploads_skipped': 0, 'contributions_written': 0}
+    carrier_names: Dict[Any, Optional[str]] = {}
+    last_id = None
+
+    while True:
+        query = select(StatementUploadModel).where(
+            func.lower(StatementUploadModel.status) == 'approved',
+            ~exists().where(CommissionContribution.upload_id == StatementUploadModel.id)
+        )
+        if last_id is not None:
+            query = query.where(StatementUploadModel.id > last_id)
+        query = query.order_by(StatementUploadModel.id).limit(batch_size).options(with_payload_kinds('final_data'))
+
+        uploads = (await db.execute(query)).scalars().all()
+        if not uploads:
+            break
+
+        for upload in uploads:
+            stats['uploads_scanned'] += 1
+            if not upload.final_data or not upload.field_config:
+                stats['uploads_skipped'] += 1
+                continue
+
+            # Breckpoint column validation keys off the carrier name: look the carrier up by
+            # carrier_id, falling back to company_id for uploads that only have the company set
+            carrier_key = upload.carrier_id or upload.company_id
+            if carrier_key not in carrier_names:
+                carrier = await get_company_by_id(db, carrier_key)
+                carrier_names[carrier_key] = carrier.name if carrier else None
+
+            # Undated statements were booked under the month they were approved in
+            statement_date_info = None
+            if not upload.selected_statement_date and upload.completed_at:
+                completed_at = upload.completed_at
+                statement_date_info = (completed_at, completed_at.month, completed_at.year)
+
+            try:
+                commission_records = collect_commission_records(upload, carrier_names[carrier_key], statement_date_info)
+            except ValueError as e:
+                logger.warning(f"Skipping upload {upload.id} during ledger backfill: {e}")
+                commission_records = None
+
+            if commission_records is None:
+                stats['uploads_skipped'] += 1
+                continue
+
+            stats['contributions_written'] += await save_upload_contributions(db, str(upload.id), commission_records)
+            stats['uploads_backfilled'] += 1
+
+        last_id = uploads[-1].id
+        await db.commit()
+        db.expunge_all()
+        logger.info(f"Ledger backfill progress: {stats}")
+
+    return stats
@@ -194,11 +194,13 @@ async def get_company_role_by_name(db: AsyncSession, name: str) -> Optional[Dict
 
 async def get_latest_statement_upload_for_company(db, company_id):
     from ..models import StatementUpload as StatementUploadModel
+    from .statement_upload import with_payloads
     result = await db.execute(
         select(StatementUploadModel)
         .where(StatementUploadModel.company_id == company_id)
         .order_by(StatementUploadModel.uploaded_at.desc())
         .limit(1)
+        .options(with_payloads())
     )
     return result.scalar_one_or_none()
 
@@ -220,6 +222,8 @@ async def merge_carriers(db: AsyncSession, source_carrier_id: str, target_carrie
     )
     from sqlalchemy import or_, and_, func
     from datetime import datetime
+    from .commission_ledger import move_contributions, commission_key
+    from .dashboard_aggregates import dashboard_cells_by_user, refresh_dashboard_for_users
     
     try:
         # Convert string IDs to UUID if needed
@@ -259,6 +263,8 @@ async def merge_carriers(db: AsyncSession, source_carrier_id: str, target_carrie
             )
         )
         statements = statements_result.scalars().all()
+        # Dashboard rows of both carriers: the moved statements and commission records before and after
+        dashboard_cells = dashboard_cells_by_user(statements=statements)
         
         for statement in statements:
             statement.carrier_id = target_carrier_id
@@ -401,6 +407,8 @@ async def merge_carriers(db: AsyncSession, source_carrier_id: str, target_carrie
             )
         )
         earned_commissions = earned_commissions_result.scalars().all()
+        dashboard_cells_by_user(earned_commissions, cells_by_user=dashboard_cells)
+        merged_commissions = []
         
         for source_commission in earned_commissions:
             # Check if target has a commission record for the same client and statement date
@@ -417,6 +425,12 @@ async def merge_carriers(db: AsyncSession, source_carrier_id: str, target_carrie
             )
             existing_commission = existing_commission_result.scalar_one_or_none()
             
+            # Re-key the ledger rows too: they reference the source carrier, which is deleted below
+            if existing_commission:
+                await move_contributions(db, source_commission, commission_key(existing_commission))
+            else:
+                await move_contributions(db, source_commission, {**commission_key(source_commission), 'carrier_id': target_carrier_id})
+            
             if existing_commission:
                 # Merge the commission data
                 existing_commission.invoice_total += source_commission.invoice_total
@@ -447,12 +461,17 @@ async def merge_carriers(db: AsyncSession, source_carrier_id: str, target_carrie
                 existing_commission.dec_commission += source_commission.dec_commission or 0
                 
                 await db.delete(source_commission)
+                merged_commissions.append(existing_commission)
             else:
                 # Migrate to target carrier
                 source_commission.carrier_id = target_carrier_id
+                merged_commissions.append(source_commission)
             
             merge_result["earned_commissions_merged"] += 1
         
+        dashboard_cells_by_user(merged_commissions, cells_by_user=dashboard_cells)
+        await refresh_dashboard_for_users(db, dashboard_cells)
+        
         # 6. Delete the source carrier
         await db.delete(source_carrier)
         
@@ -91,15 +91,14 @@ async def save_company_mapping_config(db, company_id, plan_types, table_names, f
         latest_upload.current_step = 'field_mapper'
         latest_upload.last_updated = datetime.utcnow()
         
-        # Save mapping data in progress_data
-        if not latest_upload.progress_data:
-            latest_upload.progress_data = {}
-        
-        latest_upload.progress_data['field_mapper'] = {
+        # Save mapping data in progress_data (reassigned so the payload gets a new version)
+        progress_data = dict(latest_upload.progress_data or {})
+        progress_data['field_mapper'] = {
             'plan_types': plan_types,
             'table_names': table_names,
             'field_config': field_config
         }
+        latest_upload.progress_data = progress_data
         
         await db.commit()
         await db.refresh(latest_upload)
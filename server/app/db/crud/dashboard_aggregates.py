@@ -0,0 +1,503 @@
+"""
+Maintained dashboard aggregates.
+
+dashboard_stats_aggregates holds pre-computed earned commission totals and statement counts
+per scope (a user, a user's company, or global), rolled up by environment, carrier and year.
+The user and company rows touched by a change (its environment, carrier and year, plus
+their rollups) are rebuilt in the same transaction that changes earned_commissions
+(bulk_process_commissions / remove_upload_from_earned_commissions) or a statement's status,
+so the stats endpoints read a single pre-computed row instead of re-aggregating the
+commission and statement tables on every request.
+
+The global scope spans every tenant and is never rebuilt in a write transaction: once the
+write commits, its touched rows are rebuilt in the background with their own session. Reads
+rebuild any missing or stale scope the same way.
+"""
+from ..models import DashboardStatsAggregate, EarnedCommission, StatementUpload, User
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, delete, insert, func, exists, tuple_, event
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import UUID
+from typing import Optional, Iterable, Dict, Any
+import asyncio
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCOPE_USER = 'user'
+SCOPE_COMPANY = 'company'
+SCOPE_GLOBAL = 'global'
+
+# Rows older than this are rebuilt in the background on read, so status changes made outside
+# the refresh hooks (admin tools, scripts) still show up eventually
+DASHBOARD_AGGREGATE_MAX_AGE = timedelta(minutes=15)
+
+FINALIZED_STATUSES = ['Approved', 'needs_review']
+EARNED_STATEMENT_STATUSES = ['completed', 'Approved']
+# Every status a statement counter reads
+COUNTED_STATUSES = frozenset(FINALIZED_STATUSES + EARNED_STATEMENT_STATUSES)
+
+_EMPTY_COUNTS = {
+    'total_invoice': Decimal('0'),
+    'total_commission': Decimal('0'),
+    'commission_records': 0,
+    'total_carriers': 0,
+    'total_companies': 0,
+    'approved_statements': 0,
+    'completed_statements': 0,
+    'needs_review_statements': 0,
+    'statement_carriers': 0
+}
+
+
+def _to_uuid(value) -> Optional[UUID]:
+    if value is None:
+        return None
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+def _affected_keys(cells: Iterable[tuple]) -> set:
+    """
+    Expand changed (environment_id, carrier_id, statement_year) cells into every aggregate
+    row that rolls them up. A None carrier or year (a statement status change) only touches
+    the environment's rollups.
+    """
+    keys = {(None, None, None)}
+    for environment_id, carrier_id, year in cells:
+        environment_id, carrier_id = _to_uuid(environment_id), _to_uuid(carrier_id)
+        for env_key in {environment_id, None}:
+            for carrier_key in {carrier_id, None}:
+                for year_key in {year, None}:
+                    keys.add((env_key, carrier_key, year_key))
+    return keys
+
+
+def status_change_affects_counts(old_status: Optional[str], new_status: Optional[str]) -> bool:
+    """Whether moving a statement from old_status to new_status changes its environment's statement counts."""
+    return old_status != new_status and (old_status in COUNTED_STATUSES or new_status in COUNTED_STATUSES)
+
+
+def _scope_filter(scope_type: str, scope_id: Optional[UUID]):
+    agg = DashboardStatsAggregate
+    return and_(
+        agg.scope_type == scope_type,
+        agg.scope_id == scope_id if scope_id is not None else agg.scope_id.is_(None)
+    )
+
+
+def _key_filter(key: tuple):
+    """Match the aggregate row of one (environment_id, carrier_id, statement_year) key."""
+    agg = DashboardStatsAggregate
+    return and_(*[
+        column == value if value is not None else column.is_(None)
+        for column, value in zip((agg.environment_id, agg.carrier_id, agg.statement_year), key)
+    ])
+
+
+def _scope_user_filter(column, scope_type: str, scope_id: Optional[UUID]):
+    """Restrict a user_id column to the users covered by a scope (None for global)."""
+    if scope_type == SCOPE_USER:
+        return column == scope_id
+    if scope_type == SCOPE_COMPANY:
+        return column.in_(select(User.id).where(User.company_id == scope_id))
+    return None
+
+
+def _grouping_sets(columns: tuple, keys: Optional[set]) -> list:
+    """
+    GROUPING SETS for the given keys: one set per distinct pattern of the columns a key
+    pins, or every combination of the columns when keys is None.
+    """
+    if keys is None:
+        patterns = set(itertools.product((True, False), repeat=len(columns)))
+    else:
+        patterns = {tuple(value is not None for value in key) for key in keys}
+    return [
+        tuple_(*[column for column, pinned in zip(columns, pattern) if pinned])
+        for pattern in sorted(patterns, reverse=True)
+    ]
+
+
+def _covering_filter(columns: tuple, keys: Optional[set]):
+    """
+    Restrict base rows to the ones the keys aggregate: a row is needed if it matches every
+    column pinned by at least one key. None when a key pins nothing and needs every row.
+    """
+    if keys is None:
+        return None
+    clauses = []
+    for key in keys:
+        pinned = [column == value for column, value in zip(columns, key) if value is not None]
+        if not pinned:
+            return None
+        clauses.append(and_(*pinned))
+    return or_(*clauses)
+
+
+def _key_batches(keys: Optional[set], width: int) -> list:
+    """
+    Split keys into the ones that pin a column and the total across everything. The total
+    reads every row of the scope, so it runs as its own plain aggregate instead of widening
+    the filter of the narrow keys to the whole scope.
+    """
+    if keys is None:
+        return [None]
+    total = (None,) * width
+    return [batch for batch in (keys - {total}, keys & {total}) if batch]
+
+
+async def _compute_scope_rows(
+    db: AsyncSession,
+    scope_type: str,
+    scope_id: Optional[UUID],
+    keys: Optional[set] = None
+) -> Dict[tuple, Dict[str, Any]]:
+    """
+    Aggregate earned_commissions and statement_uploads for one scope.
+
+    Returns rows keyed by (environment_id, carrier_id, statement_year) where None means
+    "all". Both queries use GROUPING SETS so every rollup level comes from one table scan.
+    With keys, only those rows are computed: the base queries read just the rows the keys
+    cover and group just the levels the keys sit at.
+    """
+    rows: Dict[tuple, Dict[str, Any]] = {}
+
+    def row_for(key):
+        if key not in rows:
+            rows[key] = dict(_EMPTY_COUNTS)
+        return rows[key]
+
+    # Grand total always exists so an empty scope is still a cache hit
+    if keys is None or (None, None, None) in keys:
+        row_for((None, None, None))
+
+    # --- earned_commissions: (env, carrier, year) and every rollup the endpoints read ---
+    ec = EarnedCommission
+    columns = (ec.environment_id, ec.carrier_id, ec.statement_year)
+    user_filter = _scope_user_filter(ec.user_id, scope_type, scope_id)
+
+    for batch in _key_batches(keys, len(columns)):
+        commission_query = select(
+            *columns,
+            *[func.grouping(column) for column in columns],
+            func.coalesce(func.sum(ec.invoice_total), 0),
+            func.coalesce(func.sum(ec.commission_earned), 0),
+            func.count(ec.id),
+            func.count(func.distinct(ec.carrier_id)),
+            func.count(func.distinct(func.lower(func.trim(ec.client_name))))
+        ).group_by(
+            func.grouping_sets(*_grouping_sets(columns, batch))
+        )
+        for base_filter in (user_filter, _covering_filter(columns, batch)):
+            if base_filter is not None:
+                commission_query = commission_query.where(base_filter)
+
+        for (env_id, carrier_id, year, g_env, g_carrier, g_year,
+             invoice, commission, record_count, carriers, companies) in (await db.execute(commission_query)).all():
+            # A grouped NULL key (e.g. legacy rows without an environment) would collide with
+            # the "all" rollup row - skip it, no endpoint filters on a NULL key
+            if (not g_env and env_id is None) or (not g_carrier and carrier_id is None) or (not g_year and year is None):
+                continue
+            # The covering filter also lets through neighbouring groups at the same level
+            if batch is not None and (env_id, carrier_id, year) not in batch:
+                continue
+            row = row_for((env_id, carrier_id, year))
+            row['total_invoice'] = Decimal(str(invoice))
+            row['total_commission'] = Decimal(str(commission))
+            row['commission_records'] = record_count
+            row['total_carriers'] = carriers
+            row['total_companies'] = companies
+
+    # --- statement_uploads: counts per environment and overall ---
+    # Statement counts only live on rows rolled up across carriers and years
+    statement_keys = None
+    if keys is not None:
+        statement_keys = {(env_id,) for env_id, carrier_id, year in keys if carrier_id is None and year is None}
+
+    su = StatementUpload
+    carrier_key = func.coalesce(su.carrier_id, su.company_id)
+    # Companies that have users are user organizations, not carriers
+    is_carrier = ~exists().where(User.company_id == carrier_key)
+    user_filter = _scope_user_filter(su.user_id, scope_type, scope_id)
+
+    for batch in _key_batches(statement_keys, 1):
+        statement_query = select(
+            su.environment_id,
+            func.grouping(su.environment_id),
+            func.count(su.id).filter(su.status == 'Approved'),
+            func.count(su.id).filter(su.status == 'completed'),
+            func.count(su.id).filter(su.status == 'needs_review'),
+            func.count(func.distinct(carrier_key)).filter(and_(su.status.in_(FINALIZED_STATUSES), is_carrier))
+        ).where(
+            su.status.in_(FINALIZED_STATUSES + EARNED_STATEMENT_STATUSES)
+        ).group_by(
+            func.grouping_sets(*_grouping_sets((su.environment_id,), batch))
+        )
+        for base_filter in (user_filter, _covering_filter((su.environment_id,), batch)):
+            if base_filter is not None:
+                statement_query = statement_query.where(base_filter)
+
+        for env_id, g_env, approved, completed, needs_review, statement_carriers in (await db.execute(statement_query)).all():
+            if not g_env and env_id is None:
+                continue
+            if batch is not None and (env_id,) not in batch:
+                continue
+            row = row_for((env_id, None, None))
+            row['approved_statements'] = approved
+            row['completed_statements'] = completed
+            row['needs_review_statements'] = needs_review
+            row['statement_carriers'] = statement_carriers
+
+    return rows
+
+
+async def refresh_dashboard_scope(db: AsyncSession, scope_type: str, scope_id=None, cells: Optional[Iterable[tuple]] = None) -> int:
+    """
+    Rebuild the aggregate rows of one scope.
+
+    With cells, only the rows rolling up those (environment_id, carrier_id, statement_year)
+    cells are replaced; a scope that has never been built is rebuilt in full. Serialized per
+    scope with a transaction-level advisory lock so two concurrent approvals cannot
+    interleave their delete/insert. Does not commit.
+    """
+    scope_id = _to_uuid(scope_id)
+    lock_key = f"dashboard_stats:{scope_type}:{scope_id or ''}"
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(lock_key))))
+
+    agg = DashboardStatsAggregate
+    keys = None
+    if cells is not None:
+        built = (await db.execute(
+            select(exists().where(and_(_scope_filter(scope_type, scope_id), _key_filter((None, None, None)))))
+        )).scalar()
+        if built:
+            keys = _affected_keys(cells)
+
+    rows = await _compute_scope_rows(db, scope_type, scope_id, keys)
+
+    delete_query = delete(agg).where(_scope_filter(scope_type, scope_id))
+    if keys is not None:
+        # Affected keys that have no data any more are dropped and simply not re-inserted
+        delete_query = delete_query.where(or_(*[_key_filter(key) for key in keys]))
+    await db.execute(delete_query)
+
+    now = datetime.utcnow()
+    await db.execute(insert(agg), [
+        {
+            'scope_type': scope_type,
+            'scope_id': scope_id,
+            'environment_id': env_id,
+            'carrier_id': carrier_id,
+            'statement_year': year,
+            'refreshed_at': now,
+            **counts
+        }
+        for (env_id, carrier_id, year), counts in rows.items()
+    ])
+    return len(rows)
+
+
+async def refresh_dashboard_aggregates(db: AsyncSession, user_id, cells: Optional[Iterable[tuple]] = None) -> None:
+    """
+    Rebuild the tenant scopes a user's data rolls up into: the user and their company.
+
+    cells lists the (environment_id, carrier_id, statement_year) combinations the change
+    touched (carrier and year None for a status-only change); None rebuilds both scopes in
+    full. The global scope is rebuilt for the same cells in the background once the
+    transaction commits. Call after changing earned_commissions or a statement status,
+    inside the same transaction. Does not commit.
+    """
+    cells = list(cells) if cells is not None else None
+    # Legacy rows without a user still count towards the global scope
+    _defer_global_refresh(db, cells)
+    if user_id is None:
+        return
+
+    user_id = _to_uuid(user_id)
+    await refresh_dashboard_scope(db, SCOPE_USER, user_id, cells)
+
+    company_id = (await db.execute(select(User.company_id).where(User.id == user_id))).scalar_one_or_none()
+    if company_id:
+        await refresh_dashboard_scope(db, SCOPE_COMPANY, company_id, cells)
+
+    print(f"📊 DASHBOARD: Refreshed aggregates for user {user_id}")
+
+
+def dashboard_cells_by_user(commissions: Iterable = (), statements: Iterable = (), cells_by_user: Optional[dict] = None) -> Dict[Any, set]:
+    """
+    Collect the cells of earned_commissions records and statements per owning user, for
+    refresh_dashboard_for_users. Read them before the rows are deleted or re-keyed (and again
+    after a re-key, into the same cells_by_user, for the new cells).
+    """
+    cells_by_user = {} if cells_by_user is None else cells_by_user
+    for commission in commissions:
+        cells_by_user.setdefault(commission.user_id, set()).add(
+            (commission.environment_id, commission.carrier_id, commission.statement_year)
+        )
+    for statement in statements:
+        cells_by_user.setdefault(statement.user_id, set()).add((statement.environment_id, None, None))
+    return cells_by_user
+
+
+async def refresh_dashboard_for_users(db: AsyncSession, cells_by_user: Dict[Any, set]) -> None:
+    """
+    refresh_dashboard_aggregates for every user in cells_by_user, for writers that edit or
+    delete earned_commissions or statements outside bulk_process_commissions. Call before the
+    users themselves are deleted (their company is looked up). Does not commit.
+    """
+    for user_id, cells in cells_by_user.items():
+        await refresh_dashboard_aggregates(db, user_id, cells)
+
+
+# Background rebuilds in flight in this process, keyed by (scope_type, scope_id)
+_refresh_tasks: Dict[tuple, asyncio.Task] = {}
+
+
+async def _refresh_scope_in_background(scope_type: str, scope_id: Optional[UUID]) -> None:
+    from ..database import AsyncSessionLocal
+    try:
+        async with AsyncSessionLocal() as session:
+            await refresh_dashboard_scope(session, scope_type, scope_id)
+            await session.commit()
+        logger.info(f"Rebuilt dashboard aggregates for {scope_type} scope {scope_id or ''}")
+    except Exception as e:
+        logger.warning(f"Background dashboard aggregate rebuild failed for {scope_type} scope {scope_id or ''}: {e}")
+
+
+def schedule_dashboard_refresh(scope_type: str, scope_id=None) -> None:
+    """Rebuild a scope in the background with its own session, at most once at a time per process."""
+    key = (scope_type, _to_uuid(scope_id))
+    if key in _refresh_tasks:
+        return
+    task = asyncio.create_task(_refresh_scope_in_background(*key))
+    _refresh_tasks[key] = task
+    task.add_done_callback(lambda _: _refresh_tasks.pop(key, None))
+
+
+# Session.info key of the global cells a session's uncommitted writes touched (None: all of them)
+_GLOBAL_CELLS_KEY = 'dashboard_global_cells'
+
+# Cells committed in this process whose global rows are not rebuilt yet (None: all of them)
+_pending_global_cells: Optional[set] = set()
+_global_refresh_task: Optional[asyncio.Task] = None
+
+
+def _merge_cells(pending: Optional[set], cells: Optional[Iterable[tuple]]) -> Optional[set]:
+    if pending is None or cells is None:
+        return None
+    return pending | set(cells)
+
+
+def _defer_global_refresh(db: AsyncSession, cells: Optional[Iterable[tuple]]) -> None:
+    """Record cells whose global rows are rebuilt once db commits."""
+    info = db.sync_session.info
+    info[_GLOBAL_CELLS_KEY] = _merge_cells(info.get(_GLOBAL_CELLS_KEY, set()), cells)
+
+
+@event.listens_for(Session, 'after_commit')
+def _schedule_committed_global_refresh(session):
+    if _GLOBAL_CELLS_KEY in session.info:
+        schedule_global_dashboard_refresh(session.info.pop(_GLOBAL_CELLS_KEY))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_uncommitted_global_refresh(session):
+    session.info.pop(_GLOBAL_CELLS_KEY, None)
+
+
+async def _refresh_global_in_background() -> None:
+    global _pending_global_cells
+    from ..database import AsyncSessionLocal
+    # Cells committed while a rebuild runs are picked up by the next pass
+    while _pending_global_cells is None or _pending_global_cells:
+        cells, _pending_global_cells = _pending_global_cells, set()
+        try:
+            async with AsyncSessionLocal() as session:
+                await refresh_dashboard_scope(session, SCOPE_GLOBAL, None, cells)
+                await session.commit()
+        except Exception as e:
+            # Left to the rebuild on read once the rows are stale
+            logger.warning(f"Background dashboard aggregate rebuild failed for global scope: {e}")
+
+
+def schedule_global_dashboard_refresh(cells: Optional[Iterable[tuple]] = None) -> None:
+    """
+    Rebuild the global rows rolling up the given cells (None: all of them) in the background.
+    Requests made while a rebuild runs are merged into one follow-up pass.
+    """
+    global _pending_global_cells, _global_refresh_task
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # Committed outside an event loop (sync scripts): left to the rebuild on read
+        return
+    _pending_global_cells = _merge_cells(_pending_global_cells, cells)
+    if _global_refresh_task is None or _global_refresh_task.done():
+        _global_refresh_task = asyncio.create_task(_refresh_global_in_background())
+
+
+def resolve_dashboard_scope(current_user: User, view_mode: Optional[str]) -> tuple:
+    """Map the endpoints' view_mode to an aggregate scope (all_data without a company is the user's own data)."""
+    if view_mode == "all_data" and current_user.company_id:
+        return SCOPE_COMPANY, current_user.company_id
+    return SCOPE_USER, current_user.id
+
+
+async def get_dashboard_aggregate(
+    db: AsyncSession,
+    scope_type: str,
+    scope_id=None,
+    environment_id=None,
+    year: Optional[int] = None,
+    carrier_id=None
+) -> Dict[str, Any]:
+    """
+    Read the pre-computed stats of a scope.
+
+    Commission totals come from the (environment, carrier, year) row; statement counts are
+    not year- or carrier-specific and come from the environment's all-years row. Both rows
+    are fetched in one query. Read-only: a scope that has never been built is computed for
+    this request and built in the background; rows older than DASHBOARD_AGGREGATE_MAX_AGE
+    are served as they are while a background rebuild refreshes them.
+    """
+    scope_id = _to_uuid(scope_id)
+    environment_id = _to_uuid(environment_id)
+    carrier_id = _to_uuid(carrier_id)
+
+    agg = DashboardStatsAggregate
+    query = select(agg).where(and_(
+        _scope_filter(scope_type, scope_id),
+        or_(
+            _key_filter((environment_id, carrier_id, year)),
+            _key_filter((None, None, None)),
+            _key_filter((environment_id, None, None))
+        )
+    ))
+
+    stored = (await db.execute(query)).scalars().all()
+    rows = {(r.environment_id, r.carrier_id, r.statement_year): r for r in stored}
+
+    if (None, None, None) not in rows:
+        schedule_dashboard_refresh(scope_type, scope_id)
+        rows = await _compute_scope_rows(db, scope_type, scope_id)
+    elif any(datetime.utcnow() - r.refreshed_at > DASHBOARD_AGGREGATE_MAX_AGE for r in stored):
+        schedule_dashboard_refresh(scope_type, scope_id)
+
+    def _field(row, field):
+        return row[field] if isinstance(row, dict) else getattr(row, field)
+
+    totals_row = rows.get((environment_id, carrier_id, year))
+    counts_row = rows.get((environment_id, None, None))
+
+    result = dict(_EMPTY_COUNTS)
+    if totals_row is not None:
+        for field in ('total_invoice', 'total_commission', 'commission_records', 'total_carriers', 'total_companies'):
+            result[field] = _field(totals_row, field) or _EMPTY_COUNTS[field]
+    if counts_row is not None:
+        for field in ('approved_statements', 'completed_statements', 'needs_review_statements', 'statement_carriers'):
+            result[field] = _field(counts_row, field) or 0
+    return result
@@ -2,13 +2,15 @@ from ..models import EarnedCommission, Company, StatementUpload as StatementUplo
 from ..schemas import EarnedCommissionCreate, EarnedCommissionUpdate
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_, or_, update, insert
+from sqlalchemy import and_, or_, update, insert, func, cast, bindparam, literal, case, String, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY, JSON, JSONB, UUID as PG_UUID
 from datetime import datetime
 from uuid import UUID
 from typing import Optional, List, Dict, Any
 import asyncio
 import time
 import logging
+import uuid
 from decimal import Decimal
 from ...services.company_name_service import CompanyNameDetectionService
 
@@ -17,6 +19,14 @@ logger = logging.getLogger(__name__)
 # Create a global instance of the company name service for cleaning
 company_name_service = CompanyNameDetectionService()
 
+# Monthly breakdown column for each statement month
+MONTH_COLUMNS = {
+    1: 'jan_commission', 2: 'feb_commission', 3: 'mar_commission',
+    4: 'apr_commission', 5: 'may_commission', 6: 'jun_commission',
+    7: 'jul_commission', 8: 'aug_commission', 9: 'sep_commission',
+    10: 'oct_commission', 11: 'nov_commission', 12: 'dec_commission'
+}
+
 
 def find_similar_column(
     target_field: str, 
@@ -422,6 +432,44 @@ async def get_earned_commissions_by_carriers(db: AsyncSession, carrier_ids: List
     result = await db.execute(query)
     return result.all()
 
+# Columns of an earned commissions export, in order
+EARNED_COMMISSION_EXPORT_COLUMNS = [
+    ('Carrier', Company.name),
+    ('Client', EarnedCommission.client_name),
+    ('Invoice Total', EarnedCommission.invoice_total),
+    ('Commission Earned', EarnedCommission.commission_earned),
+    ('Statement Count', EarnedCommission.statement_count),
+    ('Statement Year', EarnedCommission.statement_year),
+    ('Statement Month', EarnedCommission.statement_month),
+    *[(column.split('_')[0].capitalize(), getattr(EarnedCommission, column)) for column in MONTH_COLUMNS.values()],
+    ('Last Updated', EarnedCommission.last_updated),
+]
+
+async def stream_earned_commissions_for_export(
+    db: AsyncSession,
+    user_id: Optional[UUID] = None,
+    year: Optional[int] = None,
+    batch_size: int = 1000
+):
+    """
+    Yield earned commission export rows (tuples in EARNED_COMMISSION_EXPORT_COLUMNS order).
+
+    Reads through a server-side cursor batch_size rows at a time and selects plain columns
+    (no ORM instances in the identity map), so memory stays flat however many rows there are.
+    """
+    query = select(*[column for _, column in EARNED_COMMISSION_EXPORT_COLUMNS])\
+        .join(Company, EarnedCommission.carrier_id == Company.id)
+    
+    if user_id is not None:
+        query = query.where(EarnedCommission.user_id == user_id)
+    if year is not None:
+        query = query.where(EarnedCommission.statement_year == year)
+    
+    query = query.order_by(Company.name.asc(), EarnedCommission.client_name.asc())
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for row in result:
+        yield tuple(row)
+
 async def get_commission_record(db: AsyncSession, carrier_id: str, client_name: str, statement_date: datetime, user_id: UUID = None):
     """
     Get commission record by carrier, client, statement date, and user_id.
@@ -447,19 +495,26 @@ async def get_commission_record(db: AsyncSession, carrier_id: str, client_name:
 async def recalculate_commission_totals(db: AsyncSession, commission: EarnedCommission):
     """Recalculate commission totals based on remaining uploads."""
     try:
+        # ✅ LEDGER: Rebuild from recorded contributions when every remaining upload has ledger rows
+        from .commission_ledger import get_contribution_totals
+        ledger_totals = await get_contribution_totals(db, commission)
+        if ledger_totals is not None:
+            commission.invoice_total = ledger_totals['invoice_total']
+            commission.commission_earned = ledger_totals['commission_earned']
+            commission.statement_count = ledger_totals['statement_count']
+            commission.last_updated = datetime.utcnow()
+            month_column = MONTH_COLUMNS.get(commission.statement_month)
+            if month_column:
+                setattr(commission, month_column, ledger_totals['commission_earned'])
+            print(f"🎯 Recalculate: Rebuilt {commission.client_name} from contribution ledger: invoice=${ledger_totals['invoice_total']}, commission=${ledger_totals['commission_earned']}")
+            return
+        
         # Reset all totals to zero
         total_invoice = 0.0
         total_commission = 0.0
         statement_count = 0
         
         # Reset monthly breakdown
-        month_columns = {
-            1: 'jan_commission', 2: 'feb_commission', 3: 'mar_commission',
-            4: 'apr_commission', 5: 'may_commission', 6: 'jun_commission',
-            7: 'jul_commission', 8: 'aug_commission', 9: 'sep_commission',
-            10: 'oct_commission', 11: 'nov_commission', 12: 'dec_commission'
-        }
-        
         monthly_totals = {month: 0.0 for month in range(1, 13)}
         
         # Process each remaining upload to recalculate totals
@@ -529,9 +584,9 @@ async def recalculate_commission_totals(db: AsyncSession, commission: EarnedComm
         
         # Update monthly breakdown
         for month, total in monthly_totals.items():
-            if month in month_columns:
-                setattr(commission, month_columns[month], total)
-                print(f"🎯 Recalculate: Set {month_columns[month]} = ${total} for {commission.client_name}")
+            if month in MONTH_COLUMNS:
+                setattr(commission, MONTH_COLUMNS[month], total)
+                print(f"🎯 Recalculate: Set {MONTH_COLUMNS[month]} = ${total} for {commission.client_name}")
         
         print(f"Recalculated commission totals for {commission.client_name}: invoice=${total_invoice}, commission=${total_commission}, statements={statement_count}")
         print(f"Monthly breakdown: {monthly_totals}")
@@ -811,6 +866,25 @@ def extract_field_mappings_once(field_config):
     
     return mappings
 
+def _commission_keys_relation(unique_keys: List[tuple]):
+    """
+    Build an unnest() relation of commission lookup keys from six typed array parameters.
+    
+    The whole key set travels as one relation the planner can hash-join against
+    earned_commissions, instead of one OR branch (and 5-6 bind params) per key.
+    """
+    carrier_ids, client_names, months, years, user_ids, environment_ids = (list(col) for col in zip(*unique_keys))
+    return func.unnest(
+        bindparam('key_carrier_ids', carrier_ids, type_=ARRAY(PG_UUID(as_uuid=True))),
+        bindparam('key_client_names', client_names, type_=ARRAY(String)),
+        bindparam('key_months', months, type_=ARRAY(Integer)),
+        bindparam('key_years', years, type_=ARRAY(Integer)),
+        bindparam('key_user_ids', user_ids, type_=ARRAY(PG_UUID(as_uuid=True))),
+        bindparam('key_environment_ids', environment_ids, type_=ARRAY(PG_UUID(as_uuid=True)))
+    ).table_valued(
+        'carrier_id', 'client_name', 'statement_month', 'statement_year', 'user_id', 'environment_id'
+    ).render_derived(name='commission_keys')
+
 async def fetch_existing_commission_records_bulk(db: AsyncSession, commission_records: List[Dict[str, Any]]) -> Dict[tuple, EarnedCommission]:
     """
     CRITICAL OPTIMIZATION: Fetch all existing records in single query instead of N queries
@@ -818,6 +892,9 @@ async def fetch_existing_commission_records_bulk(db: AsyncSession, commission_re
     
     CRITICAL FIX: Now includes user_id, statement_month, and environment_id in lookup
     to match the new unique constraint and ensure proper data isolation
+    
+    ✅ PERFORMANCE: All keys are sent as one unnest() relation joined against earned_commissions
+    (six array parameters total) instead of an OR chain with one branch per key.
     """
     if not commission_records:
         return {}
@@ -835,39 +912,27 @@ async def fetch_existing_commission_records_bulk(db: AsyncSession, commission_re
     
     print(f"🔍 Bulk fetch: Looking up {len(unique_keys)} unique commission records (with user + month/year isolation)")
     
-    # Single query with OR conditions - this replaces 300-400 individual queries
-    # CRITICAL FIX: Now includes statement_month and environment_id in the conditions
-    conditions = []
-    for carrier_id, client_name, statement_month, statement_year, user_id, environment_id in unique_keys:
-        if user_id is not None:
-            # Include user_id, month, year, and environment_id filter for proper data isolation
-            condition_parts = [
-                EarnedCommission.carrier_id == carrier_id,
-                EarnedCommission.client_name == client_name,
-                EarnedCommission.statement_month == statement_month,
-                EarnedCommission.statement_year == statement_year,
-                EarnedCommission.user_id == user_id
-            ]
-            
-            # Add environment_id filter if provided
-            if environment_id is not None:
-                condition_parts.append(EarnedCommission.environment_id == environment_id)
-            
-            conditions.append(and_(*condition_parts))
-        else:
-            # Fallback for legacy records without user_id (backward compatibility)
-            conditions.append(
-                and_(
-                    EarnedCommission.carrier_id == carrier_id,
-                    EarnedCommission.client_name == client_name,
-                    EarnedCommission.statement_month == statement_month,
-                    EarnedCommission.statement_year == statement_year,
-                    EarnedCommission.user_id.is_(None)
-                )
-            )
+    keys = _commission_keys_relation(unique_keys)
+    
+    # user_id NULL only matches legacy records without user_id; environment_id NULL in a key
+    # means "any environment" (same semantics as the previous per-key OR conditions)
+    join_condition = and_(
+        EarnedCommission.carrier_id == keys.c.carrier_id,
+        EarnedCommission.client_name == keys.c.client_name,
+        EarnedCommission.statement_month.is_not_distinct_from(keys.c.statement_month),
+        EarnedCommission.statement_year.is_not_distinct_from(keys.c.statement_year),
+        EarnedCommission.user_id.is_not_distinct_from(keys.c.user_id),
+        or_(
+            keys.c.environment_id.is_(None),
+            keys.c.user_id.is_(None),
+            EarnedCommission.environment_id == keys.c.environment_id
+        )
+    )
     
     # Execute single bulk query
-    result = await db.execute(select(EarnedCommission).where(or_(*conditions)))
+    result = await db.execute(
+        select(EarnedCommission).join(keys, join_condition)
+    )
     existing_records = result.scalars().all()
     
     print(f"✅ Bulk fetch: Found {len(existing_records)} existing records for specified users")
@@ -882,14 +947,11 @@ async def fetch_existing_commission_records_bulk(db: AsyncSession, commission_re
     
     return lookup
 
-def prepare_bulk_operations(commission_records: List[Dict[str, Any]], existing_records: Dict[tuple, EarnedCommission]) -> tuple:
+def aggregate_commission_records(commission_records: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
     """
-    Prepare bulk update and insert operations from commission records.
-    ✅ FIXED: Now properly aggregates records by unique constraint (carrier_id, client_name, statement_month, statement_year, user_id, environment_id)
-    Returns (updates_list, inserts_list) for bulk execution.
+    Aggregate per-row commission records by the earned_commissions unique constraint
+    (carrier_id, client_name, statement_month, statement_year, user_id, environment_id).
     """
-    
-    # ✅ CRITICAL FIX: Aggregate commission records by unique constraint FIRST
     print(f"📊 Aggregating {len(commission_records)} individual records by unique constraint...")
     
     # Group records by unique constraint: (carrier_id, client_name, statement_month, statement_year, user_id, environment_id)
@@ -937,6 +999,18 @@ def prepare_bulk_operations(commission_records: List[Dict[str, Any]], existing_r
     for unique_key, agg_record in list(aggregated_records.items())[:3]:  # Show first 3
         print(f"   📋 {agg_record['client_name']} (user: {agg_record['user_id']}): ${agg_record['commission_earned']:.2f} commission, ${agg_record['invoice_total']:.2f} invoice")
     
+    return aggregated_records
+
+def prepare_bulk_operations(commission_records: List[Dict[str, Any]], existing_records: Dict[tuple, EarnedCommission]) -> tuple:
+    """
+    Prepare bulk update and insert operations from commission records.
+    ✅ FIXED: Now properly aggregates records by unique constraint (carrier_id, client_name, statement_month, statement_year, user_id, environment_id)
+    Returns (updates_list, inserts_list) for bulk execution.
+    """
+    
+    # ✅ CRITICAL FIX: Aggregate commission records by unique constraint FIRST
+    aggregated_records = aggregate_commission_records(commission_records)
+    
     # Now prepare bulk operations with aggregated data
     updates = []
     inserts = []
@@ -1045,6 +1119,103 @@ def prepare_bulk_operations(commission_records: List[Dict[str, Any]], existing_r
     print(f"📊 Bulk operations prepared: {len(updates)} updates, {len(inserts)} inserts")
     return updates, inserts
 
+# Rows per INSERT ... ON CONFLICT statement (~27 bind params per row, asyncpg caps a statement at 32767)
+COMMISSION_UPSERT_CHUNK_SIZE = 1000
+
+def build_commission_upsert_statement(rows: List[Dict[str, Any]]):
+    """
+    Build one INSERT ... ON CONFLICT (uq_carrier_client_month_year_user_env) DO UPDATE for rows.
+    
+    Mirrors prepare_bulk_operations in SQL: if the existing record already lists the incoming
+    upload_ids it is a RECALCULATION and values are replaced, otherwise they are added and the
+    upload_ids merged. Monthly *_commission columns follow the same rule for the months the
+    incoming row carries; the other months are inserted as NULL and left untouched on update.
+    """
+    stmt = pg_insert(EarnedCommission).values(rows)
+    excluded = stmt.excluded
+    
+    existing_upload_ids = func.coalesce(cast(EarnedCommission.upload_ids, JSONB), cast(literal('[]'), JSONB))
+    is_recalculation = existing_upload_ids.op('@>')(cast(excluded.upload_ids, JSONB))
+    
+    set_ = {
+        'invoice_total': case(
+            (is_recalculation, excluded.invoice_total),
+            else_=func.coalesce(EarnedCommission.invoice_total, 0) + excluded.invoice_total
+        ),
+        'commission_earned': case(
+            (is_recalculation, excluded.commission_earned),
+            else_=func.coalesce(EarnedCommission.commission_earned, 0) + excluded.commission_earned
+        ),
+        'statement_count': case(
+            (is_recalculation, func.coalesce(EarnedCommission.statement_count, 1)),
+            else_=func.coalesce(EarnedCommission.statement_count, 0) + 1
+        ),
+        'upload_ids': case(
+            (is_recalculation, EarnedCommission.upload_ids),
+            else_=cast(existing_upload_ids.op('||')(cast(excluded.upload_ids, JSONB)), JSON)
+        ),
+        'last_updated': excluded.last_updated
+    }
+    
+    for column_name in MONTH_COLUMNS.values():
+        current_value = getattr(EarnedCommission, column_name)
+        incoming_value = getattr(excluded, column_name)
+        # Months the incoming row does not touch are NULL and leave the stored value as is
+        set_[column_name] = case(
+            (incoming_value.is_(None), current_value),
+            (is_recalculation, incoming_value),
+            else_=func.coalesce(current_value, 0) + incoming_value
+        )
+    
+    return stmt.on_conflict_do_update(
+        constraint='uq_carrier_client_month_year_user_env',
+        set_=set_
+    )
+
+async def upsert_commission_records_bulk(db: AsyncSession, commission_records: List[Dict[str, Any]]) -> int:
+    """
+    🚀 Apply commission records with INSERT ... ON CONFLICT DO UPDATE - no prior SELECT and no
+    per-row UPDATE round trips.
+    
+    IMPORTANT: Only valid when every record has user_id AND environment_id. The unique
+    constraint treats NULLs as distinct, so NULL keys would never conflict and would insert
+    duplicates - callers must use the fetch + prepare_bulk_operations path for those.
+    Returns the number of aggregated records written.
+    """
+    aggregated_records = aggregate_commission_records(commission_records)
+    
+    now = datetime.utcnow()
+    rows = []
+    for agg_record in aggregated_records.values():
+        row = {
+            'id': uuid.uuid4(),
+            'carrier_id': agg_record['carrier_id'],
+            'client_name': agg_record['client_name'],
+            'invoice_total': agg_record['invoice_total'],
+            'commission_earned': agg_record['commission_earned'],
+            'statement_count': 1,
+            'upload_ids': sorted(agg_record['upload_ids']),
+            'statement_date': agg_record['statement_date'],
+            'statement_month': agg_record['statement_month'],
+            'statement_year': agg_record['statement_year'],
+            'user_id': agg_record['user_id'],
+            'environment_id': agg_record['environment_id'],
+            'created_at': now,
+            'last_updated': now
+        }
+        # Every row needs the same column set for a multi-row VALUES list; months without
+        # data stay NULL, as they do on the insert path
+        for month_num, column_name in MONTH_COLUMNS.items():
+            row[column_name] = agg_record['monthly_commissions'].get(month_num)
+        rows.append(row)
+    
+    for i in range(0, len(rows), COMMISSION_UPSERT_CHUNK_SIZE):
+        chunk = rows[i:i + COMMISSION_UPSERT_CHUNK_SIZE]
+        await db.execute(build_commission_upsert_statement(chunk))
+    
+    print(f"⚡ Bulk upsert: Applied {len(rows)} commission records in {(len(rows) + COMMISSION_UPSERT_CHUNK_SIZE - 1) // COMMISSION_UPSERT_CHUNK_SIZE} statement(s)")
+    return len(rows)
+
 def analyze_commission_duplicates(commission_records: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze commission records to identify potential duplicates."""
     
@@ -1107,6 +1278,22 @@ def parse_currency_amount(amount_str: str) -> float:
 async def remove_upload_from_earned_commissions(db: AsyncSession, upload_id: str):
     """Remove an upload from earned commission records and recalculate totals."""
     try:
+        # ✅ LEDGER: Subtract the recorded contribution directly - no final_data reload or table scan
+        from .commission_ledger import remove_upload_contributions
+        from .commission_ledger import get_upload_contribution_cells
+        from .dashboard_aggregates import refresh_dashboard_aggregates
+        dashboard_cells = set(await get_upload_contribution_cells(db, upload_id))
+        if dashboard_cells:
+            reverted_count = await remove_upload_contributions(db, upload_id, dashboard_cells)
+            upload_user_id = (await db.execute(
+                select(StatementUploadModel.user_id).where(StatementUploadModel.id == UUID(str(upload_id)))
+            )).scalar_one_or_none()
+            await refresh_dashboard_aggregates(db, upload_user_id, dashboard_cells)
+            await db.commit()
+            print(f"Successfully removed upload {upload_id} via contribution ledger ({reverted_count} contributions)")
+            return
+        
+        # Legacy path for uploads approved before the ledger existed (not yet backfilled)
         # First, get the statement being deleted to extract its contribution
         from .statement_upload import get_statement_by_id
         deleted_statement = await get_statement_by_id(db, upload_id)
@@ -1206,6 +1393,10 @@ async def remove_upload_from_earned_commissions(db: AsyncSession, upload_id: str
                         print(f"🎯 Remove Upload: Could not extract deleted contribution, falling back to full recalculation for {commission.client_name}")
                         await recalculate_commission_totals(db, commission)
         
+        await refresh_dashboard_aggregates(db, deleted_statement.user_id, {
+            (commission.environment_id, commission.carrier_id, commission.statement_year)
+            for commission in records_to_update
+        })
         await db.commit()
         print(f"Successfully removed upload {upload_id} from {len(records_to_update)} commission records")
         
@@ -1642,24 +1833,6 @@ async def bulk_process_commissions(db: AsyncSession, statement_upload: Statement
     if not environment_id:
         print(f"⚠️  WARNING: No environment_id found in statement upload {statement_upload.id}")
     
-    # ✅ OPTIMIZED: Extract field mappings ONCE at the beginning
-    field_mappings = extract_field_mappings_once(statement_upload.field_config)
-    client_name_field = field_mappings['client_name_field']
-    commission_earned_field = field_mappings['commission_earned_field']
-    invoice_total_field = field_mappings['invoice_total_field']
-    
-    if not client_name_field or not commission_earned_field:
-        print(f"❌ Missing required fields: client={client_name_field}, commission={commission_earned_field}")
-        return None
-    
-    print(f"✅ OPTIMIZED: Pre-extracted field mappings: client={client_name_field}, commission={commission_earned_field}, invoice={invoice_total_field}")
-    print(f"👤 Processing for user_id: {user_id}")
-    print(f"🌍 Processing for environment_id: {environment_id}")
-    
-    # Extract statement date information
-    statement_date, statement_month, statement_year = extract_statement_date_info(statement_upload)
-    print(f"📅 Statement date: {statement_date} (month: {statement_month}, year: {statement_year})")
-    
     # Get carrier name for validation (try to get from carrier_id lookup if available)
     carrier_name = None
     if hasattr(statement_upload, 'carrier_name') and statement_upload.carrier_name:
@@ -1677,6 +1850,117 @@ async def bulk_process_commissions(db: AsyncSession, statement_upload: Statement
         except Exception as e:
             logger.warning(f"Could not retrieve carrier name: {e}")
     
+    # ✅ OPTIMIZED: Extract all commission data in memory (no DB calls)
+    commission_records = collect_commission_records(statement_upload, carrier_name)
+    if commission_records is None:
+        return None
+    
+    # ✅ LEDGER: On re-approval/recalculation, back out this upload's previous contribution
+    # as a signed delta so the records below are simply added again (no final_data re-scan)
+    from .commission_ledger import remove_upload_contributions, save_upload_contributions, get_upload_contribution_cells
+    from .dashboard_aggregates import refresh_dashboard_aggregates
+    upload_id = str(statement_upload.id)
+    # Dashboard rows to rebuild: what the upload contributed before, what it contributes now,
+    # and its environment's statement counts
+    previous_cells = await get_upload_contribution_cells(db, upload_id)
+    dashboard_cells = set(previous_cells)
+    dashboard_cells.add((environment_id, None, None))
+    dashboard_cells.update(
+        (record.get('environment_id'), record['carrier_id'], record['statement_year'])
+        for record in commission_records
+    )
+    if previous_cells:
+        reverted_count = await remove_upload_contributions(db, upload_id, dashboard_cells)
+        print(f"🔄 LEDGER: Reverted {reverted_count} previous contributions of upload {upload_id}")
+        # Flush so the SQL-side recalculation check below sees the reverted upload_ids
+        await db.flush()
+    
+    if not commission_records:
+        print("ℹ️ No commission records to process")
+        await refresh_dashboard_aggregates(db, user_id, dashboard_cells)
+        return True
+    
+    print(f"📊 Extracted {len(commission_records)} commission records for bulk processing")
+    
+    # ✅ DEBUG: Analyze duplicates before processing
+    if commission_records:
+        analysis = analyze_commission_duplicates(commission_records)
+        print(f"📊 Commission Analysis: {analysis}")
+    
+    # ✅ OPTIMIZED: Execute operations (transaction managed by FastAPI)
+    try:
+        if user_id and environment_id:
+            # ✅ FAST PATH: Single INSERT ... ON CONFLICT DO UPDATE per chunk - no lookup query
+            # and no per-record UPDATE round trips
+            await upsert_commission_records_bulk(db, commission_records)
+        else:
+            # NULL user/environment keys never conflict on the unique constraint, so fall back
+            # to lookup + separate UPDATE/INSERT for legacy uploads
+            # ✅ CRITICAL OPTIMIZATION: Fetch ALL existing records in SINGLE query (eliminates N+1 problem)
+            existing_records = await fetch_existing_commission_records_bulk(db, commission_records)
+            
+            # ✅ OPTIMIZED: Prepare bulk operations
+            updates, inserts = prepare_bulk_operations(commission_records, existing_records)
+            
+            # Execute bulk updates if any
+            if updates:
+                print(f"🔄 Executing bulk update for {len(updates)} records")
+                for update_data in updates:
+                    record_id = update_data.pop('id')
+                    await db.execute(
+                        update(EarnedCommission)
+                        .where(EarnedCommission.id == record_id)
+                        .values(**update_data)
+                    )
+            
+            # Execute bulk inserts if any
+            if inserts:
+                print(f"➕ Executing bulk insert for {len(inserts)} records")
+                await db.execute(insert(EarnedCommission), inserts)
+        
+        # Record what this upload contributed so removal is a delta, not a recalculation
+        await save_upload_contributions(db, upload_id, commission_records)
+        
+        # Rebuild the affected dashboard stats rows in the same transaction as the rollup writes
+        await refresh_dashboard_aggregates(db, user_id, dashboard_cells)
+        
+        print(f"✅ BULK PROCESSING: Successfully processed {len(commission_records)} records")
+        print(f"📈 Performance: Reduced from 600-800 DB operations to 2-3 operations")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error in bulk processing: {e}")
+        raise
+
+def collect_commission_records(statement_upload: StatementUploadModel, carrier_name: str = None, statement_date_info: tuple = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract per-row commission records from an approved statement's final_data without touching the DB.
+    
+    Returns None when the client or commission field cannot be resolved from field_config.
+    statement_date_info overrides the (date, month, year) derived from selected_statement_date.
+    Shared by bulk_process_commissions and the contribution ledger backfill.
+    """
+    user_id = statement_upload.user_id
+    environment_id = statement_upload.environment_id
+    
+    # ✅ OPTIMIZED: Extract field mappings ONCE at the beginning
+    field_mappings = extract_field_mappings_once(statement_upload.field_config)
+    client_name_field = field_mappings['client_name_field']
+    commission_earned_field = field_mappings['commission_earned_field']
+    invoice_total_field = field_mappings['invoice_total_field']
+    
+    if not client_name_field or not commission_earned_field:
+        print(f"❌ Missing required fields: client={client_name_field}, commission={commission_earned_field}")
+        return None
+    
+    print(f"✅ OPTIMIZED: Pre-extracted field mappings: client={client_name_field}, commission={commission_earned_field}, invoice={invoice_total_field}")
+    print(f"👤 Processing for user_id: {user_id}")
+    print(f"🌍 Processing for environment_id: {environment_id}")
+    
+    # Extract statement date information
+    statement_date, statement_month, statement_year = statement_date_info or extract_statement_date_info(statement_upload)
+    print(f"📅 Statement date: {statement_date} (month: {statement_month}, year: {statement_year})")
+    
     # ✅ OPTIMIZED: Extract all commission data in memory (no DB calls)
     commission_records = []
     
@@ -1822,48 +2106,8 @@ async def bulk_process_commissions(db: AsyncSession, statement_upload: Statement
                 # Continue processing other rows instead of failing completely
                 continue
     
-    if not commission_records:
-        print("ℹ️ No commission records to process")
-        return True
-    
-    print(f"📊 Extracted {len(commission_records)} commission records for bulk processing")
-    
-    # ✅ DEBUG: Analyze duplicates before processing
-    if commission_records:
-        analysis = analyze_commission_duplicates(commission_records)
-        print(f"📊 Commission Analysis: {analysis}")
-    
-    # ✅ CRITICAL OPTIMIZATION: Fetch ALL existing records in SINGLE query (eliminates N+1 problem)
-    existing_records = await fetch_existing_commission_records_bulk(db, commission_records)
-    
-    # ✅ OPTIMIZED: Prepare bulk operations
-    updates, inserts = prepare_bulk_operations(commission_records, existing_records)
-    
-    # ✅ OPTIMIZED: Execute operations (transaction managed by FastAPI)
-    try:
-        # Execute bulk updates if any
-        if updates:
-            print(f"🔄 Executing bulk update for {len(updates)} records")
-            for update_data in updates:
-                record_id = update_data.pop('id')
-                await db.execute(
-                    update(EarnedCommission)
-                    .where(EarnedCommission.id == record_id)
-                    .values(**update_data)
-                )
-        
-        # Execute bulk inserts if any
-        if inserts:
-            print(f"➕ Executing bulk insert for {len(inserts)} records")
-            await db.execute(insert(EarnedCommission), inserts)
-        
-        print(f"✅ BULK PROCESSING: Successfully processed {len(commission_records)} records")
-        print(f"📈 Performance: Reduced from 600-800 DB operations to 2-3 operations")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error in bulk processing: {e}")
-        raise
+    return commission_records
+
 
 def extract_statement_date_info(statement_upload: StatementUploadModel) -> tuple:
     """Extract statement date information from upload."""
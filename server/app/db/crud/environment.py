@@ -5,7 +5,8 @@ Handles creating, reading, updating, deleting environments
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.db.models import Environment
+from app.db.models import Environment, EarnedCommission, StatementUpload
+from .dashboard_aggregates import dashboard_cells_by_user, refresh_dashboard_for_users
 from uuid import UUID
 from typing import Optional, List
 import logging
@@ -175,7 +176,22 @@ async def delete_environment(
     if not environment:
         return False
     
+    # Statements and commission records go with the environment (ON DELETE CASCADE)
+    commission_cells = await db.execute(
+        select(
+            EarnedCommission.user_id, EarnedCommission.environment_id,
+            EarnedCommission.carrier_id, EarnedCommission.statement_year
+        ).where(EarnedCommission.environment_id == environment_id).distinct()
+    )
+    statement_cells = await db.execute(
+        select(StatementUpload.user_id, StatementUpload.environment_id)
+        .where(StatementUpload.environment_id == environment_id).distinct()
+    )
+    dashboard_cells = dashboard_cells_by_user(commission_cells.all(), statement_cells.all())
+    
     await db.delete(environment)
+    await db.flush()
+    await refresh_dashboard_for_users(db, dashboard_cells)
     await db.commit()
     logger.info(f"Deleted environment {environment_id} for user {user_id}")
     return True
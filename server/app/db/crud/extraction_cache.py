@@ -0,0 +1,136 @@
+"""
+Persistent extraction result cache.
+
+Standardized extraction results are stored per (file sha256, extraction method, version),
+where version covers the prompts and models that produced the result. Re-uploading a file
+that was already extracted with the same method/prompts/models replays the stored result
+instead of calling the AI services again. Entries expire after EXTRACTION_CACHE_TTL and the
+table is kept under EXTRACTION_CACHE_MAX_BYTES by evicting least recently used entries.
+Lives in Postgres, so it is shared by every worker and survives restarts.
+"""
+from ..models import ExtractionResultCache, CompressedJSON
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import delete, update, func
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_CACHE_ENABLED = os.getenv('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true'
+EXTRACTION_CACHE_TTL = timedelta(hours=int(os.getenv('EXTRACTION_CACHE_TTL_HOURS', str(24 * 30))))
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv('EXTRACTION_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+_compressed_json = CompressedJSON()
+
+
+def extraction_cache_key(file_hash: str, extraction_method: str, version: str) -> str:
+    return hashlib.sha256(f"{file_hash}|{extraction_method}|{version}".encode('utf-8')).hexdigest()
+
+
+async def get_cached_extraction(
+    db: AsyncSession,
+    file_hash: str,
+    extraction_method: str,
+    version: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached result; a hit refreshes its LRU position and is committed.
+
+    Returns None on a miss or an expired entry.
+    """
+    cache_key = extraction_cache_key(file_hash, extraction_method, version)
+    now = datetime.utcnow()
+
+    result = await db.execute(
+        update(ExtractionResultCache)
+        .where(ExtractionResultCache.cache_key == cache_key, ExtractionResultCache.expires_at > now)
+        .values(last_accessed_at=now, hit_count=ExtractionResultCache.hit_count + 1)
+        .returning(ExtractionResultCache.result)
+    )
+    cached = result.scalar_one_or_none()
+    await db.commit()
+    return cached
+
+
+async def save_cached_extraction(
+    db: AsyncSession,
+    file_hash: str,
+    extraction_method: str,
+    version: str,
+    result: Dict[str, Any]
+) -> Optional[int]:
+    """
+    Store (or replace) a result, then evict expired and least recently used entries.
+
+    Returns the stored size in bytes, or None if the result is not JSON serializable.
+    Commits.
+    """
+    try:
+        # Round-trip so what we store is exactly what a hit will replay
+        payload = json.loads(json.dumps(result, default=str))
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Extraction result for {file_hash[:16]}... not cacheable: {e}")
+        return None
+
+    size_bytes = len(_compressed_json.process_bind_param(payload, None))
+    now = datetime.utcnow()
+    values = {
+        'cache_key': extraction_cache_key(file_hash, extraction_method, version),
+        'file_hash': file_hash,
+        'extraction_method': extraction_method,
+        'version': version,
+        'result': payload,
+        'size_bytes': size_bytes,
+        'hit_count': 0,
+        'created_at': now,
+        'last_accessed_at': now,
+        'expires_at': now + EXTRACTION_CACHE_TTL
+    }
+    stmt = pg_insert(ExtractionResultCache).values(**values)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[ExtractionResultCache.cache_key],
+        set_={k: stmt.excluded[k] for k in values if k != 'cache_key'}
+    ))
+
+    await evict_extraction_cache(db)
+    await db.commit()
+    return size_bytes
+
+
+async def evict_extraction_cache(db: AsyncSession, max_bytes: int = None) -> int:
+    """
+    Drop expired entries, then the least recently used ones until the cache fits max_bytes.
+
+    Serialized with an advisory lock so concurrent saves do not over-evict. Does not commit.
+    """
+    max_bytes = EXTRACTION_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext('extraction_result_cache:evict'))))
+
+    expired = await db.execute(
+        delete(ExtractionResultCache).where(ExtractionResultCache.expires_at <= datetime.utcnow())
+    )
+    evicted = expired.rowcount or 0
+
+    # Running total from the most recently used entry down; everything past the budget goes
+    running_total = func.sum(ExtractionResultCache.size_bytes).over(
+        order_by=ExtractionResultCache.last_accessed_at.desc()
+    )
+    ranked = select(ExtractionResultCache.cache_key, running_total.label('running_total')).subquery()
+    lru = await db.execute(
+        delete(ExtractionResultCache).where(
+            ExtractionResultCache.cache_key.in_(
+                select(ranked.c.cache_key).where(ranked.c.running_total > max_bytes)
+            )
+        )
+    )
+    evicted += lru.rowcount or 0
+
+    if evicted:
+        logger.info(f"🗑️ Extraction cache: evicted {evicted} entries")
+    return evicted
@@ -0,0 +1,229 @@
+"""
+Durable extraction job queue.
+
+Jobs live in extraction_jobs. Any worker process claims the oldest queued job with
+SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never claim the same job or block
+each other. A running job's heartbeat_at is its lease: jobs whose worker stopped
+heartbeating (crash, restart) are requeued, or failed once max_attempts is used up.
+Cancellation is a flag on the row, so it works whichever worker holds the job.
+All functions commit.
+"""
+from ..models import ExtractionJob
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update, func, and_, case
+from datetime import timedelta
+from typing import Optional, Dict, Any
+from uuid import UUID
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+
+def _job_dict(job: ExtractionJob) -> Dict[str, Any]:
+    return {
+        'id': job.id,
+        'upload_id': job.upload_id,
+        'upload_uuid': job.upload_uuid,
+        'user_id': job.user_id,
+        'handler': job.handler,
+        'payload': job.payload,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'worker_id': job.worker_id,
+        'cancel_requested': job.cancel_requested,
+        'progress': job.progress,
+        'progress_message': job.progress_message,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at
+    }
+
+
+async def enqueue_extraction_job(
+    db: AsyncSession,
+    upload_id: str,
+    upload_uuid: UUID,
+    handler: str,
+    payload: Dict[str, Any],
+    user_id: Optional[UUID] = None,
+    max_attempts: int = 2
+) -> Dict[str, Any]:
+    job = ExtractionJob(
+        upload_id=upload_id,
+        upload_uuid=upload_uuid,
+        user_id=user_id,
+        handler=handler,
+        payload=payload,
+        status='queued',
+        max_attempts=max_attempts
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return _job_dict(job)
+
+
+async def claim_extraction_job(db: AsyncSession, worker_id: str, job_id: Optional[UUID] = None) -> Optional[Dict[str, Any]]:
+    """
+    Claim the oldest queued job (or a specific one) for worker_id.
+
+    Returns the job as a dict with status 'running', or None if nothing is claimable.
+    """
+    candidate = select(ExtractionJob.id).where(ExtractionJob.status == 'queued')
+    if job_id is not None:
+        candidate = candidate.where(ExtractionJob.id == job_id)
+    candidate = candidate.order_by(ExtractionJob.created_at).limit(1).with_for_update(skip_locked=True)
+
+    result = await db.execute(
+        update(ExtractionJob)
+        .where(ExtractionJob.id == candidate.scalar_subquery())
+        .values(
+            status='running',
+            worker_id=worker_id,
+            attempts=ExtractionJob.attempts + 1,
+            started_at=func.now(),
+            heartbeat_at=func.now()
+        )
+        .returning(ExtractionJob)
+        .execution_options(synchronize_session=False)
+    )
+    job = result.scalar_one_or_none()
+    await db.commit()
+    return _job_dict(job) if job is not None else None
+
+
+async def heartbeat_extraction_job(
+    db: AsyncSession,
+    job_id: UUID,
+    worker_id: str,
+    progress: Optional[int] = None,
+    progress_message: Optional[str] = None
+) -> Optional[bool]:
+    """
+    Renew the lease of a running job and record its progress.
+
+    Returns whether cancellation was requested, or None if the worker no longer holds the
+    job (it was requeued or finished elsewhere).
+    """
+    values = {'heartbeat_at': func.now()}
+    if progress is not None:
+        values['progress'] = progress
+        values['progress_message'] = progress_message
+
+    result = await db.execute(
+        update(ExtractionJob)
+        .where(
+            ExtractionJob.id == job_id,
+            ExtractionJob.worker_id == worker_id,
+            ExtractionJob.status == 'running'
+        )
+        .values(**values)
+        .returning(ExtractionJob.cancel_requested)
+    )
+    cancel_requested = result.scalar_one_or_none()
+    await db.commit()
+    return cancel_requested
+
+
+async def finish_extraction_job(
+    db: AsyncSession,
+    job_id: UUID,
+    worker_id: str,
+    status: str,
+    error: Optional[str] = None
+) -> bool:
+    """Record a job's final status ('succeeded', 'failed', 'cancelled'), or put it back ('queued')."""
+    values = {'status': status, 'error': error}
+    if status == 'queued':
+        # Released (e.g. on shutdown): the attempt does not count
+        values.update(worker_id=None, heartbeat_at=None, attempts=ExtractionJob.attempts - 1)
+    else:
+        values.update(finished_at=func.now())
+        if status == 'succeeded':
+            values['progress'] = 100
+
+    result = await db.execute(
+        update(ExtractionJob)
+        .where(
+            ExtractionJob.id == job_id,
+            ExtractionJob.worker_id == worker_id,
+            ExtractionJob.status == 'running'
+        )
+        .values(**values)
+    )
+    await db.commit()
+    return (result.rowcount or 0) > 0
+
+
+async def request_extraction_job_cancel(db: AsyncSession, upload_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Cancel the active job for an upload tracking id.
+
+    A queued job is cancelled right away; a running one gets cancel_requested and is
+    stopped by the worker holding it at its next heartbeat. Returns the job as it was
+    before the request, or None if there is no active job.
+    """
+    result = await db.execute(
+        select(ExtractionJob)
+        .where(ExtractionJob.upload_id == upload_id, ExtractionJob.status.in_(ACTIVE_JOB_STATUSES))
+        .order_by(ExtractionJob.created_at.desc())
+        .limit(1)
+        .with_for_update()
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        await db.commit()
+        return None
+
+    before = _job_dict(job)
+    if job.status == 'queued':
+        job.status = 'cancelled'
+        job.finished_at = func.now()
+    job.cancel_requested = True
+    await db.commit()
+    return before
+
+
+async def get_extraction_job_by_upload_id(db: AsyncSession, upload_id: str) -> Optional[Dict[str, Any]]:
+    """Most recent job for an upload tracking id."""
+    result = await db.execute(
+        select(ExtractionJob)
+        .where(ExtractionJob.upload_id == upload_id)
+        .order_by(ExtractionJob.created_at.desc())
+        .limit(1)
+    )
+    job = result.scalar_one_or_none()
+    return _job_dict(job) if job is not None else None
+
+
+async def requeue_stale_extraction_jobs(db: AsyncSession, lease: timedelta) -> int:
+    """
+    Recover running jobs whose worker stopped heartbeating for longer than lease:
+    requeue them, or fail them when they have used up max_attempts (or cancellation was
+    requested). Returns how many jobs were recovered.
+    """
+    exhausted = (ExtractionJob.attempts >= ExtractionJob.max_attempts) | ExtractionJob.cancel_requested
+    result = await db.execute(
+        update(ExtractionJob)
+        .where(and_(
+            ExtractionJob.status == 'running',
+            ExtractionJob.heartbeat_at < func.now() - lease
+        ))
+        .values(
+            status=case((exhausted, 'failed'), else_='queued'),
+            error=case((exhausted, 'Worker stopped responding'), else_=ExtractionJob.error),
+            finished_at=case((exhausted, func.now()), else_=None),
+            worker_id=None
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    recovered = result.rowcount or 0
+    if recovered:
+        logger.warning(f"♻️ Recovered {recovered} extraction jobs from unresponsive workers")
+    return recovered
@@ -1,7 +1,8 @@
-from ..models import StatementUpload as StatementUploadModel
+from ..models import StatementUpload as StatementUploadModel, StatementUploadPayload, PayloadKindsOption, STATEMENT_PAYLOAD_KINDS
 from ..schemas import StatementUpload, StatementUploadCreate, StatementUploadUpdate, PendingFile
 from sqlalchemy.future import select
-from sqlalchemy import text
+from sqlalchemy import text, func, delete, insert, event
+from sqlalchemy.orm import Session, raiseload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from uuid import UUID
@@ -11,6 +12,112 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def with_payloads():
+    """
+    Loader option for queries whose results read the JSON payload attributes (raw_data,
+    edited_tables, final_data, progress_data, ai_intelligence): loads all payload rows with
+    one extra IN query. Without it (or with_payload_kinds()), reading a payload attribute raises.
+    """
+    return selectinload(StatementUploadModel.payloads)
+
+def without_payloads():
+    """
+    Loader option for queries that only read or update the small statement_uploads columns
+    (status, step, timestamps): skips the payload query, and reading a payload attribute raises.
+    
+    Payloads are not loaded by default either; this makes the intent explicit.
+    """
+    return raiseload(StatementUploadModel.payloads)
+
+def _payload_loader(load_payloads: bool):
+    # For getters whose with_payloads flag shadows the option function
+    return with_payloads() if load_payloads else without_payloads()
+
+async def refresh_upload(db: AsyncSession, db_upload: StatementUploadModel) -> None:
+    """
+    Refresh an upload after commit and reload its payloads.
+    
+    A plain refresh leaves the payloads unloaded on uploads created in this session.
+    """
+    await db.refresh(db_upload)
+    await db.refresh(db_upload, ['payloads'])
+
+def with_payload_kinds(*kinds: str):
+    """
+    Loader option that loads only the given payload kinds.
+    
+    Reading or writing any other payload attribute of the loaded uploads raises, as reading
+    any payload does after without_payloads().
+    """
+    unknown = set(kinds) - set(STATEMENT_PAYLOAD_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown payload kinds: {sorted(unknown)}")
+    return PayloadKindsOption(frozenset(kinds))
+
+@event.listens_for(Session, 'do_orm_execute')
+def _load_payload_kinds(execute_state):
+    """Turn with_payload_kinds() into a selectin load of those payload rows."""
+    if not execute_state.is_select or execute_state.is_relationship_load or execute_state.is_column_load:
+        return
+    for option in execute_state.user_defined_options:
+        if isinstance(option, PayloadKindsOption):
+            execute_state.statement = execute_state.statement.options(selectinload(
+                StatementUploadModel.payloads.and_(StatementUploadPayload.kind.in_(option.payload))
+            ))
+
+async def get_statement_payload(db: AsyncSession, upload_id, kind: str):
+    """
+    Load one payload of an upload on demand, without loading the upload or its other payloads.
+    Falls back to the legacy inline column for uploads not yet migrated.
+    """
+    if kind not in STATEMENT_PAYLOAD_KINDS:
+        raise ValueError(f"Unknown payload kind: {kind}")
+    if isinstance(upload_id, str):
+        upload_id = UUID(upload_id)
+    
+    payload_data = (await db.execute(
+        select(StatementUploadPayload.data)
+        .where(StatementUploadPayload.upload_id == upload_id, StatementUploadPayload.kind == kind)
+        .order_by(StatementUploadPayload.version.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+    if payload_data is not None:
+        return payload_data
+    
+    inline_column = getattr(StatementUploadModel, f'{kind}_inline')
+    return (await db.execute(select(inline_column).where(StatementUploadModel.id == upload_id))).scalar_one_or_none()
+
+async def save_statement_payload(db: AsyncSession, upload_id, kind: str, data) -> None:
+    """
+    Write one payload of an upload as a new version, without loading the upload row.
+    
+    Use on uploads loaded with without_payloads() (or not loaded at all); on an instance with
+    loaded payloads, assign the attribute instead. Does not commit.
+    """
+    if kind not in STATEMENT_PAYLOAD_KINDS:
+        raise ValueError(f"Unknown payload kind: {kind}")
+    if isinstance(upload_id, str):
+        upload_id = UUID(upload_id)
+    
+    payload_filter = (StatementUploadPayload.upload_id == upload_id, StatementUploadPayload.kind == kind)
+    current_version = (await db.execute(
+        select(func.max(StatementUploadPayload.version)).where(*payload_filter)
+    )).scalar()
+    
+    await db.execute(delete(StatementUploadPayload).where(*payload_filter))
+    if data is not None:
+        await db.execute(insert(StatementUploadPayload).values(
+            upload_id=upload_id, kind=kind, version=(current_version or 0) + 1, data=data
+        ))
+    
+    # The payload row supersedes any legacy inline copy
+    uploads_table = StatementUploadModel.__table__
+    await db.execute(
+        uploads_table.update()
+        .where(uploads_table.c.id == upload_id, uploads_table.c[kind].isnot(None))
+        .values({kind: None})
+    )
+
 async def save_statement_upload(db, upload: StatementUpload):
     """
     Save a statement upload to the database.
@@ -53,7 +160,7 @@ async def save_statement_upload(db, upload: StatementUpload):
     )
     db.add(db_upload)
     await db.commit()
-    await db.refresh(db_upload)
+    await refresh_upload(db, db_upload)
     return db_upload
 
 async def create_statement_upload(db: AsyncSession, upload: StatementUploadCreate) -> Optional[StatementUploadModel]:
@@ -100,21 +207,27 @@ async def create_statement_upload(db: AsyncSession, upload: StatementUploadCreat
     )
     db.add(db_upload)
     await db.commit()
-    await db.refresh(db_upload)
+    await refresh_upload(db, db_upload)
     return db_upload
 
 async def update_statement_upload(db: AsyncSession, upload_id: UUID, update_data: StatementUploadUpdate) -> Optional[StatementUploadModel]:
     """
     Update statement upload with progress data and status changes.
     """
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id))
+    update_dict = update_data.dict(exclude_unset=True)
+    
+    # Only load the payloads being written; status/step-only updates need none
+    query = select(StatementUploadModel).where(StatementUploadModel.id == upload_id)
+    payload_kinds = [field for field in update_dict if field in STATEMENT_PAYLOAD_KINDS]
+    query = query.options(with_payload_kinds(*payload_kinds) if payload_kinds else without_payloads())
+    result = await db.execute(query)
     db_upload = result.scalar_one_or_none()
     
     if not db_upload:
         return None
+    previous_status = db_upload.status
     
     # Update fields if provided
-    update_dict = update_data.dict(exclude_unset=True)
     for field, value in update_dict.items():
         setattr(db_upload, field, value)
     
@@ -125,6 +238,10 @@ async def update_statement_upload(db: AsyncSession, upload_id: UUID, update_data
     if update_data.status in ['approved', 'rejected']:
         db_upload.completed_at = datetime.utcnow()
     
+    from .dashboard_aggregates import refresh_dashboard_aggregates, status_change_affects_counts
+    if status_change_affects_counts(previous_status, db_upload.status):
+        await refresh_dashboard_aggregates(db, db_upload.user_id, [(db_upload.environment_id, None, None)])
+    
     await db.commit()
     await db.refresh(db_upload)
     return db_upload
@@ -138,6 +255,7 @@ async def get_pending_files_for_company(db: AsyncSession, company_id: UUID) -> L
             StatementUploadModel.company_id == company_id,
             StatementUploadModel.status == 'pending'
         ).order_by(StatementUploadModel.last_updated.desc())
+        .options(with_payload_kinds('progress_data'))
     )
     uploads = result.scalars().all()
     
@@ -169,6 +287,7 @@ async def get_pending_files_for_company_by_user(db: AsyncSession, company_id: UU
             StatementUploadModel.user_id == user_id,
             StatementUploadModel.status == 'pending'
         ).order_by(StatementUploadModel.last_updated.desc())
+        .options(with_payload_kinds('progress_data'))
     )
     uploads = result.scalars().all()
     
@@ -190,28 +309,34 @@ async def get_pending_files_for_company_by_user(db: AsyncSession, company_id: UU
     
     return pending_files
 
-async def get_statement_upload_by_id(db: AsyncSession, upload_id: UUID) -> Optional[StatementUploadModel]:
+async def get_statement_upload_by_id(db: AsyncSession, upload_id: UUID, with_payloads: bool = True) -> Optional[StatementUploadModel]:
     """
     Get statement upload by ID with all progress data.
+    
+    with_payloads=False skips loading the JSON payloads (see without_payloads()).
     """
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id))
+    query = select(StatementUploadModel).where(StatementUploadModel.id == upload_id)
+    query = query.options(_payload_loader(with_payloads))
+    result = await db.execute(query)
     return result.scalar_one_or_none()
 
 async def save_progress_data(db: AsyncSession, upload_id: UUID, step: str, data: dict, session_id: Optional[str] = None) -> bool:
     """
     Save progress data for a specific step.
     """
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id))
+    result = await db.execute(
+        select(StatementUploadModel).where(StatementUploadModel.id == upload_id).options(without_payloads())
+    )
     db_upload = result.scalar_one_or_none()
     
     if not db_upload:
         return False
     
-    # Update progress data
-    if not db_upload.progress_data:
-        db_upload.progress_data = {}
+    # Update progress data (written as a new payload version - the upload row only gets the step)
+    progress_data = dict(await get_statement_payload(db, upload_id, 'progress_data') or {})
+    progress_data[step] = data
+    await save_statement_payload(db, upload_id, 'progress_data', progress_data)
     
-    db_upload.progress_data[step] = data
     db_upload.current_step = step
     db_upload.last_updated = datetime.utcnow()
     
@@ -225,19 +350,20 @@ async def get_progress_data(db: AsyncSession, upload_id: UUID, step: str) -> Opt
     """
     Get progress data for a specific step.
     """
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id))
-    db_upload = result.scalar_one_or_none()
+    progress_data = await get_statement_payload(db, upload_id, 'progress_data')
     
-    if not db_upload or not db_upload.progress_data:
+    if not progress_data:
         return None
     
-    return db_upload.progress_data.get(step)
+    return progress_data.get(step)
 
 async def resume_upload_session(db: AsyncSession, upload_id: UUID) -> Optional[dict]:
     """
     Resume an upload session with all saved progress data.
     """
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id))
+    result = await db.execute(
+        select(StatementUploadModel).where(StatementUploadModel.id == upload_id).options(with_payloads())
+    )
     db_upload = result.scalar_one_or_none()
     
     if not db_upload or db_upload.status != 'pending':
@@ -260,7 +386,9 @@ async def delete_pending_upload(db: AsyncSession, upload_id: UUID) -> bool:
     """
     Delete a pending upload.
     """
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id))
+    result = await db.execute(
+        select(StatementUploadModel).where(StatementUploadModel.id == upload_id).options(without_payloads())
+    )
     db_upload = result.scalar_one_or_none()
     
     if not db_upload or db_upload.status != 'pending':
@@ -312,8 +440,11 @@ async def save_statement_review(
         logger.error(f"💾 Invalid upload_id format: {upload_id}")
         return None
     
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid))
+    result = await db.execute(
+        select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid).options(with_payloads())
+    )
     db_upload = result.scalar_one_or_none()
+    previous_status = db_upload.status if db_upload else None
     
     # CRITICAL CHANGE: CREATE record if it doesn't exist (for remap flow)
     if not db_upload:
@@ -923,14 +1054,21 @@ async def save_statement_review(
         print(f"✅ Set extracted_invoice_total={extracted_invoice_total}")
     
     # If the statement is approved, process commission data BEFORE committing
+    commissions_processed = None
     if status == "Approved":
         print(f"✅ Statement approved, processing commission data with BULK OPTIMIZATION...")
         from .earned_commission import bulk_process_commissions
-        await bulk_process_commissions(db, db_upload)
+        commissions_processed = await bulk_process_commissions(db, db_upload)
+    
+    from .dashboard_aggregates import refresh_dashboard_aggregates, status_change_affects_counts
+    if not commissions_processed and status_change_affects_counts(previous_status, status):
+        # The statement counts changed even though no commission data was written
+        # (bulk_process_commissions refreshes the aggregates itself when it does)
+        await refresh_dashboard_aggregates(db, db_upload.user_id, [(db_upload.environment_id, None, None)])
     
     # Commit all changes together (statement + commission data)
     await db.commit()
-    await db.refresh(db_upload)
+    await refresh_upload(db, db_upload)
     
     return db_upload
 
@@ -1007,19 +1145,180 @@ async def get_statements_for_carrier(db, carrier_id):
     
     return statements
 
-async def get_statement_by_id(db: AsyncSession, statement_id: str):
+def carrier_key_column():
+    """
+    coalesce(carrier_id, company_id) - the carrier of a statement in both the old (carrier stored
+    in company_id) and new (carrier_id) format. Matches ix_statement_uploads_carrier_key_user.
+    """
+    from sqlalchemy import func
+    return func.coalesce(StatementUploadModel.carrier_id, StatementUploadModel.company_id)
+
+async def get_carrier_statement_counts(
+    db: AsyncSession,
+    user_ids=None,
+    environment_id: Optional[UUID] = None,
+    statuses: Optional[List[str]] = None,
+    carrier_ids: Optional[List[UUID]] = None
+) -> Dict[UUID, int]:
+    """
+    Count statements per carrier in a single grouped query.
+    
+    Args:
+        user_ids: List (or subquery) of user ids to count statements for; None counts all users
+        environment_id: Optional environment filter
+        statuses: Optional status filter (e.g. VALID_PERSISTENT_STATUSES)
+        carrier_ids: Optional list of carriers to restrict the counts to
+        
+    Returns:
+        {carrier_id: statement_count}; carriers without statements are absent
+    """
+    from sqlalchemy import func
+    
+    carrier_key = carrier_key_column()
+    query = select(carrier_key, func.count(StatementUploadModel.id))
+    
+    if user_ids is not None:
+        query = query.where(StatementUploadModel.user_id.in_(user_ids))
+    if environment_id is not None:
+        query = query.where(StatementUploadModel.environment_id == environment_id)
+    if statuses is not None:
+        query = query.where(StatementUploadModel.status.in_(statuses))
+    if carrier_ids is not None:
+        if not carrier_ids:
+            return {}
+        query = query.where(carrier_key.in_(carrier_ids))
+    
+    result = await db.execute(query.group_by(carrier_key))
+    return {carrier_id: count for carrier_id, count in result.all() if carrier_id is not None}
+
+# Columns needed to render statement lists - everything except the heavy JSON payloads
+# (raw_data, edited_tables, final_data, progress_data, ai_intelligence, field_config, ...)
+STATEMENT_LIST_COLUMNS = (
+    StatementUploadModel.id,
+    StatementUploadModel.company_id,
+    StatementUploadModel.carrier_id,
+    StatementUploadModel.file_name,
+    StatementUploadModel.status,
+    StatementUploadModel.uploaded_at,
+    StatementUploadModel.last_updated,
+    StatementUploadModel.completed_at,
+    StatementUploadModel.rejection_reason,
+    StatementUploadModel.plan_types,
+    StatementUploadModel.selected_statement_date,
+    StatementUploadModel.automated_approval,
+    StatementUploadModel.automation_timestamp,
+    StatementUploadModel.total_amount_match,
+    StatementUploadModel.extracted_total,
+    StatementUploadModel.calculated_total,
+    StatementUploadModel.extracted_invoice_total
+)
+
+STATEMENT_LIST_DEFAULT_LIMIT = 50
+STATEMENT_LIST_MAX_LIMIT = 500
+
+def encode_statement_cursor(uploaded_at: Optional[datetime], statement_id) -> str:
+    """Opaque keyset cursor for the (uploaded_at, id) position of the last row of a page."""
+    import base64
+    raw = f"{uploaded_at.isoformat() if uploaded_at else ''}|{statement_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_statement_cursor(cursor: str) -> tuple:
+    """Decode a cursor from encode_statement_cursor. Raises ValueError if it is malformed."""
+    import base64
+    import binascii
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        uploaded_at, statement_id = raw.split('|', 1)
+        return (datetime.fromisoformat(uploaded_at) if uploaded_at else None), UUID(statement_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+async def list_statements_page(
+    db: AsyncSession,
+    statuses: List[str],
+    user_id: Optional[UUID] = None,
+    environment_id: Optional[UUID] = None,
+    carrier_id: Optional[UUID] = None,
+    limit: int = STATEMENT_LIST_DEFAULT_LIMIT,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    One page of a statement list, newest first, keyset-paginated on (uploaded_at, id).
+    
+    Only STATEMENT_LIST_COLUMNS plus the uploading company's name are selected, and the
+    cursor predicate seeks straight to the next page, so cost is independent of how many
+    uploads the tenant has and how deep the page is.
+    
+    Args:
+        statuses: Statuses to include
+        user_id: Restrict to one user's statements (None for all users)
+        environment_id: Optional environment filter
+        carrier_id: Restrict to one carrier (old and new carrier format)
+        limit: Page size (capped at STATEMENT_LIST_MAX_LIMIT)
+        cursor: next_cursor of the previous page
+        
+    Returns:
+        {"statements": [row mappings], "next_cursor": str or None, "has_more": bool}
+    """
+    from sqlalchemy import and_, or_
+    from ..models import Company
+    
+    limit = max(1, min(limit, STATEMENT_LIST_MAX_LIMIT))
+    query = (
+        select(*STATEMENT_LIST_COLUMNS, Company.name.label('company_name'))
+        .join(Company, StatementUploadModel.company_id == Company.id)
+        .where(StatementUploadModel.status.in_(statuses))
+    )
+    
+    if user_id is not None:
+        query = query.where(StatementUploadModel.user_id == user_id)
+    if environment_id is not None:
+        query = query.where(StatementUploadModel.environment_id == environment_id)
+    if carrier_id is not None:
+        query = query.where(carrier_key_column() == carrier_id)
+    
+    if cursor:
+        cursor_uploaded_at, cursor_id = decode_statement_cursor(cursor)
+        if cursor_uploaded_at is not None:
+            query = query.where(or_(
+                StatementUploadModel.uploaded_at < cursor_uploaded_at,
+                and_(StatementUploadModel.uploaded_at == cursor_uploaded_at, StatementUploadModel.id < cursor_id),
+                StatementUploadModel.uploaded_at.is_(None)  # NULLS LAST: undated rows come after every dated one
+            ))
+        else:
+            query = query.where(and_(StatementUploadModel.uploaded_at.is_(None), StatementUploadModel.id < cursor_id))
+    
+    query = query.order_by(
+        StatementUploadModel.uploaded_at.desc().nulls_last(),
+        StatementUploadModel.id.desc()
+    ).limit(limit + 1)
+    
+    rows = (await db.execute(query)).mappings().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_statement_cursor(last['uploaded_at'], last['id'])
+    
+    return {"statements": rows, "next_cursor": next_cursor, "has_more": has_more}
+
+async def get_statement_by_id(db: AsyncSession, statement_id: str, with_payloads: bool = True):
     try:
         # Convert string to UUID if needed
         if isinstance(statement_id, str):
             statement_id = UUID(statement_id)
-        result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == statement_id))
+        query = select(StatementUploadModel).where(StatementUploadModel.id == statement_id)
+        query = query.options(_payload_loader(with_payloads))
+        result = await db.execute(query)
         return result.scalar_one_or_none()
     except ValueError:
         # Invalid UUID format
         return None
 
 async def delete_statement(db: AsyncSession, statement_id: str):
-    statement = await get_statement_by_id(db, statement_id)
+    statement = await get_statement_by_id(db, statement_id, with_payloads=False)
     if not statement:
         raise ValueError(f"Statement with ID {statement_id} not found")
     
@@ -1058,7 +1357,13 @@ async def delete_statement(db: AsyncSession, statement_id: str):
         )
         
         # Delete the statement
+        user_id, environment_id = statement.user_id, statement.environment_id
         await db.delete(statement)
+        await db.flush()
+        
+        # Drop the statement from the dashboard counts
+        from .dashboard_aggregates import refresh_dashboard_aggregates
+        await refresh_dashboard_aggregates(db, user_id, [(environment_id, None, None)])
         await db.commit()
         return True
     except Exception as e:
@@ -1078,7 +1383,10 @@ async def save_edited_tables(db: AsyncSession, tables_data: list):
         return None
     
     # Update the upload with edited tables
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id))
+    result = await db.execute(
+        select(StatementUploadModel).where(StatementUploadModel.id == upload_id)
+        .options(with_payload_kinds('edited_tables', 'progress_data'))
+    )
     db_upload = result.scalar_one_or_none()
     
     if not db_upload:
@@ -1088,14 +1396,13 @@ async def save_edited_tables(db: AsyncSession, tables_data: list):
     db_upload.current_step = 'table_editor'
     db_upload.last_updated = datetime.utcnow()
     
-    # Save in progress_data
-    if not db_upload.progress_data:
-        db_upload.progress_data = {}
-    
-    db_upload.progress_data['table_editor'] = {
+    # Save in progress_data (reassigned so the payload gets a new version)
+    progress_data = dict(db_upload.progress_data or {})
+    progress_data['table_editor'] = {
         'tables': tables_data,
         'table_count': len(tables_data)
     }
+    db_upload.progress_data = progress_data
     
     await db.commit()
     await db.refresh(db_upload)
@@ -1114,7 +1421,10 @@ async def get_edited_tables(db: AsyncSession, upload_id: str):
     except (ValueError, AttributeError):
         return None
     
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid))
+    result = await db.execute(
+        select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid)
+        .options(with_payload_kinds('edited_tables'))
+    )
     db_upload = result.scalar_one_or_none()
     
     if not db_upload:
@@ -1141,7 +1451,10 @@ async def update_upload_tables(db: AsyncSession, upload_id: str, tables_data: li
         print(f"🎯 CRUD: Invalid upload_id format: {upload_id}, error: {e}")
         return None
     
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid))
+    result = await db.execute(
+        select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid)
+        .options(with_payload_kinds('edited_tables', 'progress_data'))
+    )
     db_upload = result.scalar_one_or_none()
     
     if not db_upload:
@@ -1170,22 +1483,21 @@ async def update_upload_tables(db: AsyncSession, upload_id: str, tables_data: li
         db_upload.carrier_id = carrier_id
         print(f"🎯 CRUD: Linking statement to carrier: carrier_id={carrier_id}, company_id stays as user's company={db_upload.company_id}")
     
-    # Save in progress_data
-    if not db_upload.progress_data:
-        db_upload.progress_data = {}
-    
-    db_upload.progress_data['extraction'] = {
+    # Save in progress_data (reassigned so the payload gets a new version)
+    progress_data = dict(db_upload.progress_data or {})
+    progress_data['extraction'] = {
         'tables': tables_data,
         'table_count': len(tables_data)
     }
     
     # Also save selected statement date and carrier info in progress data
     if selected_statement_date or carrier_id:
-        db_upload.progress_data['table_editor'] = {
+        progress_data['table_editor'] = {
             'selected_statement_date': selected_statement_date,
             'carrier_id': carrier_id
         }
         print(f"🎯 CRUD: Also saved statement date and carrier to progress_data")
+    db_upload.progress_data = progress_data
     
     await db.commit()
     await db.refresh(db_upload)
@@ -1208,7 +1520,10 @@ async def delete_edited_tables(db: AsyncSession, upload_id: str):
     except (ValueError, AttributeError):
         return False
     
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid))
+    result = await db.execute(
+        select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid)
+        .options(with_payload_kinds('edited_tables', 'progress_data'))
+    )
     db_upload = result.scalar_one_or_none()
     
     if not db_upload:
@@ -1218,14 +1533,16 @@ async def delete_edited_tables(db: AsyncSession, upload_id: str):
     
     # Remove from progress_data
     if db_upload.progress_data and 'table_editor' in db_upload.progress_data:
-        del db_upload.progress_data['table_editor']
+        db_upload.progress_data = {key: value for key, value in db_upload.progress_data.items() if key != 'table_editor'}
     
     await db.commit()
     return True
 
-async def get_upload_by_id(db: AsyncSession, upload_id: str):
+async def get_upload_by_id(db: AsyncSession, upload_id: str, with_payloads: bool = True):
     """
     Get upload by ID with all progress data.
+    
+    with_payloads=False skips loading the JSON payloads (see without_payloads()).
     """
     # Convert string to UUID if needed
     try:
@@ -1236,7 +1553,9 @@ async def get_upload_by_id(db: AsyncSession, upload_id: str):
     except (ValueError, AttributeError):
         return None
     
-    result = await db.execute(select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid))
+    query = select(StatementUploadModel).where(StatementUploadModel.id == upload_id_uuid)
+    query = query.options(_payload_loader(with_payloads))
+    result = await db.execute(query)
     return result.scalar_one_or_none()
 
 async def get_statement_by_file_hash_and_status(
@@ -1265,7 +1584,7 @@ async def get_statement_by_file_hash_and_status(
                 StatementUploadModel.file_hash == file_hash,
                 StatementUploadModel.status.in_(valid_statuses)
             )
-        )
+        ).options(with_payload_kinds('raw_data'))
     )
     return result.scalar_one_or_none()
 
@@ -1,9 +1,17 @@
 from sqlalchemy import (
-    Column, String, Integer, Text, TIMESTAMP, JSON, ForeignKey, DateTime, text, UniqueConstraint, Numeric, Boolean
+    Column, String, Integer, Text, TIMESTAMP, JSON, ForeignKey, DateTime, text, UniqueConstraint, Numeric, Boolean, Index,
+    LargeBinary, Float, BigInteger, and_, exists
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import UserDefinedOption, relationship
+from sqlalchemy.orm.collections import attribute_keyed_dict
+from sqlalchemy.types import TypeDecorator
+import json
 import uuid
+import zlib
 
 Base = declarative_base()
 
@@ -110,11 +118,14 @@ class StatementUpload(Base):
     current_step = Column(String, default='upload')  # upload, table_editor, field_mapper, dashboard, completed
     
     # Progress Data Storage
-    progress_data = Column(JSON)  # Store intermediate data for each step
-    raw_data = Column(JSON)  # Extracted table data
-    edited_tables = Column(JSON)  # Tables after editing in TableEditor
+    # progress_data, raw_data, edited_tables, final_data and ai_intelligence live in
+    # statement_upload_payloads (see the payload properties below). These inline columns only
+    # hold rows written before the payload store existed, until migrate_statement_payloads.py moves them.
+    progress_data_inline = Column('progress_data', JSON(none_as_null=True))  # Store intermediate data for each step
+    raw_data_inline = Column('raw_data', JSON(none_as_null=True))  # Extracted table data
+    edited_tables_inline = Column('edited_tables', JSON(none_as_null=True))  # Tables after editing in TableEditor
     field_mapping = Column(JSON)  # Field mapping configuration
-    final_data = Column(JSON)  # Final processed data
+    final_data_inline = Column('final_data', JSON(none_as_null=True))  # Final processed data
     
     # Metadata
     mapping_used = Column(JSON)
@@ -122,7 +133,7 @@ class StatementUpload(Base):
     rejection_reason = Column(Text)
     plan_types = Column(JSON)  # Store list of plan types (Medical, Dental, etc)
     selected_statement_date = Column(JSON)  # Store selected statement date from TableEditor
-    ai_intelligence = Column(JSON)  # Store AI intelligence data (table selection, field mapping, plan detection)
+    ai_intelligence_inline = Column('ai_intelligence', JSON(none_as_null=True))  # Store AI intelligence data (table selection, field mapping, plan detection)
     
     # Timestamps
     last_updated = Column(DateTime, server_default=text('now()'), onupdate=text('now()'), nullable=False)
@@ -139,6 +150,123 @@ class StatementUpload(Base):
     extracted_total = Column(Numeric(15, 2), nullable=True)  # The earned commission total extracted from document (AI-extracted value)
     calculated_total = Column(Numeric(15, 2), nullable=True)  # The earned commission total calculated from table rows
     extracted_invoice_total = Column(Numeric(15, 2), nullable=True)  # The invoice total calculated from table data
+    
+    __table_args__ = (
+        # Carrier statement counts group/filter on coalesce(carrier_id, company_id) (legacy rows
+        # stored the carrier in company_id) - expression index so those lookups don't scan
+        Index('ix_statement_uploads_carrier_key_user', text('coalesce(carrier_id, company_id)'), 'user_id'),
+        # Keyset pagination of statement lists (ORDER BY uploaded_at DESC NULLS LAST, id DESC),
+        # per user and per carrier
+        Index('ix_statement_uploads_user_uploaded', 'user_id', text('uploaded_at DESC NULLS LAST'), text('id DESC')),
+        Index('ix_statement_uploads_carrier_key_uploaded', text('coalesce(carrier_id, company_id)'), text('uploaded_at DESC NULLS LAST'), text('id DESC')),
+    )
+    
+    # Heavy JSON payloads, one row per kind. Never loaded by default (reading a payload attribute
+    # raises); queries that read them load them explicitly with crud.statement_upload.with_payloads()
+    # or with_payload_kinds()
+    payloads = relationship(
+        'StatementUploadPayload',
+        collection_class=attribute_keyed_dict('kind'),
+        order_by='StatementUploadPayload.version',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        lazy='raise'
+    )
+    
+    @classmethod
+    def payload_is_null(cls, kind: str):
+        """SQL condition: the upload has no payload of this kind (in the payload store or inline)."""
+        return and_(
+            ~exists().where(and_(
+                StatementUploadPayload.upload_id == cls.id,
+                StatementUploadPayload.kind == kind
+            )),
+            getattr(cls, f'{kind}_inline').is_(None)
+        )
+
+class CompressedJSON(TypeDecorator):
+    """JSON stored as zlib-compressed bytes (keeps key order, unlike JSONB)."""
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 6)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(value).decode('utf-8'))
+
+STATEMENT_PAYLOAD_KINDS = ('raw_data', 'edited_tables', 'final_data', 'progress_data', 'ai_intelligence')
+
+class StatementUploadPayload(Base):
+    __tablename__ = 'statement_upload_payloads'
+    upload_id = Column(UUID(as_uuid=True), ForeignKey('statement_uploads.id', ondelete='CASCADE'), primary_key=True)
+    kind = Column(String, primary_key=True)  # One of STATEMENT_PAYLOAD_KINDS
+    version = Column(Integer, primary_key=True, default=1)  # Bumped on every write; older versions are removed
+    data = Column(CompressedJSON)
+    created_at = Column(DateTime, server_default=text('now()'), nullable=False)
+
+class PayloadKindsOption(UserDefinedOption):
+    """
+    Query option loading only some payload kinds of the uploads (payload: frozenset of kinds).
+    Built by crud.statement_upload.with_payload_kinds(); the kinds are recorded on every loaded
+    upload, and reading or writing any other payload attribute raises.
+    """
+    propagate_to_loaders = True
+
+@event.listens_for(StatementUpload, 'load')
+def _record_loaded_payload_kinds(upload, context):
+    for option in inspect(upload).load_options:
+        if isinstance(option, PayloadKindsOption):
+            upload._loaded_payload_kinds = option.payload
+
+@event.listens_for(StatementUpload, 'refresh')
+def _reset_loaded_payload_kinds(upload, context, attrs):
+    # refresh_upload() reloads every payload
+    if attrs is not None and 'payloads' in attrs:
+        upload._loaded_payload_kinds = None
+
+# Kinds loaded by with_payload_kinds(); None when every kind was loaded (or none, see without_payloads())
+StatementUpload._loaded_payload_kinds = None
+
+def _statement_payload_property(kind: str):
+    """
+    Attribute for a payload kind: reads the payload row, falling back to the legacy inline column;
+    writes a new payload version and clears the inline copy.
+    """
+    inline_attr = f'{kind}_inline'
+    
+    def check_loaded(self):
+        # Without the payload row the inline fallback would be read, or a duplicate version written
+        if self._loaded_payload_kinds is not None and kind not in self._loaded_payload_kinds:
+            raise InvalidRequestError(
+                f"'StatementUpload.{kind}' is not available: only payload kinds "
+                f"{sorted(self._loaded_payload_kinds)} were loaded (with_payload_kinds)"
+            )
+    
+    def fget(self):
+        check_loaded(self)
+        payload = self.payloads.get(kind)
+        return payload.data if payload is not None else getattr(self, inline_attr)
+    
+    def fset(self, value):
+        check_loaded(self)
+        current = self.payloads.get(kind)
+        if value is None:
+            self.payloads.pop(kind, None)
+        else:
+            version = current.version + 1 if current is not None else 1
+            self.payloads[kind] = StatementUploadPayload(kind=kind, version=version, data=value)
+        if getattr(self, inline_attr) is not None:
+            setattr(self, inline_attr, None)
+    
+    return property(fget, fset, doc=f"{kind} payload (statement_upload_payloads)")
+
+for _kind in STATEMENT_PAYLOAD_KINDS:
+    setattr(StatementUpload, _kind, _statement_payload_property(_kind))
 
 class Extraction(Base):
     __tablename__ = 'extractions'
@@ -219,6 +347,62 @@ class EarnedCommission(Base):
         UniqueConstraint('carrier_id', 'client_name', 'statement_month', 'statement_year', 'user_id', 'environment_id', name='uq_carrier_client_month_year_user_env'),
     )
 
+class CommissionContribution(Base):
+    __tablename__ = 'commission_contributions'
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    upload_id = Column(UUID(as_uuid=True), ForeignKey('statement_uploads.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    # Same key columns as earned_commissions so a contribution maps straight onto its rollup record
+    carrier_id = Column(UUID(as_uuid=True), ForeignKey('companies.id'), nullable=False)
+    client_name = Column(String, nullable=False)
+    statement_month = Column(Integer, nullable=True)
+    statement_year = Column(Integer, nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=True)
+    environment_id = Column(UUID(as_uuid=True), ForeignKey('environments.id', ondelete='CASCADE'), nullable=True)
+
+    # Amounts this upload added to the matching earned_commissions record
+    invoice_total = Column(Numeric(15, 2), default=0)
+    commission_earned = Column(Numeric(15, 2), default=0)
+
+    created_at = Column(DateTime, server_default=text('now()'), nullable=False)
+
+    # One ledger row per upload, client and statement month
+    __table_args__ = (
+        UniqueConstraint('upload_id', 'carrier_id', 'client_name', 'statement_month', 'statement_year', name='uq_contribution_upload_client_month'),
+    )
+
+class DashboardStatsAggregate(Base):
+    __tablename__ = 'dashboard_stats_aggregates'
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Scope: 'user' (scope_id = users.id), 'company' (scope_id = companies.id) or 'global' (scope_id NULL)
+    scope_type = Column(String, nullable=False)
+    scope_id = Column(UUID(as_uuid=True), nullable=True)
+
+    # NULL in any of these means "rolled up across all values"
+    environment_id = Column(UUID(as_uuid=True), nullable=True)
+    carrier_id = Column(UUID(as_uuid=True), nullable=True)
+    statement_year = Column(Integer, nullable=True)
+
+    # earned_commissions aggregates
+    total_invoice = Column(Numeric(18, 2), default=0)
+    total_commission = Column(Numeric(18, 2), default=0)
+    commission_records = Column(Integer, default=0)
+    total_carriers = Column(Integer, default=0)  # Distinct carriers with commission data
+    total_companies = Column(Integer, default=0)  # Distinct lower(trim(client_name))
+
+    # statement_uploads counts (only on rows rolled up across carriers and years)
+    approved_statements = Column(Integer, default=0)
+    completed_statements = Column(Integer, default=0)
+    needs_review_statements = Column(Integer, default=0)
+    statement_carriers = Column(Integer, default=0)  # Distinct carriers of finalized statements, user companies excluded
+
+    refreshed_at = Column(DateTime, server_default=text('now()'), nullable=False)
+
+    __table_args__ = (
+        Index('ix_dashboard_stats_scope', 'scope_type', 'scope_id', 'environment_id', 'statement_year'),
+    )
+
 class EditedTable(Base):
     __tablename__ = 'edited_tables'
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -334,3 +518,88 @@ class OTPRequest(Base):
     user_agent = Column(String, nullable=True)
     created_at = Column(DateTime, server_default=text('now()'), nullable=False)
     used_at = Column(DateTime, nullable=True)
+
+class ClaudeRateLimitReservation(Base):
+    __tablename__ = 'claude_rate_limit_reservations'
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    limiter_key = Column(String, nullable=False)  # One sliding window per key (e.g. per API key/model)
+    reserved_at = Column(Float, nullable=False)  # Epoch seconds from the database clock (same clock for every worker)
+    input_tokens = Column(Integer, nullable=False, default=0)  # Estimated until reconciled with actual usage
+    output_tokens = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('ix_claude_rate_limit_key_time', 'limiter_key', 'reserved_at'),
+    )
+
+class ExtractionResultCache(Base):
+    __tablename__ = 'extraction_result_cache'
+    # sha256 over (file_hash, extraction_method, version) - see crud.extraction_cache
+    cache_key = Column(String(64), primary_key=True)
+    file_hash = Column(String(64), nullable=False)  # sha256 of the uploaded file
+    extraction_method = Column(String, nullable=False)
+    version = Column(String, nullable=False)  # Prompt/model version the result was produced with
+    result = Column(CompressedJSON, nullable=False)  # Standardized extraction result (+ completion extras)
+    size_bytes = Column(Integer, nullable=False, default=0)  # Compressed size, for the size-bounded LRU
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=text('now()'), nullable=False)
+    last_accessed_at = Column(DateTime, server_default=text('now()'), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index('ix_extraction_result_cache_last_accessed', 'last_accessed_at'),
+        Index('ix_extraction_result_cache_expires', 'expires_at'),
+    )
+
+class ExtractionJob(Base):
+    __tablename__ = 'extraction_jobs'
+    # Durable queue of extraction work - claimed with FOR UPDATE SKIP LOCKED, see crud.extraction_jobs
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    upload_id = Column(String, nullable=False)  # Tracking id the client follows progress on (WebSocket)
+    upload_uuid = Column(UUID(as_uuid=True), nullable=False)  # Upload id used for DB records/GCS paths
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=True)
+    handler = Column(String, nullable=False)  # Registered job handler name
+    payload = Column(JSON, nullable=False)  # Handler arguments
+    status = Column(String, nullable=False, default='queued')  # queued | running | succeeded | failed | cancelled
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=2)
+    worker_id = Column(String, nullable=True)  # host:pid of the worker holding the job
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    progress = Column(Integer, nullable=False, default=0)  # Last reported percentage
+    progress_message = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=text('now()'), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Lease: a running job with a stale heartbeat is requeued
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_extraction_jobs_status_created', 'status', 'created_at'),
+        Index('ix_extraction_jobs_upload_id', 'upload_id'),
+    )
+
+class HttpRateLimit(Base):
+    __tablename__ = 'http_rate_limits'
+    # GCRA state for one (policy, client) pair - see services.rate_limiter
+    limiter_key = Column(String, primary_key=True)
+    tat = Column(Float, nullable=False)  # Theoretical arrival time, epoch seconds from the database clock
+    
+    __table_args__ = (
+        Index('ix_http_rate_limits_tat', 'tat'),
+        # Counters are disposable: skip WAL, a crash only resets the limits
+        {'prefixes': ['UNLOGGED']},
+    )
+
+class ProgressEvent(Base):
+    __tablename__ = 'progress_events'
+    # Shared WebSocket replay backlog (and large message bodies relayed by reference) - see services.progress_bus
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    upload_id = Column(String, nullable=False)
+    message = Column(Text, nullable=False)  # JSON-encoded WebSocket message
+    created_at = Column(DateTime, server_default=text('now()'), nullable=False)
+    
+    __table_args__ = (
+        Index('ix_progress_events_upload_id', 'upload_id', 'id'),
+        Index('ix_progress_events_created_at', 'created_at'),
+        # Progress is transient: skip WAL, a crash only loses replay history
+        {'prefixes': ['UNLOGGED']},
+    )
@@ -2,12 +2,13 @@ from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Union
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from app.db.database import get_db
 from app.db.models import User
-from app.utils.auth_utils import get_user_by_email, verify_token, update_session_activity, check_session_inactivity
+from app.utils.auth_utils import get_user_by_email, verify_token, INACTIVITY_TIMEOUT_MINUTES
 from app.services.jwt_service import jwt_service
+from app.services.auth_cache import auth_cache
 
 # Security schemes
 security_bearer = HTTPBearer(auto_error=False)  # Don't auto-raise on missing token
@@ -63,21 +64,23 @@ async def get_current_user_hybrid(
         session_token = request.cookies.get("session_token")
         if session_token:
             try:
-                is_inactive = await check_session_inactivity(db, session_token)
+                is_inactive = await auth_cache.check_session_inactivity(
+                    db, session_token, timedelta(minutes=INACTIVITY_TIMEOUT_MINUTES)
+                )
                 if is_inactive:
                     raise HTTPException(
                         status_code=status.HTTP_401_UNAUTHORIZED,
                         detail="Session expired due to inactivity"
                     )
-                # Update session activity (non-blocking)
-                await update_session_activity(db, session_token)
+                # Update session activity (coalesced into periodic batched writes)
+                auth_cache.record_session_activity(session_token)
             except Exception as e:
                 # If session check fails, log but don't block the request
                 print(f"Session activity check failed: {e}")
                 # Continue with the request
     
-    # Get user from database
-    user = await get_user_by_email(db, email)
+    # Get user (short-TTL cache, invalidated on role/status changes)
+    user = await auth_cache.get_user(db, email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
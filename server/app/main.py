@@ -6,10 +6,9 @@ load_dotenv()
 from app.new_extraction_services.utils.compatibility import apply_compatibility_fixes
 apply_compatibility_fixes()
 
-from fastapi import FastAPI, Request, Response, HTTPException
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from collections import defaultdict
 import time
 import os
 import signal
@@ -29,6 +28,12 @@ import asyncio
 # Initialize logging
 logger = logging.getLogger(__name__)
 
+# ✅ Fork-after-load: with `gunicorn --preload` this module is imported once in the master,
+# so models loaded here are shared copy-on-write by every worker instead of loaded per worker
+if os.getenv('PRELOAD_EXTRACTION_MODELS', 'false').lower() == 'true':
+    from app.new_extraction_services.models.model_registry import preload_models
+    logger.info(f"📦 Preloaded extraction models: {preload_models()}")
+
 app = FastAPI()
 
 # Track background tasks for graceful shutdown
@@ -100,7 +105,11 @@ async def shutdown_event_handler():
         from app.services.process_monitor import process_monitor
         await process_monitor.stop_monitoring()
         logger.info("Process monitoring stopped")
-        
+
+        # Close pooled GCS connections used by the PDF proxy
+        from app.services.gcs_async_client import async_gcs_client
+        await async_gcs_client.aclose()
+
         # Import connection manager
         from app.services.websocket_service import connection_manager
         
@@ -162,9 +171,17 @@ async def health_check_detailed():
         from app.services.process_monitor import process_monitor
         process_status = process_monitor.get_health_status()
         
+        # Models loaded in this worker (and whether they were inherited from the gunicorn master)
+        from app.new_extraction_services.models.model_registry import model_registry
+        
+        # Local GCS object cache hit/miss counters
+        from app.services.gcs_object_cache import gcs_object_cache
+        
         return {
             "status": "healthy",
             "process_monitoring": process_status,
+            "models": model_registry.stats(),
+            "gcs_cache": gcs_object_cache.stats(),
             "timestamp": time.time(),
             "resources": {
                 "memory": {
@@ -178,7 +195,8 @@ async def health_check_detailed():
                 }
             },
             "connections": {
-                "websocket": ws_connections
+                "websocket": ws_connections,
+                "websocket_frames": connection_manager.frame_stats()
             },
             "warnings": [
                 "High memory usage" if memory.percent > 90 else None,
@@ -262,30 +280,14 @@ async def add_security_headers(request: Request, call_next):
     
     return response
 
-# Rate limiting storage
-rate_limit_storage = defaultdict(list)
+# Rate limiting (per-route GCRA policies, shared across workers - see services.rate_limiter)
+from app.services.rate_limiter import http_rate_limiter
 
-# Rate limiting middleware
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
-    client_ip = request.client.host if request.client else "unknown"
-    current_time = time.time()
-    
-    # Clean old entries (older than 1 hour)
-    rate_limit_storage[client_ip] = [
-        timestamp for timestamp in rate_limit_storage[client_ip]
-        if current_time - timestamp < 3600
-    ]
-    
-    # Check rate limits based on endpoint
-    if request.url.path.startswith("/auth/otp/request"):
-        # OTP requests: 10 per hour
-        if len(rate_limit_storage[client_ip]) >= 10:
-            raise HTTPException(
-                status_code=429,
-                detail="Too many OTP requests. Please try again later."
-            )
-        rate_limit_storage[client_ip].append(current_time)
+    rejection = await http_rate_limiter.reject(request)
+    if rejection is not None:
+        return rejection
     
     response = await call_next(request)
     return response
@@ -370,12 +372,43 @@ async def startup_event():
     background_tasks.add(orphan_cleanup_task)
     orphan_cleanup_task.add_done_callback(background_tasks.discard)
     logger.info("✅ Orphan cleanup scheduler started (runs every 3 minutes)")
-    
+
+    # Batched session last_accessed writes (recorded in memory by the auth dependency)
+    from app.services.auth_cache import auth_cache
+    activity_flush_task = asyncio.create_task(auth_cache.run_activity_flusher(shutdown_event))
+    background_tasks.add(activity_flush_task)
+    activity_flush_task.add_done_callback(background_tasks.discard)
+
+    # Evict idle rate limit keys so the limiter's storage stays bounded
+    rate_limit_eviction_task = asyncio.create_task(http_rate_limiter.run_eviction(shutdown_event))
+    background_tasks.add(rate_limit_eviction_task)
+    rate_limit_eviction_task.add_done_callback(background_tasks.discard)
+
+    # Relay WebSocket progress broadcast by other workers to sockets connected here
+    from app.services.websocket_service import connection_manager
+    progress_relay_task = asyncio.create_task(connection_manager.run_progress_relay(shutdown_event))
+    background_tasks.add(progress_relay_task)
+    progress_relay_task.add_done_callback(background_tasks.discard)
+
+    # Worker pool for queued extraction jobs (shared across workers through Postgres)
+    from app.services.extraction_job_queue import extraction_job_queue
+    extraction_worker_task = asyncio.create_task(extraction_job_queue.run(shutdown_event))
+    background_tasks.add(extraction_worker_task)
+    extraction_worker_task.add_done_callback(background_tasks.discard)
+
     # Start process monitoring for long-running document extractions
     from app.services.process_monitor import process_monitor
     await process_monitor.start_monitoring()
     logger.info("Process monitoring started for large file processing")
     
+    # Optional warm-up so the first extraction in this worker does not pay the model cold start
+    if os.getenv('WARM_UP_EXTRACTION_MODELS', 'false').lower() == 'true':
+        from app.new_extraction_services.models.model_registry import warm_up_models
+        warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up_models))
+        background_tasks.add(warm_up_task)
+        warm_up_task.add_done_callback(background_tasks.discard)
+        logger.info("Extraction model warm-up started in background")
+    
     logger.info("Application startup complete with enhanced monitoring and signal handlers")
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 """Document processor for handling various input formats."""
 
 import asyncio
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, AsyncIterator, List, Union, Tuple
 from pathlib import Path
 import time
 import numpy as np
@@ -91,6 +91,17 @@ class DocumentProcessor:
         
         return []
     
+    async def iter_page_images(self, processed_doc: ProcessedDocument,
+                               grayscale: bool = False) -> AsyncIterator[Tuple[int, np.ndarray]]:
+        """Yield (page_num, image) one page at a time, rendering PDF pages on demand."""
+        if processed_doc.format == DocumentFormat.PDF and not processed_doc.raw_images:
+            async for page_num, image in self.pdf_processor.iter_images(processed_doc, grayscale=grayscale):
+                yield page_num, image
+            return
+        
+        for page_num, image in enumerate(await self.extract_images_from_pages(processed_doc)):
+            yield page_num, image
+    
     def get_page_text(self, processed_doc: ProcessedDocument, page_num: int) -> str:
         """Get text content from a specific page."""
         if page_num >= processed_doc.num_pages:
@@ -7,6 +7,7 @@ from dataclasses import dataclass
 import asyncio
 from ..utils.logging_utils import get_logger
 from ..utils.config import Config
+from ...services.column_profile import TableProfile
 
 @dataclass
 class PageTable:
@@ -361,26 +362,21 @@ class MultiPageTableHandler:
         
         return pattern_matches / total_columns if total_columns > 0 else 0.0
     
-    def _analyze_column_data_patterns(self, rows: List[List[str]]) -> List[Dict[str, Any]]:
+    def _analyze_column_data_patterns(self, rows: List[List[str]], profile: Optional[TableProfile] = None) -> List[Dict[str, Any]]:
         """Analyze data patterns for each column."""
         if not rows:
             return []
         
-        max_cols = max(len(row) for row in rows) if rows else 0
         patterns = []
         
-        for col_idx in range(max_cols):
-            column_data = []
-            for row in rows:
-                if col_idx < len(row):
-                    column_data.append(str(row[col_idx]).strip())
-            
+        for column in (profile or TableProfile(rows)).columns:
+            lengths = column.lengths
             pattern = {
-                'has_numbers': any(self._is_numeric(val) for val in column_data),
-                'has_currency': any('$' in val for val in column_data),
-                'has_dates': any(self._is_date(val) for val in column_data),
-                'avg_length': sum(len(val) for val in column_data) / len(column_data) if column_data else 0,
-                'has_alpha': any(any(c.isalpha() for c in val) for val in column_data)
+                'has_numbers': bool(column.float_mask.any()),
+                'has_currency': bool(column.dollar_mask.any()),
+                'has_dates': bool(column.date_mask.any()),
+                'avg_length': int(lengths.sum()) / len(lengths) if len(lengths) else 0,
+                'has_alpha': bool(column.alpha_counts.any())
             }
             patterns.append(pattern)
         
@@ -469,40 +465,6 @@ class MultiPageTableHandler:
         
         return structure_similarity >= 0.6 or continuation_indicators >= 2
     
-    def _is_numeric(self, value: str) -> bool:
-        """Check if a value is numeric."""
-        if not value:
-            return False
-        
-        # Remove common non-numeric characters
-        clean_value = value.replace(',', '').replace('$', '').replace('%', '').strip()
-        
-        # Check if it's a number
-        try:
-            float(clean_value)
-            return True
-        except ValueError:
-            return False
-    
-    def _is_date(self, value: str) -> bool:
-        """Check if a value looks like a date."""
-        if not value:
-            return False
-        
-        # Simple date pattern detection
-        date_patterns = [
-            r'\d{1,2}/\d{1,2}/\d{2,4}',  # MM/DD/YYYY
-            r'\d{1,2}-\d{1,2}-\d{2,4}',  # MM-DD-YYYY
-            r'\d{4}-\d{1,2}-\d{1,2}',    # YYYY-MM-DD
-        ]
-        
-        import re
-        for pattern in date_patterns:
-            if re.search(pattern, value):
-                return True
-        
-        return False
-    
     async def _looks_like_continuation(
         self, 
         table: PageTable, 
@@ -1136,166 +1098,13 @@ class MultiPageTableHandler:
         # Require at least 60% pattern match for continuation
         return total_checks > 0 and (pattern_matches / total_checks) >= 0.6
     
-    def _learn_column_patterns(self, rows: List[List[str]]) -> List[Dict[str, Any]]:
+    def _learn_column_patterns(self, rows: List[List[str]], profile: Optional[TableProfile] = None) -> List[Dict[str, Any]]:
         """Learn patterns from table data for each column."""
         if not rows:
             return []
         
-        num_columns = max(len(row) for row in rows) if rows else 0
-        column_patterns = []
-        
-        for col_idx in range(num_columns):
-            column_data = []
-            for row in rows:
-                if col_idx < len(row):
-                    column_data.append(str(row[col_idx]).strip())
-            
-            if column_data:
-                pattern = self._analyze_column_pattern(column_data)
-                column_patterns.append(pattern)
-            else:
-                column_patterns.append({})
-        
-        return column_patterns
-    
-    def _analyze_column_pattern(self, column_data: List[str]) -> Dict[str, Any]:
-        """Analyze the pattern of a single column."""
-        if not column_data:
-            return {}
-        
-        pattern = {
-            'length_stats': self._calculate_length_stats(column_data),
-            'char_type_distribution': self._calculate_char_type_distribution(column_data),
-            'case_patterns': self._analyze_case_patterns(column_data),
-            'numeric_patterns': self._analyze_numeric_patterns(column_data),
-            'special_char_patterns': self._analyze_special_char_patterns(column_data),
-            'word_patterns': self._analyze_word_patterns(column_data)
-        }
-        
-        return pattern
-    
-    def _calculate_length_stats(self, data: List[str]) -> Dict[str, float]:
-        """Calculate length statistics for a column."""
-        lengths = [len(item) for item in data if item]
-        if not lengths:
-            return {'mean': 0, 'std': 0, 'min': 0, 'max': 0}
-        
-        mean_length = sum(lengths) / len(lengths)
-        variance = sum((x - mean_length) ** 2 for x in lengths) / len(lengths)
-        std_length = variance ** 0.5
-        
-        return {
-            'mean': mean_length,
-            'std': std_length,
-            'min': min(lengths),
-            'max': max(lengths)
-        }
-    
-    def _calculate_char_type_distribution(self, data: List[str]) -> Dict[str, float]:
-        """Calculate character type distribution for a column."""
-        total_chars = 0
-        alpha_chars = 0
-        digit_chars = 0
-        special_chars = 0
-        
-        for item in data:
-            for char in item:
-                total_chars += 1
-                if char.isalpha():
-                    alpha_chars += 1
-                elif char.isdigit():
-                    digit_chars += 1
-                else:
-                    special_chars += 1
-        
-        if total_chars == 0:
-            return {'alpha_ratio': 0, 'digit_ratio': 0, 'special_ratio': 0}
-        
-        return {
-            'alpha_ratio': alpha_chars / total_chars,
-            'digit_ratio': digit_chars / total_chars,
-            'special_ratio': special_chars / total_chars
-        }
-    
-    def _analyze_case_patterns(self, data: List[str]) -> Dict[str, Any]:
-        """Analyze case patterns in a column."""
-        all_upper = sum(1 for item in data if item.isupper())
-        all_lower = sum(1 for item in data if item.islower())
-        mixed_case = sum(1 for item in data if not item.isupper() and not item.islower() and item)
-        title_case = sum(1 for item in data if item.istitle())
-        
-        total = len(data)
-        if total == 0:
-            return {'all_upper_ratio': 0, 'all_lower_ratio': 0, 'mixed_case_ratio': 0, 'title_case_ratio': 0}
-        
-        return {
-            'all_upper_ratio': all_upper / total,
-            'all_lower_ratio': all_lower / total,
-            'mixed_case_ratio': mixed_case / total,
-            'title_case_ratio': title_case / total
-        }
-    
-    def _analyze_numeric_patterns(self, data: List[str]) -> Dict[str, Any]:
-        """Analyze numeric patterns in a column."""
-        numeric_count = 0
-        decimal_count = 0
-        currency_count = 0
-        
-        for item in data:
-            clean_item = item.replace(',', '').replace('$', '').replace('%', '').strip()
-            
-            if clean_item.replace('.', '').isdigit():
-                numeric_count += 1
-                if '.' in clean_item:
-                    decimal_count += 1
-            
-            if '$' in item or '%' in item:
-                currency_count += 1
-        
-        total = len(data)
-        if total == 0:
-            return {'numeric_ratio': 0, 'decimal_ratio': 0, 'currency_ratio': 0}
-        
-        return {
-            'numeric_ratio': numeric_count / total,
-            'decimal_ratio': decimal_count / total,
-            'currency_ratio': currency_count / total
-        }
-    
-    def _analyze_special_char_patterns(self, data: List[str]) -> Dict[str, float]:
-        """Analyze special character patterns in a column."""
-        special_chars = set()
-        for item in data:
-            for char in item:
-                if not char.isalnum() and char != ' ':
-                    special_chars.add(char)
-        
-        char_freq = {}
-        total_chars = sum(len(item) for item in data)
-        
-        if total_chars > 0:
-            for char in special_chars:
-                freq = sum(item.count(char) for item in data) / total_chars
-                char_freq[char] = freq
-        
-        return char_freq
-    
-    def _analyze_word_patterns(self, data: List[str]) -> Dict[str, Any]:
-        """Analyze word patterns in a column."""
-        word_counts = [len(item.split()) for item in data]
-        
-        if not word_counts:
-            return {'mean_words': 0, 'std_words': 0, 'max_words': 0}
-        
-        mean_words = sum(word_counts) / len(word_counts)
-        variance = sum((x - mean_words) ** 2 for x in word_counts) / len(word_counts)
-        std_words = variance ** 0.5
-        
-        return {
-            'mean_words': mean_words,
-            'std_words': std_words,
-            'max_words': max(word_counts)
-        }
+        profile = profile or TableProfile(rows)
+        return [column.pattern() for column in profile.columns]
     
     def _matches_column_pattern(self, cell: str, pattern: Dict[str, Any]) -> bool:
         """Check if a cell matches the learned pattern for a column."""
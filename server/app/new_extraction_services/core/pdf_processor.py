@@ -1,18 +1,158 @@
 """PDF document processor."""
 
 import asyncio
+import math
 import time
 from pathlib import Path
-from typing import List, Tuple
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 import numpy as np
 import pdfplumber
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+try:
+    import fitz  # PyMuPDF - renders one page at a time
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
 
 from ..utils.config import Config
 from .document_types import DocumentFormat, ProcessedDocument, DocumentProcessingError
 from .table_extractor import TableExtractor
 
 
+PAGE_IMAGE_DPI = 200  # Good quality for OCR
+BLANK_PAGE_SHAPE = (800, 600)
+
+
+class PDFPageImages:
+    """
+    Lazily rasterized page images of a PDF.
+
+    Pages are rendered one at a time (PyMuPDF, or pdf2image for a single page when PyMuPDF
+    is not installed), so memory stays bounded by one page whatever the page count. Pages
+    larger than max_pixels at the requested DPI are rendered at a lower DPI instead.
+
+    With reuse_buffer=True iteration renders every page into the same array when the page
+    size allows it; each yielded image is then only valid until the next one is pulled.
+    """
+
+    def __init__(
+        self,
+        pdf_path: str,
+        dpi: int = PAGE_IMAGE_DPI,
+        grayscale: bool = False,
+        max_pixels: Optional[int] = None,
+        reuse_buffer: bool = False
+    ):
+        self.pdf_path = str(pdf_path)
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self.max_pixels = max_pixels
+        self.reuse_buffer = reuse_buffer
+        self._doc = None
+        self._page_count: Optional[int] = None
+        self._buffer: Optional[np.ndarray] = None
+
+    def __enter__(self) -> "PDFPageImages":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+        self._buffer = None
+
+    def _document(self):
+        if self._doc is None:
+            self._doc = fitz.open(self.pdf_path)
+        return self._doc
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            if PYMUPDF_AVAILABLE:
+                self._page_count = self._document().page_count
+            else:
+                self._page_count = int(pdfinfo_from_path(self.pdf_path)['Pages'])
+        return self._page_count
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def page_dpi(self, width_points: float, height_points: float) -> float:
+        """DPI for a page of the given size (in points) that keeps it within max_pixels."""
+        if not self.max_pixels:
+            return self.dpi
+        area_inches = (width_points / 72.0) * (height_points / 72.0)
+        if area_inches <= 0:
+            return self.dpi
+        return min(self.dpi, math.sqrt(self.max_pixels / area_inches))
+
+    def _render_pymupdf(self, page_num: int) -> np.ndarray:
+        page = self._document()[page_num]
+        zoom = self.page_dpi(page.rect.width, page.rect.height) / 72.0
+        colorspace = fitz.csGRAY if self.grayscale else fitz.csRGB
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+        # Rows may be padded, so go through the stride before dropping the padding
+        samples = np.frombuffer(pixmap.samples_mv, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)
+        pixels = samples[:, :pixmap.width * pixmap.n].reshape(pixmap.height, pixmap.width, pixmap.n)
+        return self._store(pixels[:, :, 0] if self.grayscale else pixels)
+
+    def _render_pdf2image(self, page_num: int) -> np.ndarray:
+        dpi = self.dpi
+        if self.max_pixels:
+            info = pdfinfo_from_path(self.pdf_path, first_page=page_num + 1, last_page=page_num + 1)
+            width, height = (float(v) for v in info.get('Page size', '0 x 0').split(' pts')[0].split(' x '))
+            dpi = self.page_dpi(width, height)
+        pil_image = convert_from_path(
+            self.pdf_path, dpi=dpi, first_page=page_num + 1, last_page=page_num + 1,
+            grayscale=self.grayscale
+        )[0]
+        return self._store(np.asarray(pil_image))
+
+    def _store(self, pixels: np.ndarray) -> np.ndarray:
+        """Copy rendered pixels into an array the caller owns (or the shared buffer)."""
+        if not self.reuse_buffer:
+            return np.array(pixels, copy=True)
+        if self._buffer is None or self._buffer.shape != pixels.shape:
+            self._buffer = np.empty_like(pixels)
+        np.copyto(self._buffer, pixels)
+        return self._buffer
+
+    def render(self, page_num: int) -> np.ndarray:
+        """Image of one page (0-based)."""
+        if not 0 <= page_num < self.page_count:
+            raise IndexError(f"Page {page_num} not found. Document has {self.page_count} pages")
+        if PYMUPDF_AVAILABLE:
+            return self._render_pymupdf(page_num)
+        return self._render_pdf2image(page_num)
+
+    def blank_page(self) -> np.ndarray:
+        shape = BLANK_PAGE_SHAPE if self.grayscale else BLANK_PAGE_SHAPE + (3,)
+        return np.zeros(shape, dtype=np.uint8)
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """(page_num, image) for every page; a page that fails to render is blank."""
+        for page_num in range(self.page_count):
+            try:
+                yield page_num, self.render(page_num)
+            except Exception:
+                yield page_num, self.blank_page()
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[int, np.ndarray]]:
+        """Like __iter__, rendering each page in a worker thread."""
+        page_count = await asyncio.to_thread(lambda: self.page_count)
+        for page_num in range(page_count):
+            try:
+                image = await asyncio.to_thread(self.render, page_num)
+            except Exception:
+                image = self.blank_page()
+            yield page_num, image
+
+
 class PDFProcessor:
     """Process PDF documents using Docling and other tools."""
     
@@ -177,40 +317,46 @@ class PDFProcessor:
             self.logger.logger.error(f"PDF processing failed: {e}")
             raise
     
+    def page_images(self, processed_doc: ProcessedDocument, grayscale: bool = False,
+                    reuse_buffer: bool = False) -> PDFPageImages:
+        """Lazy page image source for a processed PDF; close it (or use it as a context manager) when done."""
+        max_width, max_height = self.processing_config.max_image_size
+        return PDFPageImages(
+            processed_doc.document_path,
+            dpi=PAGE_IMAGE_DPI,
+            grayscale=grayscale,
+            max_pixels=max_width * max_height,
+            reuse_buffer=reuse_buffer
+        )
+
+    async def iter_images(self, processed_doc: ProcessedDocument, grayscale: bool = False,
+                          reuse_buffer: bool = False) -> AsyncIterator[Tuple[int, np.ndarray]]:
+        """Yield (page_num, image) one page at a time."""
+        with self.page_images(processed_doc, grayscale=grayscale, reuse_buffer=reuse_buffer) as pages:
+            async for page_num, image in pages:
+                yield page_num, image
+
     async def extract_images(self, processed_doc: ProcessedDocument) -> List[np.ndarray]:
-        """Extract images from processed document pages."""
+        """
+        Extract images from processed document pages.
+
+        Holds every page in memory; prefer iter_images.
+        """
         images = []
         
         try:
             self.logger.logger.info(f"Extracting images from PDF: {processed_doc.document_path}")
             
-            # Convert PDF to images
-            pdf_images = convert_from_path(
-                processed_doc.document_path,
-                dpi=200,  # Good quality for OCR
-                fmt='RGB',
-                thread_count=2  # Parallel processing
-            )
-            
-            for page_num, pil_image in enumerate(pdf_images):
-                try:
-                    # Convert PIL image to numpy array
-                    image_array = np.array(pil_image)
-                    images.append(image_array)
-                    
-                    self.logger.logger.debug(f"Extracted image from page {page_num}: {image_array.shape}")
-                    
-                except Exception as e:
-                    self.logger.logger.error(f"Failed to process image from page {page_num}: {e}")
-                    # Add a blank image as placeholder
-                    blank_image = np.zeros((800, 600, 3), dtype=np.uint8)
-                    images.append(blank_image)
+            async for page_num, image_array in self.iter_images(processed_doc):
+                images.append(image_array)
+                self.logger.logger.debug(f"Extracted image from page {page_num}: {image_array.shape}")
             
             self.logger.logger.info(f"Successfully extracted {len(images)} page images from PDF")
             
         except Exception as e:
             self.logger.logger.error(f"PDF image extraction failed: {e}")
             # Fallback: create blank images for each page
+            images = []
             for page_num in range(processed_doc.num_pages):
                 blank_image = np.zeros((800, 600, 3), dtype=np.uint8)
                 images.append(blank_image)
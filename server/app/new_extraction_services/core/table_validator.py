@@ -2,7 +2,9 @@
 
 import re
 import statistics
-from typing import List, Set, Dict, Any
+from typing import List, Set, Dict, Any, Optional
+
+from ...services.column_profile import ALPHA_TEXT_RULE, DIGIT_RULE, TableProfile
 
 
 class TableValidator:
@@ -307,57 +309,36 @@ class TableValidator:
 
     def _analyze_data_type_diversity(self, rows: List[List[str]]) -> Set[str]:
         """Analyze diversity of data types in table"""
-        data_types = set()
-        
-        for row in rows[:5]:  # Sample first 5 rows
-            for cell in row:
-                cell_str = str(cell).strip()
-                if not cell_str:
-                    continue
-                
-                # Intelligent type detection
-                if re.search(r'[\d.,]', cell_str):
-                    data_types.add('numeric')
-                if re.search(r'[\$€£¥%]', cell_str):
-                    data_types.add('financial')
-                if re.search(r'\d{1,4}[/-]\d{1,2}[/-]\d{1,4}', cell_str):
-                    data_types.add('date')
-                if re.match(r'^[a-zA-Z\s]+$', cell_str):
-                    data_types.add('text')
-        
-        return data_types
-
-    def _has_structured_patterns(self, rows: List[List[str]]) -> bool:
+        return TableProfile(rows[:5]).data_types()  # Sample first 5 rows
+
+    def _has_structured_patterns(self, rows: List[List[str]], profile: Optional[TableProfile] = None) -> bool:
         """Check for structured patterns in data"""
         if len(rows) < 3:
             return False
         
         # Look for consistent patterns across rows
+        profile = profile or TableProfile(rows)
         pattern_consistency = 0
-        for col_idx in range(min(len(row) for row in rows)):
-            column_values = [str(row[col_idx]).strip() for row in rows]
-            
+        for column in profile.columns[:profile.min_row_length]:
             # Check if column has consistent data pattern
-            if self._column_has_consistent_pattern(column_values):
+            if self._column_has_consistent_pattern(column):
                 pattern_consistency += 1
         
         # If more than half columns have consistent patterns
-        max_columns = max(len(row) for row in rows) if rows else 0
-        return pattern_consistency > max_columns * 0.5
+        return pattern_consistency > profile.column_count * 0.5
 
-    def _column_has_consistent_pattern(self, values: List[str]) -> bool:
+    def _column_has_consistent_pattern(self, column) -> bool:
         """Check if column values follow a consistent pattern"""
-        if not values:
+        total = len(column.stripped)
+        if not total:
             return False
         
         # Check for numeric pattern
-        numeric_count = sum(1 for v in values if re.search(r'\d', v))
-        if numeric_count > len(values) * 0.7:  # 70% numeric
+        if column.mask(DIGIT_RULE).sum() > total * 0.7:  # 70% numeric
             return True
         
         # Check for text pattern
-        text_count = sum(1 for v in values if re.match(r'^[a-zA-Z\s]+$', v))
-        if text_count > len(values) * 0.7:  # 70% text
+        if column.mask(ALPHA_TEXT_RULE).sum() > total * 0.7:  # 70% text
             return True
         
         return False
@@ -13,6 +13,7 @@ import statistics
 
 from ..utils.config import Config
 from ..utils.logging_utils import get_logger
+from .model_registry import load_easyocr_reader, load_paddleocr
 
 @dataclass
 class OCRResult:
@@ -52,8 +53,7 @@ class AdvancedOCREngine:
         # EasyOCR (preferred for date extraction)
         if engines_initialized < max_engines:
             try:
-                import easyocr
-                self.engines['easyocr'] = easyocr.Reader(
+                self.engines['easyocr'] = load_easyocr_reader(
                     self.config.processing.ocr_languages,
                     gpu=self.config.models.device == "cuda"
                 )
@@ -77,12 +77,7 @@ class AdvancedOCREngine:
         # PaddleOCR (only if we have room and need it)
         if engines_initialized < max_engines:
             try:
-                from paddleocr import PaddleOCR
-                self.engines['paddleocr'] = PaddleOCR(
-                    use_angle_cls=True,
-                    lang='en',
-                    show_log=False
-                )
+                self.engines['paddleocr'] = load_paddleocr()
                 self.logger.logger.info("PaddleOCR engine initialized")
                 engines_initialized += 1
             except Exception as e:
@@ -1,7 +1,6 @@
 """Real Microsoft Table Transformer implementation for production use."""
 
 import torch
-from transformers import AutoImageProcessor, TableTransformerForObjectDetection
 from transformers import AutoTokenizer, AutoModel
 import torchvision.transforms as transforms
 from PIL import Image
@@ -14,6 +13,8 @@ import re
 
 from ..utils.config import Config
 from ..utils.logging_utils import get_logger
+from .inference_worker import BatchInferenceWorker
+from .model_registry import model_registry, load_table_transformer, TABLE_DETECTION_MODEL, TABLE_STRUCTURE_MODEL
 
 
 class ProductionTableFormer:
@@ -28,153 +29,136 @@ class ProductionTableFormer:
         self._load_detection_model()
         self._load_structure_model()
         
+        # All forward passes run on one worker thread per process, batched across concurrent
+        # pages from every pipeline that shares these models (see model_registry)
+        worker_key = (
+            'tableformer-inference-worker', config.models.device, config.models.cache_dir,
+            config.processing.table_detection_threshold, config.processing.cell_detection_threshold
+        )
+        self.inference_worker = model_registry.get(worker_key, lambda: BatchInferenceWorker(
+            handlers={
+                'detection': self._run_detection_batch,
+                'structure': self._run_structure_batch
+            },
+            max_batch_size=max(config.models.batch_size, 4),
+            name="tableformer-inference"
+        ))
+        
     def _load_detection_model(self):
-        """Load Microsoft Table Transformer Detection model."""
+        """Load Microsoft Table Transformer Detection model (once per process, via the model registry)."""
         try:
-            # Try with configured cache directory first
-            self.detection_processor = AutoImageProcessor.from_pretrained(
-                "microsoft/table-transformer-detection",
-                cache_dir=self.config.models.cache_dir
+            self.detection_processor, self.detection_model = load_table_transformer(
+                TABLE_DETECTION_MODEL, self.config.models.device, self.config.models.cache_dir
             )
-            self.detection_model = TableTransformerForObjectDetection.from_pretrained(
-                "microsoft/table-transformer-detection",
-                cache_dir=self.config.models.cache_dir
-            ).to(self.device)
-            self.detection_model.eval()
             self.logger.logger.info("Table detection model loaded successfully")
-        except (OSError, PermissionError) as e:
-            # Fallback: try without cache directory (uses default location)
-            self.logger.logger.warning(f"Failed to load detection model with cache dir {self.config.models.cache_dir}: {e}")
-            self.logger.logger.info("Attempting to load detection model without cache directory...")
-            try:
-                self.detection_processor = AutoImageProcessor.from_pretrained(
-                    "microsoft/table-transformer-detection"
-                )
-                self.detection_model = TableTransformerForObjectDetection.from_pretrained(
-                    "microsoft/table-transformer-detection"
-                ).to(self.device)
-                self.detection_model.eval()
-                self.logger.logger.info("Table detection model loaded successfully (fallback)")
-            except Exception as fallback_e:
-                raise RuntimeError(f"Failed to load detection model (both cache and fallback): {fallback_e}")
         except Exception as e:
             raise RuntimeError(f"Failed to load detection model: {e}")
             
     def _load_structure_model(self):
-        """Load Microsoft Table Transformer Structure Recognition model."""
+        """Load Microsoft Table Transformer Structure Recognition model (once per process, via the model registry)."""
         try:
-            # Try with configured cache directory first
-            self.structure_processor = AutoImageProcessor.from_pretrained(
-                "microsoft/table-transformer-structure-recognition-v1.1-all",
-                cache_dir=self.config.models.cache_dir
+            self.structure_processor, self.structure_model = load_table_transformer(
+                TABLE_STRUCTURE_MODEL, self.config.models.device, self.config.models.cache_dir
             )
-            self.structure_model = TableTransformerForObjectDetection.from_pretrained(
-                "microsoft/table-transformer-structure-recognition-v1.1-all",
-                cache_dir=self.config.models.cache_dir
-            ).to(self.device)
-            self.structure_model.eval()
             self.logger.logger.info("Table structure model loaded successfully")
-        except (OSError, PermissionError) as e:
-            # Fallback: try without cache directory (uses default location)
-            self.logger.logger.warning(f"Failed to load structure model with cache dir {self.config.models.cache_dir}: {e}")
-            self.logger.logger.info("Attempting to load structure model without cache directory...")
-            try:
-                self.structure_processor = AutoImageProcessor.from_pretrained(
-                    "microsoft/table-transformer-structure-recognition-v1.1-all"
-                )
-                self.structure_model = TableTransformerForObjectDetection.from_pretrained(
-                    "microsoft/table-transformer-structure-recognition-v1.1-all"
-                ).to(self.device)
-                self.structure_model.eval()
-                self.logger.logger.info("Table structure model loaded successfully (fallback)")
-            except Exception as fallback_e:
-                raise RuntimeError(f"Failed to load structure model (both cache and fallback): {fallback_e}")
         except Exception as e:
             raise RuntimeError(f"Failed to load structure model: {e}")
     
-    async def detect_tables_advanced(self, image: np.ndarray) -> List[Dict[str, Any]]:
-        """Advanced table detection using Microsoft Table Transformer."""
-        try:
-            # Convert numpy array to PIL Image
-            if isinstance(image, np.ndarray):
-                image_pil = Image.fromarray(image)
-            else:
-                image_pil = image
-            
-            # Preprocess image
-            inputs = self.detection_processor(image_pil, return_tensors="pt").to(self.device)
-            
-            # Run inference
-            with torch.no_grad():
-                outputs = self.detection_model(**inputs)
-            
-            # Process outputs
-            target_sizes = torch.tensor([image_pil.size[::-1]]).to(self.device)
-            results = self.detection_processor.post_process_object_detection(
-                outputs, threshold=self.config.processing.table_detection_threshold, 
-                target_sizes=target_sizes
-            )[0]
-            
-            # Convert results to standard format
+    @staticmethod
+    def _to_pil(image) -> Image.Image:
+        if isinstance(image, np.ndarray):
+            return Image.fromarray(image)
+        return image
+    
+    def _run_detection_batch(self, images: List[Image.Image]) -> List[List[Dict[str, Any]]]:
+        """One batched detection forward pass (runs on the inference worker thread)."""
+        threshold = self.config.processing.table_detection_threshold
+        inputs = self.detection_processor(images, return_tensors="pt").to(self.device)
+        
+        with torch.no_grad():
+            outputs = self.detection_model(**inputs)
+        
+        target_sizes = torch.tensor([image.size[::-1] for image in images]).to(self.device)
+        batch_results = self.detection_processor.post_process_object_detection(
+            outputs, threshold=threshold, target_sizes=target_sizes
+        )
+        
+        # Convert results to standard format
+        detected = []
+        for results in batch_results:
             detected_tables = []
             for i, (score, label, box) in enumerate(zip(
                 results["scores"], results["labels"], results["boxes"]
             )):
-                if score >= self.config.processing.table_detection_threshold:
+                if score >= threshold:
                     detected_tables.append({
                         'bbox': box.cpu().numpy().tolist(),  # [x1, y1, x2, y2]
                         'confidence': float(score),
                         'label': int(label),
                         'table_id': i
                     })
-            
-            return detected_tables
-            
+            detected.append(detected_tables)
+        return detected
+    
+    def _run_structure_batch(self, table_images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """One batched structure recognition forward pass (runs on the inference worker thread)."""
+        inputs = self.structure_processor(table_images, return_tensors="pt").to(self.device)
+        
+        with torch.no_grad():
+            outputs = self.structure_model(**inputs)
+        
+        target_sizes = torch.tensor([image.size[::-1] for image in table_images]).to(self.device)
+        return self.structure_processor.post_process_object_detection(
+            outputs, threshold=self.config.processing.cell_detection_threshold,
+            target_sizes=target_sizes
+        )
+    
+    async def detect_tables_batch(self, images: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        """Detect tables on several pages; pages are batched into shared forward passes."""
+        try:
+            return await self.inference_worker.infer_many('detection', [self._to_pil(image) for image in images])
         except Exception as e:
             self.logger.logger.error(f"Advanced table detection failed: {e}")
             raise
     
-    async def recognize_structure_advanced(
-        self, 
-        image: np.ndarray, 
-        table_bbox: List[float]
-    ) -> Dict[str, Any]:
-        """Advanced structure recognition with merged cell detection."""
+    async def detect_tables_advanced(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """Advanced table detection using Microsoft Table Transformer."""
+        return (await self.detect_tables_batch([image]))[0]
+    
+    async def recognize_structures_advanced(
+        self,
+        image: np.ndarray,
+        table_bboxes: List[List[float]]
+    ) -> List[Dict[str, Any]]:
+        """Structure recognition for several tables of a page, batched into shared forward passes."""
         try:
-            # Extract table region
-            table_image = self._extract_table_region_precise(image, table_bbox)
+            # Extract table regions
+            table_images = [
+                self._to_pil(self._extract_table_region_precise(image, table_bbox))
+                for table_bbox in table_bboxes
+            ]
             
-            # Convert to PIL Image
-            if isinstance(table_image, np.ndarray):
-                table_pil = Image.fromarray(table_image)
-            else:
-                table_pil = table_image
-            
-            # Preprocess for structure recognition
-            inputs = self.structure_processor(table_pil, return_tensors="pt").to(self.device)
-            
-            # Run structure recognition
-            with torch.no_grad():
-                outputs = self.structure_model(**inputs)
-            
-            # Process structure outputs
-            target_sizes = torch.tensor([table_pil.size[::-1]]).to(self.device)
-            results = self.structure_processor.post_process_object_detection(
-                outputs, threshold=self.config.processing.cell_detection_threshold,
-                target_sizes=target_sizes
-            )[0]
+            # Run structure recognition off the event loop
+            batch_results = await self.inference_worker.infer_many('structure', table_images)
             
             # Advanced structure analysis
-            structure_info = await self._analyze_advanced_structure(
-                results, table_bbox, table_pil.size
-            )
-            
-            return structure_info
+            return [
+                await self._analyze_advanced_structure(results, table_bbox, table_pil.size)
+                for results, table_bbox, table_pil in zip(batch_results, table_bboxes, table_images)
+            ]
             
         except Exception as e:
             self.logger.logger.error(f"Advanced structure recognition failed: {e}")
             raise
     
+    async def recognize_structure_advanced(
+        self, 
+        image: np.ndarray, 
+        table_bbox: List[float]
+    ) -> Dict[str, Any]:
+        """Advanced structure recognition with merged cell detection."""
+        return (await self.recognize_structures_advanced(image, [table_bbox]))[0]
+    
     async def _analyze_advanced_structure(
         self, 
         detection_results: Dict, 
@@ -727,6 +711,10 @@ class ProductionTableFormer:
         # Must have more positive than negative indicators
         return header_indicators > 0 and header_indicators / max(total_indicators, 1) > 0.3
     
+    def crop_table(self, image: np.ndarray, bbox: List[float]) -> np.ndarray:
+        """The page region structure recognition runs on; the cell bboxes it returns are relative to it."""
+        return self._extract_table_region_precise(image, bbox)
+    
     def _extract_table_region_precise(self, image: np.ndarray, bbox: List[float]) -> np.ndarray:
         """Extract table region with precise coordinates and validation."""
         
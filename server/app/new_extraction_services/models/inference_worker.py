@@ -0,0 +1,135 @@
+"""Dedicated inference thread that batches model requests off the event loop."""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+BatchHandler = Callable[[List[Any]], List[Any]]
+
+_STOP = object()
+
+
+class BatchInferenceWorker:
+    """
+    Single thread that owns model inference for a set of named handlers.
+
+    Callers submit items (e.g. page images) and get futures back. The worker drains the
+    queue into batches of up to max_batch_size items of the same kind - waiting at most
+    max_wait_ms for a batch to fill - and calls the kind's handler once per batch, so one
+    forward pass serves many pages. Handlers run only on the worker thread, which keeps the
+    event loop free (torch releases the GIL during inference) and means the models are never
+    used from two threads at once.
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, BatchHandler],
+        max_batch_size: int = 4,
+        max_wait_ms: float = 10.0,
+        name: str = "inference-worker"
+    ):
+        self.handlers = dict(handlers)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pending: Optional[Tuple[str, Any, Future]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self.stats = {'batches': 0, 'items': 0, 'busy_seconds': 0.0}
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent; submit() starts it on demand)."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the worker after the queued items are processed."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def submit(self, kind: str, item: Any) -> Future:
+        """Queue one item for the kind's handler; the future resolves to the handler's output for it."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown inference kind: {kind}")
+        self.start()
+        future: Future = Future()
+        self._queue.put((kind, item, future))
+        return future
+
+    def submit_many(self, kind: str, items: List[Any]) -> List[Future]:
+        """Queue several items back to back so they land in as few batches as possible."""
+        return [self.submit(kind, item) for item in items]
+
+    async def infer(self, kind: str, item: Any) -> Any:
+        """Await the result of one item without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(kind, item))
+
+    async def infer_many(self, kind: str, items: List[Any]) -> List[Any]:
+        """Await the results of several items, in input order."""
+        return await asyncio.gather(*(asyncio.wrap_future(f) for f in self.submit_many(kind, items)))
+
+    def _next_batch(self) -> Optional[Tuple[str, List[Tuple[Any, Future]]]]:
+        """Block for the next request, then collect same-kind requests up to the batch size."""
+        first = self._pending if self._pending is not None else self._queue.get()
+        self._pending = None
+        if first is _STOP:
+            return None
+
+        kind, item, future = first
+        batch = [(item, future)]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is _STOP or nxt[0] != kind:
+                # Different kind (or shutdown) starts the next batch
+                self._pending = nxt
+                break
+            batch.append((nxt[1], nxt[2]))
+
+        return kind, batch
+
+    def _run(self) -> None:
+        while True:
+            next_batch = self._next_batch()
+            if next_batch is None:
+                return
+
+            kind, batch = next_batch
+            # Skip items whose caller has gone away (cancelled futures)
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                outputs = self.handlers[kind]([item for item, _ in batch])
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"{kind} handler returned {len(outputs)} results for {len(batch)} items")
+            except BaseException as e:
+                logger.error(f"{self.name}: {kind} batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            finally:
+                self.stats['batches'] += 1
+                self.stats['items'] += len(batch)
+                self.stats['busy_seconds'] += time.perf_counter() - started
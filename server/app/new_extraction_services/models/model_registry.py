@@ -0,0 +1,257 @@
+"""Process-wide registry so heavyweight models are loaded once and shared."""
+
+import gc
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from loguru import logger
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+def _rss_bytes() -> Optional[int]:
+    if not PSUTIL_AVAILABLE:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+def _tensor_bytes(value: Any) -> int:
+    """Bytes held by torch parameters/buffers in value (a module or a tuple/dict of them)."""
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_tensor_bytes(v) for v in value.values())
+    total = 0
+    for attr in ('parameters', 'buffers'):
+        tensors = getattr(value, attr, None)
+        if callable(tensors):
+            try:
+                total += sum(t.numel() * t.element_size() for t in tensors())
+            except Exception:
+                return 0
+    return total
+
+
+@dataclass
+class ModelEntry:
+    """A loaded model and what it cost to load."""
+    key: Hashable
+    value: Any
+    load_seconds: float
+    tensor_bytes: int
+    rss_delta_bytes: Optional[int]
+    loaded_at: float = field(default_factory=time.time)
+    pid: int = field(default_factory=os.getpid)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'key': str(self.key),
+            'load_seconds': round(self.load_seconds, 3),
+            'tensor_mb': round(self.tensor_bytes / 2**20, 1),
+            'rss_delta_mb': round(self.rss_delta_bytes / 2**20, 1) if self.rss_delta_bytes is not None else None,
+            'loaded_in_pid': self.pid,
+            # Loaded before gunicorn forked this worker -> pages shared copy-on-write
+            'inherited_from_parent': self.pid != os.getpid()
+        }
+
+
+class ModelRegistry:
+    """
+    Lazy, thread-safe cache of loaded models keyed by what identifies them
+    (model name, device, cache dir, ...).
+
+    get() runs the loader at most once per key per process; concurrent callers for the same
+    key wait for the first load instead of loading again. Failed loads are not cached so a
+    later call can retry.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, ModelEntry] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry.value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.value
+
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            value = loader()
+            load_seconds = time.perf_counter() - started
+            rss_after = _rss_bytes()
+
+            entry = ModelEntry(
+                key=key,
+                value=value,
+                load_seconds=load_seconds,
+                tensor_bytes=_tensor_bytes(value),
+                rss_delta_bytes=(rss_after - rss_before) if rss_before is not None and rss_after is not None else None
+            )
+            self._entries[key] = entry
+            logger.info(
+                f"Model registry: loaded {key} in {load_seconds:.2f}s "
+                f"({entry.tensor_bytes / 2**20:.1f} MB tensors)"
+            )
+            return value
+
+    def is_loaded(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory accounting for everything loaded in this process."""
+        entries = [entry.to_dict() for entry in self._entries.values()]
+        rss = _rss_bytes()
+        return {
+            'pid': os.getpid(),
+            'models': entries,
+            'model_count': len(entries),
+            'total_tensor_mb': round(sum(e.tensor_bytes for e in self._entries.values()) / 2**20, 1),
+            'total_load_seconds': round(sum(e.load_seconds for e in self._entries.values()), 3),
+            'process_rss_mb': round(rss / 2**20, 1) if rss is not None else None
+        }
+
+
+model_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return model_registry
+
+
+# --- Loaders for the models used by the extraction pipeline ---
+
+def load_table_transformer(model_name: str, device: str, cache_dir: Optional[str]):
+    """(image processor, eval-mode model) for a Table Transformer checkpoint, shared per process."""
+
+    def _load():
+        import torch
+        from transformers import AutoImageProcessor, TableTransformerForObjectDetection
+
+        try:
+            # Try with configured cache directory first
+            processor = AutoImageProcessor.from_pretrained(model_name, cache_dir=cache_dir)
+            model = TableTransformerForObjectDetection.from_pretrained(model_name, cache_dir=cache_dir)
+        except (OSError, PermissionError) as e:
+            # Fallback: try without cache directory (uses default location)
+            logger.warning(f"Failed to load {model_name} with cache dir {cache_dir}: {e}; retrying without cache directory")
+            processor = AutoImageProcessor.from_pretrained(model_name)
+            model = TableTransformerForObjectDetection.from_pretrained(model_name)
+
+        model = model.to(torch.device(device))
+        model.eval()
+        return processor, model
+
+    return model_registry.get(('table-transformer', model_name, device, cache_dir), _load)
+
+
+def load_easyocr_reader(languages: List[str], gpu: bool):
+    """EasyOCR reader for the given languages, shared per process."""
+
+    def _load():
+        import easyocr
+        return easyocr.Reader(list(languages), gpu=gpu)
+
+    return model_registry.get(('easyocr', tuple(languages), gpu), _load)
+
+
+def load_paddleocr():
+    """English PaddleOCR pipeline, shared per process."""
+
+    def _load():
+        from paddleocr import PaddleOCR
+        return PaddleOCR(use_angle_cls=True, lang='en', show_log=False)
+
+    return model_registry.get(('paddleocr', 'en'), _load)
+
+
+TABLE_DETECTION_MODEL = "microsoft/table-transformer-detection"
+TABLE_STRUCTURE_MODEL = "microsoft/table-transformer-structure-recognition-v1.1-all"
+
+
+def _load_models(config) -> None:
+    """Load the pipeline's models into the registry without running them."""
+    device = config.models.device
+    cache_dir = config.models.cache_dir
+
+    for model_name in (TABLE_DETECTION_MODEL, TABLE_STRUCTURE_MODEL):
+        try:
+            load_table_transformer(model_name, device, cache_dir)
+        except Exception as e:
+            logger.warning(f"Model preload failed for {model_name}: {e}")
+
+    if config.processing.enable_ocr:
+        try:
+            load_easyocr_reader(config.processing.ocr_languages, device == "cuda")
+        except Exception as e:
+            logger.warning(f"Model preload failed for EasyOCR: {e}")
+
+
+def preload_models(config=None) -> Dict[str, Any]:
+    """
+    Load the pipeline's models in the gunicorn master, before workers fork (--preload).
+
+    No inference threads are started, and gc.freeze() moves the loaded objects out of the
+    collector's reach so the workers' garbage collections do not touch (and un-share) their
+    pages. Only call from the app import path that runs in the master; in a worker the
+    freeze buys nothing.
+    """
+    from ..utils.config import get_config
+
+    _load_models(config or get_config())
+
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+    return model_registry.stats()
+
+
+def warm_up_models(config=None) -> Dict[str, Any]:
+    """
+    Load the models and run one dummy forward pass so the first request does not pay for
+    lazy kernel/allocator initialization.
+
+    Run in each worker after fork (e.g. from the FastAPI startup event in a thread),
+    never in the gunicorn master: inference starts torch thread pools that do not survive fork.
+    """
+    from ..utils.config import get_config
+
+    config = config or get_config()
+    _load_models(config)
+
+    try:
+        import torch
+        from PIL import Image
+
+        page = Image.new("RGB", (800, 1000), "white")
+        for model_name in (TABLE_DETECTION_MODEL, TABLE_STRUCTURE_MODEL):
+            processor, model = load_table_transformer(model_name, config.models.device, config.models.cache_dir)
+            inputs = processor(page, return_tensors="pt").to(torch.device(config.models.device))
+            with torch.no_grad():
+                model(**inputs)
+        logger.info("Model registry: warm-up inference complete")
+    except Exception as e:
+        logger.warning(f"Model warm-up inference failed: {e}")
+
+    return model_registry.stats()
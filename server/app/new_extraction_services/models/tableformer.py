@@ -17,6 +17,7 @@ from huggingface_hub import hf_hub_download
 from ..utils.config import Config, ModelConfig
 from ..utils.logging_utils import get_logger
 from ..utils.validation import validate_coordinates, validate_confidence_score
+from .model_registry import load_easyocr_reader
 
 
 @dataclass
@@ -401,8 +402,7 @@ class OCREngine:
     def _init_easyocr(self):
         """Initialize EasyOCR engine."""
         try:
-            import easyocr
-            self.ocr_reader = easyocr.Reader(
+            self.ocr_reader = load_easyocr_reader(
                 self.config.processing.ocr_languages,
                 gpu=self.config.models.device == "cuda"
             )
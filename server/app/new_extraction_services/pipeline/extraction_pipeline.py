@@ -9,6 +9,8 @@ from enum import Enum
 import json
 import re
 
+import numpy as np
+
 from ..core.document_processor import DocumentProcessor, ProcessedDocument
 from ..core.multipage_handler import MultiPageTableHandler
 from ..models.tableformer import TableFormerModel, OCREngine, TableStructure
@@ -19,6 +21,7 @@ from ..evaluation.advanced_metrics import AdvancedEvaluationMetrics
 from ..utils.config import Config
 from ..utils.logging_utils import get_logger, LogExtractionOperation
 from ..utils.validation import ExtractionResultValidator, ValidationResult
+from ...services.column_profile import TableProfile
 
 
 class ExtractionStage(Enum):
@@ -287,12 +290,16 @@ class ExtractionPipeline:
                 all_tables = await self._extract_from_standard_document(tables_with_scores, options)
         
         # Fallback: extract from pages if no pre-extracted tables
-        if not all_tables:
+        if not all_tables and self.advanced_tableformer is not None and options.enable_advanced_tableformer:
+            self.logger.logger.info("No pre-extracted tables found, falling back to batched Table Transformer extraction")
+            all_tables = await self._extract_tables_from_pages_batched(processed_doc, options)
+        elif not all_tables:
             self.logger.logger.info("No pre-extracted tables found, falling back to page-based extraction")
-            for page_num in range(processed_doc.num_pages):
+            # Pages are rendered one at a time as the loop pulls them
+            async for page_num, page_image in self.document_processor.iter_page_images(processed_doc):
                 try:
                     page_tables = await self._extract_tables_from_page(
-                        processed_doc, page_num, options
+                        processed_doc, page_num, page_image, options
                     )
                     all_tables.extend(page_tables)
                     
@@ -453,26 +460,13 @@ class ExtractionPipeline:
         self,
         processed_doc: ProcessedDocument,
         page_num: int,
+        page_image: np.ndarray,
         options: ExtractionOptions
     ) -> List[Dict[str, Any]]:
-        """Extract tables from a specific page."""
+        """Extract tables from the image of a specific page."""
         page_tables = []
         
         try:
-            # Get page images
-            if processed_doc.raw_images and page_num < len(processed_doc.raw_images):
-                page_image = processed_doc.raw_images[page_num]
-            else:
-                # Extract page image from document
-                page_images = await self.document_processor.extract_images_from_pages(
-                    processed_doc
-                )
-                if page_num < len(page_images):
-                    page_image = page_images[page_num]
-                else:
-                    self.logger.logger.warning(f"No image available for page {page_num}")
-                    return page_tables
-            
             # Use TableFormer for end-to-end processing
             detected_tables = await self.tableformer.process_table_end_to_end(page_image)
             
@@ -508,6 +502,104 @@ class ExtractionPipeline:
         
         return page_tables
     
+    async def _extract_tables_from_pages_batched(
+        self,
+        processed_doc: ProcessedDocument,
+        options: ExtractionOptions
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract tables from every page through the Table Transformer batch APIs.
+
+        Pages are pulled from the page-image stream one inference batch at a time, so only
+        that many page images are held at once. All tables found on those pages are then
+        submitted for structure recognition together and share forward passes too.
+        """
+        tableformer = self.advanced_tableformer
+        worker = tableformer.inference_worker
+        group_size = worker.max_batch_size
+        batches_before, items_before = worker.stats['batches'], worker.stats['items']
+        all_tables = []
+        
+        page_nums, images = [], []
+        async for page_num, page_image in self.document_processor.iter_page_images(processed_doc):
+            page_nums.append(page_num)
+            images.append(page_image)
+            if len(images) == group_size:
+                all_tables.extend(await self._extract_tables_from_page_group(page_nums, images, processed_doc, options))
+                page_nums, images = [], []
+        if images:
+            all_tables.extend(await self._extract_tables_from_page_group(page_nums, images, processed_doc, options))
+        
+        # The worker is shared by the process, so concurrent extractions are counted too
+        batches = worker.stats['batches'] - batches_before
+        items = worker.stats['items'] - items_before
+        if batches:
+            self.logger.logger.info(
+                f"Table Transformer: {items} pages and table crops in {batches} batches "
+                f"({items / batches:.1f} per batch, max {group_size})"
+            )
+        
+        return all_tables
+    
+    async def _extract_tables_from_page_group(
+        self,
+        page_nums: List[int],
+        images: List[np.ndarray],
+        processed_doc: ProcessedDocument,
+        options: ExtractionOptions
+    ) -> List[Dict[str, Any]]:
+        """Detect and recognize the tables on one inference batch of page images."""
+        tableformer = self.advanced_tableformer
+        group_tables = []
+        
+        try:
+            detections = await tableformer.detect_tables_batch(images)
+            # Skip tables with low confidence and limit the number of tables per page
+            detections = [
+                [table for table in page_detections if table['confidence'] >= options.confidence_threshold]
+                [:options.max_tables_per_page]
+                for page_detections in detections
+            ]
+            structures = await asyncio.gather(*(
+                tableformer.recognize_structures_advanced(page_image, [table['bbox'] for table in page_detections])
+                for page_image, page_detections in zip(images, detections)
+            ))
+        except Exception as e:
+            self.logger.logger.error(f"Failed to extract tables from pages {page_nums[0]}-{page_nums[-1]}: {e}")
+            return []
+        
+        for page_num, page_image, page_detections, page_structures in zip(page_nums, images, detections, structures):
+            page_tables = []
+            for i, (detection, structure) in enumerate(zip(page_detections, page_structures)):
+                table_info = {
+                    'table_id': i,
+                    'bbox': detection['bbox'],
+                    'structure': structure,
+                    'cells': structure['cells'],
+                    'detection_confidence': detection['confidence'],
+                    'structure_confidence': structure['confidence']
+                }
+                
+                # Extract text from cells if OCR is enabled; cell bboxes are relative to the table crop
+                if options.enable_ocr and self.ocr_engine:
+                    table_info = await self._extract_text_from_table(
+                        tableformer.crop_table(page_image, detection['bbox']), table_info
+                    )
+                
+                # Add page and document metadata
+                table_info.update({
+                    'page_number': page_num,
+                    'table_index': i,
+                    'document_path': processed_doc.document_path,
+                    'extraction_timestamp': time.time()
+                })
+                page_tables.append(table_info)
+            
+            group_tables.extend(page_tables)
+            self.logger.logger.info(f"Page {page_num}: extracted {len(page_tables)} tables")
+        
+        return group_tables
+    
     async def _link_multipage_tables(
         self, 
         tables: List[Dict[str, Any]], 
@@ -914,168 +1006,13 @@ class ExtractionPipeline:
         # Require at least 60% pattern match for continuation
         return total_checks > 0 and (pattern_matches / total_checks) >= 0.6
     
-    def _learn_column_patterns(self, rows: List[List[str]]) -> List[Dict[str, Any]]:
+    def _learn_column_patterns(self, rows: List[List[str]], profile: Optional[TableProfile] = None) -> List[Dict[str, Any]]:
         """Learn patterns from table data for each column."""
         if not rows:
             return []
         
-        num_columns = max(len(row) for row in rows) if rows else 0
-        column_patterns = []
-        
-        for col_idx in range(num_columns):
-            column_data = []
-            for row in rows:
-                if col_idx < len(row):
-                    column_data.append(str(row[col_idx]).strip())
-            
-            if column_data:
-                pattern = self._analyze_column_pattern(column_data)
-                column_patterns.append(pattern)
-            else:
-                column_patterns.append({})
-        
-        return column_patterns
-    
-    def _analyze_column_pattern(self, column_data: List[str]) -> Dict[str, Any]:
-        """Analyze the pattern of a single column."""
-        if not column_data:
-            return {}
-        
-        pattern = {
-            'length_stats': self._calculate_length_stats(column_data),
-            'char_type_distribution': self._calculate_char_type_distribution(column_data),
-            'case_patterns': self._analyze_case_patterns(column_data),
-            'numeric_patterns': self._analyze_numeric_patterns(column_data),
-            'special_char_patterns': self._analyze_special_char_patterns(column_data),
-            'word_patterns': self._analyze_word_patterns(column_data)
-        }
-        
-        return pattern
-    
-    def _calculate_length_stats(self, data: List[str]) -> Dict[str, float]:
-        """Calculate length statistics for a column."""
-        lengths = [len(item) for item in data if item]
-        if not lengths:
-            return {'mean': 0, 'std': 0, 'min': 0, 'max': 0}
-        
-        mean_length = sum(lengths) / len(lengths)
-        variance = sum((x - mean_length) ** 2 for x in lengths) / len(lengths)
-        std_length = variance ** 0.5
-        
-        return {
-            'mean': mean_length,
-            'std': std_length,
-            'min': min(lengths),
-            'max': max(lengths)
-        }
-    
-    def _calculate_char_type_distribution(self, data: List[str]) -> Dict[str, float]:
-        """Calculate character type distribution for a column."""
-        total_chars = 0
-        alpha_chars = 0
-        digit_chars = 0
-        special_chars = 0
-        
-        for item in data:
-            for char in item:
-                total_chars += 1
-                if char.isalpha():
-                    alpha_chars += 1
-                elif char.isdigit():
-                    digit_chars += 1
-                else:
-                    special_chars += 1
-        
-        if total_chars == 0:
-            return {'alpha_ratio': 0, 'digit_ratio': 0, 'special_ratio': 0}
-        
-        return {
-            'alpha_ratio': alpha_chars / total_chars,
-            'digit_ratio': digit_chars / total_chars,
-            'special_ratio': special_chars / total_chars
-        }
-    
-    def _analyze_case_patterns(self, data: List[str]) -> Dict[str, Any]:
-        """Analyze case patterns in a column."""
-        all_upper = sum(1 for item in data if item.isupper())
-        all_lower = sum(1 for item in data if item.islower())
-        mixed_case = sum(1 for item in data if not item.isupper() and not item.islower() and item)
-        title_case = sum(1 for item in data if item.istitle())
-        
-        total = len(data)
-        if total == 0:
-            return {'all_upper_ratio': 0, 'all_lower_ratio': 0, 'mixed_case_ratio': 0, 'title_case_ratio': 0}
-        
-        return {
-            'all_upper_ratio': all_upper / total,
-            'all_lower_ratio': all_lower / total,
-            'mixed_case_ratio': mixed_case / total,
-            'title_case_ratio': title_case / total
-        }
-    
-    def _analyze_numeric_patterns(self, data: List[str]) -> Dict[str, Any]:
-        """Analyze numeric patterns in a column."""
-        numeric_count = 0
-        decimal_count = 0
-        currency_count = 0
-        
-        for item in data:
-            # Remove common non-numeric characters for analysis
-            clean_item = item.replace(',', '').replace('$', '').replace('%', '').strip()
-            
-            if clean_item.replace('.', '').isdigit():
-                numeric_count += 1
-                if '.' in clean_item:
-                    decimal_count += 1
-            
-            if '$' in item or '%' in item:
-                currency_count += 1
-        
-        total = len(data)
-        if total == 0:
-            return {'numeric_ratio': 0, 'decimal_ratio': 0, 'currency_ratio': 0}
-        
-        return {
-            'numeric_ratio': numeric_count / total,
-            'decimal_ratio': decimal_count / total,
-            'currency_ratio': currency_count / total
-        }
-    
-    def _analyze_special_char_patterns(self, data: List[str]) -> Dict[str, float]:
-        """Analyze special character patterns in a column."""
-        special_chars = set()
-        for item in data:
-            for char in item:
-                if not char.isalnum() and char != ' ':
-                    special_chars.add(char)
-        
-        # Calculate frequency of each special character
-        char_freq = {}
-        total_chars = sum(len(item) for item in data)
-        
-        if total_chars > 0:
-            for char in special_chars:
-                freq = sum(item.count(char) for item in data) / total_chars
-                char_freq[char] = freq
-        
-        return char_freq
-    
-    def _analyze_word_patterns(self, data: List[str]) -> Dict[str, Any]:
-        """Analyze word patterns in a column."""
-        word_counts = [len(item.split()) for item in data]
-        
-        if not word_counts:
-            return {'mean_words': 0, 'std_words': 0, 'max_words': 0}
-        
-        mean_words = sum(word_counts) / len(word_counts)
-        variance = sum((x - mean_words) ** 2 for x in word_counts) / len(word_counts)
-        std_words = variance ** 0.5
-        
-        return {
-            'mean_words': mean_words,
-            'std_words': std_words,
-            'max_words': max(word_counts)
-        }
+        profile = profile or TableProfile(rows)
+        return [column.pattern() for column in profile.columns]
     
     def _matches_column_pattern(self, cell: str, pattern: Dict[str, Any]) -> bool:
         """Check if a cell matches the learned pattern for a column."""
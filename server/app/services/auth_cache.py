@@ -0,0 +1,203 @@
+"""
+Authentication Cache Service
+
+Short-TTL in-process cache for the per-request authentication lookups done by
+get_current_user_hybrid (user by email, session inactivity state), plus coalesced
+session activity writes: last_accessed is recorded in memory and flushed to
+user_sessions in one batched UPDATE every AUTH_ACTIVITY_FLUSH_SECONDS instead of
+one UPDATE + COMMIT per request.
+
+Entries are invalidated explicitly on logout, role changes, deactivation and deletion.
+The cache is per process, so other workers see such changes within AUTH_CACHE_TTL_SECONDS.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.db.models import User, UserSession
+
+logger = logging.getLogger(__name__)
+
+AUTH_CACHE_TTL_SECONDS = float(os.getenv('AUTH_CACHE_TTL_SECONDS', '30'))
+AUTH_ACTIVITY_FLUSH_SECONDS = float(os.getenv('AUTH_ACTIVITY_FLUSH_SECONDS', '30'))
+
+
+class AuthCache:
+    """Singleton cache of authenticated users and session activity."""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AuthCache, cls).__new__(cls)
+            cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        self.ttl = AUTH_CACHE_TTL_SECONDS
+        # email -> (cached_at, User column values)
+        self._users: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # session_token -> (cached_at, is_active, last_accessed in DB)
+        self._sessions: Dict[str, Tuple[float, bool, Optional[datetime]]] = {}
+        # session_token -> last activity not yet written to user_sessions
+        self._pending_activity: Dict[str, datetime] = {}
+        self.stats = {'user_hits': 0, 'user_misses': 0, 'session_hits': 0, 'session_misses': 0, 'activity_flushes': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _fresh(self, cached_at: float) -> bool:
+        return time.monotonic() - cached_at < self.ttl
+
+    # --- Users ---
+
+    async def get_user(self, db: AsyncSession, email: str) -> Optional[User]:
+        """
+        User by email, from the cache when fresh.
+
+        A cached user is merged into db without a query, so handlers get an instance
+        attached to their own session exactly as if it had been selected.
+        """
+        if self.enabled:
+            entry = self._users.get(email)
+            if entry is not None and self._fresh(entry[0]):
+                self.stats['user_hits'] += 1
+                user = User(**entry[1])
+                make_transient_to_detached(user)
+                return await db.merge(user, load=False)
+
+        self.stats['user_misses'] += 1
+        result = await db.execute(select(User).filter(User.email == email))
+        user = result.scalar_one_or_none()
+        if user is not None and self.enabled:
+            values = {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+            self._users[email] = (time.monotonic(), values)
+        return user
+
+    def invalidate_user(self, email: Optional[str] = None, user_id=None) -> None:
+        """Drop a cached user (by email, or by id when the email is not at hand)."""
+        if email is not None:
+            self._users.pop(email, None)
+        if user_id is not None:
+            user_id = str(user_id)
+            for cached_email, (_, values) in list(self._users.items()):
+                if str(values.get('id')) == user_id:
+                    self._users.pop(cached_email, None)
+
+    # --- Sessions ---
+
+    async def check_session_inactivity(self, db: AsyncSession, session_token: str, timeout: timedelta) -> bool:
+        """Same contract as auth_utils.check_session_inactivity, using the cached session state."""
+        entry = self._sessions.get(session_token) if self.enabled else None
+        if entry is not None and self._fresh(entry[0]):
+            self.stats['session_hits'] += 1
+            _, is_active, last_accessed = entry
+        else:
+            self.stats['session_misses'] += 1
+            result = await db.execute(
+                select(UserSession.is_active, UserSession.last_accessed)
+                .filter(UserSession.session_token == session_token, UserSession.is_active == 1)
+            )
+            row = result.first()
+            is_active, last_accessed = (row is not None), (row.last_accessed if row is not None else None)
+            if self.enabled:
+                self._sessions[session_token] = (time.monotonic(), is_active, last_accessed)
+
+        if not is_active:
+            return False
+
+        # Activity recorded here but not flushed yet counts too
+        pending = self._pending_activity.get(session_token)
+        if pending is not None and (last_accessed is None or pending > last_accessed):
+            last_accessed = pending
+        return last_accessed < datetime.utcnow() - timeout
+
+    def record_session_activity(self, session_token: str) -> None:
+        """Note activity now; written to user_sessions by the next flush."""
+        self._pending_activity[session_token] = datetime.utcnow()
+
+    def invalidate_session(self, session_token: str) -> None:
+        self._sessions.pop(session_token, None)
+        self._pending_activity.pop(session_token, None)
+
+    def prune_expired(self) -> int:
+        """Drop user and session entries older than the TTL; returns how many were dropped."""
+        dropped = 0
+        for entries in (self._users, self._sessions):
+            for key, entry in list(entries.items()):
+                if not self._fresh(entry[0]):
+                    entries.pop(key, None)
+                    dropped += 1
+        return dropped
+
+    async def flush_session_activity(self, db: AsyncSession) -> int:
+        """Write all pending last_accessed values in one executemany UPDATE and commit."""
+        if not self._pending_activity:
+            return 0
+
+        pending, self._pending_activity = self._pending_activity, {}
+        sessions = UserSession.__table__
+        try:
+            await db.execute(
+                sessions.update()
+                .where(sessions.c.session_token == bindparam('token'), sessions.c.is_active == 1)
+                .values(last_accessed=bindparam('accessed_at')),
+                [{'token': token, 'accessed_at': accessed_at} for token, accessed_at in pending.items()]
+            )
+            await db.commit()
+        except Exception:
+            # Keep the activity for the next flush (newer values win)
+            for token, accessed_at in pending.items():
+                current = self._pending_activity.get(token)
+                if current is None or accessed_at > current:
+                    self._pending_activity[token] = accessed_at
+            raise
+
+        self.stats['activity_flushes'] += 1
+        return len(pending)
+
+    async def run_activity_flusher(self, shutdown_event: Optional[asyncio.Event] = None) -> None:
+        """
+        Background task: flush session activity every AUTH_ACTIVITY_FLUSH_SECONDS (and once at
+        shutdown), and drop expired cache entries so tokens seen once do not stay in memory.
+        """
+        from app.db.database import get_db
+
+        while True:
+            try:
+                if shutdown_event is not None:
+                    try:
+                        await asyncio.wait_for(shutdown_event.wait(), timeout=AUTH_ACTIVITY_FLUSH_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(AUTH_ACTIVITY_FLUSH_SECONDS)
+
+                self.prune_expired()
+
+                async for db in get_db():
+                    flushed = await self.flush_session_activity(db)
+                    if flushed:
+                        logger.debug(f"Flushed activity for {flushed} sessions")
+                    break
+
+                if shutdown_event is not None and shutdown_event.is_set():
+                    return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Session activity flush failed: {e}")
+
+
+# Global instance
+auth_cache = AuthCache()
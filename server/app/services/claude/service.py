@@ -58,6 +58,7 @@ from .utils import (
 
 # Import existing utilities for compatibility
 from app.services.extraction_utils import normalize_multi_line_headers, normalize_statement_date
+from app.services.pdf_document import PDFDocument
 
 logger = logging.getLogger(__name__)
 
@@ -144,6 +145,9 @@ class ClaudeDocumentAIService:
         # Timeout configuration
         self.timeout_seconds = int(os.getenv('CLAUDE_TIMEOUT_SECONDS', '300'))
         
+        # Chunks of one document extracted in parallel (API calls are still paced by the rate limiter)
+        self.chunk_concurrency = int(os.getenv('CLAUDE_CHUNK_CONCURRENCY', '3'))
+        
         # Initialize API client
         self.client = None
         self.async_client = None
@@ -315,7 +319,8 @@ class ClaudeDocumentAIService:
     async def extract_metadata_only(
         self,
         file_path: str,
-        pdf_info: Optional[Dict[str, Any]] = None
+        pdf_info: Optional[Dict[str, Any]] = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Extract only document metadata (carrier, date, broker) from PDF.
@@ -327,6 +332,7 @@ class ClaudeDocumentAIService:
         Args:
             file_path: Path to PDF file
             pdf_info: Optional precomputed PDF metadata to avoid re-validation
+            document: Optional parsed PDF shared with the rest of the extraction
             
         Returns:
             Dictionary with metadata extraction results
@@ -336,7 +342,7 @@ class ClaudeDocumentAIService:
             
             # Validate file
             if pdf_info is None:
-                validation = self._validate_file(file_path)
+                validation = self._validate_file(file_path, document)
                 if not validation['valid']:
                     return {
                         'success': False,
@@ -385,17 +391,19 @@ class ClaudeDocumentAIService:
                         'model_used': self.metadata_model or self.primary_model
                     }
                 
-                doc = fitz.open(file_path)
-                first_pages_doc = fitz.open()
-                first_pages_doc.insert_pdf(doc, from_page=0, to_page=2)  # Pages 0-2 (first 3)
+                if document is not None:
+                    first_pages_bytes = document.page_range_pdf(0, 3)
+                else:
+                    doc = fitz.open(file_path)
+                    first_pages_doc = fitz.open()
+                    first_pages_doc.insert_pdf(doc, from_page=0, to_page=2)  # Pages 0-2 (first 3)
+                    first_pages_bytes = first_pages_doc.write()
+                    first_pages_doc.close()
+                    doc.close()
                 
                 # Convert to base64
-                first_pages_bytes = first_pages_doc.write()
                 pdf_base64 = base64.b64encode(first_pages_bytes).decode('utf-8')
                 
-                first_pages_doc.close()
-                doc.close()
-                
                 # Adjust page count for token estimation
                 metadata_pages = 3
             else:
@@ -458,7 +466,8 @@ class ClaudeDocumentAIService:
         carrier_name,
         file_path: str,
         progress_tracker = None,
-        use_enhanced: bool = True  # ⭐ DEFAULT TO TRUE FOR ENHANCED QUALITY
+        use_enhanced: bool = True,  # ⭐ DEFAULT TO TRUE FOR ENHANCED QUALITY
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Extract commission data from PDF file with comprehensive monitoring.
@@ -468,6 +477,7 @@ class ClaudeDocumentAIService:
             file_path: Path to PDF file
             progress_tracker: Optional WebSocket progress tracker
             use_enhanced: If True, use enhanced 3-phase extraction pipeline (DEFAULT: True)
+            document: Optional parsed PDF shared with the rest of the extraction
             
         Returns:
             Dictionary with extraction results including monitoring metadata
@@ -488,7 +498,7 @@ class ClaudeDocumentAIService:
                     "Validating PDF file for Claude processing"
                 )
             
-            validation_result = self._validate_file(file_path)
+            validation_result = self._validate_file(file_path, document)
             if not validation_result['valid']:
                 raise ValueError(validation_result['error'])
             
@@ -517,7 +527,7 @@ class ClaudeDocumentAIService:
                             18,
                             "Prefetching metadata with Claude Haiku"
                         )
-                    metadata_prefetch = await self.extract_metadata_only(file_path, pdf_info=pdf_info)
+                    metadata_prefetch = await self.extract_metadata_only(file_path, pdf_info=pdf_info, document=document)
                     if metadata_prefetch.get('success'):
                         metadata_hint = self._prepare_metadata_hint(metadata_prefetch)
                         logger.info(
@@ -555,7 +565,8 @@ class ClaudeDocumentAIService:
                     prompt=full_prompt,
                     system_prompt=system_prompt,
                     progress_tracker=progress_tracker,
-                    force_chunk=True
+                    force_chunk=True,
+                    document=document
                 )
             else:
                 logger.info("✅ Token estimate is safe, attempting single call")
@@ -567,7 +578,8 @@ class ClaudeDocumentAIService:
                     num_pages=page_count,
                     prompt=full_prompt,
                     system_prompt=system_prompt,
-                    progress_tracker=progress_tracker
+                    progress_tracker=progress_tracker,
+                    document=document
                 )
             
             # ✅ NEW: Early validation check (before sending to frontend)
@@ -719,7 +731,7 @@ class ClaudeDocumentAIService:
                 'processing_time': processing_time
             }
     
-    def _validate_file(self, file_path: str) -> Dict[str, Any]:
+    def _validate_file(self, file_path: str, document: Optional[PDFDocument] = None) -> Dict[str, Any]:
         """Validate file meets Claude's requirements"""
         try:
             # Check file exists
@@ -727,7 +739,7 @@ class ClaudeDocumentAIService:
                 return {'valid': False, 'error': f'File not found: {file_path}'}
             
             # Get PDF info
-            pdf_info = self.pdf_processor.get_pdf_info(file_path)
+            pdf_info = self.pdf_processor.get_pdf_info(file_path, document)
             
             if 'error' in pdf_info:
                 return {'valid': False, 'error': pdf_info['error']}
@@ -743,7 +755,8 @@ class ClaudeDocumentAIService:
             # Validate page count
             is_valid_pages, pages_error = self.pdf_processor.validate_pdf_pages(
                 file_path,
-                self.max_pages
+                self.max_pages,
+                document
             )
             if not is_valid_pages:
                 return {'valid': False, 'error': pages_error}
@@ -1082,7 +1095,7 @@ class ClaudeDocumentAIService:
         original_path: str
     ) -> str:
         """
-        Extract a subset of pages from PDF document.
+        Extract a subset of pages from PDF document (a PyMuPDF document or a shared PDFDocument).
         
         Returns path to new temporary PDF with only the selected pages.
         """
@@ -1097,12 +1110,15 @@ class ClaudeDocumentAIService:
             logger.error("PyMuPDF (fitz) not available for chunking")
             raise ImportError("PyMuPDF required for PDF chunking. Install with: pip install pymupdf")
         
-        new_pdf = fitz.open()
-        for page_num in range(start_page, end_page):
-            new_pdf.insert_pdf(pdf_doc, from_page=page_num, to_page=page_num)
-        
-        new_pdf.save(str(chunk_path))
-        new_pdf.close()
+        if isinstance(pdf_doc, PDFDocument):
+            chunk_path.write_bytes(pdf_doc.page_range_pdf(start_page, end_page))
+        else:
+            new_pdf = fitz.open()
+            for page_num in range(start_page, end_page):
+                new_pdf.insert_pdf(pdf_doc, from_page=page_num, to_page=page_num)
+            
+            new_pdf.save(str(chunk_path))
+            new_pdf.close()
         
         logger.debug(f"Created chunk PDF: {chunk_path} (pages {start_page + 1}-{end_page})")
         
@@ -1448,7 +1464,8 @@ class ClaudeDocumentAIService:
         progress_tracker = None,
         model: str = None,  # ← NEW: Optional model override
         max_rechunk_attempts: int = 2,  # ✅ NEW: Allow 2 levels of re-chunking (5→3→2 or 3→2→1)
-        _recursion_depth: int = 0  # ✅ INTERNAL: Track recursion depth
+        _recursion_depth: int = 0,  # ✅ INTERNAL: Track recursion depth
+        document: Optional[PDFDocument] = None  # Parsed pdf_path, shared with the caller
     ) -> Dict[str, Any]:
         """
         Extract from PDF in chunks with AUTOMATIC RE-CHUNKING on failure.
@@ -1458,8 +1475,8 @@ class ClaudeDocumentAIService:
         - Recursively retry with progressively smaller sizes: 5 → 3 → 2 pages
         - Only mark as failed after exhausting all re-chunking attempts
         
-        Chunks are processed sequentially (respecting 36K ITPM limit)
-        but intelligently merged to avoid duplication.
+        Up to chunk_concurrency chunks are in flight at once; each API call still waits for
+        the token bucket (36K ITPM limit). Results are merged in chunk order to avoid duplication.
         """
         
         # Use primary model if not specified
@@ -1476,8 +1493,8 @@ class ClaudeDocumentAIService:
         if _recursion_depth > 0:
             logger.info(f"{indent}   (Re-chunking attempt {_recursion_depth}/{max_rechunk_attempts})")
         
-        # Open PDF
-        pdf_doc = fitz.open(pdf_path)
+        # Open PDF (or reuse the upload's parsed document)
+        pdf_doc = document if document is not None else fitz.open(pdf_path)
         
         all_results = {
             'tables': [],
@@ -1521,14 +1538,34 @@ class ClaudeDocumentAIService:
         for i, chunk in enumerate(chunks):
             logger.info(f"{indent}      Chunk {i + 1}: Pages {chunk['start_page'] + 1}-{chunk['end_page']}")
         
-        # Process each chunk with error recovery
-        for chunk_info in chunks:
+        # Process chunks concurrently (bounded by chunk_concurrency; the token bucket decides
+        # when each API call actually goes out). Each chunk reports into its own outcome and
+        # outcomes are merged afterwards in chunk order, so deduplication does not depend on
+        # which chunk finished first.
+        chunk_semaphore = asyncio.Semaphore(max(1, self.chunk_concurrency))
+        completed_chunks = 0
+        
+        async def _process_chunk(chunk_info: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal completed_chunks
+            async with chunk_semaphore:
+                try:
+                    return await _extract_chunk(chunk_info)
+                finally:
+                    completed_chunks += 1
+        
+        async def _extract_chunk(chunk_info: Dict[str, Any]) -> Dict[str, Any]:
+            outcome = {
+                'chunk_results': [],     # Results fed to ExtractionValidator.validate_chunk_merge
+                'merge_result': None,    # Direct chunk result merged via _merge_chunk_results
+                'succeeded': False,
+                'failures': []
+            }
             try:
                 logger.info(f"{indent}📖 Processing chunk {chunk_info['index'] + 1}/{len(chunks)}: Pages {chunk_info['start_page'] + 1}-{chunk_info['end_page']}")
                 
                 # Update progress
                 if progress_tracker:
-                    progress_pct = 20 + int((chunk_info['index'] / len(chunks)) * 60)
+                    progress_pct = 20 + int((completed_chunks / len(chunks)) * 60)
                     await progress_tracker.update_progress(
                         "table_detection",
                         progress_pct,
@@ -1612,13 +1649,9 @@ class ClaudeDocumentAIService:
                                             'writing_agents': sub_result.get('writing_agents', []),
                                             'business_intelligence': sub_result.get('business_intelligence', {})
                                         }
-                                        all_chunk_results.append(wrapped_result)
-                                    
-                                    # ✅ NEW: Track processed pages from sub-result
-                                    for page_num in range(chunk_info['start_page'], chunk_info['end_page']):
-                                        all_results['pages_processed'].add(page_num)
+                                        outcome['chunk_results'].append(wrapped_result)
                                     
-                                    all_results['successful_chunks'].append(chunk_info['index'])
+                                    outcome['succeeded'] = True
                                 else:
                                     # ✅ PHASE 4: Try page-by-page fallback before giving up
                                     logger.warning(f"{indent}   ⚠️ Re-chunking failed, attempting page-by-page fallback")
@@ -1629,7 +1662,8 @@ class ClaudeDocumentAIService:
                                         prompt=prompt,
                                         system_prompt=system_prompt,
                                         progress_tracker=progress_tracker,
-                                        model=model
+                                        model=model,
+                                        document=document
                                     )
                                     
                                     if fallback_result.get('success'):
@@ -1644,17 +1678,13 @@ class ClaudeDocumentAIService:
                                             'writing_agents': [],
                                             'business_intelligence': {}
                                         }
-                                        all_chunk_results.append(wrapped_result)
-                                        
-                                        # ✅ NEW: Track processed pages from fallback
-                                        for page_num in range(chunk_info['start_page'], chunk_info['end_page']):
-                                            all_results['pages_processed'].add(page_num)
+                                        outcome['chunk_results'].append(wrapped_result)
                                         
-                                        all_results['successful_chunks'].append(chunk_info['index'])
+                                        outcome['succeeded'] = True
                                     else:
                                         # Final failure after all attempts
                                         logger.error(f"{indent}   ❌ Re-chunking and fallback both failed for chunk {chunk_info['index']}")
-                                        all_results['failed_chunks'].append({
+                                        outcome['failures'].append({
                                             'chunk_index': chunk_info['index'],
                                             'reason': 'Re-chunking exhausted and page-by-page fallback failed',
                                             'pages': f"{chunk_info['start_page'] + 1}-{chunk_info['end_page']}",
@@ -1669,17 +1699,17 @@ class ClaudeDocumentAIService:
                                 except Exception as e:
                                     logger.warning(f"{indent}   Failed to cleanup temp chunk PDF: {e}")
                             
-                            continue  # Move to next chunk
+                            return outcome  # Move to next chunk
                         else:
                             # Can't split further or max recursion reached
                             logger.error(f"{indent}   ❌ Cannot split chunk further (current size: {chunk_info['page_count']}, recommended: {recommended_size}, depth: {_recursion_depth}/{max_rechunk_attempts})")
-                            all_results['failed_chunks'].append({
+                            outcome['failures'].append({
                                 'chunk_index': chunk_info['index'],
                                 'reason': f'Exceeds token limit and cannot split further (depth: {_recursion_depth})',
                                 'pages': f"{chunk_info['start_page'] + 1}-{chunk_info['end_page']}",
                                 'recoverable': False
                             })
-                            continue
+                            return outcome
                     
                     # Extract chunk (only if passed validation)
                     chunk_prompt = f"Extract commission data from this section of the document. Page range: {chunk_info['start_page'] + 1}-{chunk_info['end_page']}.\n\n{prompt}"
@@ -1710,13 +1740,9 @@ class ClaudeDocumentAIService:
                     # Check if chunk extraction succeeded
                     if chunk_result and chunk_result.get('success'):
                         # ✅ CRITICAL FIX: Merge even if only one table (don't fail on small chunks)
-                        all_chunk_results.append(chunk_result)
-                        all_results = self._merge_chunk_results(all_results, chunk_result, chunk_info)
-                        all_results['successful_chunks'].append(chunk_info['index'])
-                        
-                        # ✅ NEW: Track processed pages
-                        for page_num in range(chunk_info['start_page'], chunk_info['end_page']):
-                            all_results['pages_processed'].add(page_num)
+                        outcome['chunk_results'].append(chunk_result)
+                        outcome['merge_result'] = chunk_result
+                        outcome['succeeded'] = True
                         
                         logger.info(f"{indent}   ✅ Chunk successful: {len(chunk_result.get('tables', []))} tables extracted")
                     else:
@@ -1724,7 +1750,7 @@ class ClaudeDocumentAIService:
                         error_msg = chunk_result.get('error', 'Unknown error') if chunk_result else 'No result'
                         logger.warning(f"{indent}   ❌ Chunk extraction failed: {error_msg}")
                         
-                        all_results['failed_chunks'].append({
+                        outcome['failures'].append({
                             'chunk_index': chunk_info['index'],
                             'reason': error_msg,
                             'pages': f"{chunk_info['start_page'] + 1}-{chunk_info['end_page']}",
@@ -1732,7 +1758,7 @@ class ClaudeDocumentAIService:
                         })
                         
                         # Continue to next chunk instead of failing
-                        continue
+                        return outcome
                 
                 finally:
                     # Clean up chunk file
@@ -1748,7 +1774,7 @@ class ClaudeDocumentAIService:
                 logger.error(f"{indent}   ❌ Chunk {chunk_info['index']} failed with exception: {e}")
                 logger.exception("Full traceback:")
                 
-                all_results['failed_chunks'].append({
+                outcome['failures'].append({
                     'chunk_index': chunk_info['index'],
                     'exception': str(e),
                     'pages': f"{chunk_info['start_page'] + 1}-{chunk_info['end_page']}",
@@ -1756,9 +1782,25 @@ class ClaudeDocumentAIService:
                 })
                 
                 # Continue processing remaining chunks
-                continue
+                return outcome
+        
+            
+            return outcome
+        
+        outcomes = await asyncio.gather(*(_process_chunk(chunk_info) for chunk_info in chunks))
+        
+        for chunk_info, outcome in zip(chunks, outcomes):
+            all_chunk_results.extend(outcome['chunk_results'])
+            if outcome['merge_result'] is not None:
+                all_results = self._merge_chunk_results(all_results, outcome['merge_result'], chunk_info)
+            if outcome['succeeded']:
+                all_results['successful_chunks'].append(chunk_info['index'])
+                for page_num in range(chunk_info['start_page'], chunk_info['end_page']):
+                    all_results['pages_processed'].add(page_num)
+            all_results['failed_chunks'].extend(outcome['failures'])
         
-        pdf_doc.close()
+        if document is None:
+            pdf_doc.close()
         
         # ✅ CRITICAL VALIDATION: Verify all pages processed
         expected_pages = set(range(num_pages))
@@ -1866,7 +1908,8 @@ class ClaudeDocumentAIService:
         prompt: str,
         system_prompt: str,
         progress_tracker = None,
-        model: str = None
+        model: str = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         FALLBACK: Extract pages individually when chunking fails.
@@ -1890,7 +1933,7 @@ class ClaudeDocumentAIService:
             logger.error("PyMuPDF not available for page-by-page fallback")
             raise ImportError("PyMuPDF required for PDF chunking. Install with: pip install pymupdf")
         
-        pdf_doc = fitz.open(pdf_path)
+        pdf_doc = document if document is not None else fitz.open(pdf_path)
         page_results = []
         
         for page_num in range(failed_chunk_info['start_page'], failed_chunk_info['end_page']):
@@ -1946,7 +1989,8 @@ class ClaudeDocumentAIService:
                 logger.error(f"      ❌ Page {page_num + 1} failed: {e}")
                 continue
         
-        pdf_doc.close()
+        if document is None:
+            pdf_doc.close()
         
         # Merge page results
         if page_results:
@@ -1977,7 +2021,8 @@ class ClaudeDocumentAIService:
         progress_tracker = None,
         chunk_size: int = None,  # None means calculate, or specify exact size
         force_chunk: bool = False,  # ← NEW: Force chunking even if estimated safe
-        model: str = None  # ← NEW: Optional model override (defaults to primary_model)
+        model: str = None,  # ← NEW: Optional model override (defaults to primary_model)
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Extract from PDF in chunks with pre-calculated token awareness.
@@ -1986,7 +2031,7 @@ class ClaudeDocumentAIService:
         1. Estimate tokens needed
         2. If fits: extract as single call
         3. If doesn't fit: split into chunks
-        4. Process chunks sequentially (respecting rate limits)
+        4. Process chunks concurrently (paced by the rate limiter, merged in order)
         5. Merge results intelligently
         """
         
@@ -2047,7 +2092,8 @@ class ClaudeDocumentAIService:
             system_prompt=system_prompt,
             estimation=None,  # Not needed when force chunking
             progress_tracker=progress_tracker,
-            model=model  # ✅ Pass model parameter
+            model=model,  # ✅ Pass model parameter
+            document=document
         )
     
     async def _extract_with_fallback(
@@ -2210,9 +2256,8 @@ class ClaudeDocumentAIService:
         )
         
         # STEP 3: Wait if needed to respect BOTH input and output rate limits (CRITICAL)
-        wait_start = time.time()
-        await self.rate_limiter.wait_if_needed(estimated_input_tokens, estimated_output_tokens)
-        wait_time = time.time() - wait_start
+        reservation = await self.rate_limiter.reserve(estimated_input_tokens, estimated_output_tokens)
+        wait_time = reservation['wait_time']
         
         if wait_time > 1:
             self.stats['rate_limit_waits'] += 1
@@ -2341,29 +2386,8 @@ class ClaudeDocumentAIService:
                     f"Output: Est={estimated_output_tokens:,}, Actual={actual_output_tokens:,}, Diff={output_token_diff:+,}"
                 )
                 
-                # Correct the token bucket counts
-                # We already added 'estimated_input_tokens' and 'estimated_output_tokens' in wait_if_needed()
-                # Now adjust by the differences
-                async with self.rate_limiter.lock:
-                    old_input_count = self.rate_limiter.input_token_count
-                    old_output_count = self.rate_limiter.output_token_count
-                    
-                    # Replace estimated with actual
-                    self.rate_limiter.input_token_count = (
-                        self.rate_limiter.input_token_count - estimated_input_tokens + actual_input_tokens
-                    )
-                    self.rate_limiter.output_token_count = (
-                        self.rate_limiter.output_token_count - estimated_output_tokens + actual_output_tokens
-                    )
-                    
-                    logger.info(
-                        f"🔧 Token bucket adjusted: "
-                        f"Input: {old_input_count:,} → {self.rate_limiter.input_token_count:,}, "
-                        f"Output: {old_output_count:,} → {self.rate_limiter.output_token_count:,}"
-                    )
-                
-                # Call update_actual_usage for tracking
-                self.rate_limiter.update_actual_usage(actual_input_tokens, actual_output_tokens)
+                # Replace the reservation's estimates with the actual usage in the shared window
+                await self.rate_limiter.update_actual_usage(actual_input_tokens, actual_output_tokens, reservation)
                 
                 return {
                     'content': content_text,
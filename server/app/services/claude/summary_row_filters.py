@@ -19,10 +19,29 @@ Based on the comprehensive analysis document for table extraction.
 
 import re
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..summary_row_rules import RowRule, RowTexts, join_cells
 
 logger = logging.getLogger(__name__)
 
+GROUP_NO_VALIDATION_PATTERN = r'^[A-Z]\d{6}$'
+AMOUNT_PATTERN = re.compile(r'^[\d,]+\.\d{2}$')
+NEGATIVE_AMOUNT_PATTERN = re.compile(r'^\(\$?[\d,]+\.\d{2}\)$')
+
+# Keywords that mark a row the post validator catches, in reporting order
+EXPLICIT_SUMMARY_KEYWORDS = [
+    "total for group",
+    "total for vendor",
+    "grand total",
+    "sub-total",
+    "subtotal",
+    "writing agent number",
+    "writing agent name",
+    "agent 2 name",
+    "producer name"
+]
+
 
 class SummaryRowPreFilter:
     """
@@ -60,9 +79,17 @@ class SummaryRowPreFilter:
         re.compile(r'^Agent 2 Name:\s*', re.IGNORECASE),
         re.compile(r'^Producer Name:\s*', re.IGNORECASE),
         # Pattern for group numbers with valid format (Letter + 6 digits)
-        re.compile(r'^[A-Z]\d{6}$'),  # Valid pattern - use for validation
+        re.compile(GROUP_NO_VALIDATION_PATTERN),  # Valid pattern - use for validation
     ]
     
+    # Each rule class compiled once into a single pattern
+    KEYWORD_RULE = RowRule('pre_filter_keywords', SUMMARY_KEYWORDS, literal=True)
+    EXCLUSION_RULE = RowRule(
+        'pre_filter_exclusions',
+        [p.pattern for p in EXCLUSION_PATTERNS if p.pattern != GROUP_NO_VALIDATION_PATTERN],
+        flags=re.IGNORECASE
+    )
+    
     @staticmethod
     def filter_summary_rows(raw_table_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
         """
@@ -90,15 +117,22 @@ class SummaryRowPreFilter:
         
         logger.info(f"Pre-filtering {len(rows)} rows for summary detection")
         
+        # Convert rows to strings once and run checks 1 and 2 over the whole table
+        row_texts = RowTexts([join_cells(row) if row else '' for row in rows])
+        keyword_mask = row_texts.mask(SummaryRowPreFilter.KEYWORD_RULE)
+        pattern_mask = RowTexts([str(row[0]).strip() if row else '' for row in rows]).mask(
+            SummaryRowPreFilter.EXCLUSION_RULE
+        )
+        columns = SummaryRowPreFilter._group_columns(headers)
+        
         for row_idx, row in enumerate(rows):
             if not row:
                 continue
             
-            # Convert row to string for checking
-            row_text = ' '.join(str(cell).lower() for cell in row if cell)
-            
             # Check 1: Keyword-based detection
-            is_summary, reason = SummaryRowPreFilter._check_keywords(row, row_text)
+            is_summary = False
+            if keyword_mask[row_idx]:
+                is_summary, reason = SummaryRowPreFilter._check_keywords(row, row_texts[row_idx])
             if is_summary:
                 excluded_rows.append({
                     'row_index': row_idx,
@@ -109,7 +143,8 @@ class SummaryRowPreFilter:
                 continue
             
             # Check 2: Pattern-based detection
-            is_summary, reason = SummaryRowPreFilter._check_patterns(row)
+            if pattern_mask[row_idx]:
+                is_summary, reason = SummaryRowPreFilter._check_patterns(row)
             if is_summary:
                 excluded_rows.append({
                     'row_index': row_idx,
@@ -120,7 +155,7 @@ class SummaryRowPreFilter:
                 continue
             
             # Check 3: Structural detection (empty key fields)
-            is_summary, reason = SummaryRowPreFilter._check_structure(row, headers)
+            is_summary, reason = SummaryRowPreFilter._check_structure(row, headers, columns)
             if is_summary:
                 excluded_rows.append({
                     'row_index': row_idx,
@@ -131,7 +166,7 @@ class SummaryRowPreFilter:
                 continue
             
             # Check 4: Group number format validation
-            has_valid_group_no, reason = SummaryRowPreFilter._validate_group_number(row, headers)
+            has_valid_group_no, reason = SummaryRowPreFilter._validate_group_number(row, headers, columns)
             if not has_valid_group_no:
                 excluded_rows.append({
                     'row_index': row_idx,
@@ -161,9 +196,9 @@ class SummaryRowPreFilter:
         Returns:
             Tuple of (is_summary: bool, reason: str)
         """
-        for keyword in SummaryRowPreFilter.SUMMARY_KEYWORDS:
-            if keyword in row_text:
-                return True, f"Contains summary keyword: '{keyword}'"
+        keyword = SummaryRowPreFilter.KEYWORD_RULE.first(row_text)
+        if keyword:
+            return True, f"Contains summary keyword: '{keyword}'"
         return False, ""
     
     @staticmethod
@@ -179,30 +214,22 @@ class SummaryRowPreFilter:
         
         first_cell = str(row[0]).strip()
         
-        for pattern in SummaryRowPreFilter.EXCLUSION_PATTERNS:
-            # Skip the validation pattern (used later)
-            if pattern.pattern == r'^[A-Z]\d{6}$':
-                continue
-            
-            if pattern.match(first_cell):
-                return True, f"Matches exclusion pattern: {pattern.pattern}"
+        # The validation pattern is not part of the rule (used later)
+        pattern = SummaryRowPreFilter.EXCLUSION_RULE.first(first_cell)
+        if pattern:
+            return True, f"Matches exclusion pattern: {pattern}"
         
         return False, ""
     
     @staticmethod
-    def _check_structure(row: List[Any], headers: List[str]) -> Tuple[bool, str]:
+    def _group_columns(headers: List[str]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
         """
-        Check structural indicators of summary rows.
-        
-        ✅ SIMPLIFIED: Only flag if BOTH identifiers are empty (conservative).
+        Locate the identifier columns once per table.
         
         Returns:
-            Tuple of (is_summary: bool, reason: str)
+            Tuple of (first Group No. index, last Group No. index, last Group Name index)
         """
-        if not row or len(row) < 2:
-            return False, ""
-        
-        # Find Group No. and Group Name column indices
+        first_group_no_idx = None
         group_no_idx = None
         group_name_idx = None
         
@@ -210,9 +237,29 @@ class SummaryRowPreFilter:
             header_lower = str(header).lower()
             if 'group no' in header_lower or 'group number' in header_lower:
                 group_no_idx = idx
+                if first_group_no_idx is None:
+                    first_group_no_idx = idx
             if 'group name' in header_lower or 'company' in header_lower or 'customer name' in header_lower:
                 group_name_idx = idx
         
+        return first_group_no_idx, group_no_idx, group_name_idx
+    
+    @staticmethod
+    def _check_structure(row: List[Any], headers: List[str], columns: Optional[Tuple] = None) -> Tuple[bool, str]:
+        """
+        Check structural indicators of summary rows.
+        
+        ✅ SIMPLIFIED: Only flag if BOTH identifiers are empty (conservative).
+        
+        Returns:
+            Tuple of (is_summary: bool, reason: str)
+        """
+        if not row or len(row) < 2:
+            return False, ""
+        
+        # Find Group No. and Group Name column indices
+        _, group_no_idx, group_name_idx = columns or SummaryRowPreFilter._group_columns(headers)
+        
         # ✅ CONSERVATIVE: Only flag if BOTH key columns are empty
         # (Empty Group No. alone is NOT enough - could be parsing error)
         if group_no_idx is not None and group_name_idx is not None:
@@ -227,7 +274,7 @@ class SummaryRowPreFilter:
         return False, ""
     
     @staticmethod
-    def _validate_group_number(row: List[Any], headers: List[str]) -> Tuple[bool, str]:
+    def _validate_group_number(row: List[Any], headers: List[str], columns: Optional[Tuple] = None) -> Tuple[bool, str]:
         """
         Validate that row has a proper group number format.
         
@@ -241,12 +288,7 @@ class SummaryRowPreFilter:
             return False, "Empty row"
         
         # Find Group No. column
-        group_no_idx = None
-        for idx, header in enumerate(headers):
-            header_lower = str(header).lower()
-            if 'group no' in header_lower or 'group number' in header_lower:
-                group_no_idx = idx
-                break
+        group_no_idx = (columns or SummaryRowPreFilter._group_columns(headers))[0]
         
         if group_no_idx is None or group_no_idx >= len(row):
             # No Group No. column found - can't validate
@@ -279,6 +321,8 @@ class SummaryRowPostValidator:
     This is a safety net to ensure summary rows don't slip through.
     """
     
+    KEYWORD_RULE = RowRule('post_validate_keywords', EXPLICIT_SUMMARY_KEYWORDS, literal=True)
+    
     @staticmethod
     def validate_extracted_rows(extracted_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
         """
@@ -323,6 +367,12 @@ class SummaryRowPostValidator:
             
             summary_row_indices = set(existing_summary_rows)  # Start with existing
             
+            # Convert rows to strings once and check keywords over the whole table
+            rows_data = [row.get('data', row) if isinstance(row, dict) else row for row in rows]
+            row_texts = RowTexts([join_cells(row_data) if row_data else '' for row_data in rows_data])
+            keyword_mask = row_texts.mask(SummaryRowPostValidator.KEYWORD_RULE)
+            columns = SummaryRowPostValidator._group_columns(headers)
+            
             for row_idx, row in enumerate(rows):
                 # Skip if already marked as summary
                 if row_idx in summary_row_indices:
@@ -347,7 +397,9 @@ class SummaryRowPostValidator:
                         continue
                 
                 # Apply validation to detect unmarked summary rows
-                is_valid, reason = SummaryRowPostValidator._validate_row(row_data, headers)
+                is_valid, reason = SummaryRowPostValidator._validate_row(
+                    row_data, headers, row_texts[row_idx], keyword_mask[row_idx], columns
+                )
                 
                 if not is_valid:
                     summary_row_indices.add(row_idx)
@@ -414,8 +466,8 @@ class SummaryRowPostValidator:
                         amount = str(last_row_data[amount_idx]).strip()
                         has_amount = (amount and 
                                      (amount.startswith('$') or amount.startswith('(') or 
-                                      re.match(r'^[\d,]+\.\d{2}$', amount) or
-                                      re.match(r'^\(\$?[\d,]+\.\d{2}\)$', amount)))
+                                      AMOUNT_PATTERN.match(amount) or
+                                      NEGATIVE_AMOUNT_PATTERN.match(amount)))
                     
                     # If last row has empty identifiers and populated amount → Grand Total
                     if identifiers_empty and has_amount:
@@ -450,49 +502,53 @@ class SummaryRowPostValidator:
         return validated_data, detected_summary_rows
     
     @staticmethod
-    def _validate_row(row: List[Any], headers: List[str]) -> Tuple[bool, str]:
+    def _group_columns(headers: List[str]) -> Tuple[Optional[int], Optional[int]]:
+        """Locate the Group No. and Group Name columns once per table."""
+        group_no_idx = None
+        group_name_idx = None
+        
+        for idx, header in enumerate(headers):
+            header_lower = str(header).lower()
+            if 'group no' in header_lower or 'group number' in header_lower:
+                group_no_idx = idx
+            if 'group name' in header_lower or 'company' in header_lower:
+                group_name_idx = idx
+        
+        return group_no_idx, group_name_idx
+    
+    @staticmethod
+    def _validate_row(
+        row: List[Any],
+        headers: List[str],
+        row_text: Optional[str] = None,
+        has_keyword: bool = True,
+        columns: Optional[Tuple] = None
+    ) -> Tuple[bool, str]:
         """
         Validate a single row against summary patterns.
         
         ✅ SIMPLIFIED: Only catch OBVIOUS summary rows that slipped through.
         Conservative approach - when in doubt, treat as valid data row.
         
+        validate_extracted_rows passes the row text, keyword mask entry and identifier
+        columns it computed for the whole table.
+        
         Returns:
             Tuple of (is_valid: bool, reason: str)
         """
         if not row:
             return False, "Empty row"
         
-        # Convert row to string for checking
-        row_text = ' '.join(str(cell) for cell in row if cell).lower()
-        
         # ✅ ONLY check for explicit keywords (high confidence)
-        explicit_keywords = [
-            "total for group",
-            "total for vendor", 
-            "grand total",
-            "sub-total",
-            "subtotal",
-            "writing agent number",
-            "writing agent name",
-            "agent 2 name",
-            "producer name"
-        ]
-        
-        for keyword in explicit_keywords:
-            if keyword in row_text:
+        if has_keyword:
+            if row_text is None:
+                row_text = join_cells(row)
+            keyword = SummaryRowPostValidator.KEYWORD_RULE.first(row_text)
+            if keyword:
                 return False, f"Contains explicit summary keyword: '{keyword}'"
         
         # ✅ Check for completely empty identifier columns (BOTH must be empty)
-        group_no_idx = None
-        group_name_idx = None
-        
-        for idx, header in enumerate(headers):
-            header_lower = str(header).lower()
-            if 'group no' in header_lower or 'group number' in header_lower:
-                group_no_idx = idx
-            if 'group name' in header_lower or 'company' in header_lower:
-                group_name_idx = idx
+        group_no_idx, group_name_idx = columns or SummaryRowPostValidator._group_columns(headers)
         
         # Only flag if BOTH identifiers are empty
         if group_no_idx is not None and group_name_idx is not None:
@@ -12,6 +12,7 @@ import time
 import threading
 import asyncio
 import random
+from abc import ABC, abstractmethod
 from collections import deque
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
@@ -35,19 +36,229 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+
+
+def evaluate_rate_limit_window(
+    entries: List[Tuple[float, int, int]],
+    now: float,
+    limits: Tuple[int, int, int],
+    cost: Tuple[int, int],
+    window_seconds: float = RATE_LIMIT_WINDOW_SECONDS
+) -> Dict[str, Any]:
+    """
+    Decide whether a request fits a sliding window of reservations.
+    
+    Shared by every rate limit backend so they all apply the same rules.
+    
+    Args:
+        entries: (reserved_at, input_tokens, output_tokens) of reservations still in the window,
+                 oldest first
+        now: Current time on the same clock as reserved_at
+        limits: (requests, input tokens, output tokens) allowed per window
+        cost: (input tokens, output tokens) of the new request
+        window_seconds: Window length
+        
+    Returns:
+        {"allowed": bool, "retry_after": seconds until enough reservations expire,
+         "usage": {"requests", "input_tokens", "output_tokens"}, "reasons": [str]}
+    """
+    rpm_limit, itpm_limit, otpm_limit = limits
+    input_cost, output_cost = cost
+    
+    used = [len(entries), sum(e[1] for e in entries), sum(e[2] for e in entries)]
+    needed = [1, input_cost, output_cost]
+    caps = [rpm_limit, itpm_limit, otpm_limit]
+    usage = {'requests': used[0], 'input_tokens': used[1], 'output_tokens': used[2]}
+    
+    over = [used[i] + needed[i] > caps[i] for i in range(3)]
+    
+    # Large single outputs are allowed while the output budget of the window is still fresh
+    # (< 20% used) - the per-request max_tokens cap bounds them
+    if over[2] and used[2] < otpm_limit * 0.2:
+        over[2] = False
+    
+    if not any(over):
+        return {'allowed': True, 'retry_after': 0.0, 'usage': usage, 'reasons': []}
+    
+    reasons = []
+    retry_after = 0.0
+    for i, name in enumerate(('RPM', 'ITPM', 'OTPM')):
+        if not over[i]:
+            continue
+        excess = used[i] + needed[i] - caps[i]
+        reasons.append(f"{name} limit ({used[i]:,}+{needed[i]:,}/{caps[i]:,})")
+        
+        # Walk the window oldest first until enough of this dimension has expired
+        freed = 0
+        expires_at = None
+        for entry in entries:
+            freed += 1 if i == 0 else entry[i]
+            if freed >= excess:
+                expires_at = entry[0] + window_seconds
+                break
+        if expires_at is None:
+            expires_at = (entries[-1][0] if entries else now) + window_seconds
+        retry_after = max(retry_after, expires_at - now)
+    
+    return {'allowed': False, 'retry_after': max(0.05, retry_after), 'usage': usage, 'reasons': reasons}
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for sliding-window reservations.
+    
+    try_reserve must check and record a reservation atomically for its key; reconcile replaces
+    a reservation's estimated tokens with the actual usage.
+    """
+    
+    @abstractmethod
+    async def try_reserve(self, key: str, limits: Tuple[int, int, int], cost: Tuple[int, int]) -> Dict[str, Any]:
+        """Returns evaluate_rate_limit_window()'s decision plus "reservation_id" when allowed."""
+    
+    @abstractmethod
+    async def reconcile(self, key: str, reservation_id: str, input_tokens: int, output_tokens: int) -> None:
+        """Replace a reservation's estimated tokens with the actual usage."""
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """
+    In-process backend: limits only this worker.
+    
+    Stand-in for development/tests and fallback when the shared backend is unavailable.
+    """
+    
+    def __init__(self, window_seconds: float = RATE_LIMIT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._windows: Dict[str, deque] = {}
+        # Held only for the in-memory check-and-append, never across an await
+        self._lock = threading.Lock()
+    
+    async def try_reserve(self, key: str, limits: Tuple[int, int, int], cost: Tuple[int, int]) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            window = self._windows.setdefault(key, deque())
+            while window and window[0][0] <= now - self.window_seconds:
+                window.popleft()
+            
+            decision = evaluate_rate_limit_window(
+                [(e[0], e[1], e[2]) for e in window], now, limits, cost, self.window_seconds
+            )
+            decision['reservation_id'] = None
+            if decision['allowed']:
+                reservation_id = f"{now:.6f}-{random.getrandbits(32):08x}"
+                window.append([now, cost[0], cost[1], reservation_id])
+                decision['reservation_id'] = reservation_id
+            return decision
+    
+    async def reconcile(self, key: str, reservation_id: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            for entry in self._windows.get(key, ()):
+                if entry[3] == reservation_id:
+                    entry[1] = input_tokens
+                    entry[2] = output_tokens
+                    return
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """
+    Shared backend: one row per reservation in claude_rate_limit_reservations.
+    
+    Check-and-insert runs in a short transaction serialized per key with
+    pg_advisory_xact_lock, and timestamps come from the database clock, so every gunicorn
+    worker (and every instance) sees the same sliding window.
+    """
+    
+    def __init__(self, window_seconds: float = RATE_LIMIT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+    
+    @staticmethod
+    def _engine_and_table():
+        from app.db.database import engine
+        from app.db.models import ClaudeRateLimitReservation
+        return engine, ClaudeRateLimitReservation.__table__
+    
+    async def try_reserve(self, key: str, limits: Tuple[int, int, int], cost: Tuple[int, int]) -> Dict[str, Any]:
+        import uuid
+        from sqlalchemy import select, delete, insert, func
+        
+        engine, table = self._engine_and_table()
+        async with engine.begin() as conn:
+            await conn.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"claude_rate_limit:{key}"))))
+            now = float((await conn.execute(select(func.extract('epoch', func.clock_timestamp())))).scalar())
+            
+            await conn.execute(
+                delete(table).where(table.c.limiter_key == key, table.c.reserved_at <= now - self.window_seconds)
+            )
+            entries = (await conn.execute(
+                select(table.c.reserved_at, table.c.input_tokens, table.c.output_tokens)
+                .where(table.c.limiter_key == key)
+                .order_by(table.c.reserved_at)
+            )).all()
+            
+            decision = evaluate_rate_limit_window(
+                [tuple(e) for e in entries], now, limits, cost, self.window_seconds
+            )
+            decision['reservation_id'] = None
+            if decision['allowed']:
+                reservation_id = uuid.uuid4()
+                await conn.execute(insert(table).values(
+                    id=reservation_id, limiter_key=key, reserved_at=now,
+                    input_tokens=cost[0], output_tokens=cost[1]
+                ))
+                decision['reservation_id'] = str(reservation_id)
+            return decision
+    
+    async def reconcile(self, key: str, reservation_id: str, input_tokens: int, output_tokens: int) -> None:
+        import uuid
+        from sqlalchemy import update
+        
+        engine, table = self._engine_and_table()
+        async with engine.begin() as conn:
+            await conn.execute(
+                update(table)
+                .where(table.c.id == uuid.UUID(reservation_id))
+                .values(input_tokens=input_tokens, output_tokens=output_tokens)
+            )
+
+
+_rate_limit_backends: Dict[str, RateLimitBackend] = {}
+
+
+def get_rate_limit_backend(name: Optional[str] = None) -> RateLimitBackend:
+    """
+    Process-wide backend instance by name ("postgres" or "local").
+    
+    Defaults to the CLAUDE_RATE_LIMIT_BACKEND environment variable, then "postgres" so that
+    all gunicorn workers share one budget.
+    """
+    name = (name or os.getenv('CLAUDE_RATE_LIMIT_BACKEND', 'postgres')).lower()
+    if name not in _rate_limit_backends:
+        if name == 'postgres':
+            _rate_limit_backends[name] = PostgresRateLimitBackend()
+        elif name == 'local':
+            _rate_limit_backends[name] = LocalRateLimitBackend()
+        else:
+            raise ValueError(f"Unknown rate limit backend: {name}")
+    return _rate_limit_backends[name]
+
+
 class ClaudeTokenBucket:
     """
-    ✅ PRODUCTION-GRADE: Token bucket algorithm for Claude API rate limiting.
+    ✅ PRODUCTION-GRADE: Sliding-window rate limiter for the Claude API, shared across workers.
     
-    Now tracks BOTH input and output tokens separately with exponential backoff.
+    Tracks requests, input tokens and output tokens separately over a sliding 60s window of
+    reservations kept in a pluggable backend (Postgres by default, so the limits hold for the
+    whole deployment rather than per gunicorn worker; see get_rate_limit_backend).
     
     OPTIMIZED LIMITS (Based on Claude Sonnet 4.5 Tier 1):
     - Requests: 50 RPM → 45 RPM (with 90% buffer)
     - Input Tokens: 40,000 ITPM → 36,000 ITPM (with 90% buffer)
     - Output Tokens: 8,000 OTPM → 7,200 OTPM (with 90% buffer)
     
-    Claude API enforces THREE separate limits. This prevents 429 rate limit errors
-    by managing all three consumption metrics proactively with exponential backoff.
+    Callers in this process queue FIFO; only the head of the queue talks to the backend, and
+    no lock is held while it sleeps. Reservations are made with estimates and reconciled with
+    the actual usage in update_actual_usage.
     """
     
     def __init__(
@@ -55,29 +266,39 @@ class ClaudeTokenBucket:
         requests_per_minute: int = 50,
         input_tokens_per_minute: int = 40000,
         output_tokens_per_minute: int = 8000,
-        buffer_percentage: float = 0.90
+        buffer_percentage: float = 0.90,
+        backend: Optional[RateLimitBackend] = None,
+        limiter_key: str = 'claude'
     ):
         """
-        Initialize token bucket rate limiter with exponential backoff and jitter.
+        Initialize the rate limiter.
         
         Args:
             requests_per_minute: Maximum requests per minute (50 for Tier 1)
             input_tokens_per_minute: Maximum INPUT tokens per minute (40,000 for Tier 1)
             output_tokens_per_minute: Maximum OUTPUT tokens per minute (8,000 for Tier 1)
             buffer_percentage: Use 90% of limits (safe with concurrency control)
+            backend: Reservation storage (default: get_rate_limit_backend())
+            limiter_key: Window shared by every limiter with the same key
         """
         self.rpm_limit = int(requests_per_minute * buffer_percentage)  # 45 RPM
         self.itpm_limit = int(input_tokens_per_minute * buffer_percentage)    # 36,000 ITPM
         self.otpm_limit = int(output_tokens_per_minute * buffer_percentage)   # 7,200 OTPM
         
-        # Track input and output tokens separately
+        self.backend = backend or get_rate_limit_backend()
+        self.fallback_backend = LocalRateLimitBackend()
+        self.limiter_key = limiter_key
+        
+        # Window usage as of the last backend decision (for logging/monitoring)
         self.request_count = 0
         self.input_token_count = 0
         self.output_token_count = 0
         
-        # Window management
-        self.window_start = time.time()
-        self.lock = asyncio.Lock()
+        # FIFO of waiting callers; the condition's lock is only held to inspect the queue
+        self._waiters = deque()
+        self._turn = asyncio.Condition()
+        # Set when this process gives capacity back, so the head re-checks before its timeout
+        self._capacity_freed = asyncio.Event()
         
         # Exponential backoff parameters
         self.backoff_base = 1.0
@@ -91,6 +312,7 @@ class ClaudeTokenBucket:
         self.logger.info(f"   ITPM Limit: {self.itpm_limit:,} (from {input_tokens_per_minute:,})")
         self.logger.info(f"   OTPM Limit: {self.otpm_limit:,} (from {output_tokens_per_minute:,})")
         self.logger.info(f"   Buffer: {buffer_percentage * 100:.0f}%")
+        self.logger.info(f"   Backend: {type(self.backend).__name__} (key: {self.limiter_key}, sliding {RATE_LIMIT_WINDOW_SECONDS:.0f}s window)")
         self.logger.info(f"   Exponential backoff: base={self.backoff_base}s, max={self.backoff_max}s, jitter={self.backoff_jitter}")
         # Calculate max pages per chunk
         available_tokens_for_pages = self.itpm_limit - 3000  # Reserve 3K for prompt
@@ -117,6 +339,95 @@ class ClaudeTokenBucket:
         
         return total
     
+    async def _try_reserve(self, limits: Tuple[int, int, int], cost: Tuple[int, int]) -> Dict[str, Any]:
+        """Reserve through the backend, falling back to the local window if it is unavailable."""
+        try:
+            decision = await self.backend.try_reserve(self.limiter_key, limits, cost)
+            decision['backend'] = self.backend
+        except Exception as e:
+            self.logger.warning(f"⚠️ Rate limit backend unavailable ({e}); using in-process window")
+            decision = await self.fallback_backend.try_reserve(self.limiter_key, limits, cost)
+            decision['backend'] = self.fallback_backend
+        
+        usage = decision['usage']
+        self.request_count = usage['requests']
+        self.input_token_count = usage['input_tokens']
+        self.output_token_count = usage['output_tokens']
+        return decision
+    
+    async def reserve(self, estimated_input_tokens: int, estimated_output_tokens: int = 2000) -> Dict[str, Any]:
+        """
+        Wait (FIFO) until the request fits all three limits and reserve its estimated tokens.
+        
+        Returns:
+            Reservation to pass to update_actual_usage:
+            {"reservation_id", "backend", "input_tokens", "output_tokens", "wait_time"}
+        """
+        # ✅ CRITICAL VALIDATION: Reject requests that are too large to ever fit
+        if estimated_input_tokens > self.itpm_limit:
+            raise ValueError(
+                f"Request too large: {estimated_input_tokens:,} input tokens exceeds "
+                f"limit of {self.itpm_limit:,} tokens per minute"
+            )
+        # ✅ ADJUSTED: Allow individual requests up to 16K output tokens (max_tokens limit)
+        # Rate limiter will enforce waits to stay within aggregate OTPM limit
+        if estimated_output_tokens > 16000:
+            raise ValueError(
+                f"Request too large: {estimated_output_tokens:,} output tokens exceeds "
+                f"maximum of 16,000 tokens per request"
+            )
+        
+        limits = (self.rpm_limit, self.itpm_limit, self.otpm_limit)
+        cost = (estimated_input_tokens, estimated_output_tokens)
+        start = time.time()
+        ticket = object()
+        
+        # Take a place in line; the lock is released while waiting for our turn
+        async with self._turn:
+            self._waiters.append(ticket)
+            try:
+                await self._turn.wait_for(lambda: self._waiters[0] is ticket)
+            except BaseException:
+                self._waiters.remove(ticket)
+                self._turn.notify_all()
+                raise
+        
+        try:
+            while True:
+                self._capacity_freed.clear()
+                decision = await self._try_reserve(limits, cost)
+                if decision['allowed']:
+                    break
+                
+                self.logger.warning(f"⏳ Rate limit hit: {', '.join(decision['reasons'])}")
+                self.logger.info(f"   Waiting up to {decision['retry_after']:.1f}s for the window to slide")
+                try:
+                    await asyncio.wait_for(self._capacity_freed.wait(), timeout=decision['retry_after'])
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            async with self._turn:
+                self._waiters.remove(ticket)
+                self._turn.notify_all()
+        
+        wait_time = time.time() - start
+        log = self.logger.info if wait_time > 1 else self.logger.debug
+        log(
+            f"✅ Rate limit OK - "
+            f"RPM: {self.request_count + 1}/{self.rpm_limit}, "
+            f"ITPM: {self.input_token_count + estimated_input_tokens:,}/{self.itpm_limit:,}, "
+            f"OTPM: {self.output_token_count + estimated_output_tokens:,}/{self.otpm_limit:,}"
+            + (f" (waited {wait_time:.1f}s)" if wait_time > 1 else "")
+        )
+        
+        return {
+            'reservation_id': decision['reservation_id'],
+            'backend': decision['backend'],
+            'input_tokens': estimated_input_tokens,
+            'output_tokens': estimated_output_tokens,
+            'wait_time': wait_time
+        }
+    
     async def wait_if_needed(self, estimated_input_tokens: int, estimated_output_tokens: int = 2000) -> float:
         """
         ✅ CRITICAL FIX: Wait if needed to respect rate limits for BOTH input and output tokens.
@@ -124,7 +435,9 @@ class ClaudeTokenBucket:
         Claude API enforces THREE separate limits:
         - Requests per minute (RPM)
         - Input tokens per minute (ITPM)
-        - Output tokens per minute (OTPM) ← This was missing!
+        - Output tokens per minute (OTPM)
+        
+        Use reserve() instead when the actual usage will be reported back.
         
         Args:
             estimated_input_tokens: Estimated input tokens for the request
@@ -133,107 +446,8 @@ class ClaudeTokenBucket:
         Returns:
             Wait time in seconds (0.0 if no wait needed)
         """
-        async with self.lock:
-            current_time = time.time()
-            elapsed = current_time - self.window_start
-            
-            # Reset window if 60 seconds passed
-            if elapsed >= 60:
-                self.request_count = 0
-                self.input_token_count = 0
-                self.output_token_count = 0  # ✅ NEW
-                self.window_start = current_time
-                elapsed = 0  # ✅ CRITICAL FIX: Reset elapsed after window reset
-                self.logger.info("✅ Token bucket reset (60s window)")
-                # ✅ CRITICAL FIX: Don't return early - fall through to limit checks
-                # This ensures we validate even the first request after reset
-            
-            # ✅ CRITICAL VALIDATION: Reject requests that are too large to ever fit
-            if estimated_input_tokens > self.itpm_limit:
-                raise ValueError(
-                    f"Request too large: {estimated_input_tokens:,} input tokens exceeds "
-                    f"limit of {self.itpm_limit:,} tokens per minute"
-                )
-            # ✅ ADJUSTED: Allow individual requests up to 16K output tokens (max_tokens limit)
-            # Rate limiter will enforce waits to stay within aggregate OTPM limit
-            if estimated_output_tokens > 16000:
-                raise ValueError(
-                    f"Request too large: {estimated_output_tokens:,} output tokens exceeds "
-                    f"maximum of 16,000 tokens per request"
-                )
-            
-            # ✅ CRITICAL FIX: Check ALL THREE limits
-            requests_available = self.request_count < self.rpm_limit
-            input_tokens_available = (self.input_token_count + estimated_input_tokens) <= self.itpm_limit
-            output_tokens_available = (self.output_token_count + estimated_output_tokens) <= self.otpm_limit  # ✅ NEW
-            
-            # ✅ ENHANCED: Smart windowing for output tokens
-            # Allow large output requests if we're in a fresh window
-            fresh_window = self.output_token_count < (self.otpm_limit * 0.2)  # Less than 20% used
-            if fresh_window and not output_tokens_available:
-                if estimated_output_tokens <= 16000:  # Within per-request limit
-                    self.logger.info(
-                        f"⚡ Allowing large output request in fresh window "
-                        f"({estimated_output_tokens:,} tokens, {self.output_token_count:,}/{self.otpm_limit:,} used)"
-                    )
-                    output_tokens_available = True
-            
-            # If all limits are OK, reserve tokens immediately
-            if requests_available and input_tokens_available and output_tokens_available:
-                self.request_count += 1
-                self.input_token_count += estimated_input_tokens
-                self.output_token_count += estimated_output_tokens  # ✅ NEW
-                
-                self.logger.debug(
-                    f"✅ Rate limit OK - "
-                    f"RPM: {self.request_count}/{self.rpm_limit}, "
-                    f"ITPM: {self.input_token_count:,}/{self.itpm_limit:,}, "
-                    f"OTPM: {self.output_token_count:,}/{self.otpm_limit:,}"  # ✅ NEW
-                )
-                return 0.0
-            
-            # ✅ ENHANCED: Calculate precise wait time based on most restrictive limit
-            time_until_reset = 60 - elapsed
-            
-            wait_reasons = []
-            if not requests_available:
-                wait_reasons.append(f"RPM limit ({self.request_count}/{self.rpm_limit})")
-            if not input_tokens_available:
-                tokens_over = (self.input_token_count + estimated_input_tokens) - self.itpm_limit
-                wait_reasons.append(f"ITPM limit (over by {tokens_over:,})")
-            if not output_tokens_available:
-                tokens_over = (self.output_token_count + estimated_output_tokens) - self.otpm_limit
-                wait_reasons.append(f"OTPM limit (over by {tokens_over:,})")
-            
-            self.logger.warning(f"⏳ Rate limit hit: {', '.join(wait_reasons)}")
-            self.logger.info(f"   Waiting {time_until_reset:.1f}s for window reset")
-            
-            # Wait for window reset
-            seconds_to_wait = time_until_reset
-            
-            await asyncio.sleep(seconds_to_wait)
-            
-            # After waiting, reset appropriately
-            elapsed_after_wait = time.time() - self.window_start
-            if elapsed_after_wait >= 60:
-                self.request_count = 0
-                self.input_token_count = 0
-                self.output_token_count = 0
-                self.window_start = time.time()
-            
-            # Reserve tokens
-            self.request_count += 1
-            self.input_token_count += estimated_input_tokens
-            self.output_token_count += estimated_output_tokens
-            
-            self.logger.info(
-                f"✅ Rate limit status after wait: "
-                f"RPM: {self.request_count}/{self.rpm_limit}, "
-                f"ITPM: {self.input_token_count:,}/{self.itpm_limit:,}, "
-                f"OTPM: {self.output_token_count:,}/{self.otpm_limit:,}"
-            )
-            
-            return seconds_to_wait
+        reservation = await self.reserve(estimated_input_tokens, estimated_output_tokens)
+        return reservation['wait_time']
     
     def _calculate_exponential_backoff(self) -> float:
         """
@@ -261,26 +475,47 @@ class ClaudeTokenBucket:
         """Increment backoff attempt counter after rate limit hit"""
         self.attempt_count += 1
     
-    def update_actual_usage(self, actual_input_tokens: int, actual_output_tokens: int):
+    async def update_actual_usage(
+        self,
+        actual_input_tokens: int,
+        actual_output_tokens: int,
+        reservation: Optional[Dict[str, Any]] = None
+    ):
         """
-        ✅ CRITICAL FIX: Update token counts with actual usage after API call.
-        This improves accuracy over time by correcting estimates with actual values.
+        ✅ CRITICAL FIX: Reconcile a reservation with the actual usage after the API call.
+        
+        The reservation's estimated tokens are replaced by the actual ones in the shared window,
+        so over-estimates free capacity for other callers (and workers) right away.
         
         Args:
             actual_input_tokens: Actual input tokens used
             actual_output_tokens: Actual output tokens used
+            reservation: Returned by reserve(); without it the usage is only logged
         """
         self.logger.debug(
             f"📊 Actual usage - Input: {actual_input_tokens:,}, Output: {actual_output_tokens:,}"
         )
+        if not reservation or not reservation.get('reservation_id'):
+            return
+        
+        try:
+            await reservation['backend'].reconcile(
+                self.limiter_key, reservation['reservation_id'], actual_input_tokens, actual_output_tokens
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not reconcile rate limit reservation: {e}")
+            return
+        
+        if actual_input_tokens < reservation['input_tokens'] or actual_output_tokens < reservation['output_tokens']:
+            self._capacity_freed.set()
 
 
 class ClaudePDFProcessor:
     """Handles PDF processing for Claude API"""
     
     @staticmethod
-    def get_pdf_info(file_path: str) -> Dict[str, Any]:
-        """Get PDF file information"""
+    def get_pdf_info(file_path: str, document=None) -> Dict[str, Any]:
+        """Get PDF file information (page count from document, a shared PDFDocument, if given)"""
         try:
             file_size_bytes = os.path.getsize(file_path)
             file_size_mb = file_size_bytes / (1024 * 1024)
@@ -293,9 +528,12 @@ class ClaudePDFProcessor:
                     'error': 'PyMuPDF not available'
                 }
             
-            doc = fitz.open(file_path)
-            page_count = len(doc)
-            doc.close()
+            if document is not None:
+                page_count = document.page_count
+            else:
+                doc = fitz.open(file_path)
+                page_count = len(doc)
+                doc.close()
             
             return {
                 'file_size_bytes': file_size_bytes,
@@ -337,15 +575,18 @@ class ClaudePDFProcessor:
             return False, f"Error validating file size: {str(e)}"
     
     @staticmethod
-    def validate_pdf_pages(file_path: str, max_pages: int = 100) -> Tuple[bool, Optional[str]]:
+    def validate_pdf_pages(file_path: str, max_pages: int = 100, document=None) -> Tuple[bool, Optional[str]]:
         """Validate PDF page count against Claude's limits"""
         try:
             if not PYMUPDF_AVAILABLE:
                 return True, None  # Skip validation if PyMuPDF not available
             
-            doc = fitz.open(file_path)
-            page_count = len(doc)
-            doc.close()
+            if document is not None:
+                page_count = document.page_count
+            else:
+                doc = fitz.open(file_path)
+                page_count = len(doc)
+                doc.close()
             
             if page_count > max_pages:
                 return False, f"Document has {page_count} pages, exceeds maximum {max_pages}"
@@ -0,0 +1,401 @@
+"""
+Columnar profile of a table, computed once and shared.
+
+Format learning (FormatLearningService), the pattern learners of the extraction pipeline
+and multipage handler, and TableValidator all profile the columns of a table: types,
+character classes, lengths, numeric/currency/date cells and nulls. Each of them used to
+walk every cell in Python, several times over.
+
+A TableProfile transposes the rows once. Each ColumnProfile converts its cells to strings
+once and computes its statistics with NumPy:
+- Character classes come from the code points of the whole column, classified through a
+  lookup table, so no Python loop runs per character.
+- Per-cell counts (letters, digits, words, '$', '.') are bincounts of those code points
+  by the cell they belong to.
+- Regex masks use the combined, precompiled patterns of summary_row_rules.RowRule.
+
+Statistics are computed on first use and cached on the profile. A caller that runs several
+analyses over one table builds the profile once and passes it to each of them.
+"""
+
+from functools import cached_property
+from itertools import compress, zip_longest
+from operator import methodcaller
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+from app.services.summary_row_rules import RowRule
+
+# Character class bits
+ALPHA = 1
+DIGIT = 2
+ALNUM = 4
+SPACE = 8
+
+
+def _char_flags(char: str) -> int:
+    return (
+        (ALPHA if char.isalpha() else 0)
+        | (DIGIT if char.isdigit() else 0)
+        | (ALNUM if char.isalnum() else 0)
+        | (SPACE if char.isspace() else 0)
+    )
+
+
+_ASCII_FLAGS = np.array([_char_flags(chr(cp)) for cp in range(128)], dtype=np.uint8)
+
+DATE_RULE = RowRule('date', [
+    r'\d{1,2}/\d{1,2}/\d{2,4}',  # MM/DD/YYYY
+    r'\d{1,2}-\d{1,2}-\d{2,4}',  # MM-DD-YYYY
+    r'\d{4}-\d{1,2}-\d{1,2}',    # YYYY-MM-DD
+])
+DIGIT_RULE = RowRule('digit', [r'\d'])
+NUMERIC_CHAR_RULE = RowRule('numeric_char', [r'[\d.,]'])
+FINANCIAL_RULE = RowRule('financial', [r'[\$€£¥%]'])
+DATE_LIKE_RULE = RowRule('date_like', [r'\d{1,4}[/-]\d{1,2}[/-]\d{1,4}'])
+ALPHA_TEXT_RULE = RowRule('alpha_text', [r'^[a-zA-Z\s]+$'])
+
+
+def _parses_as_float(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _bool_array(values, count: int) -> np.ndarray:
+    return np.fromiter(values, dtype=bool, count=count)
+
+
+class ColumnProfile:
+    """
+    Statistics of one column.
+
+    Per-cell vectors cover `stripped`: the stripped text of the cells present in each row
+    (rows shorter than the column are skipped), which is what the pattern learners use.
+    `non_null` follows pandas instead (None/NaN and absent cells dropped, text not stripped),
+    which is what format learning uses.
+    """
+
+    def __init__(self, index: int, name: Optional[str], cells: Sequence[Any], present: np.ndarray):
+        self.index = index
+        self.name = name
+        self._cells = cells
+        self.present = present
+        self.row_count = len(cells)
+        self._masks: Dict[RowRule, np.ndarray] = {}
+
+    @cached_property
+    def null(self) -> np.ndarray:
+        """True for absent, None and NaN cells."""
+        if not self.row_count:
+            return np.zeros(0, dtype=bool)
+        cells = np.fromiter(self._cells, dtype=object, count=self.row_count)
+        return ~self.present | pd.isnull(cells)
+
+    @cached_property
+    def _text(self) -> List[str]:
+        return list(map(str, self._cells))
+
+    @cached_property
+    def values(self) -> List[str]:
+        """str() of the cells present in each row."""
+        if self.present.all():
+            return self._text
+        return list(compress(self._text, self.present))
+
+    @cached_property
+    def stripped(self) -> List[str]:
+        return list(map(str.strip, self.values))
+
+    @cached_property
+    def non_null(self) -> List[str]:
+        """str() of the non-null cells, in row order."""
+        return list(compress(self._text, ~self.null))
+
+    @cached_property
+    def raw_lengths(self) -> np.ndarray:
+        """Length of str(cell) for every row; 0 where the row has no such cell."""
+        lengths = np.fromiter(map(len, self._text), dtype=np.int64, count=self.row_count)
+        lengths[~self.present] = 0
+        return lengths
+
+    @property
+    def null_ratio(self) -> float:
+        return float(self.null.sum()) / self.row_count if self.row_count else 0.0
+
+    # Character level ------------------------------------------------------------
+
+    @cached_property
+    def _chars(self):
+        """Code points of all stripped cells, their class bits, and each cell's span."""
+        cells = self.stripped
+        lengths = np.fromiter(map(len, cells), dtype=np.int64, count=len(cells))
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        codepoints = np.frombuffer(
+            ''.join(cells).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32
+        )
+        flags = _ASCII_FLAGS[np.minimum(codepoints, 127)]
+        wide = codepoints > 127
+        if wide.any():
+            unique, inverse = np.unique(codepoints[wide], return_inverse=True)
+            wide_flags = np.array([_char_flags(chr(cp)) for cp in unique.tolist()], dtype=np.uint8)
+            flags[wide] = wide_flags[inverse]
+        return codepoints, flags, starts, ends, lengths
+
+    @cached_property
+    def _cell_of_char(self) -> np.ndarray:
+        """Index of the cell each character belongs to."""
+        lengths = self._chars[4]
+        return np.repeat(np.arange(len(lengths)), lengths)
+
+    def _per_cell(self, char_mask: np.ndarray) -> np.ndarray:
+        """Number of characters in each cell for which char_mask is set."""
+        return np.bincount(self._cell_of_char[char_mask], minlength=len(self.stripped))
+
+    @cached_property
+    def lengths(self) -> np.ndarray:
+        return self._chars[4]
+
+    @cached_property
+    def alpha_counts(self) -> np.ndarray:
+        return self._per_cell((self._chars[1] & ALPHA) != 0)
+
+    @cached_property
+    def digit_counts(self) -> np.ndarray:
+        """Digits that are not also letters."""
+        flags = self._chars[1]
+        return self._per_cell(((flags & DIGIT) != 0) & ((flags & ALPHA) == 0))
+
+    @cached_property
+    def word_counts(self) -> np.ndarray:
+        """len(cell.split()) for every cell."""
+        codepoints, flags, starts, ends, lengths = self._chars
+        space = (flags & SPACE) != 0
+        after_space = np.ones(len(codepoints), dtype=bool)
+        after_space[1:] = space[:-1]
+        after_space[starts[lengths > 0]] = True
+        return self._per_cell(~space & after_space)
+
+    def _contains(self, char: str) -> np.ndarray:
+        return self._per_cell(self._chars[0] == ord(char)) > 0
+
+    # Cell classification ----------------------------------------------------
+
+    @cached_property
+    def blank_mask(self) -> np.ndarray:
+        return self.lengths == 0
+
+    @cached_property
+    def upper_mask(self) -> np.ndarray:
+        return _bool_array(map(str.isupper, self.stripped), len(self.stripped))
+
+    @cached_property
+    def lower_mask(self) -> np.ndarray:
+        return _bool_array(map(str.islower, self.stripped), len(self.stripped))
+
+    @cached_property
+    def title_mask(self) -> np.ndarray:
+        return _bool_array(map(str.istitle, self.stripped), len(self.stripped))
+
+    @cached_property
+    def _numeric_core(self) -> List[str]:
+        """Cells without ',', '$' and '%', stripped."""
+        # Chained replace is several times faster than str.translate for this
+        return [cell.replace(',', '').replace('$', '').replace('%', '').strip() for cell in self.stripped]
+
+    @cached_property
+    def numeric_mask(self) -> np.ndarray:
+        """Only digits (and '.') once ',', '$' and '%' are removed."""
+        cores = map(methodcaller('replace', '.', ''), self._numeric_core)
+        return _bool_array(map(str.isdigit, cores), len(self.stripped))
+
+    @cached_property
+    def decimal_mask(self) -> np.ndarray:
+        return self.numeric_mask & self._contains('.')
+
+    @cached_property
+    def currency_mask(self) -> np.ndarray:
+        """Contains '$' or '%'."""
+        return self._contains('$') | self._contains('%')
+
+    @cached_property
+    def dollar_mask(self) -> np.ndarray:
+        return self._contains('$')
+
+    @cached_property
+    def float_mask(self) -> np.ndarray:
+        """Parses as a float once ',', '$' and '%' are removed."""
+        return _bool_array(map(_parses_as_float, self._numeric_core), len(self.stripped))
+
+    def mask(self, rule: RowRule) -> np.ndarray:
+        """Cells (stripped) where the rule matches."""
+        # Cells are short, so searching each one beats scanning a joined blob
+        if rule not in self._masks:
+            search = rule.regex.search
+            self._masks[rule] = _bool_array(map(bool, map(search, self.stripped)), len(self.stripped))
+        return self._masks[rule]
+
+    @property
+    def date_mask(self) -> np.ndarray:
+        return self.mask(DATE_RULE)
+
+    # Summaries --------------------------------------------------------------
+
+    def length_stats(self) -> Dict[str, float]:
+        """Length statistics of the non-empty cells."""
+        lengths = self.lengths[self.lengths > 0]
+        if not len(lengths):
+            return {'mean': 0, 'std': 0, 'min': 0, 'max': 0}
+        mean_length = int(lengths.sum()) / len(lengths)
+        return {
+            'mean': mean_length,
+            'std': float(np.sqrt(((lengths - mean_length) ** 2).sum() / len(lengths))),
+            'min': int(lengths.min()),
+            'max': int(lengths.max())
+        }
+
+    def char_type_distribution(self) -> Dict[str, float]:
+        total_chars = int(self.lengths.sum())
+        if total_chars == 0:
+            return {'alpha_ratio': 0, 'digit_ratio': 0, 'special_ratio': 0}
+        alpha_chars = int(self.alpha_counts.sum())
+        digit_chars = int(self.digit_counts.sum())
+        return {
+            'alpha_ratio': alpha_chars / total_chars,
+            'digit_ratio': digit_chars / total_chars,
+            'special_ratio': (total_chars - alpha_chars - digit_chars) / total_chars
+        }
+
+    def case_patterns(self) -> Dict[str, float]:
+        total = len(self.stripped)
+        if total == 0:
+            return {'all_upper_ratio': 0, 'all_lower_ratio': 0, 'mixed_case_ratio': 0, 'title_case_ratio': 0}
+        mixed = ~self.upper_mask & ~self.lower_mask & ~self.blank_mask
+        return {
+            'all_upper_ratio': int(self.upper_mask.sum()) / total,
+            'all_lower_ratio': int(self.lower_mask.sum()) / total,
+            'mixed_case_ratio': int(mixed.sum()) / total,
+            'title_case_ratio': int(self.title_mask.sum()) / total
+        }
+
+    def numeric_patterns(self) -> Dict[str, float]:
+        total = len(self.stripped)
+        if total == 0:
+            return {'numeric_ratio': 0, 'decimal_ratio': 0, 'currency_ratio': 0}
+        return {
+            'numeric_ratio': int(self.numeric_mask.sum()) / total,
+            'decimal_ratio': int(self.decimal_mask.sum()) / total,
+            'currency_ratio': int(self.currency_mask.sum()) / total
+        }
+
+    def special_char_patterns(self) -> Dict[str, float]:
+        """Frequency of each character that is not alphanumeric or a space."""
+        codepoints, flags, _, _, _ = self._chars
+        total_chars = len(codepoints)
+        if total_chars == 0:
+            return {}
+        special = ((flags & ALNUM) == 0) & (codepoints != 32)
+        chars, counts = np.unique(codepoints[special], return_counts=True)
+        return {chr(cp): count / total_chars for cp, count in zip(chars.tolist(), counts.tolist())}
+
+    def word_patterns(self) -> Dict[str, float]:
+        word_counts = self.word_counts
+        if not len(word_counts):
+            return {'mean_words': 0, 'std_words': 0, 'max_words': 0}
+        mean_words = int(word_counts.sum()) / len(word_counts)
+        return {
+            'mean_words': mean_words,
+            'std_words': float(np.sqrt(((word_counts - mean_words) ** 2).sum() / len(word_counts))),
+            'max_words': int(word_counts.max())
+        }
+
+    def pattern(self) -> Dict[str, Any]:
+        """Learned pattern of the column, as used to match continuation rows."""
+        if not self.stripped:
+            return {}
+        return {
+            'length_stats': self.length_stats(),
+            'char_type_distribution': self.char_type_distribution(),
+            'case_patterns': self.case_patterns(),
+            'numeric_patterns': self.numeric_patterns(),
+            'special_char_patterns': self.special_char_patterns(),
+            'word_patterns': self.word_patterns()
+        }
+
+    def sample_values(self, max_samples: int = 5) -> List[str]:
+        """First distinct non-null values, in row order."""
+        samples: List[str] = []
+        seen: Set[str] = set()
+        for value in self.non_null:
+            if value not in seen:
+                seen.add(value)
+                samples.append(value)
+                if len(samples) == max_samples:
+                    break
+        return samples
+
+
+class TableProfile:
+    """Column profiles of a table (rows of cells, optionally with headers)."""
+
+    def __init__(self, rows: Sequence[Sequence[Any]], headers: Optional[Sequence[str]] = None):
+        self.rows = rows
+        self.headers = list(headers or [])
+        self.row_count = len(rows)
+        self.row_lengths = np.fromiter(map(len, rows), dtype=np.int64, count=self.row_count)
+        width = int(self.row_lengths.max()) if self.row_count else 0
+        self.column_count = max(width, len(self.headers))
+
+        # One transpose for the whole table; short rows are padded with None
+        columns = list(zip_longest(*rows)) if width else []
+        columns.extend([(None,) * self.row_count] * (self.column_count - len(columns)))
+        self.columns = [
+            ColumnProfile(
+                index,
+                self.headers[index] if index < len(self.headers) else None,
+                cells,
+                self.row_lengths > index
+            )
+            for index, cells in enumerate(columns)
+        ]
+
+    def column(self, index: int) -> ColumnProfile:
+        return self.columns[index]
+
+    @property
+    def min_row_length(self) -> int:
+        return int(self.row_lengths.min()) if self.row_count else 0
+
+    def null_count(self, column_count: Optional[int] = None) -> int:
+        return sum(int(column.null.sum()) for column in self.columns[:column_count])
+
+    def non_empty_cells(self) -> int:
+        """Cells present in their row whose stripped text is not empty."""
+        return sum(int((~column.blank_mask).sum()) for column in self.columns)
+
+    def duplicate_rows(self, column_count: Optional[int] = None) -> int:
+        """Rows identical to an earlier row, comparing the first column_count columns."""
+        if not self.row_count:
+            return 0
+        cells = [column._cells for column in self.columns[:column_count]]
+        if not cells:
+            return self.row_count - 1
+        return self.row_count - len(set(zip(*cells)))
+
+    def data_types(self) -> Set[str]:
+        """Kinds of values found in the table's non-empty cells."""
+        data_types = set()
+        for label, rule in (
+            ('numeric', NUMERIC_CHAR_RULE),
+            ('financial', FINANCIAL_RULE),
+            ('date', DATE_LIKE_RULE),
+            ('text', ALPHA_TEXT_RULE),
+        ):
+            if any(column.mask(rule).any() for column in self.columns):
+                data_types.add(label)
+        return data_types
@@ -140,7 +140,8 @@ class DateExtractionService:
     async def extract_dates_from_file(
         self, 
         file_path: str,
-        max_pages: int = 2  # Process first 2 pages by default for better date detection
+        max_pages: int = 2,  # Process first 2 pages by default for better date detection
+        document=None
     ) -> Dict[str, Any]:
         """
         Extract dates from the first few pages of a document.
@@ -148,6 +149,7 @@ class DateExtractionService:
         Args:
             file_path: Path to the document file
             max_pages: Maximum number of pages to process (default: 2 for better date detection)
+            document: Optional shared PDFDocument for file_path (reuses its parsed text and words)
             
         Returns:
             Dictionary containing extracted dates and metadata
@@ -167,7 +169,7 @@ class DateExtractionService:
             file_ext = Path(file_path).suffix.lower()
             
             if file_ext == '.pdf':
-                return await self._extract_dates_from_pdf(file_path, max_pages)
+                return await self._extract_dates_from_pdf(file_path, max_pages, document)
             elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.tif']:
                 return await self._extract_dates_from_image(file_path)
             elif file_ext in ['.xlsx', '.xls', '.xlsm', '.xlsb']:
@@ -234,7 +236,7 @@ class DateExtractionService:
                 "dates": []
             }
     
-    async def _extract_dates_from_pdf(self, file_path: str, max_pages: int) -> Dict[str, Any]:
+    async def _extract_dates_from_pdf(self, file_path: str, max_pages: int, document=None) -> Dict[str, Any]:
         """Extract dates from PDF document with timeout and retry limits."""
         try:
             dates = []
@@ -242,21 +244,26 @@ class DateExtractionService:
             
             # Method 1: Use pdfplumber for text extraction (fast, no OCR)
             try:
-                with pdfplumber.open(file_path) as pdf:
-                    for page_num in range(min(len(pdf.pages), max_pages)):
-                        page = pdf.pages[page_num]
+                if document is not None:
+                    for page_num in range(min(document.page_count, max_pages)):
+                        dates.extend(self._extract_dates_from_text(document.layout_text(page_num), page_num + 1))
+                        dates.extend(self._extract_dates_from_words(document.page_words(page_num), page_num + 1))
+                else:
+                    with pdfplumber.open(file_path) as pdf:
+                        for page_num in range(min(len(pdf.pages), max_pages)):
+                            page = pdf.pages[page_num]
                         
-                        # Extract text from page
-                        text = page.extract_text() or ""
+                            # Extract text from page
+                            text = page.extract_text() or ""
                         
-                        # Extract dates from text
-                        text_dates = self._extract_dates_from_text(text, page_num + 1)
-                        dates.extend(text_dates)
+                            # Extract dates from text
+                            text_dates = self._extract_dates_from_text(text, page_num + 1)
+                            dates.extend(text_dates)
                         
-                        # Extract dates from words with bounding boxes
-                        words = page.extract_words()
-                        bbox_dates = self._extract_dates_from_words(words, page_num + 1)
-                        dates.extend(bbox_dates)
+                            # Extract dates from words with bounding boxes
+                            words = page.extract_words()
+                            bbox_dates = self._extract_dates_from_words(words, page_num + 1)
+                            dates.extend(bbox_dates)
                 
                 extraction_methods.append("text_extraction")
                 self.logger.logger.info(f"Text extraction found {len(dates)} dates")
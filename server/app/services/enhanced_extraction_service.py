@@ -41,6 +41,8 @@ except ImportError:
 
 from app.services.extraction_utils import normalize_statement_date, normalize_multi_line_headers
 from app.services.cancellation_manager import cancellation_manager
+from app.services.pdf_document import PDFDocument
+from app.db.crud.extraction_cache import EXTRACTION_CACHE_ENABLED
 
 # Import timeout configuration
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -48,6 +50,15 @@ from config.timeouts import timeout_settings
 
 logger = logging.getLogger(__name__)
 
+# Bump when extraction prompts or post-processing change so cached results are not replayed
+EXTRACTION_PROMPT_VERSION = "1"
+
+# Environment variables that select the models behind each extraction method
+EXTRACTION_MODEL_ENV_VARS = (
+    "GPT5_PRIMARY_MODEL", "GPT5_MINI_MODEL", "GPT5_TOTAL_PASS_MODEL", "GPT5_METADATA_MODEL",
+    "CLAUDE_MODEL_PRIMARY"
+)
+
 class EnhancedExtractionService:
     """
     Enhanced extraction service with real-time progress tracking and comprehensive timeout management.
@@ -249,7 +260,9 @@ class EnhancedExtractionService:
         upload_id: str,
         file_type: str = "pdf",
         extraction_method: str = "smart",
-        upload_id_uuid: str = None
+        upload_id_uuid: str = None,
+        file_hash: Optional[str] = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Extract tables with real-time progress tracking.
@@ -261,16 +274,31 @@ class EnhancedExtractionService:
             file_type: Type of file (pdf, excel, etc.)
             upload_id_uuid: Actual UUID from database (optional, for WebSocket completion)
             extraction_method: Method to use (smart, gpt4o, docai, mistral, excel)
+            file_hash: sha256 of the file; enables the extraction result cache for PDFs
+            document: Parsed PDF shared by every step of the extraction. When not given,
+                one is created for PDFs and closed when the extraction ends.
             
         Returns:
             Dictionary with extraction results
         """
         progress_tracker = create_progress_tracker(upload_id)
+        is_excel = file_type.lower() in ['xlsx', 'xls', 'xlsm', 'xlsb']
+        owns_document = document is None and not is_excel
+        if owns_document:
+            document = PDFDocument(file_path)
         
         try:
             # Check if already cancelled before starting
             await cancellation_manager.check_cancellation(upload_id)
             
+            # ✅ Same file + method + prompts/models extracted before: replay it (no AI calls)
+            cache_version = None
+            if file_hash and EXTRACTION_CACHE_ENABLED and not is_excel:
+                cache_version = self._extraction_cache_version(extraction_method, company_id)
+                cached = await self._get_cached_result(file_hash, extraction_method, cache_version)
+                if cached is not None:
+                    return await self._replay_cached_result(cached, progress_tracker, upload_id_uuid)
+            
             # ✅ CRITICAL: Validate services BEFORE starting progress tracking
             service_health = await self._validate_extraction_services(extraction_method)
             if not service_health['healthy']:
@@ -288,22 +316,22 @@ class EnhancedExtractionService:
             logger.info(f"✅ {service_health['service'].upper()} service validated successfully")
             
             # Determine extraction method based on file type and method preference
-            if file_type.lower() in ['xlsx', 'xls', 'xlsm', 'xlsb']:
-                return await self._extract_excel_with_progress(
+            if is_excel:
+                result = await self._extract_excel_with_progress(
                     file_path, company_id, progress_tracker, upload_id_uuid
                 )
             elif extraction_method == "mistral":
                 # Explicit Mistral request
-                return await self._extract_with_mistral_progress(
-                    file_path, company_id, progress_tracker, upload_id_uuid
+                result = await self._extract_with_mistral_progress(
+                    file_path, company_id, progress_tracker, upload_id_uuid, document
                 )
             elif extraction_method == "gpt4o":
-                return await self._extract_with_gpt4o_progress(
+                result = await self._extract_with_gpt4o_progress(
                     file_path, company_id, progress_tracker, upload_id_uuid
                 )
             elif extraction_method == "docai":
-                return await self._extract_with_docai_progress(
-                    file_path, company_id, progress_tracker, upload_id_uuid
+                result = await self._extract_with_docai_progress(
+                    file_path, company_id, progress_tracker, upload_id_uuid, document
                 )
             else:  # smart, default, or claude - USE GPT-5 VISION AS PRIMARY ⭐
                 logger.info("="*80)
@@ -313,9 +341,17 @@ class EnhancedExtractionService:
                 logger.info(f"   File: {file_path}")
                 logger.info(f"   NOTE: Function name '_extract_with_claude_progress' is legacy - it USES GPT-5")
                 logger.info("="*80)
-                return await self._extract_with_claude_progress(  # NOTE: Legacy function name, actually uses GPT-5 Vision!
-                    file_path, company_id, progress_tracker, upload_id_uuid
+                result = await self._extract_with_claude_progress(  # NOTE: Legacy function name, actually uses GPT-5 Vision!
+                    file_path, company_id, progress_tracker, upload_id_uuid, document
                 )
+            
+            completion_extra_fields = result.pop('_completion_extra_fields', None) if isinstance(result, dict) else None
+            # Fallback results after a (possibly transient) primary failure are not pinned for the file
+            if (cache_version and isinstance(result, dict) and result.get('success') and result.get('tables')
+                    and not self._is_fallback_result(result)):
+                await self._store_cached_result(file_hash, extraction_method, cache_version, result, completion_extra_fields)
+            
+            return result
                 
         except Exception as e:
             logger.error(f"Extraction failed for upload {upload_id}: {e}")
@@ -325,6 +361,9 @@ class EnhancedExtractionService:
             )
             raise
         finally:
+            if owns_document:
+                document.close()
+            
             # Clean up models and free memory after extraction
             try:
                 # Clean up any lazy-loaded services that were used
@@ -668,7 +707,8 @@ class EnhancedExtractionService:
         file_path: str,
         company_id: str,
         progress_tracker,
-        upload_id_uuid: str = None
+        upload_id_uuid: str = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """Extract with Google DocAI and progress tracking."""
         await progress_tracker.start_stage("document_processing", "Preparing for Google Document AI")
@@ -684,7 +724,7 @@ class EnhancedExtractionService:
         await progress_tracker.update_progress("table_detection", 30, "Analyzing document structure")
         
         # Perform actual extraction
-        result = await self.docai_extractor.extract_tables_async(file_path)
+        result = await self.docai_extractor.extract_tables_async(file_path, document=document)
         
         await progress_tracker.update_progress("table_detection", 70, "Extracting tables")
         await asyncio.sleep(0.3)
@@ -727,7 +767,8 @@ class EnhancedExtractionService:
         file_path: str,
         company_id: str,
         progress_tracker,
-        upload_id_uuid: str = None
+        upload_id_uuid: str = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Extract with Mistral and comprehensive progress tracking with timeout management.
@@ -737,7 +778,7 @@ class EnhancedExtractionService:
             # Overall process timeout
             async with asyncio.timeout(self.phase_timeouts['total_process']):
                 return await self._extract_with_phase_timeouts(
-                    file_path, company_id, progress_tracker, upload_id_uuid
+                    file_path, company_id, progress_tracker, upload_id_uuid, document
                 )
         except asyncio.TimeoutError:
             error_msg = f"Extraction timeout after {self.phase_timeouts['total_process']} seconds. The document may be too large or complex."
@@ -765,7 +806,8 @@ class EnhancedExtractionService:
         file_path: str,
         company_id: str,
         progress_tracker,
-        upload_id_uuid: str = None
+        upload_id_uuid: str = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """Process extraction with individual phase timeouts."""
         
@@ -796,7 +838,7 @@ class EnhancedExtractionService:
                 logger.info(f"Starting Claude metadata extraction with {self.phase_timeouts['metadata_extraction']}s timeout")
                 
                 # Extract metadata using Claude AI (includes broker_company)
-                claude_metadata = await self.claude_service.extract_metadata_only(file_path)
+                claude_metadata = await self.claude_service.extract_metadata_only(file_path, document=document)
                 
                 if claude_metadata.get('success'):
                     carrier_info = {
@@ -951,7 +993,8 @@ class EnhancedExtractionService:
         file_path: str,
         company_id: str,
         progress_tracker,
-        upload_id_uuid: str = None
+        upload_id_uuid: str = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Extract with GPT-5 Vision and comprehensive progress tracking.
@@ -974,7 +1017,7 @@ class EnhancedExtractionService:
             
             await progress_tracker.complete_stage("document_processing", "GPT-5 Vision ready")
 
-            carrier_name_for_prompt = await self._resolve_carrier_name(company_id, file_path)
+            carrier_name_for_prompt = await self._resolve_carrier_name(company_id, file_path, document)
             prompt_options = (
                 GPTDynamicPrompts.get_prompt_options(carrier_name_for_prompt)
                 if carrier_name_for_prompt else {}
@@ -1022,7 +1065,8 @@ class EnhancedExtractionService:
                 progress_tracker=progress_tracker,
                 use_enhanced=self.use_enhanced,  # ⭐ Enable enhanced 3-phase pipeline
                 max_pages=100,  # Allow large documents (1-100 pages) to be processed end-to-end
-                prompt_options=prompt_options
+                prompt_options=prompt_options,
+                document=document
             )
             
             logger.info("="*80)
@@ -1273,7 +1317,8 @@ class EnhancedExtractionService:
                     file_path=file_path,
                     progress_tracker=progress_tracker,
                     carrier_name=carrier_name_for_prompt if 'carrier_name_for_prompt' in locals() else None,
-                    use_enhanced=self.use_enhanced
+                    use_enhanced=self.use_enhanced,
+                    document=document
                 )
                 
                 logger.warning("="*80)
@@ -1309,12 +1354,14 @@ class EnhancedExtractionService:
                 # Try Mistral as last resort
                 logger.warning("⚠️ Trying Mistral as last resort fallback")
                 try:
-                    return await self._extract_with_mistral_progress(
+                    mistral_result = await self._extract_with_mistral_progress(
                         file_path,
                         company_id,
                         progress_tracker,
                         upload_id_uuid
                     )
+                    mistral_result['primary_service_failed'] = 'gpt5_vision'
+                    return mistral_result
                 except Exception as mistral_error:
                     logger.error(f"All extraction methods failed: {mistral_error}")
                     raise
@@ -1484,10 +1531,106 @@ class EnhancedExtractionService:
         
         if extra_fields:
             payload.update(extra_fields)
+            # Kept with the result so a cache replay sends the same completion payload
+            result['_completion_extra_fields'] = extra_fields
         
         await progress_tracker.send_completion(payload)
+    
+    def _extraction_cache_version(self, extraction_method: str, company_id: Optional[str]) -> str:
+        """
+        Everything besides the file that determines the extraction output: prompt version,
+        models, pipeline mode and the carrier (carrier-specific prompts).
+        """
+        models = ",".join(f"{name}={os.getenv(name, '')}" for name in EXTRACTION_MODEL_ENV_VARS)
+        return (
+            f"prompts={EXTRACTION_PROMPT_VERSION}|enhanced={self.use_enhanced}|"
+            f"carrier={company_id or ''}|{models}"
+        )
+    
+    @staticmethod
+    def _is_fallback_result(result: Dict[str, Any]) -> bool:
+        """Whether the result came from a fallback service after the requested one failed."""
+        return bool(result.get('primary_service_failed')) or result.get('extraction_method') == 'claude_fallback'
+    
+    async def _get_cached_result(self, file_hash: str, extraction_method: str, version: str) -> Optional[Dict[str, Any]]:
+        try:
+            from app.db import crud, get_db
+            async for db in get_db():
+                cached = await crud.get_cached_extraction(db, file_hash, extraction_method, version)
+                if cached is not None:
+                    logger.info(f"♻️ Extraction cache HIT for {file_hash[:16]}... ({extraction_method})")
+                else:
+                    logger.info(f"Extraction cache miss for {file_hash[:16]}... ({extraction_method})")
+                return cached
+        except Exception as exc:
+            logger.warning(f"⚠️ Extraction cache lookup failed (extracting normally): {exc}")
+        return None
+    
+    async def _store_cached_result(
+        self,
+        file_hash: str,
+        extraction_method: str,
+        version: str,
+        result: Dict[str, Any],
+        completion_extra_fields: Optional[Dict[str, Any]]
+    ):
+        try:
+            from app.db import crud, get_db
+            async for db in get_db():
+                size_bytes = await crud.save_cached_extraction(db, file_hash, extraction_method, version, {
+                    'result': result,
+                    'completion_extra_fields': completion_extra_fields or {}
+                })
+                if size_bytes is not None:
+                    logger.info(f"💾 Cached extraction for {file_hash[:16]}... ({size_bytes:,} bytes)")
+                break
+        except Exception as exc:
+            logger.warning(f"⚠️ Could not cache extraction result (non-critical): {exc}")
+    
+    async def _replay_cached_result(
+        self,
+        cached: Dict[str, Any],
+        progress_tracker,
+        upload_id_uuid: Optional[str]
+    ) -> Dict[str, Any]:
+        """Send a cached result through the normal WebSocket progress flow and return it."""
+        result = cached['result']
+        tables = result.get('tables', [])
+        
+        # Nothing was spent on this run
+        result['cache_hit'] = True
+        result['cached_tokens_used'] = result.get('total_tokens_used', 0)
+        result['total_tokens_used'] = 0
+        result['estimated_cost_usd'] = 0.0
+        
+        await progress_tracker.start_stage("document_processing", "Found a previous extraction of this file")
+        await progress_tracker.complete_stage("document_processing", "Previous extraction found")
+        await progress_tracker.connection_manager.emit_upload_step(progress_tracker.upload_id, 'extraction', 25)
+        await progress_tracker.connection_manager.emit_upload_step(progress_tracker.upload_id, 'table_extraction', 45)
+        await progress_tracker.start_stage("table_detection", "Loading cached extraction")
+        await progress_tracker.complete_stage("table_detection", f"Loaded {len(tables)} tables from cache")
+        
+        await self._emit_summary_ws(progress_tracker, result.get('summary'), result.get('structured_data') or {})
+        
+        await progress_tracker.start_stage("validation", "Validating cached results")
+        await progress_tracker.update_progress("validation", 100, "Validation completed")
+        
+        await self._send_completion_payload(
+            progress_tracker=progress_tracker,
+            upload_id_uuid=upload_id_uuid,
+            result=result,
+            extra_fields={**(cached.get('completion_extra_fields') or {}), 'cache_hit': True}
+        )
+        result.pop('_completion_extra_fields', None)
+        
+        return result
 
-    async def _resolve_carrier_name(self, company_id: Optional[str], file_path: str) -> Optional[str]:
+    async def _resolve_carrier_name(
+        self,
+        company_id: Optional[str],
+        file_path: str,
+        document: Optional[PDFDocument] = None
+    ) -> Optional[str]:
         """
         Determine the most likely carrier name using multiple strategies so carrier-specific prompts fire.
         """
@@ -1505,7 +1648,7 @@ class EnhancedExtractionService:
             logger.info(f"✓ Carrier inferred from filename: {carrier_name}")
             return carrier_name
         
-        carrier_name = await self._detect_carrier_from_pdf(file_path)
+        carrier_name = await self._detect_carrier_from_pdf(file_path, document)
         if carrier_name:
             logger.info(f"✓ Carrier detected from PDF text: {carrier_name}")
             return carrier_name
@@ -1530,16 +1673,17 @@ class EnhancedExtractionService:
         filename = Path(file_path).name
         return GPTDynamicPrompts.detect_carrier_in_text(filename, logger=logger)
 
-    async def _detect_carrier_from_pdf(self, file_path: str) -> Optional[str]:
+    async def _detect_carrier_from_pdf(self, file_path: str, document: Optional[PDFDocument] = None) -> Optional[str]:
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._scan_pdf_for_carrier, file_path)
+        return await loop.run_in_executor(None, self._scan_pdf_for_carrier, file_path, document)
 
-    def _scan_pdf_for_carrier(self, file_path: str) -> Optional[str]:
+    def _scan_pdf_for_carrier(self, file_path: str, document: Optional[PDFDocument] = None) -> Optional[str]:
         try:
-            reader = PdfReader(file_path)
+            if document is None:
+                document = PDFDocument(file_path)
             snippets: List[str] = []
-            for page in reader.pages[:3]:
-                page_text = page.extract_text() or ""
+            for page_num in range(min(3, document.page_count)):
+                page_text = document.page_text(page_num)
                 if page_text:
                     snippets.append(page_text[:4000])
             if not snippets:
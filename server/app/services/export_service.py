@@ -0,0 +1,131 @@
+"""
+Export Service
+
+Streams tabular exports (CSV and XLSX) as chunked StreamingResponses without building the
+file in memory:
+- CSV rows go through csv.writer into a small buffer that is flushed every
+  EXPORT_FLUSH_BYTES.
+- XLSX uses openpyxl's write-only workbook, which spools worksheet XML to temporary files.
+  The finished file is then streamed from a temporary file in chunks. An XLSX is a zip
+  with a central directory at the end, so it cannot be sent before the last row is written.
+
+Rows are async iterables, so callers can feed them straight from a server-side cursor.
+"""
+
+import asyncio
+import csv
+import io
+import re
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, List, Sequence, Tuple
+
+from fastapi.responses import StreamingResponse
+
+EXPORT_FLUSH_BYTES = 64 * 1024
+EXPORT_CHUNK_BYTES = 1024 * 1024
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+Sheet = Tuple[str, AsyncIterable[Sequence[Any]]]
+
+
+async def aiter_rows(rows: Iterable[Sequence[Any]]) -> AsyncIterator[Sequence[Any]]:
+    """Adapt an in-memory row list to the async row interface."""
+    for row in rows:
+        yield row
+
+
+def _xlsx_value(value: Any) -> Any:
+    """Cell value openpyxl can write (numbers and dates stay typed, the rest become text)."""
+    if value is None or isinstance(value, (str, int, float, Decimal, datetime, date, bool)):
+        return value
+    return str(value)
+
+
+def _sheet_title(title: str, used: set) -> str:
+    """Excel sheet names: at most 31 characters, no []:*?/\\ and unique in the workbook."""
+    base = re.sub(r'[\[\]:*?/\\]', ' ', title or '').strip()[:31] or "Sheet"
+    candidate, n = base, 1
+    while candidate.lower() in used:
+        n += 1
+        suffix = f" ({n})"
+        candidate = base[:31 - len(suffix)] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+async def iter_csv(sheets: List[Sheet]) -> AsyncIterator[bytes]:
+    """
+    CSV bytes for one or more sheets.
+
+    A single sheet is written as-is. Several sheets are written one after another, each
+    under a "Table: <title>" line and separated by a blank row.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the file as UTF-8
+    yield "\ufeff".encode("utf-8")
+
+    for index, (title, rows) in enumerate(sheets):
+        if len(sheets) > 1:
+            if index:
+                writer.writerow([])
+            writer.writerow([f"Table: {title}"])
+        async for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+            if buffer.tell() >= EXPORT_FLUSH_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def iter_xlsx(sheets: List[Sheet]) -> AsyncIterator[bytes]:
+    """XLSX bytes with one worksheet per sheet, built with a write-only workbook."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    used_titles: set = set()
+    for title, rows in sheets:
+        worksheet = workbook.create_sheet(title=_sheet_title(title, used_titles))
+        async for row in rows:
+            worksheet.append([_xlsx_value(value) for value in row])
+    if not used_titles:
+        workbook.create_sheet(title="Sheet")
+
+    with tempfile.TemporaryFile() as spool:
+        await asyncio.to_thread(workbook.save, spool)
+        spool.seek(0)
+        while True:
+            chunk = await asyncio.to_thread(spool.read, EXPORT_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_response(sheets: List[Sheet], export_format: str, filename: str) -> StreamingResponse:
+    """
+    Chunked download of sheets in export_format ("csv" or "xlsx").
+
+    filename is given without extension.
+    """
+    export_format = export_format.lower()
+    if export_format == "csv":
+        body, media_type = iter_csv(sheets), CSV_MEDIA_TYPE
+    elif export_format == "xlsx":
+        body, media_type = iter_xlsx(sheets), XLSX_MEDIA_TYPE
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
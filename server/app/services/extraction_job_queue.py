@@ -0,0 +1,306 @@
+"""
+Extraction Job Queue
+
+Runs long extractions as durable jobs stored in Postgres (see crud.extraction_jobs)
+instead of inside the request that uploaded the file:
+- The upload endpoint enqueues a job and returns immediately.
+- Every worker process runs a pool of up to EXTRACTION_WORKER_CONCURRENCY jobs, claiming
+  queued jobs with SELECT ... FOR UPDATE SKIP LOCKED.
+- While a job runs, a heartbeat renews its lease and stores its progress (taken from the
+  upload's WebSocket progress messages). A job whose worker dies is requeued by the other
+  workers once its lease expires.
+- Cancellation is requested on the job row, so it reaches the job whichever worker runs it;
+  the worker holding the job notices it on its next heartbeat.
+- Heartbeats run on the event loop, so a loop stalled past the lease gets its job requeued
+  while the handler is still running. Handlers call confirm_lease right before publishing
+  results, which renews the lease or raises ExtractionJobLeaseLost, so a job taken over by
+  another worker never completes twice.
+
+Handlers are registered by name and receive the job dict. A handler returns normally on
+success, raises ExtractionJobCancelled when it stopped because of a cancel request, lets
+ExtractionJobLeaseLost propagate, and raises anything else on failure.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from app.db import crud
+from app.db.database import AsyncSessionLocal
+from app.services.cancellation_manager import cancellation_manager
+from app.services.websocket_service import connection_manager
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_WORKER_CONCURRENCY = int(os.getenv('EXTRACTION_WORKER_CONCURRENCY', '2'))
+EXTRACTION_JOB_POLL_SECONDS = float(os.getenv('EXTRACTION_JOB_POLL_SECONDS', '2'))
+EXTRACTION_JOB_HEARTBEAT_SECONDS = float(os.getenv('EXTRACTION_JOB_HEARTBEAT_SECONDS', '10'))
+EXTRACTION_JOB_LEASE_SECONDS = float(os.getenv('EXTRACTION_JOB_LEASE_SECONDS', '90'))
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class ExtractionJobCancelled(Exception):
+    """Raised by a handler that stopped because cancellation was requested."""
+
+
+class ExtractionJobLeaseLost(Exception):
+    """Raised by confirm_lease when the job was requeued and belongs to another worker now."""
+
+
+class ExtractionJobQueue:
+    """Singleton worker pool for durable extraction jobs."""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ExtractionJobQueue, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        self.concurrency = EXTRACTION_WORKER_CONCURRENCY
+        self.poll_interval = EXTRACTION_JOB_POLL_SECONDS
+        self.heartbeat_interval = EXTRACTION_JOB_HEARTBEAT_SECONDS
+        self.lease = timedelta(seconds=EXTRACTION_JOB_LEASE_SECONDS)
+
+        self._handlers: Dict[str, JobHandler] = {}
+        # job id -> (job task, work task) for jobs running in this process
+        self._jobs: Dict[UUID, Tuple[asyncio.Task, Optional[asyncio.Task]]] = {}
+        self._stop_reasons: Dict[UUID, str] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._accepting = False
+
+    @property
+    def worker_id(self) -> str:
+        # Resolved on use: with `gunicorn --preload` this module is imported in the master
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def register_handler(self, name: str, handler: JobHandler) -> None:
+        self._handlers[name] = handler
+
+    def _has_capacity(self) -> bool:
+        return self._accepting and len(self._jobs) < self.concurrency
+
+    async def enqueue(
+        self,
+        upload_id: str,
+        upload_uuid: UUID,
+        handler: str,
+        payload: Dict[str, Any],
+        user_id: Optional[UUID] = None
+    ) -> Dict[str, Any]:
+        """
+        Store a job and return it. If this process has a free slot the job is claimed here
+        right away, so it starts without waiting for the next poll.
+        """
+        if handler not in self._handlers:
+            raise ValueError(f"Unknown extraction job handler: {handler}")
+
+        async with AsyncSessionLocal() as db:
+            job = await crud.enqueue_extraction_job(
+                db, upload_id=upload_id, upload_uuid=upload_uuid, handler=handler,
+                payload=payload, user_id=user_id
+            )
+            if self._has_capacity():
+                claimed = await crud.claim_extraction_job(db, self.worker_id, job_id=job['id'])
+                if claimed:
+                    self._start(claimed)
+                    job = claimed
+
+        logger.info(f"📥 Extraction job {job['id']} for upload {upload_id} is {job['status']}")
+        return job
+
+    async def request_cancel(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Request cancellation of the active job for an upload. A job running in this process
+        is stopped immediately; one running elsewhere stops at its worker's next heartbeat.
+        Returns the job as it was before the request, or None if there is no active job.
+        """
+        async with AsyncSessionLocal() as db:
+            job = await crud.request_extraction_job_cancel(db, upload_id)
+
+        if job and job['status'] == 'running' and job['id'] in self._jobs:
+            await self._stop_job(job['id'], upload_id, 'cancel')
+        return job
+
+    def _start(self, job: Dict[str, Any]) -> None:
+        task = asyncio.create_task(self._run_job(job))
+        self._jobs[job['id']] = (task, None)
+        task.add_done_callback(lambda _: self._on_job_done(job['id']))
+
+    def _on_job_done(self, job_id: UUID) -> None:
+        self._jobs.pop(job_id, None)
+        self._stop_reasons.pop(job_id, None)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _stop_job(self, job_id: UUID, upload_id: str, reason: str) -> None:
+        """Stop a local job's work: reason is 'cancel' (user request) or 'lost' (lease lost)."""
+        if job_id in self._stop_reasons:
+            return
+        self._stop_reasons[job_id] = reason
+        if reason == 'cancel':
+            await cancellation_manager.mark_cancelled(upload_id)
+
+        _, work = self._jobs.get(job_id, (None, None))
+        if work is not None and not work.done():
+            work.cancel()
+
+    @staticmethod
+    def _current_progress(upload_id: str) -> Tuple[Optional[int], Optional[str]]:
+        """Latest progress percentage (and message) broadcast for the upload."""
+        message = connection_manager.last_progress.get(upload_id)
+        if message is None:
+            return None, None
+        text = message.get('message') or message.get('stepTitle') or message.get('current_stage')
+        return int(message['percentage']), str(text)[:500] if text else None
+
+    async def _heartbeat(self, job: Dict[str, Any]) -> None:
+        job_id, upload_id = job['id'], job['upload_id']
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            progress, message = self._current_progress(upload_id)
+            try:
+                async with AsyncSessionLocal() as db:
+                    cancel_requested = await crud.heartbeat_extraction_job(
+                        db, job_id, self.worker_id, progress, message
+                    )
+            except Exception as e:
+                logger.warning(f"⚠️ Heartbeat failed for extraction job {job_id}: {e}")
+                continue
+
+            if cancel_requested is None:
+                logger.warning(f"⚠️ Extraction job {job_id} was taken over by another worker, stopping it here")
+                await self._stop_job(job_id, upload_id, 'lost')
+                return
+            if cancel_requested:
+                logger.info(f"🛑 Cancellation requested for extraction job {job_id}")
+                await self._stop_job(job_id, upload_id, 'cancel')
+                return
+
+    async def confirm_lease(self, job: Dict[str, Any]) -> None:
+        """
+        Renew the lease of a job running in this process before its results are published.
+
+        Raises ExtractionJobLeaseLost if the job was requeued meanwhile. A pending cancel
+        request stops the job, as on a heartbeat.
+        """
+        job_id, upload_id = job['id'], job['upload_id']
+        progress, message = self._current_progress(upload_id)
+        async with AsyncSessionLocal() as db:
+            cancel_requested = await crud.heartbeat_extraction_job(db, job_id, self.worker_id, progress, message)
+
+        if cancel_requested is None:
+            self._stop_reasons.setdefault(job_id, 'lost')
+            raise ExtractionJobLeaseLost()
+        if cancel_requested:
+            await self._stop_job(job_id, upload_id, 'cancel')
+
+    async def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await crud.finish_extraction_job(db, job['id'], self.worker_id, status, error)
+        except Exception as e:
+            logger.error(f"❌ Failed to record status {status} for extraction job {job['id']}: {e}")
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id, upload_id = job['id'], job['upload_id']
+        handler = self._handlers.get(job['handler'])
+        if handler is None:
+            await self._finish(job, 'failed', f"Unknown handler: {job['handler']}")
+            return
+
+        logger.info(f"⚙️ Worker {self.worker_id} running extraction job {job_id} (attempt {job['attempts']})")
+        work = asyncio.create_task(handler(job))
+        self._jobs[job_id] = (self._jobs[job_id][0], work)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+
+        try:
+            try:
+                await work
+            except asyncio.CancelledError:
+                reason = self._stop_reasons.get(job_id)
+                if reason is None:
+                    # This worker is shutting down: hand the job back to the queue
+                    await self._finish(job, 'queued')
+                    raise
+                if reason == 'cancel':
+                    raise ExtractionJobCancelled()
+                return
+        except ExtractionJobLeaseLost:
+            logger.warning(f"⚠️ Extraction job {job_id} was taken over by another worker, dropping its results here")
+        except ExtractionJobCancelled:
+            await self._finish(job, 'cancelled')
+            await connection_manager.send_extraction_complete(
+                upload_id, {"status": "cancelled", "message": "Upload cancelled"}
+            )
+            logger.info(f"🛑 Extraction job {job_id} cancelled")
+        except Exception as e:
+            error = getattr(e, 'detail', None) or str(e) or type(e).__name__
+            logger.error(f"❌ Extraction job {job_id} failed: {error}")
+            await self._finish(job, 'failed', str(error))
+            await connection_manager.send_extraction_error(upload_id, str(error))
+        else:
+            await self._finish(job, 'succeeded')
+            logger.info(f"✅ Extraction job {job_id} succeeded")
+        finally:
+            heartbeat.cancel()
+            await cancellation_manager.clear_cancelled(upload_id)
+
+    async def _claim_available(self) -> None:
+        while self._has_capacity():
+            async with AsyncSessionLocal() as db:
+                job = await crud.claim_extraction_job(db, self.worker_id)
+            if job is None:
+                return
+            self._start(job)
+
+    async def run(self, shutdown_event: asyncio.Event) -> None:
+        """Claim and run jobs until shutdown; jobs still running are handed back to the queue."""
+        if self.concurrency <= 0:
+            logger.info("Extraction job worker disabled (EXTRACTION_WORKER_CONCURRENCY=0)")
+            return
+
+        self._wakeup = asyncio.Event()
+        self._accepting = True
+        last_recovery = 0.0
+        logger.info(f"✅ Extraction job worker {self.worker_id} started (concurrency {self.concurrency})")
+
+        try:
+            while not shutdown_event.is_set():
+                try:
+                    if time.monotonic() - last_recovery >= self.lease.total_seconds() / 2:
+                        last_recovery = time.monotonic()
+                        async with AsyncSessionLocal() as db:
+                            await crud.requeue_stale_extraction_jobs(db, self.lease)
+                    await self._claim_available()
+                except Exception as e:
+                    logger.error(f"❌ Extraction job worker error: {e}")
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._accepting = False
+            running = [task for task, _ in self._jobs.values()]
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.wait(running, timeout=5)
+
+
+# Global instance
+extraction_job_queue = ExtractionJobQueue()
@@ -7,6 +7,8 @@ import re
 from difflib import SequenceMatcher
 from dateutil import parser as date_parser
 
+from app.services.summary_row_rules import RowRule, RowTexts, rule_for
+
 logger = logging.getLogger(__name__)
 
 # Configuration constants for table stitching
@@ -86,6 +88,10 @@ SUMMARY_PHRASE_HINTS = [
     }
 ]
 
+SUMMARY_PHRASE_RULE = RowRule(
+    "summary_phrase_hints", [hint["pattern"] for hint in SUMMARY_PHRASE_HINTS], flags=re.IGNORECASE
+)
+
 PLACEHOLDER_TOKENS = {
     "unknown",
     "null",
@@ -735,20 +741,22 @@ def _build_summary_config(prompt_options: Optional[Dict[str, Any]]) -> Dict[str,
     
     phrase_patterns = [
         {
-            "regex": re.compile(hint["pattern"], re.IGNORECASE),
+            "regex": regex,
             "weight": hint["weight"],
             "reason": hint["reason"]
         }
-        for hint in SUMMARY_PHRASE_HINTS
+        for hint, regex in zip(SUMMARY_PHRASE_HINTS, SUMMARY_PHRASE_RULE.compiled)
     ]
     
     return {
         "keywords": keywords,
+        "keyword_rule": rule_for("summary_keywords", sorted(keywords), literal=True),
         "expected_rollups": [label.lower() for label in expected_rollups],
         "numeric_tolerance_bps": tolerance_bps,
         "tolerance_ratio": tolerance_bps / 10000.0,
         "row_role_examples": prompt_options.get("row_role_examples", []),
-        "phrase_patterns": phrase_patterns
+        "phrase_patterns": phrase_patterns,
+        "phrase_rule": SUMMARY_PHRASE_RULE
     }
 
 
@@ -928,6 +936,14 @@ def _detect_summary_rows_with_context(
         if isinstance(ann.get("role"), str) and "summary" in ann.get("role", "").lower()
     )
     
+    # Keyword, rollup and phrase checks for every row at once
+    row_texts = RowTexts([row_profile.get("text_blob", "") for row_profile in profile["row_profiles"]])
+    keyword_rule = summary_config.get("keyword_rule") or rule_for("summary_keywords", sorted(keywords), literal=True)
+    keyword_mask = row_texts.mask(keyword_rule)
+    rollup_mask = row_texts.mask(rule_for("expected_rollups", expected_rollups, literal=True))
+    phrase_rule = summary_config.get("phrase_rule")
+    phrase_mask = row_texts.mask(phrase_rule) if phrase_rule else None
+    
     window_sums = {col_idx: 0.0 for col_idx in numeric_columns}
     detail_window_rows: List[int] = []
     
@@ -936,27 +952,29 @@ def _detect_summary_rows_with_context(
     final_summaries = set(existing_summaries)
     analysis_entries: List[Dict[str, Any]] = []
     
-    for row_profile, numeric_map in zip(profile["row_profiles"], profile["row_numeric_values"]):
+    for position, (row_profile, numeric_map) in enumerate(zip(profile["row_profiles"], profile["row_numeric_values"])):
         idx = row_profile["index"]
         tokens = row_profile.get("tokens", [])
         text_blob = row_profile.get("text_blob", "")
         annotation = annotation_lookup.get(idx, {})
         annotation_role = str(annotation.get("role", "")).lower()
         
-        keyword_match = any(kw in text_blob for kw in keywords)
-        expected_rollup_match = any(label in text_blob for label in expected_rollups)
+        keyword_match = bool(keyword_mask[position])
+        expected_rollup_match = bool(rollup_mask[position])
         annotation_summary_hint = "summary" in annotation_role if annotation_role else False
         phrase_bonus = 0.0
         phrase_reasons: List[str] = []
-        for phrase in phrase_patterns:
-            regex = phrase.get("regex")
-            if not regex:
-                continue
-            if regex.search(text_blob):
-                phrase_bonus = max(phrase_bonus, phrase.get("weight", 0.0))
-                reason = phrase.get("reason")
-                if reason:
-                    phrase_reasons.append(reason)
+        if phrase_mask is None or phrase_mask[position]:
+            # Only rows the combined pattern matched are checked phrase by phrase
+            for phrase in phrase_patterns:
+                regex = phrase.get("regex")
+                if not regex:
+                    continue
+                if regex.search(text_blob):
+                    phrase_bonus = max(phrase_bonus, phrase.get("weight", 0.0))
+                    reason = phrase.get("reason")
+                    if reason:
+                        phrase_reasons.append(reason)
         
         writing_agent_metadata = "writing" in tokens and "agent" in tokens
         
@@ -285,12 +285,13 @@ class GoogleDocAIExtractor:
             self.project_id is not None
         )
     
-    def extract_tables(self, pdf_path: str) -> List[Dict[str, Any]]:
+    def extract_tables(self, pdf_path: str, document=None) -> List[Dict[str, Any]]:
         """
         Extract tables from PDF using Google Document AI with smart page handling.
         
         Args:
             pdf_path: Path to the PDF file
+            document: Optional shared PDFDocument for pdf_path (reuses its parse)
             
         Returns:
             List of extracted tables with metadata
@@ -304,11 +305,16 @@ class GoogleDocAIExtractor:
             sys.stdout.flush()  # Force flush the output
             
             # Read the PDF file directly
-            with open(pdf_path, "rb") as pdf_file:
-                pdf_content = pdf_file.read()
-            
-            # Get page count to determine processing strategy
-            page_count = self._get_pdf_page_count(pdf_content)
+            if document is not None:
+                page_count = document.page_count
+                # Chunked processing reads pages through the document; only the other modes send the whole file
+                pdf_content = document.read_bytes() if page_count <= 30 else None
+            else:
+                with open(pdf_path, "rb") as pdf_file:
+                    pdf_content = pdf_file.read()
+                
+                # Get page count to determine processing strategy
+                page_count = self._get_pdf_page_count(pdf_content)
             print(f"📄 Google Document AI: Document has {page_count} pages")
             
             # **ENHANCED DEBUGGING: Track processing strategy and results**
@@ -334,7 +340,7 @@ class GoogleDocAIExtractor:
                     if "PAGE_LIMIT_EXCEEDED" in str(e) or "page limit" in str(e).lower():
                         processing_mode = "chunked"
                         print(f"⚠️ Google Document AI: Imageless mode failed, falling back to chunked processing")
-                        tables = self._process_document_in_chunks(pdf_content, page_count)
+                        tables = self._process_document_in_chunks(pdf_content, page_count, document)
                         print(f"✅ Google Document AI: Chunked processing extracted {len(tables)} tables")
                     else:
                         print(f"❌ Google Document AI: Imageless mode failed with non-page-limit error: {e}")
@@ -344,7 +350,7 @@ class GoogleDocAIExtractor:
                 # Use chunked processing for large documents
                 processing_mode = "chunked"
                 print(f"🔄 Google Document AI: Using chunked processing ({page_count} pages)")
-                tables = self._process_document_in_chunks(pdf_content, page_count)
+                tables = self._process_document_in_chunks(pdf_content, page_count, document)
                 print(f"✅ Google Document AI: Chunked processing extracted {len(tables)} tables")
             
             # **ENHANCED DEBUGGING: Calculate extraction metrics**
@@ -415,12 +421,13 @@ class GoogleDocAIExtractor:
             print(f"❌ Google Document AI extraction failed: {e}")
             raise
 
-    async def extract_tables_async(self, pdf_path: str) -> Dict[str, Any]:
+    async def extract_tables_async(self, pdf_path: str, document=None) -> Dict[str, Any]:
         """
         Async wrapper for extract_tables method.
         
         Args:
             pdf_path: Path to the PDF file
+            document: Optional shared PDFDocument for pdf_path
             
         Returns:
             Dictionary with extraction results
@@ -429,7 +436,7 @@ class GoogleDocAIExtractor:
         
         # Run the synchronous extract_tables method in a thread pool
         loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, self.extract_tables, pdf_path)
+        result = await loop.run_in_executor(None, self.extract_tables, pdf_path, document)
         
         # Convert the result to the expected format
         if isinstance(result, list):
@@ -573,13 +580,14 @@ class GoogleDocAIExtractor:
         document = self._process_document_with_retry(request)
         return self._extract_tables_from_document(document)
     
-    def _process_document_in_chunks(self, pdf_content: bytes, page_count: int) -> List[Dict[str, Any]]:
+    def _process_document_in_chunks(self, pdf_content: bytes, page_count: int, document=None) -> List[Dict[str, Any]]:
         """
         Process large documents by splitting them into chunks.
         
         Args:
-            pdf_content: PDF file content as bytes
+            pdf_content: PDF file content as bytes (unused when document is given)
             page_count: Total number of pages in the document
+            document: Optional shared PDFDocument the chunks are cut from
             
         Returns:
             List of extracted tables from all chunks
@@ -591,8 +599,18 @@ class GoogleDocAIExtractor:
             all_tables = []
             chunk_size = 15  # Process 15 pages at a time (DocAI non-imageless limit)
             
-            # Read the PDF
-            pdf_reader = pypdf.PdfReader(io.BytesIO(pdf_content))
+            # Cut chunks from the shared parse, or read the PDF
+            pdf_reader = pypdf.PdfReader(io.BytesIO(pdf_content)) if document is None else None
+            
+            def pages_pdf(first_page: int, last_page: int) -> bytes:
+                if document is not None:
+                    return document.page_range_pdf(first_page, last_page)
+                pdf_writer = pypdf.PdfWriter()
+                for page_num in range(first_page, last_page):
+                    pdf_writer.add_page(pdf_reader.pages[page_num])
+                chunk_buffer = BytesIO()
+                pdf_writer.write(chunk_buffer)
+                return chunk_buffer.getvalue()
             
             for start_page in range(0, page_count, chunk_size):
                 end_page = min(start_page + chunk_size, page_count)
@@ -610,14 +628,7 @@ class GoogleDocAIExtractor:
                         print(f"🔄 Processing sub-chunk: pages {sub_start + 1}-{sub_end} ({sub_chunk_pages} pages)")
                         
                         # Create PDF for sub-chunk
-                        pdf_writer = pypdf.PdfWriter()
-                        for page_num in range(sub_start, sub_end):
-                            pdf_writer.add_page(pdf_reader.pages[page_num])
-                        
-                        # Convert to bytes
-                        chunk_buffer = BytesIO()
-                        pdf_writer.write(chunk_buffer)
-                        chunk_content = chunk_buffer.getvalue()
+                        chunk_content = pages_pdf(sub_start, sub_end)
                         
                         # Process sub-chunk
                         try:
@@ -651,14 +662,7 @@ class GoogleDocAIExtractor:
                     continue
                 
                 # Create a new PDF with just these pages
-                pdf_writer = pypdf.PdfWriter()
-                for page_num in range(start_page, end_page):
-                    pdf_writer.add_page(pdf_reader.pages[page_num])
-                
-                # Convert to bytes
-                chunk_buffer = BytesIO()
-                pdf_writer.write(chunk_buffer)
-                chunk_content = chunk_buffer.getvalue()
+                chunk_content = pages_pdf(start_page, end_page)
                 
                 # Process this chunk
                 try:
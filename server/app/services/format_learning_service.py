@@ -3,11 +3,11 @@ import json
 import re
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
-import pandas as pd
 import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import crud, schemas
 from app.utils.db_retry import with_db_retry
+from app.services.column_profile import TableProfile
 from difflib import SequenceMatcher
 
 
@@ -42,6 +42,11 @@ class FormatLearningService:
                 r'^\d{9}$'
             ]
         }
+        # One pattern per type, compiled once
+        self._type_regexes = {
+            pattern_type: re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+            for pattern_type, patterns in self.data_type_patterns.items()
+        }
     
     def _convert_numpy_types(self, obj):
         """
@@ -99,7 +104,21 @@ class FormatLearningService:
         signature_string = json.dumps(signature_data, sort_keys=True)
         return hashlib.md5(signature_string.encode()).hexdigest()
     
-    def analyze_column_types(self, table_data: List[List[str]], headers: List[str]) -> Dict[str, str]:
+    def _table_profile(
+        self, table_data: List[List[str]], headers: List[str], profile: Optional[TableProfile] = None
+    ) -> TableProfile:
+        """
+        Column profile of the table. Like the DataFrame it replaces, it requires one header per column.
+        """
+        profile = profile or TableProfile(table_data, headers)
+        width = int(profile.row_lengths.max()) if profile.row_count else 0
+        if width != len(headers):
+            raise ValueError(f"{len(headers)} columns passed, passed data had {width} columns")
+        return profile
+    
+    def analyze_column_types(
+        self, table_data: List[List[str]], headers: List[str], profile: Optional[TableProfile] = None
+    ) -> Dict[str, str]:
         """
         Analyze data types for each column based on sample values.
         """
@@ -107,22 +126,17 @@ class FormatLearningService:
             return {}
         
         column_types = {}
+        profile = self._table_profile(table_data, headers, profile)
         
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(table_data, columns=headers)
-        
-        for column in headers:
-            if column not in df.columns:
-                continue
-            
+        for index, column in enumerate(headers):
             # Get non-null values
-            values = df[column].dropna().astype(str)
+            values = profile.column(index).non_null
             if len(values) == 0:
                 column_types[column] = 'string'
                 continue
             
             # Sample values for analysis
-            sample_values = values.head(20).tolist()
+            sample_values = values[:20]
             
             # Analyze patterns
             detected_type = self._detect_column_type(sample_values)
@@ -152,11 +166,9 @@ class FormatLearningService:
             value = str(value).strip()
             
             # Check specific patterns
-            for pattern_type, patterns in self.data_type_patterns.items():
-                for pattern in patterns:
-                    if re.match(pattern, value):
-                        type_scores[pattern_type] += 1
-                        break
+            for pattern_type, regex in self._type_regexes.items():
+                if regex.match(value):
+                    type_scores[pattern_type] += 1
             
             # Check if numeric
             try:
@@ -174,7 +186,9 @@ class FormatLearningService:
         
         return best_type
     
-    def extract_column_patterns(self, table_data: List[List[str]], headers: List[str]) -> Dict[str, str]:
+    def extract_column_patterns(
+        self, table_data: List[List[str]], headers: List[str], profile: Optional[TableProfile] = None
+    ) -> Dict[str, str]:
         """
         Extract regex patterns for each column based on sample values.
         """
@@ -182,18 +196,15 @@ class FormatLearningService:
             return {}
         
         column_patterns = {}
-        df = pd.DataFrame(table_data, columns=headers)
+        profile = self._table_profile(table_data, headers, profile)
         
-        for column in headers:
-            if column not in df.columns:
-                continue
-            
-            values = df[column].dropna().astype(str)
+        for index, column in enumerate(headers):
+            values = profile.column(index).non_null
             if len(values) == 0:
                 continue
             
             # Get sample values
-            sample_values = values.head(10).tolist()
+            sample_values = values[:10]
             
             # Generate pattern
             pattern = self._generate_pattern_from_values(sample_values)
@@ -234,7 +245,9 @@ class FormatLearningService:
         
         return None
     
-    def analyze_table_structure(self, table_data: List[List[str]], headers: List[str]) -> Dict[str, Any]:
+    def analyze_table_structure(
+        self, table_data: List[List[str]], headers: List[str], profile: Optional[TableProfile] = None
+    ) -> Dict[str, Any]:
         """
         Analyze the structure of a table.
         """
@@ -252,48 +265,58 @@ class FormatLearningService:
         }
         
         # Analyze column lengths
+        profile = profile or TableProfile(table_data, headers)
         for i, header in enumerate(headers):
-            column_values = [str(row[i]) if i < len(row) else '' for row in table_data]
-            lengths = [len(val) for val in column_values]
+            lengths = profile.column(i).raw_lengths
             
-            if lengths:
-                structure['max_column_lengths'][header] = max(lengths)
-                structure['min_column_lengths'][header] = min(lengths)
-                structure['avg_column_lengths'][header] = sum(lengths) / len(lengths)
+            if len(lengths):
+                structure['max_column_lengths'][header] = int(lengths.max())
+                structure['min_column_lengths'][header] = int(lengths.min())
+                structure['avg_column_lengths'][header] = int(lengths.sum()) / len(lengths)
         
         return structure
     
-    def calculate_data_quality_metrics(self, table_data: List[List[str]], headers: List[str]) -> Dict[str, Any]:
+    def calculate_data_quality_metrics(
+        self, table_data: List[List[str]], headers: List[str], profile: Optional[TableProfile] = None
+    ) -> Dict[str, Any]:
         """
         Calculate data quality metrics for the table.
         """
         if not table_data or not headers:
             return {}
         
-        df = pd.DataFrame(table_data, columns=headers)
+        profile = self._table_profile(table_data, headers, profile)
+        row_count = profile.row_count
+        total_cells = row_count * len(headers)
+        missing_cells = profile.null_count(len(headers))
+        duplicate_rows = profile.duplicate_rows(len(headers))
         
         quality_metrics = {
-            'total_cells': len(df) * len(df.columns),
-            'missing_cells': df.isnull().sum().sum(),
-            'completeness': 1 - (df.isnull().sum().sum() / (len(df) * len(df.columns))),
+            'total_cells': total_cells,
+            'missing_cells': missing_cells,
+            'completeness': 1 - (missing_cells / total_cells),
             'column_completeness': {},
-            'duplicate_rows': len(df) - len(df.drop_duplicates()),
-            'duplicate_percentage': (len(df) - len(df.drop_duplicates())) / len(df) if len(df) > 0 else 0
+            'duplicate_rows': duplicate_rows,
+            'duplicate_percentage': duplicate_rows / row_count if row_count > 0 else 0
         }
         
         # Calculate completeness for each column
-        for column in headers:
-            if column in df.columns:
-                missing_count = df[column].isnull().sum()
-                total_count = len(df)
-                quality_metrics['column_completeness'][column] = 1 - (missing_count / total_count) if total_count > 0 else 0
+        for index, column in enumerate(headers):
+            missing_count = int(profile.column(index).null.sum())
+            quality_metrics['column_completeness'][column] = 1 - (missing_count / row_count) if row_count > 0 else 0
         
         # Convert numpy types to native Python types
         quality_metrics = self._convert_numpy_types(quality_metrics)
         
         return quality_metrics
     
-    def extract_sample_values(self, table_data: List[List[str]], headers: List[str], max_samples: int = 5) -> Dict[str, List[str]]:
+    def extract_sample_values(
+        self,
+        table_data: List[List[str]],
+        headers: List[str],
+        max_samples: int = 5,
+        profile: Optional[TableProfile] = None
+    ) -> Dict[str, List[str]]:
         """
         Extract sample values for each column.
         """
@@ -301,12 +324,10 @@ class FormatLearningService:
             return {}
         
         sample_values = {}
-        df = pd.DataFrame(table_data, columns=headers)
+        profile = self._table_profile(table_data, headers, profile)
         
-        for column in headers:
-            if column in df.columns:
-                values = df[column].dropna().astype(str).unique()
-                sample_values[column] = values[:max_samples].tolist()
+        for index, column in enumerate(headers):
+            sample_values[column] = profile.column(index).sample_values(max_samples)
         
         return sample_values
     
@@ -419,12 +440,13 @@ class FormatLearningService:
             print(f"🎯 FormatLearningService: Field mapping: {field_mapping}")
             print(f"🎯 FormatLearningService: Table data length: {len(table_data)}")
             
-            # Analyze the table
-            table_structure = self.analyze_table_structure(table_data, headers)
-            column_types = self.analyze_column_types(table_data, headers)
-            column_patterns = self.extract_column_patterns(table_data, headers)
-            sample_values = self.extract_sample_values(table_data, headers)
-            data_quality_metrics = self.calculate_data_quality_metrics(table_data, headers)
+            # Analyze the table, profiling its columns once for every analysis
+            profile = TableProfile(table_data, headers)
+            table_structure = self.analyze_table_structure(table_data, headers, profile)
+            column_types = self.analyze_column_types(table_data, headers, profile)
+            column_patterns = self.extract_column_patterns(table_data, headers, profile)
+            sample_values = self.extract_sample_values(table_data, headers, profile=profile)
+            data_quality_metrics = self.calculate_data_quality_metrics(table_data, headers, profile)
             
             # Generate format signature
             format_signature = self.generate_format_signature(headers, table_structure)
@@ -568,6 +590,21 @@ class FormatLearningService:
             traceback.print_exc()
             return False
     
+    def _learned_format(self, format_record) -> Dict[str, Any]:
+        """
+        The learned information of a saved format, as returned by find_matching_format.
+        """
+        return {
+            'format_signature': format_record.format_signature,
+            'headers': format_record.headers,
+            'column_types': format_record.column_types,
+            'column_patterns': format_record.column_patterns,
+            'field_mapping': format_record.field_mapping,
+            'table_editor_settings': format_record.table_editor_settings,
+            'confidence_score': format_record.confidence_score,
+            'usage_count': format_record.usage_count
+        }
+    
     async def find_matching_format(
         self, 
         db: AsyncSession, 
@@ -600,16 +637,7 @@ class FormatLearningService:
                 print(f"🎯 FormatLearningService: Learned field mapping: {best_match.field_mapping}")
                 print(f"🎯 FormatLearningService: Learned table editor settings: {best_match.table_editor_settings}")
                 
-                return {
-                    'format_signature': best_match.format_signature,
-                    'headers': best_match.headers,
-                    'column_types': best_match.column_types,
-                    'column_patterns': best_match.column_patterns,
-                    'field_mapping': best_match.field_mapping,
-                    'table_editor_settings': best_match.table_editor_settings,
-                    'confidence_score': best_match.confidence_score,
-                    'usage_count': best_match.usage_count
-                }, score
+                return self._learned_format(best_match), score
             else:
                 print(f"🎯 FormatLearningService: No matching format found")
             
@@ -637,53 +665,29 @@ class FormatLearningService:
             
             # Import here to avoid circular imports
             from app.db import crud
+            from app.db.database import get_sync_db
             from app.utils.db_retry import with_db_retry_sync
             
-            # Get all formats for this company
-            formats = with_db_retry_sync(crud.get_carrier_formats_for_company, company_id=company_id)
-            print(f"🎯 FormatLearningService: Found {len(formats)} saved formats for company")
-            
-            best_match = None
-            best_score = 0.0
-            
-            for format_record in formats:
-                # Calculate similarity score using improved logic
-                header_similarity = crud.calculate_header_similarity(headers, format_record.headers)
-                structure_similarity = crud.calculate_structure_similarity(table_structure, format_record.table_structure)
-                
-                # Combined score (weighted average) - header similarity is more important
-                total_score = (header_similarity * 0.8) + (structure_similarity * 0.2)
-                
-                print(f"🎯 FormatLearningService: Comparing with saved format:")
-                print(f"🎯 FormatLearningService:   Saved headers: {format_record.headers}")
-                print(f"🎯 FormatLearningService:   Header similarity: {header_similarity}")
-                print(f"🎯 FormatLearningService:   Structure similarity: {structure_similarity}")
-                print(f"🎯 FormatLearningService:   Total score: {total_score}")
-                
-                # Lower threshold for better matching - 0.5 instead of 0.6
-                if total_score > best_score and total_score > 0.5:  # Even more flexible threshold
-                    best_score = total_score
-                    best_match = format_record
-                    print(f"🎯 FormatLearningService:   -> New best match with score {total_score}")
-            
-            if best_match:
-                print(f"🎯 FormatLearningService: Found matching format with signature: {best_match.format_signature}")
-                print(f"🎯 FormatLearningService: Learned field mapping: {best_match.field_mapping}")
-                print(f"🎯 FormatLearningService: Learned table editor settings: {best_match.table_editor_settings}")
+            db = get_sync_db()
+            try:
+                best_match, best_score = with_db_retry_sync(
+                    crud.find_best_matching_format_sync,
+                    db=db,
+                    company_id=company_id,
+                    headers=headers,
+                    table_structure=table_structure
+                )
                 
-                return {
-                    'format_signature': best_match.format_signature,
-                    'headers': best_match.headers,
-                    'column_types': best_match.column_types,
-                    'column_patterns': best_match.column_patterns,
-                    'field_mapping': best_match.field_mapping,
-                    'table_editor_settings': best_match.table_editor_settings,
-                    'confidence_score': best_match.confidence_score,
-                    'usage_count': best_match.usage_count
-                }, best_score
-            else:
-                print(f"🎯 FormatLearningService: No matching format found")
+                if best_match:
+                    print(f"🎯 FormatLearningService: Found matching format with signature: {best_match.format_signature}")
+                    print(f"🎯 FormatLearningService: Learned field mapping: {best_match.field_mapping}")
+                    print(f"🎯 FormatLearningService: Learned table editor settings: {best_match.table_editor_settings}")
+                    
+                    return self._learned_format(best_match), best_score
+            finally:
+                db.close()
             
+            print(f"🎯 FormatLearningService: No matching format found")
             return None, 0.0
             
         except Exception as e:
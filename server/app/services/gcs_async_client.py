@@ -0,0 +1,109 @@
+"""
+Async GCS streaming client.
+
+One connection-pooled httpx.AsyncClient per worker for reading objects from Google Cloud
+Storage without buffering them: responses are opened in streaming mode and handed to the
+caller, who forwards the body chunk by chunk and closes the response. Range and
+conditional headers (If-None-Match, ...) are passed through, so GCS does the partial
+content and 304 handling.
+
+Objects can be read through a signed URL or directly by key with the service account's
+bearer token (same XML endpoint, same header semantics).
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+from urllib.parse import quote
+
+import httpx
+
+from app.services.gcs_utils import GCSService, gcs_service
+
+logger = logging.getLogger(__name__)
+
+GCS_HTTP_MAX_CONNECTIONS = int(os.getenv("GCS_HTTP_MAX_CONNECTIONS", "50"))
+GCS_HTTP_MAX_KEEPALIVE = int(os.getenv("GCS_HTTP_MAX_KEEPALIVE", "20"))
+GCS_HTTP_TIMEOUT = float(os.getenv("GCS_HTTP_TIMEOUT", "30"))
+
+GCS_XML_ENDPOINT = "https://storage.googleapis.com"
+# Tokens for direct object reads only need read access to storage
+GCS_READ_ONLY_SCOPE = "https://www.googleapis.com/auth/devstorage.read_only"
+
+
+class AsyncGCSClient:
+    """Shared streaming reader for GCS objects."""
+
+    def __init__(self, gcs: GCSService):
+        self.gcs = gcs
+        self._client: Optional[httpx.AsyncClient] = None
+        self._token_lock = asyncio.Lock()
+        # (source credentials, scoped copy) - service account credentials from google.auth.default()
+        # carry no scopes, and refreshing them without any fails with invalid_scope
+        self._scoped: Optional[tuple] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(GCS_HTTP_TIMEOUT, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=GCS_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=GCS_HTTP_MAX_KEEPALIVE
+                ),
+                follow_redirects=True
+            )
+        return self._client
+
+    def _credentials(self):
+        """The GCS service's credentials, scoped to read-only storage access if they require scopes."""
+        source = self.gcs.credentials
+        if source is None:
+            return None
+        if self._scoped is None or self._scoped[0] is not source:
+            from google.auth.credentials import with_scopes_if_required
+            self._scoped = (source, with_scopes_if_required(source, [GCS_READ_ONLY_SCOPE]))
+        return self._scoped[1]
+
+    async def _access_token(self) -> Optional[str]:
+        """Service account bearer token, refreshed (off the event loop) when expired."""
+        credentials = self._credentials()
+        if credentials is None:
+            return None
+
+        if not credentials.valid:
+            async with self._token_lock:
+                if not credentials.valid:
+                    from google.auth.transport.requests import Request as AuthRequest
+                    await asyncio.to_thread(credentials.refresh, AuthRequest())
+        return credentials.token
+
+    async def open_url(self, url: str, headers: Optional[Dict[str, str]] = None, method: str = "GET") -> httpx.Response:
+        """Open a streamed response for a (signed) URL. The caller must aclose() it."""
+        request = self.client.build_request(method, url, headers=headers or {})
+        return await self.client.send(request, stream=True)
+
+    async def open_object(self, gcs_key: str, headers: Optional[Dict[str, str]] = None, method: str = "GET") -> Optional[httpx.Response]:
+        """
+        Open a streamed response for an object in the configured bucket using the service
+        account. Returns None if GCS is not configured. The caller must aclose() it.
+        """
+        if not self.gcs.is_available():
+            return None
+
+        token = await self._access_token()
+        if not token:
+            return None
+
+        url = f"{GCS_XML_ENDPOINT}/{self.gcs.bucket_name}/{quote(gcs_key)}"
+        return await self.open_url(url, {**(headers or {}), "Authorization": f"Bearer {token}"}, method)
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+# Global instance
+async_gcs_client = AsyncGCSClient(gcs_service)
@@ -0,0 +1,235 @@
+"""
+Local on-disk cache of GCS objects.
+
+GCSService.download_file / download_file_bytes read objects through this cache, so the
+same statement downloaded again (re-extraction, Excel extraction from GCS, PDF proxy
+fallback, summary regeneration) is served from local disk.
+
+- Keyed by (gcs_key, generation): an overwritten object has a new generation and is
+  simply a different entry, so entries never need invalidation.
+- Bounded by GCS_CACHE_MAX_MB with least-recently-used eviction. The limit covers the
+  whole directory: eviction scans it, so files written by every worker count.
+- Atomic fills: objects are downloaded to a temporary name and renamed into place, so a
+  reader never sees a partial file.
+- Single-flight: concurrent requests for the same object in this process wait for one
+  download instead of starting their own.
+
+The directory may be shared by several worker processes. Recency is the file's mtime,
+bumped on every hit, so eviction in any worker sees the others' use; each worker's index
+is the directory as of its last scan, and a file evicted by another worker is downloaded
+again.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+GCS_CACHE_ENABLED = os.getenv('GCS_CACHE_ENABLED', 'true').lower() == 'true'
+GCS_CACHE_DIR = os.getenv('GCS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gcs-object-cache'))
+GCS_CACHE_MAX_BYTES = int(os.getenv('GCS_CACHE_MAX_MB', '2048')) * 1024 * 1024
+
+_PARTIAL_MARKER = '.partial-'
+# A partial file untouched for this long was left by a writer that died mid-download
+_STALE_PARTIAL_SECONDS = 3600
+
+
+class GCSObjectCache:
+    """Size-bounded LRU of GCS object bodies on local disk."""
+
+    def __init__(self, directory: str = GCS_CACHE_DIR, max_bytes: int = GCS_CACHE_MAX_BYTES, enabled: bool = GCS_CACHE_ENABLED):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        # entry file name -> size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self._counters = {
+            'hits': 0, 'misses': 0, 'single_flight_waits': 0, 'evictions': 0, 'bytes_downloaded': 0,
+            'fill_errors': 0, 'stale_partials_removed': 0
+        }
+
+        if self.enabled:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                self._load_index()
+            except OSError as e:
+                logger.error(f"❌ GCS object cache disabled, cannot use {self.directory}: {e}")
+                self.enabled = False
+
+    @staticmethod
+    def entry_name(gcs_key: str, generation: Any) -> str:
+        return hashlib.sha256(f"{gcs_key}#{generation}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _scan_locked(self, remove_stale_partials: bool = False) -> None:
+        """
+        Rebuild the index from the directory (entries of every worker), least recently used
+        first. Partial files are not entries; stale ones are deleted on request.
+        """
+        now = time.time()
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if _PARTIAL_MARKER in name:
+                if remove_stale_partials and now - stat.st_mtime > _STALE_PARTIAL_SECONDS:
+                    self._remove(path)
+                    self._counters['stale_partials_removed'] += 1
+                continue
+            found.append((stat.st_mtime, name, stat.st_size))
+
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(found))
+        self._total_bytes = sum(self._entries.values())
+
+    def _load_index(self) -> None:
+        """Adopt files left by earlier runs (or other workers) and clear crashed writers' partial files."""
+        with self._lock:
+            self._scan_locked(remove_stale_partials=True)
+            self._evict_locked()
+
+    def _evict_locked(self, keep: Optional[str] = None) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                if len(self._entries) == 1:
+                    return
+                self._entries.move_to_end(name)
+                continue
+            del self._entries[name]
+            self._total_bytes -= size
+            self._counters['evictions'] += 1
+            self._remove(os.path.join(self.directory, name))
+
+    def _forget(self, name: str) -> None:
+        with self._lock:
+            size = self._entries.pop(name, None)
+            if size is not None:
+                self._total_bytes -= size
+
+    def _fill(self, name: str, fill: Callable[[str], None]) -> str:
+        """Download into a temporary file next to the entry, then rename it into place."""
+        fd, partial_path = tempfile.mkstemp(prefix=f"{name}{_PARTIAL_MARKER}", dir=self.directory)
+        os.close(fd)
+        try:
+            fill(partial_path)
+            size = os.path.getsize(partial_path)
+            path = os.path.join(self.directory, name)
+            os.replace(partial_path, path)
+        except BaseException:
+            self._remove(partial_path)
+            raise
+
+        with self._lock:
+            self._counters['bytes_downloaded'] += size
+            # Rescan so the limit covers what every worker sharing the directory has written
+            self._scan_locked()
+            if name in self._entries:
+                self._entries.move_to_end(name)
+            self._evict_locked(keep=name)
+        return path
+
+    @staticmethod
+    def _touch(path: str) -> Optional[int]:
+        """Mark an entry as just used (mtime is the recency every worker's eviction reads); its size, or None if gone."""
+        try:
+            os.utime(path)
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return None
+
+    def _get_path(self, name: str, fill: Callable[[str], None]) -> str:
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            # Not in the index yet may still mean another worker has downloaded it since the last scan
+            if name in self._entries or os.path.exists(path):
+                size = self._touch(path)
+                if size is not None:
+                    self._total_bytes += size - self._entries.pop(name, 0)
+                    self._entries[name] = size
+                    self._counters['hits'] += 1
+                    return path
+                # Evicted by another worker sharing the directory
+                self._total_bytes -= self._entries.pop(name, 0)
+
+            future = self._inflight.get(name)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[name] = future
+                self._counters['misses'] += 1
+            else:
+                self._counters['single_flight_waits'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            path = self._fill(name, fill)
+        except BaseException as e:
+            with self._lock:
+                self._counters['fill_errors'] += 1
+                del self._inflight[name]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[name]
+        future.set_result(path)
+        return path
+
+    def cacheable(self, size: Optional[int]) -> bool:
+        return self.enabled and size is not None and size <= self.max_bytes
+
+    def open(self, gcs_key: str, generation: Any, fill: Callable[[str], None]) -> BinaryIO:
+        """
+        Open the cached body of (gcs_key, generation) for reading, calling fill(path) to
+        download it into path on a miss.
+
+        The returned file stays readable even if the entry is evicted meanwhile.
+        """
+        name = self.entry_name(gcs_key, generation)
+        for _ in range(2):
+            path = self._get_path(name, fill)
+            try:
+                return open(path, 'rb')
+            except FileNotFoundError:
+                # Evicted by another worker sharing the directory - download again
+                self._forget(name)
+        return open(self._get_path(name, fill), 'rb')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses'] + self._counters['single_flight_waits']
+            return {
+                **self._counters,
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'size_mb': round(self._total_bytes / 2**20, 1),
+                'max_mb': round(self.max_bytes / 2**20, 1),
+                'hit_rate': round(self._counters['hits'] / lookups, 3) if lookups else None
+            }
+
+
+# Global instance
+gcs_object_cache = GCSObjectCache()
@@ -1,4 +1,5 @@
 import os
+import shutil
 import tempfile
 import logging
 from typing import Optional, Dict, Any
@@ -8,11 +9,16 @@ from google.auth import default
 from google.cloud.exceptions import NotFound, GoogleCloudError
 from dotenv import load_dotenv
 
+from app.services.gcs_object_cache import gcs_object_cache
+
 load_dotenv()
 
 # GCS Configuration
 GCS_BUCKET_NAME = "pdf_extraction_files_saver"
 GOOGLE_CLOUD_PROJECT_ID = os.environ.get('GOOGLE_CLOUD_PROJECT_ID', 'pdf-tables-extractor-465009')
+# Resumable upload chunk size: uploads larger than this are streamed from disk in chunks
+# (must be a multiple of 256 KB)
+GCS_UPLOAD_CHUNK_SIZE = int(os.environ.get('GCS_UPLOAD_CHUNK_MB', '8')) * 1024 * 1024
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -25,6 +31,7 @@ class GCSService:
         self.project_id = GOOGLE_CLOUD_PROJECT_ID
         self.client = None
         self.bucket = None
+        self.credentials = None
         self._initialize_client()
     
     def _initialize_client(self):
@@ -78,6 +85,7 @@ class GCSService:
             
             # Initialize GCS client
             self.client = storage.Client(credentials=credentials, project=project_id)
+            self.credentials = credentials
             self.bucket = self.client.bucket(self.bucket_name)
             
             logger.info(f"✅ GCS initialized - Project: {project_id}, Bucket: {self.bucket_name}")
@@ -112,8 +120,9 @@ class GCSService:
             if not content_type:
                 content_type = self._get_content_type(file_path)
             
-            # Create blob
-            blob = self.bucket.blob(gcs_key)
+            # Create blob (with chunk_size set, large files go up as a resumable upload
+            # read from disk one chunk at a time)
+            blob = self.bucket.blob(gcs_key, chunk_size=GCS_UPLOAD_CHUNK_SIZE)
             
             # Upload file
             blob.upload_from_filename(file_path, content_type=content_type)
@@ -183,16 +192,21 @@ class GCSService:
                 local_path = temp_file.name
                 temp_file.close()
             
-            # Get blob
-            blob = self.bucket.blob(gcs_key)
+            # Get blob (metadata includes the generation the cache is keyed by)
+            blob = self.bucket.get_blob(gcs_key)
             
             # Check if blob exists
-            if not blob.exists():
+            if blob is None:
                 logger.error(f"File not found in GCS: {gcs_key}")
                 return None
             
-            # Download file
-            blob.download_to_filename(local_path)
+            # Download file (through the local object cache when it fits)
+            if gcs_object_cache.cacheable(blob.size):
+                with gcs_object_cache.open(gcs_key, blob.generation, blob.download_to_filename) as cached, \
+                        open(local_path, 'wb') as out:
+                    shutil.copyfileobj(cached, out, 1024 * 1024)
+            else:
+                blob.download_to_filename(local_path)
             
             logger.info(f"✅ File downloaded from GCS: {gcs_key} to {local_path}")
             return local_path
@@ -217,13 +231,16 @@ class GCSService:
             return None
         
         try:
-            blob = self.bucket.blob(gcs_key)
+            blob = self.bucket.get_blob(gcs_key)
             
-            if not blob.exists():
+            if blob is None:
                 logger.error(f"File not found in GCS: {gcs_key}")
                 return None
             
             logger.info(f"📥 Downloading bytes from GCS: {gcs_key}")
+            if gcs_object_cache.cacheable(blob.size):
+                with gcs_object_cache.open(gcs_key, blob.generation, blob.download_to_filename) as cached:
+                    return cached.read()
             return blob.download_as_bytes()
         
         except NotFound:
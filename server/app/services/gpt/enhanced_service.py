@@ -32,6 +32,7 @@ from .token_optimizer import TokenOptimizer, TokenTracker
 from .retry_handler import RateLimitMonitor
 from .monitoring import extraction_monitor, health_checker, performance_analyzer
 from .schemas import ExtractionResult, DocumentMetadata, BusinessIntelligence
+from app.services.pdf_document import PDFDocument
 
 logger = logging.getLogger(__name__)
 
@@ -96,7 +97,8 @@ class GPT5VisionService:
         use_enhanced: bool = True,
         max_pages: int = 100,
         upload_id: Optional[str] = None,
-        prompt_options: Optional[Dict[str, Any]] = None
+        prompt_options: Optional[Dict[str, Any]] = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Extract commission data with full enhancement pipeline.
@@ -110,6 +112,7 @@ class GPT5VisionService:
             use_enhanced: Use enhanced extraction (default: True)
             max_pages: Maximum pages to process for large docs
             upload_id: Optional upload identifier for tracking
+            document: Optional parsed PDF shared with the rest of the extraction
         
         Returns:
             Complete extraction result with metadata
@@ -147,7 +150,8 @@ class GPT5VisionService:
                 max_pages=max_pages,
                 progress_tracker=progress_tracker,
                 carrier_name=carrier_name,  # ✅ Pass carrier name for carrier-specific prompts
-                prompt_options=prompt_options or {}
+                prompt_options=prompt_options or {},
+                document=document
             )
             
             # ✅ NEW: Validate Breckpoint extraction
@@ -174,7 +178,8 @@ class GPT5VisionService:
                             max_pages=max_pages,
                             progress_tracker=progress_tracker,
                             carrier_name=carrier_name,
-                            prompt_options=enhanced_prompt_options
+                            prompt_options=enhanced_prompt_options,
+                            document=document
                         )
                         
                         # Validate retry
@@ -389,18 +389,23 @@ class IntelligentPDFProcessor:
         
         return base64_str, token_count
     
-    def extract_text_from_page(self, pdf_path: str, page_num: int) -> str:
+    def extract_text_from_page(self, pdf_path: str, page_num: int, document=None) -> str:
         """
         Extract text from a specific page.
         
         Args:
             pdf_path: Path to PDF file
             page_num: Page number (0-indexed)
+            document: Optional shared PDFDocument for pdf_path; avoids reopening the
+                file for every page
         
         Returns:
             Extracted text
         """
         try:
+            if document is not None:
+                return document.fitz_text(page_num)
+            
             doc = fitz.open(pdf_path)
             page = doc.load_page(page_num)
             text = page.get_text()
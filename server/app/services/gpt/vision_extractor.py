@@ -23,7 +23,7 @@ import asyncio
 import os
 import time
 import tempfile
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from pathlib import Path
 from pypdf import PdfReader, PdfWriter
@@ -34,6 +34,7 @@ import httpx
 from .retry_handler import retry_with_backoff, RateLimitMonitor
 from .token_optimizer import TokenOptimizer, TokenTracker
 from .circuit_breaker import CircuitBreaker
+from app.services.pdf_document import PDFDocument
 
 logger = logging.getLogger(__name__)
 
@@ -421,11 +422,14 @@ class GPT5VisionExtractorWithPDF:
         
         return {"format": format_payload}
 
-    def _get_pdf_page_count(self, pdf_path: str) -> Optional[int]:
+    def _get_pdf_page_count(self, pdf_path: str, document: Optional[PDFDocument] = None) -> Optional[int]:
         """
         Quickly determine the number of pages in the PDF so we can scale token budgets.
         Caches results per file path to avoid re-reading large documents.
         """
+        if document is not None:
+            return document.page_count
+        
         if pdf_path in self.pdf_page_cache:
             cache_entry = self.pdf_page_cache[pdf_path]
             age_seconds = (datetime.now() - cache_entry["timestamp"]).total_seconds()
@@ -534,11 +538,12 @@ class GPT5VisionExtractorWithPDF:
         use_mini: bool,
         progress_tracker,
         carrier_name: Optional[str],
-        prompt_options: Optional[Dict[str, Any]]
+        prompt_options: Optional[Dict[str, Any]],
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """Chunk PDF into smaller segments and merge GPT outputs."""
         try:
-            reader = PdfReader(pdf_path)
+            reader = document if document is not None else PdfReader(pdf_path)
         except Exception as exc:
             raise ValueError(f"Unable to open PDF for chunking: {exc}")
         
@@ -590,7 +595,7 @@ class GPT5VisionExtractorWithPDF:
     
     async def _extract_pdf_range(
         self,
-        reader: PdfReader,
+        reader: Union[PdfReader, PDFDocument],
         pdf_path: str,
         start_page: int,
         end_page: int,
@@ -661,13 +666,16 @@ class GPT5VisionExtractorWithPDF:
             except OSError:
                 pass
     
-    def _write_pdf_subset(self, reader: PdfReader, start_page: int, end_page: int) -> str:
+    def _write_pdf_subset(self, reader: Union[PdfReader, PDFDocument], start_page: int, end_page: int) -> str:
         """Write a subset of PDF pages to a temporary file."""
-        writer = PdfWriter()
-        for page_idx in range(start_page, end_page):
-            writer.add_page(reader.pages[page_idx])
         temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        writer.write(temp_file)
+        if isinstance(reader, PDFDocument):
+            temp_file.write(reader.page_range_pdf(start_page, end_page))
+        else:
+            writer = PdfWriter()
+            for page_idx in range(start_page, end_page):
+                writer.add_page(reader.pages[page_idx])
+            writer.write(temp_file)
         temp_path = temp_file.name
         temp_file.close()
         return temp_path
@@ -1167,12 +1175,13 @@ class GPT5VisionExtractorWithPDF:
         progress_tracker=None,
         carrier_name: str = None,
         prompt_options: Optional[Dict[str, Any]] = None,
-        allow_chunking: bool = True
+        allow_chunking: bool = True,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Orchestrate GPT-5 extraction with automatic chunking fallback for large documents.
         """
-        page_count = self._get_pdf_page_count(pdf_path) or 1
+        page_count = self._get_pdf_page_count(pdf_path, document) or 1
         
         if allow_chunking and page_count > self.single_call_page_limit:
             logger.info(
@@ -1187,7 +1196,8 @@ class GPT5VisionExtractorWithPDF:
                 use_mini=use_mini,
                 progress_tracker=progress_tracker,
                 carrier_name=carrier_name,
-                prompt_options=prompt_options
+                prompt_options=prompt_options,
+                document=document
             )
         
         try:
@@ -1215,7 +1225,8 @@ class GPT5VisionExtractorWithPDF:
                     use_mini=use_mini,
                     progress_tracker=progress_tracker,
                     carrier_name=carrier_name,
-                    prompt_options=prompt_options
+                    prompt_options=prompt_options,
+                    document=document
                 )
             raise
 
@@ -1225,7 +1236,8 @@ class GPT5VisionExtractorWithPDF:
         max_pages: Optional[int] = None,
         progress_tracker=None,
         carrier_name: str = None,  # ✅ NEW: For carrier-specific prompts
-        prompt_options: Optional[Dict[str, Any]] = None
+        prompt_options: Optional[Dict[str, Any]] = None,
+        document: Optional[PDFDocument] = None
     ) -> Dict[str, Any]:
         """
         Process entire PDF document using direct PDF upload.
@@ -1242,6 +1254,7 @@ class GPT5VisionExtractorWithPDF:
             max_pages: Ignored (for API compatibility)
             progress_tracker: Optional progress tracking callback
             carrier_name: Optional carrier name for carrier-specific extraction rules
+            document: Optional parsed PDF shared with the rest of the extraction
             
         Returns:
             Dict with complete extraction results
@@ -1268,7 +1281,8 @@ class GPT5VisionExtractorWithPDF:
                 use_mini=False,
                 progress_tracker=progress_tracker,
                 carrier_name=carrier_name,  # ✅ Pass carrier name for carrier-specific prompts
-                prompt_options=prompt_options or {}
+                prompt_options=prompt_options or {},
+                document=document
             )
             
             # Add processing summary
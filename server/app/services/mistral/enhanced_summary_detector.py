@@ -5,14 +5,57 @@ Professional-grade multi-strategy summary row detector for commission statements
 Only removes rows with extremely high confidence (>85%) to prevent data loss.
 """
 
-import re
 import logging
 from typing import Dict, List, Any, Tuple
 from dataclasses import dataclass
 from statistics import mean, stdev
 
+import numpy as np
+
+from ..summary_row_rules import RowRule, RowTexts
+
 logger = logging.getLogger(__name__)
 
+# Commission statement specific patterns
+STRONG_SUMMARY_PATTERNS = [
+    r'^total\s+for\s+group:?',
+    r'^grand\s+total:?',
+    r'^total\s+for\s+vendor:?',
+    r'^summary:?',
+    r'^sub\s*total:?',
+    r'^net\s+total:?'
+]
+
+AGENT_INFO_PATTERNS = [
+    r'^writing\s+agent\s+number:?',
+    r'^writing\s+agent\s+2\s+no:?',
+    r'^writing\s+agent\s+name:?',
+    r'^writing\s+agent\s+2\s+name:?'
+]
+
+# Weak indicators - need multiple to trigger
+WEAK_SUMMARY_INDICATORS = [
+    'total', 'sum', 'subtotal', 'aggregate',
+    'overall', 'combined', 'consolidated'
+]
+
+# Commission, group and vendor totals
+BUSINESS_TOTAL_PHRASES = [
+    'total commission', 'commission total', 'net commission',
+    'total for group', 'group total',
+    'total for vendor', 'vendor total'
+]
+
+AGENT_BLOCK_PHRASES = ['writing agent', 'agent number', 'agent name']
+
+# Compiled once and shared by every detector instance
+STRONG_SUMMARY_RULE = RowRule('strong_summary', STRONG_SUMMARY_PATTERNS)
+AGENT_INFO_RULE = RowRule('agent_info', AGENT_INFO_PATTERNS)
+WEAK_SUMMARY_RULE = RowRule('weak_summary', WEAK_SUMMARY_INDICATORS, literal=True)
+BUSINESS_TOTAL_RULE = RowRule('business_totals', BUSINESS_TOTAL_PHRASES, literal=True)
+AGENT_BLOCK_RULE = RowRule('agent_block', AGENT_BLOCK_PHRASES, literal=True)
+DIGIT_RULE = RowRule('digit', [r'\d'])
+
 @dataclass
 class RowAnalysis:
     """Analysis results for a single row"""
@@ -37,28 +80,9 @@ class EnhancedSummaryRowDetector:
         self.semantic_confidence_threshold = 0.90
         self.minimum_strategies_agreement = 2  # Lowered from 3 to 2 for better detection
         
-        # Commission statement specific patterns
-        self.strong_summary_keywords = [
-            r'^total\s+for\s+group:?',
-            r'^grand\s+total:?',
-            r'^total\s+for\s+vendor:?',
-            r'^summary:?',
-            r'^sub\s*total:?',
-            r'^net\s+total:?'
-        ]
-        
-        self.agent_info_patterns = [
-            r'^writing\s+agent\s+number:?',
-            r'^writing\s+agent\s+2\s+no:?',
-            r'^writing\s+agent\s+name:?',
-            r'^writing\s+agent\s+2\s+name:?'
-        ]
-        
-        # Weak indicators - need multiple to trigger
-        self.weak_summary_indicators = [
-            r'total', r'sum', r'subtotal', r'aggregate', 
-            r'overall', r'combined', r'consolidated'
-        ]
+        self.strong_summary_keywords = STRONG_SUMMARY_PATTERNS
+        self.agent_info_patterns = AGENT_INFO_PATTERNS
+        self.weak_summary_indicators = WEAK_SUMMARY_INDICATORS
 
     def detect_and_remove_summary_rows(self, table_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -78,10 +102,7 @@ class EnhancedSummaryRowDetector:
         
         try:
             # Analyze each row using multiple strategies
-            row_analyses = []
-            for i, row in enumerate(rows):
-                analysis = self._analyze_row(i, row, rows, headers)
-                row_analyses.append(analysis)
+            row_analyses = self._analyze_rows(rows, headers)
             
             # Determine which rows to remove based on conservative criteria
             rows_to_remove = self._determine_rows_to_remove(row_analyses)
@@ -107,144 +128,125 @@ class EnhancedSummaryRowDetector:
             logger.error(f"Summary detection failed: {e}")
             return self._create_result(table_data, [], "detection_error")
 
-    def _analyze_row(self, row_index: int, row: List[str], all_rows: List[List[str]], headers: List[str]) -> RowAnalysis:
-        """Analyze a single row using all detection strategies"""
+    def _analyze_rows(self, rows: List[List[str]], headers: List[str]) -> List[RowAnalysis]:
+        """Analyze every row using all detection strategies"""
+        
+        # Normalize each row once; every strategy reads the same texts and densities
+        texts = RowTexts([' '.join(str(cell) for cell in row).lower().strip() for row in rows])
+        densities = np.array([
+            sum(1 for cell in row if str(cell).strip()) / len(row) if row else 0.0
+            for row in rows
+        ])
+        empty = np.array([not row for row in rows], dtype=bool)
         
         # Strategy 1: Semantic Analysis
-        semantic_score = self._analyze_semantic_patterns(row)
+        semantic_scores = self._semantic_scores(texts)
         
-        # Strategy 2: Data Density Analysis  
-        density_score = self._analyze_data_density(row, all_rows)
+        # Strategy 2: Data Density Analysis
+        density_scores = self._density_scores(densities, empty)
         
         # Strategy 3: Structural Position Analysis
-        position_score = self._analyze_position_patterns(row_index, row, all_rows)
+        position_scores = self._position_scores(densities, empty, texts.mask(DIGIT_RULE))
         
         # Strategy 4: Business Logic Analysis
-        business_logic_score = self._analyze_business_logic(row, headers, all_rows)
-        
-        # Calculate overall confidence with weighted scoring
-        overall_confidence = self._calculate_overall_confidence(
-            semantic_score, density_score, position_score, business_logic_score
-        )
-        
-        # Collect evidence
-        evidence = self._collect_evidence(row, semantic_score, density_score, position_score, business_logic_score)
-        
-        return RowAnalysis(
-            row_index=row_index,
-            semantic_score=semantic_score,
-            density_score=density_score, 
-            position_score=position_score,
-            business_logic_score=business_logic_score,
-            overall_confidence=overall_confidence,
-            evidence=evidence,
-            is_summary_candidate=overall_confidence > self.removal_confidence_threshold
-        )
+        business_scores = self._business_logic_scores(texts)
+        
+        row_analyses = []
+        for row_index, row in enumerate(rows):
+            semantic_score = semantic_scores[row_index]
+            density_score = density_scores[row_index]
+            position_score = position_scores[row_index]
+            business_logic_score = business_scores[row_index]
+            
+            # Calculate overall confidence with weighted scoring
+            overall_confidence = self._calculate_overall_confidence(
+                semantic_score, density_score, position_score, business_logic_score
+            )
+            
+            # Collect evidence
+            evidence = self._collect_evidence(row, semantic_score, density_score, position_score, business_logic_score)
+            
+            row_analyses.append(RowAnalysis(
+                row_index=row_index,
+                semantic_score=semantic_score,
+                density_score=density_score,
+                position_score=position_score,
+                business_logic_score=business_logic_score,
+                overall_confidence=overall_confidence,
+                evidence=evidence,
+                is_summary_candidate=overall_confidence > self.removal_confidence_threshold
+            ))
+        
+        return row_analyses
 
-    def _analyze_semantic_patterns(self, row: List[str]) -> float:
-        """Analyze row for semantic summary indicators"""
-        row_text = ' '.join(str(cell) for cell in row).lower().strip()
-        
-        # Strong indicators - high confidence
-        for pattern in self.strong_summary_keywords:
-            if re.search(pattern, row_text):
-                return 0.95
-        
-        # Agent information patterns - medium-high confidence
-        for pattern in self.agent_info_patterns:
-            if re.search(pattern, row_text):
-                return 0.85
-        
-        # Multiple weak indicators
-        weak_matches = sum(1 for indicator in self.weak_summary_indicators 
-                          if indicator in row_text)
-        
-        if weak_matches >= 2:
-            return min(0.7 + (weak_matches * 0.1), 0.85)
-        elif weak_matches == 1:
-            return 0.4
-        
-        return 0.1
+    def _semantic_scores(self, texts: RowTexts) -> List[float]:
+        """Score each row for semantic summary indicators"""
+        weak_matches = texts.distinct(WEAK_SUMMARY_RULE)
+        
+        return np.select(
+            [
+                texts.mask(STRONG_SUMMARY_RULE),  # Strong indicators - high confidence
+                texts.mask(AGENT_INFO_RULE),      # Agent information patterns - medium-high confidence
+                weak_matches >= 2,                # Multiple weak indicators
+                weak_matches == 1
+            ],
+            [0.95, 0.85, np.minimum(0.7 + (weak_matches * 0.1), 0.85), 0.4],
+            default=0.1
+        ).tolist()
 
-    def _analyze_data_density(self, row: List[str], all_rows: List[List[str]]) -> float:
-        """Compare data density of this row vs typical rows"""
-        if not all_rows:
-            return 0.0
-            
-        # Calculate this row's density
-        current_density = sum(1 for cell in row if str(cell).strip()) / len(row) if row else 0
+    def _density_scores(self, densities: np.ndarray, empty: np.ndarray) -> List[float]:
+        """Compare data density of each row vs typical rows"""
+        if not len(densities) or empty.all():
+            return [0.0] * len(densities)
         
-        # Calculate average density of all rows
-        densities = []
-        for r in all_rows:
-            if r:  # Skip empty rows
-                density = sum(1 for cell in r if str(cell).strip()) / len(r)
-                densities.append(density)
-        
-        if not densities:
-            return 0.0
-        
-        avg_density = mean(densities)
+        # Average density of all rows, skipping empty rows
+        avg_density = mean(densities[~empty].tolist())
         
         # Summary rows typically have lower density
-        if current_density < avg_density * 0.5:  # Less than 50% of average
-            return 0.8
-        elif current_density < avg_density * 0.7:  # Less than 70% of average
-            return 0.6
-        elif current_density < avg_density * 0.9:  # Less than 90% of average
-            return 0.3
-        
-        return 0.1
+        return np.select(
+            [
+                densities < avg_density * 0.5,  # Less than 50% of average
+                densities < avg_density * 0.7,  # Less than 70% of average
+                densities < avg_density * 0.9   # Less than 90% of average
+            ],
+            [0.8, 0.6, 0.3],
+            default=0.1
+        ).tolist()
 
-    def _analyze_position_patterns(self, row_index: int, row: List[str], all_rows: List[List[str]]) -> float:
-        """Analyze structural position for summary likelihood"""
-        total_rows = len(all_rows)
-        
-        # Summary rows often appear after groups of data
-        if row_index == total_rows - 1:  # Last row
-            return 0.7
-        elif row_index > total_rows * 0.8:  # In last 20%
-            return 0.5
-        elif row_index > total_rows * 0.6:  # In last 40%
-            return 0.3
-        
-        # Check if row appears after a group (heuristic)
-        if row_index > 0 and row_index < total_rows - 1:
-            prev_row = all_rows[row_index - 1]
-            next_row = all_rows[row_index + 1]
-            
-            # If surrounded by different patterns, might be summary
-            if self._rows_are_different_patterns(row, prev_row) and self._rows_are_different_patterns(row, next_row):
-                return 0.4
-        
-        return 0.2
+    def _position_scores(self, densities: np.ndarray, empty: np.ndarray, has_numbers: np.ndarray) -> List[float]:
+        """Score each row's structural position for summary likelihood"""
+        total_rows = len(densities)
+        row_index = np.arange(total_rows)
+        
+        # Row i and row i + 1 have different patterns
+        changes = self._pattern_changes(densities, empty, has_numbers)
+        
+        # Summary rows often appear after groups of data: surrounded by different patterns
+        surrounded = np.zeros(total_rows, dtype=bool)
+        if total_rows > 2:
+            surrounded[1:-1] = changes[:-1] & changes[1:]
+        
+        return np.select(
+            [
+                row_index == total_rows - 1,     # Last row
+                row_index > total_rows * 0.8,    # In last 20%
+                row_index > total_rows * 0.6,    # In last 40%
+                surrounded
+            ],
+            [0.7, 0.5, 0.3, 0.4],
+            default=0.2
+        ).tolist()
 
-    def _analyze_business_logic(self, row: List[str], headers: List[str], all_rows: List[List[str]]) -> float:
+    def _business_logic_scores(self, texts: RowTexts) -> List[float]:
         """Apply business logic specific to commission statements"""
-        row_text = ' '.join(str(cell) for cell in row).lower()
-        
-        # Commission statement specific patterns
-        commission_totals = ['total commission', 'commission total', 'net commission']
-        group_totals = ['total for group', 'group total']
-        vendor_totals = ['total for vendor', 'vendor total']
-        
-        for pattern in commission_totals:
-            if pattern in row_text:
-                return 0.9
-        
-        for pattern in group_totals:
-            if pattern in row_text:
-                return 0.9
-                
-        for pattern in vendor_totals:
-            if pattern in row_text:
-                return 0.9
-        
-        # Look for agent information blocks
-        if any(agent_key in row_text for agent_key in ['writing agent', 'agent number', 'agent name']):
-            return 0.8
-        
-        return 0.1
+        return np.select(
+            [
+                texts.mask(BUSINESS_TOTAL_RULE),  # Commission, group and vendor totals
+                texts.mask(AGENT_BLOCK_RULE)      # Agent information blocks
+            ],
+            [0.9, 0.8],
+            default=0.1
+        ).tolist()
 
     def _calculate_overall_confidence(self, semantic: float, density: float, position: float, business: float) -> float:
         """Calculate weighted overall confidence score"""
@@ -337,31 +339,18 @@ class EnhancedSummaryRowDetector:
         
         return True
 
-    def _rows_are_different_patterns(self, row1: List[str], row2: List[str]) -> bool:
-        """Heuristic to determine if two rows have different patterns"""
-        if not row1 or not row2:
-            return True
-        
-        # Compare density
-        density1 = sum(1 for cell in row1 if str(cell).strip()) / len(row1)
-        density2 = sum(1 for cell in row2 if str(cell).strip()) / len(row2)
-        
-        # If densities differ significantly
-        if abs(density1 - density2) > 0.3:
-            return True
-        
-        # Compare text patterns
-        text1 = ' '.join(str(cell) for cell in row1).lower()
-        text2 = ' '.join(str(cell) for cell in row2).lower()
-        
-        # Look for format differences
-        has_numbers1 = bool(re.search(r'\d', text1))
-        has_numbers2 = bool(re.search(r'\d', text2))
-        
-        if has_numbers1 != has_numbers2:
-            return True
-        
-        return False
+    def _pattern_changes(self, densities: np.ndarray, empty: np.ndarray, has_numbers: np.ndarray) -> np.ndarray:
+        """Heuristic to determine whether each row and the next have different patterns"""
+        if len(densities) < 2:
+            return np.zeros(0, dtype=bool)
+        
+        return (
+            empty[:-1] | empty[1:]
+            # If densities differ significantly
+            | (np.abs(densities[:-1] - densities[1:]) > 0.3)
+            # Look for format differences
+            | (has_numbers[:-1] != has_numbers[1:])
+        )
 
     def _create_result(self, table_data: Dict[str, Any], removed_indices: List[int], 
                       detection_method: str, cleaned_rows: List[List[str]] = None,
@@ -58,7 +58,7 @@ async def cleanup_orphan_records():
                     and_(
                         StatementUpload.status == 'pending',
                         StatementUpload.uploaded_at < pending_cutoff,
-                        StatementUpload.raw_data.is_(None)  # No extraction data
+                        StatementUpload.payload_is_null('raw_data')  # No extraction data
                     )
                 )
             )
@@ -0,0 +1,164 @@
+"""
+Parsed PDF shared by everything that reads one upload.
+
+An extraction used to reopen the same file in every step: carrier guessing, text snippets,
+page counting, chunking, date extraction. Each step re-read the file and re-parsed its
+xref and page tree. A PDFDocument opens each parser (pypdf, PyMuPDF, pdfplumber) from the
+file at most once, on first use; the parsers read pages from disk as needed, so the file is
+never held in memory as a whole. Page count, per-page text and per-page words are memoized.
+
+Create one per upload, pass it to the consumers, and close it when the extraction is done:
+
+    with PDFDocument(file_path) as document:
+        result = await enhanced_service.extract_tables_with_progress(..., document=document)
+
+Consumers take an optional `document` and fall back to opening the file themselves when
+it is not given, so direct callers keep working.
+
+Parsers are not thread-safe, so they are only reachable through the methods below, which
+hold a lock while they use them. A document can therefore be shared with code running in
+asyncio.to_thread or run_in_executor.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class PDFDocument:
+    """Lazily parsed PDF with memoized page count, page text and page words."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        self._file = None
+        self._reader = None
+        self._fitz_doc = None
+        self._plumber = None
+        self._page_text: Dict[int, str] = {}
+        self._plumber_text: Dict[int, str] = {}
+        self._page_words: Dict[int, List[Dict[str, Any]]] = {}
+        self._fitz_text: Dict[int, str] = {}
+        # How many times each parser was opened, and the time spent parsing
+        self.opens: Counter = Counter()
+        self.parse_seconds = 0.0
+
+    def __enter__(self) -> "PDFDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fitz_doc is not None:
+                self._fitz_doc.close()
+                self._fitz_doc = None
+            if self._plumber is not None:
+                self._plumber.close()
+                self._plumber = None
+            self._reader = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.parse_seconds += time.perf_counter() - start
+
+    def read_bytes(self) -> bytes:
+        """The file contents, for callers that need the raw bytes. Not kept by the document."""
+        with open(self.file_path, 'rb') as f:
+            return f.read()
+
+    # Parser accessors; callers must hold self._lock
+
+    def _pypdf(self):
+        if self._reader is None:
+            from pypdf import PdfReader
+            # pypdf reads objects from the stream on demand, so the file stays open until close()
+            self._file = open(self.file_path, 'rb')
+            self._reader = self._timed(PdfReader, self._file)
+            self.opens['pypdf'] += 1
+        return self._reader
+
+    def _pymupdf(self):
+        if self._fitz_doc is None:
+            import fitz
+            self._fitz_doc = self._timed(fitz.open, self.file_path)
+            self.opens['pymupdf'] += 1
+        return self._fitz_doc
+
+    def _pdfplumber(self):
+        if self._plumber is None:
+            import pdfplumber
+            self._plumber = self._timed(pdfplumber.open, self.file_path)
+            self.opens['pdfplumber'] += 1
+        return self._plumber
+
+    @property
+    def page_count(self) -> int:
+        with self._lock:
+            # Use whichever parser is already open
+            if self._fitz_doc is not None:
+                return self._fitz_doc.page_count
+            return len(self._pypdf().pages)
+
+    def page_text(self, page_num: int) -> str:
+        """Text of a page (0-based) as extracted by pypdf."""
+        with self._lock:
+            if page_num not in self._page_text:
+                page = self._pypdf().pages[page_num]
+                self._page_text[page_num] = self._timed(page.extract_text) or ""
+            return self._page_text[page_num]
+
+    def layout_text(self, page_num: int) -> str:
+        """Text of a page (0-based) as extracted by pdfplumber."""
+        with self._lock:
+            if page_num not in self._plumber_text:
+                page = self._pdfplumber().pages[page_num]
+                self._plumber_text[page_num] = self._timed(page.extract_text) or ""
+            return self._plumber_text[page_num]
+
+    def page_words(self, page_num: int) -> List[Dict[str, Any]]:
+        """Words of a page (0-based) with bounding boxes, from pdfplumber."""
+        with self._lock:
+            if page_num not in self._page_words:
+                page = self._pdfplumber().pages[page_num]
+                self._page_words[page_num] = self._timed(page.extract_words)
+            return self._page_words[page_num]
+
+    def fitz_text(self, page_num: int) -> str:
+        """Text of a page (0-based) as extracted by PyMuPDF."""
+        with self._lock:
+            if page_num not in self._fitz_text:
+                page = self._pymupdf().load_page(page_num)
+                self._fitz_text[page_num] = self._timed(page.get_text)
+            return self._fitz_text[page_num]
+
+    def page_range_pdf(self, start_page: int, end_page: int) -> bytes:
+        """A new PDF of pages [start_page, end_page) (0-based, end clamped to the page count)."""
+        import fitz
+        with self._lock:
+            source = self._pymupdf()
+            end_page = min(end_page, source.page_count)
+            subset = fitz.open()
+            try:
+                self._timed(lambda: subset.insert_pdf(source, from_page=start_page, to_page=end_page - 1))
+                return subset.tobytes()
+            finally:
+                subset.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'opens': dict(self.opens),
+            'parse_seconds': round(self.parse_seconds, 4),
+            'memoized_pages': len(self._page_text) + len(self._plumber_text) + len(self._page_words) + len(self._fitz_text)
+        }
@@ -0,0 +1,285 @@
+"""
+Progress bus for WebSocket messages.
+
+A client's WebSocket can be connected to a different worker process than the one running
+its extraction. Every message broadcast for an upload is therefore published on the bus,
+and every worker relays messages from other workers to its own sockets for that upload.
+The replay backlog (what a newly connected socket is sent first) lives in the bus too,
+so it is shared by all workers.
+
+Backends (PROGRESS_BUS_BACKEND):
+- "postgres" (default): Postgres LISTEN/NOTIFY on one dedicated connection per worker.
+  Backlog messages are stored in progress_events. Messages too large for a NOTIFY
+  payload are stored there too and sent by id.
+  LISTEN needs a session-level connection: when DATABASE_URL goes through a
+  transaction-mode pooler, point PROGRESS_BUS_DSN at the database directly.
+- "local": in-process only (single worker, development).
+
+Messages travel pre-encoded (JSON text), so they are serialized once per broadcast.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import timedelta
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_BUS_CHANNEL = 'upload_progress'
+# NOTIFY payloads must be shorter than 8000 bytes; notifications whose final JSON text would
+# exceed this carry a progress_events id instead of the message
+NOTIFY_PAYLOAD_LIMIT = 7000
+PROGRESS_BACKLOG_TTL_SECONDS = int(os.getenv('PROGRESS_BACKLOG_TTL_SECONDS', '3600'))
+PROGRESS_BUS_RECONNECT_SECONDS = 5.0
+
+# deliver(upload_id, encoded_message) and wants(upload_id) -> has local sockets for it
+Deliver = Callable[[str, str], Awaitable[None]]
+Wants = Callable[[str], bool]
+
+
+def encode_notification(origin: str, upload_id: str, encoded: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """NOTIFY payload carrying the message itself, or the progress_events id it is stored under."""
+    notification = {'o': origin, 'u': upload_id}
+    if event_id is not None:
+        notification['id'] = event_id
+    else:
+        notification['m'] = encoded
+    return json.dumps(notification)
+
+
+def fits_notify_payload(payload: str) -> bool:
+    """Whether a NOTIFY payload is within NOTIFY_PAYLOAD_LIMIT (measured after JSON escaping)."""
+    return len(payload.encode('utf-8')) <= NOTIFY_PAYLOAD_LIMIT
+
+
+class ProgressBus(ABC):
+    """Fan-out of encoded WebSocket messages between workers, plus the replay backlog."""
+
+    def __init__(self, backlog_limit: int):
+        self.backlog_limit = backlog_limit
+
+    @abstractmethod
+    async def publish(self, upload_id: str, encoded: str, record: bool = True) -> None:
+        """Send a message to the other workers (and store it for replay if record)."""
+
+    @abstractmethod
+    async def record(self, upload_id: str, encoded: str) -> None:
+        """Store a message for replay without relaying it."""
+
+    @abstractmethod
+    async def backlog(self, upload_id: str) -> List[str]:
+        """Most recent stored messages for an upload, oldest first."""
+
+    @abstractmethod
+    async def clear_backlog(self, upload_id: str) -> None:
+        """Drop the stored messages of an upload."""
+
+    async def run(self, shutdown_event: asyncio.Event, deliver: Deliver, wants: Wants) -> None:
+        """Relay messages published by other workers until shutdown."""
+        return None
+
+
+class LocalProgressBus(ProgressBus):
+    """Single-process bus: nothing to relay, backlog kept in memory."""
+
+    def __init__(self, backlog_limit: int):
+        super().__init__(backlog_limit)
+        self._backlog: Dict[str, Deque[str]] = {}
+
+    async def publish(self, upload_id: str, encoded: str, record: bool = True) -> None:
+        if record:
+            await self.record(upload_id, encoded)
+
+    async def record(self, upload_id: str, encoded: str) -> None:
+        if upload_id not in self._backlog:
+            self._backlog[upload_id] = deque(maxlen=self.backlog_limit)
+        self._backlog[upload_id].append(encoded)
+
+    async def backlog(self, upload_id: str) -> List[str]:
+        return list(self._backlog.get(upload_id, ()))
+
+    async def clear_backlog(self, upload_id: str) -> None:
+        self._backlog.pop(upload_id, None)
+
+
+class PostgresProgressBus(ProgressBus):
+    """LISTEN/NOTIFY fan-out with the backlog in progress_events."""
+
+    def __init__(self, backlog_limit: int, dsn: Optional[str] = None, channel: str = PROGRESS_BUS_CHANNEL):
+        super().__init__(backlog_limit)
+        self.dsn = dsn or os.getenv('PROGRESS_BUS_DSN')
+        self.channel = channel
+        self.relayed = 0
+        self._inbox: Optional[asyncio.Queue] = None
+        self._wants: Optional[Wants] = None
+
+    @property
+    def origin(self) -> str:
+        # Resolved on use: with `gunicorn --preload` this module is imported in the master
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def _engine_and_table():
+        from app.db.database import engine
+        from app.db.models import ProgressEvent
+        return engine, ProgressEvent.__table__
+
+    def _listen_dsn(self) -> str:
+        if self.dsn:
+            return self.dsn
+        from app.db.database import DATABASE_URL
+        return DATABASE_URL.replace('postgresql+asyncpg://', 'postgresql://', 1)
+
+    async def publish(self, upload_id: str, encoded: str, record: bool = True) -> None:
+        from sqlalchemy import func, insert, select
+
+        engine, table = self._engine_and_table()
+        # Embedding the message escapes it again (quotes, backslashes, non-ASCII), so the
+        # size check is on the final payload, not on the message
+        payload = encode_notification(self.origin, upload_id, encoded)
+        by_reference = not fits_notify_payload(payload)
+
+        # The notification is delivered at commit, after the row is visible
+        async with engine.begin() as conn:
+            if record or by_reference:
+                event_id = (await conn.execute(
+                    insert(table).values(upload_id=upload_id, message=encoded).returning(table.c.id)
+                )).scalar_one()
+            if by_reference:
+                payload = encode_notification(self.origin, upload_id, event_id=event_id)
+            await conn.execute(select(func.pg_notify(self.channel, payload)))
+
+    async def record(self, upload_id: str, encoded: str) -> None:
+        from sqlalchemy import insert
+
+        engine, table = self._engine_and_table()
+        async with engine.begin() as conn:
+            await conn.execute(insert(table).values(upload_id=upload_id, message=encoded))
+
+    async def backlog(self, upload_id: str) -> List[str]:
+        from sqlalchemy import select
+
+        engine, table = self._engine_and_table()
+        async with engine.connect() as conn:
+            rows = (await conn.execute(
+                select(table.c.message)
+                .where(table.c.upload_id == upload_id)
+                .order_by(table.c.id.desc())
+                .limit(self.backlog_limit)
+            )).scalars().all()
+        return list(reversed(rows))
+
+    async def clear_backlog(self, upload_id: str) -> None:
+        from sqlalchemy import delete
+
+        engine, table = self._engine_and_table()
+        async with engine.begin() as conn:
+            await conn.execute(delete(table).where(table.c.upload_id == upload_id))
+
+    async def _purge_expired(self) -> None:
+        from sqlalchemy import delete, func
+
+        engine, table = self._engine_and_table()
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                delete(table).where(table.c.created_at < func.now() - timedelta(seconds=PROGRESS_BACKLOG_TTL_SECONDS))
+            )
+        if result.rowcount:
+            logger.info(f"🧹 Purged {result.rowcount} expired progress events")
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            notification = json.loads(payload)
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring malformed progress notification: {payload[:100]}")
+            return
+        # Our own messages were delivered locally when published
+        if notification.get('o') == self.origin:
+            return
+        if self._wants is not None and not self._wants(notification.get('u')):
+            return
+        self._inbox.put_nowait((notification['u'], notification.get('m'), notification.get('id')))
+
+    async def _fetch(self, event_id: int) -> Optional[str]:
+        from sqlalchemy import select
+
+        engine, table = self._engine_and_table()
+        async with engine.connect() as conn:
+            return (await conn.execute(select(table.c.message).where(table.c.id == event_id))).scalar_one_or_none()
+
+    async def _relay(self, deliver: Deliver) -> None:
+        """Deliver notifications in the order they arrived."""
+        while True:
+            upload_id, encoded, event_id = await self._inbox.get()
+            try:
+                if encoded is None:
+                    encoded = await self._fetch(event_id)
+                if encoded is not None:
+                    await deliver(upload_id, encoded)
+                    self.relayed += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to relay progress for upload {upload_id}: {e}")
+
+    async def run(self, shutdown_event: asyncio.Event, deliver: Deliver, wants: Wants) -> None:
+        import asyncpg
+
+        self._inbox = asyncio.Queue()
+        self._wants = wants
+        relay_task = asyncio.create_task(self._relay(deliver))
+
+        try:
+            while not shutdown_event.is_set():
+                connection = None
+                try:
+                    connection = await asyncpg.connect(self._listen_dsn(), statement_cache_size=0)
+                    lost = asyncio.Event()
+                    connection.add_termination_listener(lambda _: lost.set())
+                    await connection.add_listener(self.channel, self._on_notify)
+                    logger.info(f"✅ Progress bus listening on '{self.channel}'")
+
+                    while not shutdown_event.is_set() and not lost.is_set():
+                        try:
+                            await self._purge_expired()
+                        except Exception as e:
+                            logger.warning(f"⚠️ Progress event purge failed: {e}")
+                        await _wait_any((shutdown_event, lost), timeout=600)
+
+                    if lost.is_set():
+                        logger.warning("⚠️ Progress bus connection lost, reconnecting")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"❌ Progress bus listener error: {e}")
+                    await _wait_any((shutdown_event,), timeout=PROGRESS_BUS_RECONNECT_SECONDS)
+                finally:
+                    if connection is not None and not connection.is_closed():
+                        try:
+                            await connection.close(timeout=2)
+                        except Exception:
+                            connection.terminate()
+        finally:
+            relay_task.cancel()
+
+
+async def _wait_any(events: Tuple[asyncio.Event, ...], timeout: float) -> None:
+    waiters = [asyncio.create_task(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+def create_progress_bus(backlog_limit: int, backend: Optional[str] = None) -> ProgressBus:
+    """Bus configured from PROGRESS_BUS_BACKEND ("postgres" by default, or "local")."""
+    backend = (backend or os.getenv('PROGRESS_BUS_BACKEND', 'postgres')).lower()
+    if backend == 'postgres':
+        return PostgresProgressBus(backlog_limit)
+    if backend == 'local':
+        return LocalProgressBus(backlog_limit)
+    raise ValueError(f"Unknown progress bus backend: {backend}")
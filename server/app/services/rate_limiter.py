@@ -0,0 +1,315 @@
+"""
+HTTP Rate Limiter Service
+
+Per-route request limits for rate_limit_middleware, using GCRA (generic cell rate
+algorithm): each (policy, client) pair is a single "theoretical arrival time" (TAT), so a
+check is O(1) in time and memory however many requests the client made. A policy of
+`limit` requests per `period_seconds` allows a burst of `limit` and then one request every
+period_seconds / limit.
+
+Backends:
+- "postgres": one row per key in the unlogged http_rate_limits table, updated with a
+  single conditional upsert on the database clock, so limits hold across gunicorn workers.
+- "local": in-process dict, for development or a single worker (and fallback).
+
+Idle keys are evicted by run_eviction() once their TAT has passed: such a key is
+indistinguishable from one never seen.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HTTP_RATE_LIMIT_EVICT_SECONDS = float(os.getenv('HTTP_RATE_LIMIT_EVICT_SECONDS', '300'))
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """`limit` requests per `period_seconds` for paths starting with path_prefix."""
+    name: str
+    path_prefix: str
+    limit: int
+    period_seconds: float
+    methods: Tuple[str, ...] = ()  # Empty = every method
+    message: str = "Too many requests. Please try again later."
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period_seconds / self.limit
+
+    def matches(self, path: str, method: str) -> bool:
+        return path.startswith(self.path_prefix) and (not self.methods or method in self.methods)
+
+
+DEFAULT_POLICIES = [
+    RateLimitPolicy(
+        name="otp_request",
+        path_prefix="/api/auth/otp/request",
+        limit=10,
+        period_seconds=3600,
+        methods=("POST",),
+        message="Too many OTP requests. Please try again later."
+    ),
+    RateLimitPolicy(
+        name="otp_verify",
+        path_prefix="/api/auth/otp/verify",
+        limit=20,
+        period_seconds=900,
+        methods=("POST",),
+        message="Too many verification attempts. Please try again later."
+    ),
+    RateLimitPolicy(
+        name="otp_register",
+        path_prefix="/api/auth/otp/register",
+        limit=10,
+        period_seconds=3600,
+        methods=("POST",),
+        message="Too many registration requests. Please try again later."
+    ),
+]
+
+
+def parse_policies(spec: str) -> List[RateLimitPolicy]:
+    """
+    Policies from "prefix=limit/period_seconds" entries separated by commas,
+    e.g. "/api/auth/otp/request=10/3600,/api/auth/otp/verify=20/900".
+    """
+    policies = []
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        prefix, rate = entry.split('=', 1)
+        limit, period = rate.split('/', 1)
+        policies.append(RateLimitPolicy(
+            name=prefix.strip().strip('/').replace('/', '_') or 'root',
+            path_prefix=prefix.strip(),
+            limit=int(limit),
+            period_seconds=float(period)
+        ))
+    return policies
+
+
+def gcra_decide(tat: Optional[float], now: float, policy: RateLimitPolicy) -> Tuple[bool, float, float]:
+    """
+    One GCRA step: (allowed, new TAT, retry_after seconds).
+
+    The request is allowed if, after adding one emission interval, the TAT is no more than
+    one period ahead of now.
+    """
+    interval = policy.emission_interval
+    new_tat = max(tat if tat is not None else now, now) + interval
+    if new_tat - now <= policy.period_seconds:
+        return True, new_tat, 0.0
+    return False, tat, new_tat - now - policy.period_seconds
+
+
+class RateLimitBackend(ABC):
+    """Storage for GCRA state; hit() must decide and update a key atomically."""
+
+    @abstractmethod
+    async def hit(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        """Count one request; returns (allowed, retry_after seconds)."""
+
+    @abstractmethod
+    async def evict(self) -> int:
+        """Drop keys whose TAT has passed; returns how many."""
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """In-process backend: limits only this worker."""
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+
+    async def hit(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        # No await between read and write, so this is atomic on the event loop
+        allowed, tat, retry_after = gcra_decide(self._tats.get(key), time.time(), policy)
+        if allowed:
+            self._tats[key] = tat
+        return allowed, retry_after
+
+    async def evict(self) -> int:
+        now = time.time()
+        expired = [key for key, tat in self._tats.items() if tat <= now]
+        for key in expired:
+            del self._tats[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """
+    Shared backend on http_rate_limits.
+
+    The GCRA step is one INSERT ... ON CONFLICT DO UPDATE ... WHERE on the database clock:
+    the row lock taken by the upsert serializes concurrent requests for a key, and no row is
+    returned when the request is over the limit.
+    """
+
+    @staticmethod
+    def _engine_and_table():
+        from app.db.database import engine
+        from app.db.models import HttpRateLimit
+        return engine, HttpRateLimit.__table__
+
+    async def hit(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        from sqlalchemy import select, func
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        engine, table = self._engine_and_table()
+        interval = policy.emission_interval
+        db_now = func.extract('epoch', func.clock_timestamp())
+
+        stmt = pg_insert(table).values(limiter_key=key, tat=db_now + interval)
+        # excluded.tat is now + interval, i.e. the TAT of a key seen for the first time
+        new_tat = func.greatest(table.c.tat + interval, stmt.excluded.tat)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.limiter_key],
+            set_={'tat': new_tat},
+            where=(new_tat - stmt.excluded.tat + interval <= policy.period_seconds)
+        ).returning(table.c.tat)
+
+        async with engine.begin() as conn:
+            if (await conn.execute(stmt)).first() is not None:
+                return True, 0.0
+            row = (await conn.execute(
+                select(table.c.tat, db_now).where(table.c.limiter_key == key)
+            )).first()
+
+        if row is None:
+            return False, interval
+        _, _, retry_after = gcra_decide(float(row[0]), float(row[1]), policy)
+        return False, max(retry_after, 0.0)
+
+    async def evict(self) -> int:
+        from sqlalchemy import delete, func
+
+        engine, table = self._engine_and_table()
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                delete(table).where(table.c.tat <= func.extract('epoch', func.clock_timestamp()))
+            )
+        return result.rowcount or 0
+
+
+class HttpRateLimiter:
+    """Matches requests to policies and applies them through the configured backend."""
+
+    def __init__(self, policies: List[RateLimitPolicy], backend: RateLimitBackend):
+        self.policies = list(policies)
+        self.backend = backend
+        self._fallback = LocalRateLimitBackend()
+        self.stats = {'checked': 0, 'limited': 0, 'backend_errors': 0, 'evicted': 0}
+
+    def policy_for(self, path: str, method: str) -> Optional[RateLimitPolicy]:
+        for policy in self.policies:
+            if policy.matches(path, method):
+                return policy
+        return None
+
+    async def check(self, path: str, method: str, client_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Count a request against its route's policy.
+
+        Returns None for routes without a policy, else a dict with "allowed", "policy" and
+        "retry_after". If the shared backend fails, this worker's local limits apply.
+        """
+        policy = self.policy_for(path, method)
+        if policy is None:
+            return None
+
+        key = f"{policy.name}:{client_id}"
+        self.stats['checked'] += 1
+        try:
+            allowed, retry_after = await self.backend.hit(key, policy)
+        except Exception as e:
+            self.stats['backend_errors'] += 1
+            logger.warning(f"Rate limit backend failed, using local limits: {e}")
+            allowed, retry_after = await self._fallback.hit(key, policy)
+
+        if not allowed:
+            self.stats['limited'] += 1
+        return {'allowed': allowed, 'policy': policy, 'retry_after': retry_after}
+
+    async def reject(self, request) -> Optional[Any]:
+        """
+        For rate_limit_middleware: a 429 JSONResponse with Retry-After if the request is over
+        its route's limit, else None.
+
+        Keyed on request.client, which the uvicorn worker takes from X-Forwarded-For when the
+        peer is in --forwarded-allow-ips (start.sh); otherwise every client behind the proxy
+        would share one limit.
+        """
+        from fastapi.responses import JSONResponse
+
+        client_ip = request.client.host if request.client else "unknown"
+        decision = await self.check(request.url.path, request.method, client_ip)
+        if decision is None or decision['allowed']:
+            return None
+        # Exceptions raised in middleware bypass the exception handlers, so respond directly
+        return JSONResponse(
+            status_code=429,
+            content={"detail": decision['policy'].message},
+            headers={"Retry-After": retry_after_header(decision['retry_after'])}
+        )
+
+    async def evict(self) -> int:
+        evicted = await self._fallback.evict()
+        if self.backend is not self._fallback:
+            evicted += await self.backend.evict()
+        self.stats['evicted'] += evicted
+        return evicted
+
+    async def run_eviction(self, shutdown_event: Optional[asyncio.Event] = None) -> None:
+        """Background task: evict idle keys every HTTP_RATE_LIMIT_EVICT_SECONDS."""
+        while shutdown_event is None or not shutdown_event.is_set():
+            try:
+                if shutdown_event is not None:
+                    try:
+                        await asyncio.wait_for(shutdown_event.wait(), timeout=HTTP_RATE_LIMIT_EVICT_SECONDS)
+                        return
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(HTTP_RATE_LIMIT_EVICT_SECONDS)
+
+                evicted = await self.evict()
+                if evicted:
+                    logger.debug(f"Rate limiter evicted {evicted} idle keys")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Rate limiter eviction failed: {e}")
+
+
+def retry_after_header(retry_after: float) -> str:
+    return str(max(1, math.ceil(retry_after)))
+
+
+def create_rate_limiter(backend: Optional[str] = None, policies: Optional[str] = None) -> HttpRateLimiter:
+    """
+    Limiter configured from HTTP_RATE_LIMIT_BACKEND ("postgres" by default, or "local") and
+    HTTP_RATE_LIMIT_POLICIES (see parse_policies; defaults to DEFAULT_POLICIES).
+    """
+    backend = (backend or os.getenv('HTTP_RATE_LIMIT_BACKEND', 'postgres')).lower()
+    policies = policies if policies is not None else os.getenv('HTTP_RATE_LIMIT_POLICIES')
+
+    if backend == 'postgres':
+        storage = PostgresRateLimitBackend()
+    elif backend == 'local':
+        storage = LocalRateLimitBackend()
+    else:
+        raise ValueError(f"Unknown rate limit backend: {backend}")
+
+    return HttpRateLimiter(parse_policies(policies) if policies else DEFAULT_POLICIES, storage)
+
+
+# Global instance
+http_rate_limiter = create_rate_limiter()
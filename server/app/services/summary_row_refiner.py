@@ -2,6 +2,10 @@ import math
 import re
 from typing import Any, Dict, List, Set
 
+import numpy as np
+
+from app.services.summary_row_rules import RowRule, RowTexts, join_cells, join_stripped_cells
+
 SUMMARY_KEYWORDS = [
     "total",
     "subtotal",
@@ -14,16 +18,22 @@ SUMMARY_KEYWORDS = [
     "group",
 ]
 
-SUMMARY_ROW_REGEXES = [
-    re.compile(r"\btotal\s+for\b", re.IGNORECASE),
-    re.compile(r"\bgrand\s+total\b", re.IGNORECASE),
-    re.compile(r"\bnet\s+(?:payment|commission)\b", re.IGNORECASE),
-    re.compile(r"\bsummary\b", re.IGNORECASE),
-    re.compile(r"\bcommission\s+total\b", re.IGNORECASE),
-    re.compile(r"\bwriting\s+agent\b", re.IGNORECASE),
-    re.compile(r"\bplan\s+summary\b", re.IGNORECASE),
+SUMMARY_ROW_PATTERNS = [
+    r"\btotal\s+for\b",
+    r"\bgrand\s+total\b",
+    r"\bnet\s+(?:payment|commission)\b",
+    r"\bsummary\b",
+    r"\bcommission\s+total\b",
+    r"\bwriting\s+agent\b",
+    r"\bplan\s+summary\b",
 ]
 
+# Compiled once; see summary_row_rules
+SUMMARY_KEYWORD_RULE = RowRule("summary_keywords", SUMMARY_KEYWORDS, literal=True)
+SUMMARY_ROW_RULE = RowRule("summary_row_phrases", SUMMARY_ROW_PATTERNS, flags=re.IGNORECASE)
+TOTAL_RULE = RowRule("total", ["total"], literal=True)
+SPARSE_ROLLUP_RULE = RowRule("sparse_rollup_keywords", ["total", "vendor", "summary", "plan"], literal=True)
+
 
 def _count_non_empty_cells(row: List[Any]) -> int:
     return sum(1 for cell in row if str(cell).strip())
@@ -48,8 +58,7 @@ def _count_numeric_cells(row: List[Any]) -> int:
 
 
 def _row_has_keyword(row: List[Any]) -> bool:
-    lowered = " ".join(str(cell).lower() for cell in row if cell)
-    return any(keyword in lowered for keyword in SUMMARY_KEYWORDS)
+    return SUMMARY_KEYWORD_RULE.search(join_cells(row))
 
 
 def _is_numeric_value(cell: Any) -> bool:
@@ -71,36 +80,28 @@ def _is_numeric_value(cell: Any) -> bool:
         return False
 
 
-def row_looks_like_summary(row: List[Any]) -> bool:
-    """
-    Detect summary-like rows even when AI didn't mark them.
-    Looks for explicit phrases plus sparse rows with few populated cells.
-    """
-    if not row:
-        return False
-
-    joined_lower = " ".join(str(cell).strip().lower() for cell in row if str(cell).strip())
-    if joined_lower:
-        for regex in SUMMARY_ROW_REGEXES:
-            if regex.search(joined_lower):
-                return True
-        if "total" in joined_lower and joined_lower.count("total") > 1:
-            return True
-
-    non_empty = _count_non_empty_cells(row)
-    numeric_cells = _count_numeric_cells(row)
+def _looks_like_summary(
+    row: List[Any],
+    phrase_match: bool,
+    total_count: int,
+    rollup_keyword: bool,
+    non_empty: int,
+    numeric_cells: int
+) -> bool:
+    """Verdict of row_looks_like_summary from the row's precomputed text matches and cell counts."""
+    if phrase_match or total_count > 1:
+        return True
 
     if non_empty == 0:
         return False
 
     # Rows that only have 3 or fewer populated cells and mention "total" anywhere are summaries
-    if non_empty <= 3 and joined_lower and "total" in joined_lower:
+    if non_empty <= 3 and total_count:
         return True
 
     # Sparse rows with few numeric cells are usually rollups (e.g., Total for Vendor)
-    if non_empty <= 4 and numeric_cells <= 2 and joined_lower:
-        if any(keyword in joined_lower for keyword in ["total", "vendor", "summary", "plan"]):
-            return True
+    if non_empty <= 4 and numeric_cells <= 2 and rollup_keyword:
+        return True
 
     # Rows with zero identifiers (first two columns empty) but multiple numeric cells are usually subtotals
     identifier_cells = [str(cell).strip() for cell in row[:2]]
@@ -110,6 +111,55 @@ def row_looks_like_summary(row: List[Any]) -> bool:
     return False
 
 
+def row_looks_like_summary(row: List[Any]) -> bool:
+    """
+    Detect summary-like rows even when AI didn't mark them.
+    Looks for explicit phrases plus sparse rows with few populated cells.
+    For a whole table, summary_row_mask is faster.
+    """
+    if not row:
+        return False
+
+    joined_lower = join_stripped_cells(row)
+    return _looks_like_summary(
+        row,
+        SUMMARY_ROW_RULE.search(joined_lower),
+        joined_lower.count("total"),
+        SPARSE_ROLLUP_RULE.search(joined_lower),
+        _count_non_empty_cells(row),
+        _count_numeric_cells(row)
+    )
+
+
+def _summary_row_mask(rows: List[List[Any]], non_empty_counts: List[int], numeric_counts: List[int]) -> np.ndarray:
+    texts = RowTexts([join_stripped_cells(row) for row in rows])
+    phrase_match = texts.mask(SUMMARY_ROW_RULE)
+    total_counts = texts.counts(TOTAL_RULE)
+    rollup_keyword = texts.mask(SPARSE_ROLLUP_RULE)
+
+    mask = np.zeros(len(rows), dtype=bool)
+    for idx, row in enumerate(rows):
+        if row:
+            mask[idx] = _looks_like_summary(
+                row,
+                phrase_match[idx],
+                total_counts[idx],
+                rollup_keyword[idx],
+                non_empty_counts[idx],
+                numeric_counts[idx]
+            )
+    return mask
+
+
+def summary_row_mask(rows: List[List[Any]]) -> np.ndarray:
+    """row_looks_like_summary for every row of a table, as a boolean array."""
+    return _summary_row_mask(
+        rows,
+        [_count_non_empty_cells(row) for row in rows],
+        [_count_numeric_cells(row) for row in rows]
+    )
+
+
 def refine_summary_rows(table: Dict[str, Any]) -> Dict[str, Any]:
     """
     Post-process summary rows to reduce false positives and add obvious omissions.
@@ -139,17 +189,22 @@ def refine_summary_rows(table: Dict[str, Any]) -> Dict[str, Any]:
         return table
 
     non_empty_counts = [_count_non_empty_cells(row) for row in rows]
+    numeric_counts = [_count_numeric_cells(row) for row in rows]
     avg_non_empty = sum(non_empty_counts) / max(len(non_empty_counts), 1)
     median_non_empty = sorted(non_empty_counts)[len(non_empty_counts) // 2]
     # Threshold: rows with <= 40% of typical density (but at least 2 cells) are candidates
     density_threshold = max(2, math.ceil(min(avg_non_empty, median_non_empty) * 0.4))
 
+    # Text checks for every row at once, on rows normalized once
+    keyword_mask = RowTexts([join_cells(row) for row in rows]).mask(SUMMARY_KEYWORD_RULE)
+    detected_mask = _summary_row_mask(rows, non_empty_counts, numeric_counts)
+
     refined: Set[int] = set()
 
     for idx, row in enumerate(rows):
         non_empty = non_empty_counts[idx]
-        numeric_cells = _count_numeric_cells(row)
-        has_keyword = _row_has_keyword(row)
+        numeric_cells = numeric_counts[idx]
+        has_keyword = keyword_mask[idx]
         
         # ✅ IMPROVED: Check if identifier columns contain actual text identifiers (not just numbers)
         # Summary rows often have ONLY numeric values, even in identifier columns
@@ -184,7 +239,7 @@ def refine_summary_rows(table: Dict[str, Any]) -> Dict[str, Any]:
             (looks_sparse and not has_text_identifier and numeric_heavy) or
             is_numeric_summary_pattern  # ✅ NEW: Catch numeric-only summary rows
         )
-        detected_summary = row_looks_like_summary(row)
+        detected_summary = detected_mask[idx]
         should_be_summary = heuristic_summary or detected_summary
 
         if should_be_summary:
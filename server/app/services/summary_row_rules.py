@@ -0,0 +1,175 @@
+"""
+Compiled rule engine for summary-row detection.
+
+Summary/total rows are detected in several places (summary_row_refiner, extraction_utils,
+the Mistral detector, the Claude pre/post filters). Each one used to normalize every row
+and then run its patterns one `re.search` at a time. This module gives them a common
+engine:
+
+- A RowRule is one rule class (e.g. "strong summary phrases"). Its patterns are joined
+  into a single alternation and compiled once.
+- A RowTexts holds the normalized text of every row of a table, built once per table.
+  `mask(rule)` scans all rows in one pass over a newline-joined blob and returns a numpy
+  boolean array with one entry per row. Masks are cached, so every check on the same
+  table shares one normalization and one scan per rule.
+
+Callers keep their own normalization (it differs between detectors), then read masks
+instead of searching row by row:
+
+    texts = RowTexts([joined_lower(row) for row in rows])
+    is_total = texts.mask(TOTAL_RULE)
+    for idx in texts.hits(TOTAL_RULE):
+        reason = TOTAL_RULE.first(texts[idx])
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class RowRule:
+    """A named set of patterns matched as one compiled alternation."""
+
+    def __init__(self, name: str, patterns: Iterable[str], literal: bool = False, flags: int = 0):
+        self.name = name
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        self.literal = literal
+        self.flags = flags
+        sources = [re.escape(p) if literal else p for p in self.patterns]
+        # An empty alternation would match every row; (?!) never matches
+        combined = "|".join(f"(?:{source})" for source in sources) or "(?!)"
+        self.regex = re.compile(combined, flags)
+        # Scanning the joined blob needs ^ and $ to match at row boundaries
+        self.blob_regex = re.compile(combined, flags | re.MULTILINE)
+        self._compiled: Optional[List[re.Pattern]] = None
+
+    def __repr__(self) -> str:
+        return f"RowRule({self.name!r}, {len(self.patterns)} patterns)"
+
+    @property
+    def compiled(self) -> List[re.Pattern]:
+        """Each pattern compiled on its own, for reporting which one matched."""
+        if self._compiled is None:
+            self._compiled = [
+                re.compile(re.escape(p) if self.literal else p, self.flags) for p in self.patterns
+            ]
+        return self._compiled
+
+    def search(self, text: str) -> bool:
+        return self.regex.search(text) is not None
+
+    def match(self, text: str) -> bool:
+        return self.regex.match(text) is not None
+
+    def first(self, text: str) -> Optional[str]:
+        """The first pattern, in declaration order, found in text."""
+        for pattern, regex in zip(self.patterns, self.compiled):
+            if regex.search(text):
+                return pattern
+        return None
+
+    def matching(self, text: str) -> List[int]:
+        """Indices of every pattern found in text."""
+        return [i for i, regex in enumerate(self.compiled) if regex.search(text)]
+
+
+@lru_cache(maxsize=256)
+def _cached_rule(name: str, patterns: Tuple[str, ...], literal: bool, flags: int) -> RowRule:
+    return RowRule(name, patterns, literal=literal, flags=flags)
+
+
+def rule_for(name: str, patterns: Iterable[str], literal: bool = False, flags: int = 0) -> RowRule:
+    """
+    RowRule for patterns only known at run time (user keywords, table blueprints).
+    Rules are cached by their patterns, so each distinct set is compiled once.
+    """
+    return _cached_rule(name, tuple(patterns), literal, flags)
+
+
+class RowTexts:
+    """Normalized row texts of one table, with cached per-rule row masks."""
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = list(texts)
+        # Rows are joined with "\n"; rows that contain one themselves are checked on their own
+        flattened = []
+        multiline = []
+        for idx, text in enumerate(self.texts):
+            if "\n" in text:
+                multiline.append(idx)
+                text = text.replace("\n", " ")
+            flattened.append(text)
+        self._multiline = multiline
+        self._blob = "\n".join(flattened)
+        lengths = np.fromiter((len(text) + 1 for text in flattened), dtype=np.int64, count=len(flattened))
+        # Offset of the first character of each row in the blob
+        self._starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(flattened) else np.zeros(0, dtype=np.int64)
+        self._masks: Dict[int, np.ndarray] = {}
+        self._counts: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, idx: int) -> str:
+        return self.texts[idx]
+
+    def _scan(self, rule: RowRule) -> Tuple[np.ndarray, List[int]]:
+        """Row of every match in the blob, and the rows that need checking on their own."""
+        starts: List[int] = []
+        recheck = set(self._multiline)
+        for found in rule.blob_regex.finditer(self._blob):
+            starts.append(found.start())
+            if "\n" in found.group():
+                # The match ran across a row boundary: it does not count, and it may have
+                # consumed text that holds a real match in the rows it touched
+                first = int(np.searchsorted(self._starts, found.start(), side="right")) - 1
+                last = int(np.searchsorted(self._starts, max(found.end() - 1, found.start()), side="right")) - 1
+                recheck.update(range(first, last + 1))
+        rows = np.searchsorted(self._starts, np.asarray(starts, dtype=np.int64), side="right") - 1
+        return rows, sorted(recheck)
+
+    def mask(self, rule: RowRule) -> np.ndarray:
+        """Boolean array: True for rows where any pattern of the rule is found."""
+        key = id(rule)
+        if key not in self._masks:
+            rows, recheck = self._scan(rule)
+            mask = np.zeros(len(self.texts), dtype=bool)
+            mask[rows] = True
+            for idx in recheck:
+                mask[idx] = rule.search(self.texts[idx])
+            self._masks[key] = mask
+        return self._masks[key]
+
+    def counts(self, rule: RowRule) -> np.ndarray:
+        """Number of non-overlapping matches of the rule in each row."""
+        key = id(rule)
+        if key not in self._counts:
+            rows, recheck = self._scan(rule)
+            counts = np.bincount(rows, minlength=len(self.texts)).astype(np.int64)
+            for idx in recheck:
+                counts[idx] = sum(1 for _ in rule.regex.finditer(self.texts[idx]))
+            self._counts[key] = counts
+        return self._counts[key]
+
+    def distinct(self, rule: RowRule) -> np.ndarray:
+        """Number of the rule's patterns found in each row (each pattern counted once)."""
+        total = np.zeros(len(self.texts), dtype=np.int64)
+        for pattern in rule.patterns:
+            total += self.mask(rule_for(f"{rule.name}:{pattern}", (pattern,), rule.literal, rule.flags))
+        return total
+
+    def hits(self, rule: RowRule) -> List[int]:
+        """Indices of rows matching the rule."""
+        return np.flatnonzero(self.mask(rule)).tolist()
+
+
+def join_cells(row: Sequence[Any]) -> str:
+    """Lowercased text of the truthy cells, space separated."""
+    return " ".join(str(cell).lower() for cell in row if cell)
+
+
+def join_stripped_cells(row: Sequence[Any]) -> str:
+    """Lowercased text of the cells that are not blank once stripped, space separated."""
+    return " ".join(text.lower() for text in (str(cell).strip() for cell in row) if text)
@@ -6,7 +6,8 @@ Enhanced with timeout management and keepalive functionality for large file proc
 import asyncio
 import json
 import logging
-from collections import deque
+import time
+from collections import OrderedDict
 from typing import Dict, Set, Any, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
@@ -17,9 +18,30 @@ import os
 # Add parent directory to path to import config
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from config.timeouts import timeout_settings
+from app.services.progress_bus import create_progress_bus
 
 logger = logging.getLogger(__name__)
 
+# Progress frames that a newer frame of the same kind (and stage) supersedes
+COALESCED_MESSAGE_TYPES = {'STEP_PROGRESS', 'progress_update'}
+# Messages that end an upload's progress stream
+FINAL_MESSAGE_TYPES = {'EXTRACTION_COMPLETE', 'ERROR'}
+# Per-socket keepalives, unnecessary when the socket has just received another frame
+KEEPALIVE_MESSAGE_TYPES = {'ping', 'progress_ping'}
+
+
+class _UploadStream:
+    """Outgoing progress of one upload: frames waiting to be sent and when the last one went out."""
+    
+    __slots__ = ('lock', 'pending', 'last_sent', 'flush_task')
+    
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self.last_sent = 0.0
+        self.flush_task: Optional[asyncio.Task] = None
+
+
 class ConnectionManager:
     """
     Manages WebSocket connections for real-time progress updates.
@@ -42,9 +64,17 @@ class ConnectionManager:
         self.keepalive_tasks: Dict[str, asyncio.Task] = {}
         self.progress_tasks: Dict[str, asyncio.Task] = {}
         
-        # Message backlog for replay (per upload_id)
-        self.message_backlog: Dict[str, deque] = {}
+        # Message backlog for replay (per upload_id), shared by all workers through the progress bus
         self.backlog_limit = int(os.getenv("WEBSOCKET_BACKLOG_LIMIT", "50"))
+        self.progress_bus = create_progress_bus(self.backlog_limit)
+        # Latest progress message broadcast from this worker: {upload_id: message}
+        self.last_progress: Dict[str, Dict[str, Any]] = {}
+        
+        # Progress coalescing: at most max_fps frames per second per upload (and so per socket)
+        self.max_fps = float(os.getenv("WEBSOCKET_MAX_FPS", "4"))
+        self._min_frame_interval = 1.0 / self.max_fps if self.max_fps > 0 else 0.0
+        self._streams: Dict[str, _UploadStream] = {}
+        self.frame_counters = {'frames_sent': 0, 'frames_coalesced': 0, 'keepalives_skipped': 0}
     
     async def connect(self, websocket: WebSocket, upload_id: str, session_id: str, user_id: str = None):
         """
@@ -256,9 +286,19 @@ class ConnectionManager:
         record_backlog: bool = True
     ):
         """Send a message to a specific connection with robust state checking."""
+        if message.get('type') in KEEPALIVE_MESSAGE_TYPES and self._received_frame_within(session_id, self.ping_interval):
+            self.frame_counters['keepalives_skipped'] += 1
+            return
+        
+        encoded = json.dumps(message)
+        if await self._send_text(encoded, upload_id, session_id) and record_backlog and self._should_record_backlog(message):
+            await self._record_backlog(upload_id, encoded)
+    
+    async def _send_text(self, encoded: str, upload_id: str, session_id: str) -> bool:
+        """Send an encoded message to one connection. Returns whether it was sent."""
         if upload_id not in self.active_connections or session_id not in self.active_connections[upload_id]:
             logger.debug(f"Connection not found: upload_id={upload_id}, session_id={session_id}")
-            return  # Connection already cleaned up
+            return False  # Connection already cleaned up
         
         websocket = self.active_connections[upload_id][session_id]
         
@@ -268,22 +308,21 @@ class ConnectionManager:
             if websocket.application_state.name != 'CONNECTED':
                 logger.warning(f"WebSocket application not connected: upload_id={upload_id}, session_id={session_id}")
                 self.disconnect(upload_id, session_id)
-                return
+                return False
             
             # Check client state (Starlette level)
             if websocket.client_state.name != 'CONNECTED':
                 logger.warning(f"WebSocket client not connected: upload_id={upload_id}, session_id={session_id}")
                 self.disconnect(upload_id, session_id)
-                return
+                return False
             
             # Attempt to send with timeout to prevent hanging
             await asyncio.wait_for(
-                websocket.send_text(json.dumps(message)),
+                websocket.send_text(encoded),
                 timeout=5.0  # 5 second timeout for send operation
             )
-            
-            if record_backlog and self._should_record_backlog(message):
-                self._append_to_backlog(upload_id, message)
+            self._count_frame(session_id)
+            return True
             
         except asyncio.TimeoutError:
             logger.error(f"Timeout sending message to upload_id={upload_id}, session_id={session_id}")
@@ -299,13 +338,96 @@ class ConnectionManager:
         except Exception as e:
             logger.error(f"Error sending personal message: {e}", exc_info=True)
             self.disconnect(upload_id, session_id)
+        return False
     
     async def broadcast_to_upload(self, message: Dict[str, Any], upload_id: str):
-        """Broadcast a message to all connections for a specific upload with safe iteration."""
+        """
+        Broadcast a message to all connections for an upload: sockets on this worker directly,
+        sockets on other workers through the progress bus.
+        
+        Progress frames are coalesced: at most max_fps frames per second go out for an upload,
+        and a progress frame still waiting is replaced by a newer one for the same step. Other
+        messages are sent right away, after any waiting progress so the order is kept.
+        """
+        if isinstance(message.get('percentage'), (int, float)):
+            self.last_progress[upload_id] = message
+        
+        stream = self._streams.get(upload_id)
+        if stream is None:
+            self._prune_streams()
+            stream = self._streams[upload_id] = _UploadStream()
+        
+        key = self._coalesce_key(message)
+        if key is not None:
+            if key in stream.pending:
+                self.frame_counters['frames_coalesced'] += 1
+            stream.pending[key] = message
+            stream.pending.move_to_end(key)
+            
+            delay = stream.last_sent + self._min_frame_interval - time.monotonic()
+            if delay > 0:
+                if stream.flush_task is None or stream.flush_task.done():
+                    stream.flush_task = asyncio.create_task(self._flush_later(upload_id, stream, delay))
+                return
+            async with stream.lock:
+                await self._flush_pending(upload_id, stream)
+            return
+        
+        async with stream.lock:
+            if message.get('type') in FINAL_MESSAGE_TYPES:
+                # The stream ends here: progress still waiting is superseded by the final
+                # message, and the backlog only keeps the final frames
+                if stream.flush_task is not None:
+                    stream.flush_task.cancel()
+                self.frame_counters['frames_coalesced'] += len(stream.pending)
+                stream.pending.clear()
+                self._streams.pop(upload_id, None)
+                await self._clear_backlog(upload_id)
+            await self._flush_pending(upload_id, stream)
+            await self._emit(message, upload_id, stream)
+    
+    @staticmethod
+    def _coalesce_key(message: Dict[str, Any]) -> Optional[tuple]:
+        """Key of the progress frames a message supersedes, or None if it must always be sent."""
+        message_type = message.get('type')
+        if message_type not in COALESCED_MESSAGE_TYPES:
+            return None
+        if message_type == 'progress_update':
+            progress = message.get('progress') or {}
+            # Stage start and completion frames are always delivered
+            if progress.get('progress_percentage') in (0, 100):
+                return None
+            return (message_type, progress.get('stage'))
+        return (message_type, message.get('current_stage'))
+    
+    async def _flush_later(self, upload_id: str, stream: _UploadStream, delay: float):
+        await asyncio.sleep(delay)
+        async with stream.lock:
+            await self._flush_pending(upload_id, stream)
+    
+    async def _flush_pending(self, upload_id: str, stream: _UploadStream):
+        while stream.pending:
+            _, message = stream.pending.popitem(last=False)
+            await self._emit(message, upload_id, stream)
+    
+    async def _emit(self, message: Dict[str, Any], upload_id: str, stream: _UploadStream):
+        """Encode a message once and send it to local sockets, the progress bus and the backlog."""
         logger.info(f"Broadcasting message to upload_id {upload_id}: {message.get('type', 'unknown')}")
         
+        encoded = json.dumps(message)
+        stream.last_sent = time.monotonic()
+        
+        await self._broadcast_local(encoded, upload_id)
+        
+        try:
+            await self.progress_bus.publish(upload_id, encoded, record=self._should_record_backlog(message))
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to publish progress for upload_id {upload_id}: {e}")
+    
+    async def _broadcast_local(self, encoded: str, upload_id: str):
+        """Send an encoded message to this worker's connections for an upload with safe iteration."""
         if upload_id not in self.active_connections:
-            logger.warning(f"No active connections found for upload_id {upload_id}")
+            logger.debug(f"No local connections for upload_id {upload_id}")
             return
         
         # Create a copy of the dict items to prevent modification during iteration
@@ -329,9 +451,10 @@ class ConnectionManager:
                 
                 # Send with timeout
                 await asyncio.wait_for(
-                    websocket.send_text(json.dumps(message)),
+                    websocket.send_text(encoded),
                     timeout=5.0
                 )
+                self._count_frame(session_id)
                 logger.debug(f"Message sent to session {session_id} for upload_id {upload_id}")
                 
             except asyncio.TimeoutError:
@@ -350,9 +473,14 @@ class ConnectionManager:
         # Clean up disconnected sessions
         for session_id in disconnected_sessions:
             self.disconnect(upload_id, session_id)
-        
-        if self._should_record_backlog(message):
-            self._append_to_backlog(upload_id, message)
+    
+    async def run_progress_relay(self, shutdown_event: asyncio.Event):
+        """Relay messages broadcast by other workers to this worker's connections until shutdown."""
+        await self.progress_bus.run(
+            shutdown_event,
+            deliver=lambda upload_id, encoded: self._broadcast_local(encoded, upload_id),
+            wants=lambda upload_id: upload_id in self.active_connections
+        )
     
     async def send_progress_update(self, upload_id: str, progress_data: Dict[str, Any]):
         """Send a progress update to all connections for an upload."""
@@ -522,11 +650,21 @@ class ConnectionManager:
             'results': results,
             'timestamp': datetime.utcnow().isoformat()
         }
+        # Completion ends the relevance of earlier progress: the backlog keeps only this message
         await self.broadcast_to_upload(message, upload_id)
         logger.info(f"Extraction complete for upload_id {upload_id}")
-        # Completion marks end of backlog relevance
-        self.message_backlog.pop(upload_id, None)
-    
+
+    async def send_extraction_error(self, upload_id: str, error_message: str):
+        """Send ERROR event when an extraction fails (format expected by the upload progress UI)."""
+        message = {
+            'type': 'ERROR',
+            'upload_id': upload_id,
+            'error': error_message,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        await self.broadcast_to_upload(message, upload_id)
+        logger.info(f"Extraction error sent for upload_id {upload_id}: {error_message}")
+
     # Helper method for step-based workflow
     # ✅ CRITICAL: Step order must match frontend UPLOAD_STEPS in SummaryProgressLoader.tsx
     UPLOAD_STEPS = [
@@ -643,6 +781,41 @@ class ConnectionManager:
             return len(self.active_connections.get(upload_id, {}))
         return sum(len(connections) for connections in self.active_connections.values())
     
+    def seconds_since_last_frame(self, upload_id: str) -> float:
+        """Seconds since a frame was last broadcast for an upload from this worker."""
+        stream = self._streams.get(upload_id)
+        if stream is None or not stream.last_sent:
+            return float('inf')
+        return time.monotonic() - stream.last_sent
+    
+    def frame_stats(self) -> Dict[str, Any]:
+        """Frames written to sockets by this worker and frames saved by coalescing."""
+        return {
+            **self.frame_counters,
+            'frames_dropped': self.frame_counters['frames_coalesced'] + self.frame_counters['keepalives_skipped'],
+            'max_fps': self.max_fps,
+            'active_streams': len(self._streams)
+        }
+    
+    def _count_frame(self, session_id: str):
+        self.frame_counters['frames_sent'] += 1
+        metadata = self.connection_metadata.get(session_id)
+        if metadata is not None:
+            metadata['last_frame_at'] = time.monotonic()
+    
+    def _received_frame_within(self, session_id: str, seconds: float) -> bool:
+        metadata = self.connection_metadata.get(session_id) or {}
+        return time.monotonic() - metadata.get('last_frame_at', float('-inf')) < seconds
+    
+    def _prune_streams(self, idle_seconds: float = 600.0, max_streams: int = 1000):
+        """Forget idle streams of uploads that never sent a final message."""
+        if len(self._streams) < max_streams:
+            return
+        cutoff = time.monotonic() - idle_seconds
+        for upload_id, stream in list(self._streams.items()):
+            if not stream.pending and not stream.lock.locked() and stream.last_sent < cutoff:
+                del self._streams[upload_id]
+    
     def get_connection_info(self) -> Dict[str, Any]:
         """Get information about all active connections."""
         return {
@@ -657,25 +830,31 @@ class ConnectionManager:
             }
         }
     
-    def _append_to_backlog(self, upload_id: str, message: Dict[str, Any]):
-        """Store recent messages so new connections can replay progress."""
-        if upload_id not in self.message_backlog:
-            self.message_backlog[upload_id] = deque(maxlen=self.backlog_limit)
-        # Store a shallow copy to avoid mutation
-        self.message_backlog[upload_id].append(json.loads(json.dumps(message)))
+    async def _record_backlog(self, upload_id: str, encoded: str):
+        """Store a message so new connections can replay progress."""
+        try:
+            await self.progress_bus.record(upload_id, encoded)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to record backlog for upload_id {upload_id}: {e}")
+    
+    async def _clear_backlog(self, upload_id: str):
+        self.last_progress.pop(upload_id, None)
+        try:
+            await self.progress_bus.clear_backlog(upload_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to clear backlog for upload_id {upload_id}: {e}")
     
     async def _replay_backlog(self, upload_id: str, session_id: str):
-        """Replay recent messages for a newly connected session."""
-        if upload_id not in self.message_backlog:
+        """Replay recent messages (from any worker) for a newly connected session."""
+        try:
+            backlog = await self.progress_bus.backlog(upload_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load backlog for upload_id {upload_id}: {e}")
             return
         
-        for cached_message in list(self.message_backlog[upload_id]):
-            await self.send_personal_message(
-                cached_message,
-                upload_id,
-                session_id,
-                record_backlog=False
-            )
+        for encoded in backlog:
+            if not await self._send_text(encoded, upload_id, session_id):
+                break
     
     @staticmethod
     def _should_record_backlog(message: Dict[str, Any]) -> bool:
@@ -7,6 +7,7 @@ from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import User, AllowedDomain, UserSession
+from app.services.auth_cache import auth_cache
 from typing import TypedDict
 
 class TokenData(TypedDict):
@@ -130,6 +131,7 @@ async def invalidate_session(db: AsyncSession, session_token: str) -> bool:
         ).values(is_active=0)
         await db.execute(update_stmt)
         await db.commit()
+        auth_cache.invalidate_session(session_token)
         return True
     return False
 
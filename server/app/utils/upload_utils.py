@@ -0,0 +1,63 @@
+"""
+Utility functions for ingesting uploaded files without holding them in memory.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Tuple
+
+from fastapi import UploadFile
+
+# Bytes read from the request spool per iteration
+UPLOAD_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _spool_to_path(source: BinaryIO, dest_path: str, chunk_size: int) -> Tuple[int, str]:
+    """Copy source to dest_path chunk by chunk, hashing as it goes. Returns (size, sha256 hex)."""
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(dest_path, "wb") as out:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return size, sha256.hexdigest()
+
+
+async def spool_upload_to_disk(
+    file: UploadFile,
+    directory: str,
+    suffix: str = "",
+    chunk_size: int = UPLOAD_READ_CHUNK_SIZE
+) -> Tuple[str, int, str]:
+    """
+    Stream an uploaded file into a new temporary file in directory.
+
+    The SHA-256 is computed incrementally during the copy, so at most one chunk of the
+    upload is in memory at a time. The copy runs in a worker thread to keep the event loop
+    free. The caller owns the returned file: move it into place or delete it.
+
+    Args:
+        file: The uploaded file
+        directory: Where to create the temporary file
+        suffix: Suffix for the temporary file name (e.g. ".pdf")
+        chunk_size: Bytes per read
+
+    Returns:
+        (temporary file path, size in bytes, sha256 hex digest)
+    """
+    fd, spool_path = tempfile.mkstemp(prefix=".upload-", suffix=suffix, dir=directory)
+    os.close(fd)
+
+    try:
+        await file.seek(0)
+        size, file_hash = await asyncio.to_thread(_spool_to_path, file.file, spool_path, chunk_size)
+    except BaseException:
+        os.remove(spool_path)
+        raise
+
+    return spool_path, size, file_hash
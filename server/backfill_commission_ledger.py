@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+One-shot backfill for the commission contribution ledger.
+
+Builds commission_contributions rows from the final_data of every approved upload that
+does not have any yet, so that deletes and re-approvals of older statements also take the
+incremental delta path. Safe to re-run: uploads that already have ledger rows are skipped.
+
+Usage:
+    python backfill_commission_ledger.py [--batch-size 50]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.db.models import Base
+from app.db.database import engine, AsyncSessionLocal
+from app.db.crud.commission_ledger import backfill_commission_ledger
+
+
+async def run_backfill(batch_size: int):
+    """Create the ledger table if needed and backfill it in batches."""
+    try:
+        print("Ensuring commission_contributions table exists...")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        print(f"Backfilling contribution ledger (batch size: {batch_size})...")
+        async with AsyncSessionLocal() as db:
+            stats = await backfill_commission_ledger(db, batch_size=batch_size)
+
+        print(f"✅ Uploads scanned: {stats['uploads_scanned']}")
+        print(f"✅ Uploads backfilled: {stats['uploads_backfilled']}")
+        print(f"⚠️  Uploads skipped (no final_data/field mapping): {stats['uploads_skipped']}")
+        print(f"✅ Contributions written: {stats['contributions_written']}")
+
+    except Exception as e:
+        print(f"❌ Error backfilling contribution ledger: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the commission contribution ledger from final_data")
+    parser.add_argument("--batch-size", type=int, default=50, help="Uploads loaded per batch (default: 50)")
+    args = parser.parse_args()
+
+    print("🚀 Starting commission ledger backfill...")
+    asyncio.run(run_backfill(args.batch_size))
+    print("✨ Commission ledger backfill complete!")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for an authenticated endpoint (default /dashboard/stats).
+
+Sends sequential requests with the access_token/session_token cookies of a logged-in
+user and reports p50/p95/p99 latency. Compare the auth cache on and off by starting the
+server twice:
+
+    AUTH_CACHE_TTL_SECONDS=0 uvicorn app.main:app    # every request hits user_sessions/users
+    uvicorn app.main:app                               # cached user and session lookups
+
+Measurement procedure (the numbers only mean something against a real database):
+1. Point RENDER_DB_KEY at a PostgreSQL database with production-like data, ideally the
+   same network distance from the server as in production, since the cache saves round trips.
+2. Log in through the app and copy the access_token and session_token cookies.
+3. Start the server with AUTH_CACHE_TTL_SECONDS=0, run this script, and note p50/p95.
+4. Restart it without AUTH_CACHE_TTL_SECONDS (default TTL), and run it again with the same
+   tokens, --requests and --warmup. The warmup also fills the dashboard aggregates, so
+   both runs read the same rows.
+5. Report both p50 lines (before/after) and the database used with the change.
+
+Usage:
+    python benchmarks/bench_auth_dashboard_stats.py --access-token ... --session-token ... \
+        [--url http://localhost:8000/dashboard/stats] [--requests 500] [--warmup 20]
+"""
+
+import argparse
+import statistics
+import time
+
+import requests
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_benchmark(url: str, access_token: str, session_token: str, num_requests: int, warmup: int):
+    session = requests.Session()
+    session.cookies.set("access_token", access_token)
+    if session_token:
+        session.cookies.set("session_token", session_token)
+
+    for _ in range(warmup):
+        session.get(url).raise_for_status()
+
+    latencies_ms = []
+    for _ in range(num_requests):
+        started = time.perf_counter()
+        response = session.get(url)
+        latencies_ms.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+
+    print(f"{url}: {num_requests} requests")
+    print(f"  p50  {percentile(latencies_ms, 50):8.2f} ms")
+    print(f"  p95  {percentile(latencies_ms, 95):8.2f} ms")
+    print(f"  p99  {percentile(latencies_ms, 99):8.2f} ms")
+    print(f"  mean {statistics.mean(latencies_ms):8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark authenticated endpoint latency")
+    parser.add_argument("--url", default="http://localhost:8000/dashboard/stats")
+    parser.add_argument("--access-token", required=True)
+    parser.add_argument("--session-token", default="")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+    run_benchmark(args.url, args.access_token, args.session_token, args.requests, args.warmup)
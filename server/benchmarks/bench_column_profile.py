@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the shared column profile.
+
+Builds a synthetic commission statement and times each consumer of the profile:
+- FormatLearningService analyses (column types, patterns, structure, quality, samples)
+- continuation-table column patterns (extraction pipeline and multi-page handler)
+- multi-page column data patterns
+- TableValidator data type diversity and structured-pattern checks
+
+"cold" hands every consumer a fresh copy of the rows, so each one profiles the table
+itself. "shared" passes every consumer one profile built up front, the way
+learn_from_processed_file builds its profile once and hands it to each analysis.
+
+Usage:
+    python benchmarks/bench_column_profile.py [--rows 50000] [--runs 3]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.column_profile import TableProfile
+from app.services.format_learning_service import FormatLearningService
+from app.new_extraction_services.core.multipage_handler import MultiPageTableHandler
+from app.new_extraction_services.core.table_validator import TableValidator
+from app.new_extraction_services.pipeline.extraction_pipeline import ExtractionPipeline
+
+HEADERS = ["Group No.", "Group Name", "Billing Period", "Premium", "Commission Rate", "Paid Amount", "Agent"]
+
+
+def make_rows(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        premium = rng.uniform(100, 20000)
+        rows.append([
+            f"L{rng.randint(0, 999999):06d}",
+            f"Customer {rng.randint(1, 5000)} LLC",
+            f"{rng.randint(1, 12):02d}/01/2025",
+            f"${premium:,.2f}",
+            f"{rng.choice([5, 8, 10])}%",
+            f"{premium * 0.1:.2f}",
+            rng.choice(["Jane Doe", "JOHN ROE", ""])
+        ])
+    return rows
+
+
+def best_of(runs: int, fn) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{len(rows)} rows x {len(HEADERS)} columns, best of {args.runs} runs\n")
+
+    service = FormatLearningService()
+    # The consumers only need their profiling methods, not their model setup
+    pipeline = ExtractionPipeline.__new__(ExtractionPipeline)
+    handler = MultiPageTableHandler.__new__(MultiPageTableHandler)
+    validator = TableValidator(logging.getLogger(__name__))
+
+    profile_time = best_of(args.runs, lambda: TableProfile(rows, HEADERS).columns[0].pattern())
+    print(f"{'profile + one column pattern':<44} {profile_time * 1000:8.1f} ms\n")
+
+    consumers = [
+        ("FormatLearningService.analyze_column_types", lambda t, p: service.analyze_column_types(t, HEADERS, p)),
+        ("FormatLearningService.extract_column_patterns", lambda t, p: service.extract_column_patterns(t, HEADERS, p)),
+        ("FormatLearningService.analyze_table_structure", lambda t, p: service.analyze_table_structure(t, HEADERS, p)),
+        ("FormatLearningService.calculate_data_quality", lambda t, p: service.calculate_data_quality_metrics(t, HEADERS, p)),
+        ("FormatLearningService.extract_sample_values", lambda t, p: service.extract_sample_values(t, HEADERS, profile=p)),
+        ("ExtractionPipeline._learn_column_patterns", lambda t, p: pipeline._learn_column_patterns(t, p)),
+        ("MultiPageTableHandler._learn_column_patterns", lambda t, p: handler._learn_column_patterns(t, p)),
+        ("MultiPageTableHandler._analyze_column_data", lambda t, p: handler._analyze_column_data_patterns(t, p)),
+        ("TableValidator._has_structured_patterns", lambda t, p: validator._has_structured_patterns(t, p)),
+        ("TableValidator._analyze_data_type_diversity", lambda t, p: validator._analyze_data_type_diversity(t)),
+    ]
+
+    print(f"{'consumer':<48} {'cold ms':>9} {'shared ms':>10}")
+    cold_total = 0.0
+    shared = TableProfile(rows, HEADERS)
+    for name, fn in consumers:
+        cold_ms = best_of(args.runs, lambda: fn(list(rows), None)) * 1000
+        shared_ms = best_of(args.runs, lambda: fn(rows, shared)) * 1000
+        cold_total += cold_ms
+        print(f"{name:<48} {cold_ms:>9.1f} {shared_ms:>10.1f}")
+    print(f"\n{'all consumers, each profiling on its own':<48} {cold_total:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
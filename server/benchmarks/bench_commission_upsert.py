@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the earned_commissions bulk write paths.
+
+Compares the previous path (OR-chain lookup, one UPDATE per changed record, then an
+executemany INSERT) with the unnest-join lookup / single INSERT ... ON CONFLICT DO UPDATE
+path at 100, 1k and 10k records. Each size runs two passes: the first inserts every record,
+the second adds a new upload to every record (all updates).
+
+Runs against the configured database inside one transaction that is rolled back at the
+end, so nothing is persisted.
+
+Usage:
+    python benchmarks/bench_commission_upsert.py [--sizes 100 1000 10000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import and_, or_, update, insert
+from sqlalchemy.future import select
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import Company, User, Environment, EarnedCommission
+from app.db.crud.earned_commission import (
+    fetch_existing_commission_records_bulk,
+    prepare_bulk_operations,
+    upsert_commission_records_bulk
+)
+
+
+async def legacy_fetch_or_chain(db, commission_records):
+    """Previous lookup: one and_() branch per unique key inside a single or_()."""
+    unique_keys = list({
+        (r['carrier_id'], r['client_name'], r['statement_month'], r['statement_year'], r.get('user_id'), r.get('environment_id'))
+        for r in commission_records
+    })
+    conditions = [
+        and_(
+            EarnedCommission.carrier_id == carrier_id,
+            EarnedCommission.client_name == client_name,
+            EarnedCommission.statement_month == statement_month,
+            EarnedCommission.statement_year == statement_year,
+            EarnedCommission.user_id == user_id,
+            EarnedCommission.environment_id == environment_id
+        )
+        for carrier_id, client_name, statement_month, statement_year, user_id, environment_id in unique_keys
+    ]
+    result = await db.execute(select(EarnedCommission).where(or_(*conditions)))
+    return {
+        (r.carrier_id, r.client_name, r.statement_month, r.statement_year, r.user_id, r.environment_id): r
+        for r in result.scalars().all()
+    }
+
+
+async def run_legacy_path(db, commission_records):
+    existing_records = await legacy_fetch_or_chain(db, commission_records)
+    updates, inserts = prepare_bulk_operations(commission_records, existing_records)
+    for update_data in updates:
+        record_id = update_data.pop('id')
+        await db.execute(update(EarnedCommission).where(EarnedCommission.id == record_id).values(**update_data))
+    if inserts:
+        await db.execute(insert(EarnedCommission), inserts)
+
+
+async def run_unnest_lookup(db, commission_records):
+    await fetch_existing_commission_records_bulk(db, commission_records)
+
+
+async def run_upsert_path(db, commission_records):
+    await upsert_commission_records_bulk(db, commission_records)
+
+
+def make_records(size, carrier_id, user_id, environment_id, statement_year):
+    statement_date = datetime(statement_year, 1, 15)
+    upload_id = str(uuid.uuid4())
+    return [
+        {
+            'carrier_id': carrier_id,
+            'client_name': f"Bench Client {i:06d}",
+            'commission_earned': 125.50,
+            'invoice_total': 1000.00,
+            'statement_month': 1,
+            'statement_year': statement_year,
+            'statement_date': statement_date,
+            'upload_id': upload_id,
+            'user_id': user_id,
+            'environment_id': environment_id
+        }
+        for i in range(size)
+    ]
+
+
+async def timed(func, db, records):
+    """Run one pass inside a savepoint; returns seconds, or None if the pass failed."""
+    start = time.perf_counter()
+    try:
+        async with db.begin_nested():
+            await func(db, records)
+            await db.flush()
+    except Exception as e:
+        # e.g. the OR chain exceeds the 32767 bind parameter limit at 10k keys
+        print(f"   ⚠️ {func.__name__} failed with {len(records)} records: {type(e).__name__}: {str(e)[:120]}")
+        return None
+    return time.perf_counter() - start
+
+
+def fmt(seconds):
+    return f"{seconds * 1000:>10.1f}ms" if seconds is not None else f"{'failed':>12}"
+
+
+async def run_benchmark(sizes):
+    async with AsyncSessionLocal() as db:
+        try:
+            suffix = uuid.uuid4().hex[:8]
+            carrier = Company(name=f"benchmark-carrier-{suffix}")
+            db.add(carrier)
+            await db.flush()
+            user = User(email=f"benchmark-{suffix}@example.com", role='user', company_id=carrier.id)
+            db.add(user)
+            await db.flush()
+            environment = Environment(company_id=carrier.id, name=f"benchmark-{suffix}", created_by=user.id)
+            db.add(environment)
+            await db.flush()
+
+            print(f"{'rows':>7} | {'path':<22} | {'insert pass':>12} | {'update pass':>12}")
+            print("-" * 63)
+
+            year = 3000
+            for size in sizes:
+                for label, func in (("legacy OR + UPDATE/row", run_legacy_path), ("INSERT ... ON CONFLICT", run_upsert_path)):
+                    year += 1
+                    first = make_records(size, carrier.id, user.id, environment.id, year)
+                    second = make_records(size, carrier.id, user.id, environment.id, year)
+                    insert_time = await timed(func, db, first)
+                    update_time = await timed(func, db, second)
+                    print(f"{size:>7} | {label:<22} | {fmt(insert_time)} | {fmt(update_time)}")
+
+                # Lookup-only comparison on the rows written by the last pass
+                lookup_records = make_records(size, carrier.id, user.id, environment.id, year)
+                or_time = await timed(legacy_fetch_or_chain, db, lookup_records)
+                unnest_time = await timed(run_unnest_lookup, db, lookup_records)
+                print(f"{size:>7} | {'lookup: OR chain':<22} | {fmt(or_time)} |")
+                print(f"{size:>7} | {'lookup: unnest join':<22} | {fmt(unnest_time)} |")
+        finally:
+            await db.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark earned commission bulk write paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.sizes))
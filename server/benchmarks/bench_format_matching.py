@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the indexed format matching behind find_best_matching_format.
+
+Builds a synthetic carrier with many saved formats (header lists drawn from a shared
+vocabulary, so formats overlap the way one carrier's statements do) and times, per query:
+- the linear scan: calculate_header_similarity and calculate_structure_similarity against
+  every saved format, as find_best_matching_format used to do
+- FormatIndex.search over the same formats, and how many formats it fully scored
+
+Both must pick the same format with the same score. Building the index is timed on its
+own; it happens once per company until its formats change.
+
+Usage:
+    python benchmarks/bench_format_matching.py [--formats 500] [--queries 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.crud.carrier_format_learning import (
+    FormatIndex,
+    calculate_header_similarity,
+    calculate_structure_similarity,
+)
+
+VOCABULARY = [
+    "Group No.", "Group Name", "Client Name", "Policy Number", "Plan", "Premium",
+    "Commission Earned", "Paid Amount", "Billing Period", "Invoice Date", "Census Ct.",
+    "Subscribers", "Rate", "Method", "Adj.", "Total", "Agent", "Agent Name", "Writing Agent",
+    "Stoploss Premium", "Effective Date", "Company", "Account No", "Premium Paid", "Comm Rate",
+    "Carrier", "State", "Product", "Line of Business", "Renewal Date", "Coverage Type",
+    "Member Count", "Split %", "Override", "Chargeback", "Region", "Broker", "Payee",
+]
+
+
+def make_format(rng: random.Random):
+    headers = rng.sample(VOCABULARY, rng.randint(4, 14))
+    structure = {
+        "column_count": len(headers),
+        "typical_row_count": rng.randint(5, 400),
+        "has_header_row": True,
+    }
+    return headers, structure
+
+
+def linear_scan(formats, headers, table_structure):
+    best_idx, best_score = None, 0
+    for idx, (_, saved_headers, saved_structure) in enumerate(formats):
+        header_similarity = calculate_header_similarity(headers, saved_headers)
+        structure_similarity = calculate_structure_similarity(table_structure, saved_structure)
+        total_score = (header_similarity * 0.8) + (structure_similarity * 0.2)
+        if total_score > best_score and total_score > 0.5:
+            best_idx, best_score = idx, total_score
+    return best_idx, best_score
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    formats = [(idx, *make_format(rng)) for idx in range(args.formats)]
+    queries = []
+    for _ in range(args.queries):
+        # Most uploads are a known format with a column renamed, dropped or added
+        headers, structure = list(rng.choice(formats)[1]), dict(rng.choice(formats)[2])
+        if rng.random() < 0.7:
+            headers[rng.randrange(len(headers))] = rng.choice(VOCABULARY)
+        if rng.random() < 0.3:
+            headers.append(rng.choice(VOCABULARY))
+        queries.append((headers, structure))
+
+    start = time.perf_counter()
+    index = FormatIndex(formats)
+    build = time.perf_counter() - start
+    print(f"{len(formats)} saved formats, {len(queries)} queries; index built in {build * 1000:.1f} ms\n")
+
+    linear_total = indexed_total = 0.0
+    scored = 0
+    for headers, structure in queries:
+        start = time.perf_counter()
+        expected = linear_scan(formats, headers, structure)
+        linear_total += time.perf_counter() - start
+
+        start = time.perf_counter()
+        best_idx, best_score, count = index.search(headers, structure)
+        indexed_total += time.perf_counter() - start
+        scored += count
+
+        assert (best_idx, best_score) == expected, (headers, expected, best_idx, best_score)
+
+    print(f"{'linear scan':<14} {linear_total / len(queries) * 1000:8.2f} ms/query, {len(formats)} formats scored")
+    print(f"{'FormatIndex':<14} {indexed_total / len(queries) * 1000:8.2f} ms/query, "
+          f"{scored / len(queries):.1f} formats scored on average")
+
+
+if __name__ == "__main__":
+    main()
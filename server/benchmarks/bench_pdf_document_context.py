@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the shared per-upload PDFDocument.
+
+Builds a synthetic PDF with PyMuPDF, then replays the reads one smart extraction makes:
+- carrier guess and text snippet from the first page
+- carrier scan of the first 3 pages
+- page count for the GPT token plan
+- Claude validation (page info, page limit) and first-3-pages metadata copy
+- date extraction text and words from the first 2 pages
+- DocAI page count and chunk reader
+
+"before" opens the file for every read, as the consumers did on their own.
+"after" serves all of them from one PDFDocument. The benchmark reports parser opens and
+wall time for each.
+
+Usage:
+    python benchmarks/bench_pdf_document_context.py [--pages 100] [--runs 3]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fitz
+import pdfplumber
+from pypdf import PdfReader
+
+from app.services.pdf_document import PDFDocument
+
+
+def make_pdf(path: str, pages: int) -> None:
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 60), "Example Carrier Insurance Co", fontsize=14)
+        page.insert_text((72, 80), f"Commission Statement  Page {page_num + 1}  Statement Date 01/31/2025", fontsize=9)
+        for row in range(40):
+            y = 110 + row * 15
+            page.insert_text((72, y), f"Group {page_num * 40 + row:05d}   Premium $ {row * 321.5:,.2f}   Commission $ {row * 32.15:,.2f}", fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def before(path: str) -> int:
+    """Every consumer opens the file itself. Returns the number of parser opens."""
+    opens = 0
+    for _ in range(2):  # guess_carrier_from_pdf, extract_pdf_text_snippet
+        PdfReader(path).pages[0].extract_text()
+        opens += 1
+    reader = PdfReader(path)  # _scan_pdf_for_carrier
+    for page in reader.pages[:3]:
+        page.extract_text()
+    opens += 1
+    len(PdfReader(path).pages)  # vision extractor page count
+    opens += 1
+    for _ in range(2):  # get_pdf_info, validate_pdf_pages
+        doc = fitz.open(path)
+        len(doc)
+        doc.close()
+        opens += 1
+    doc = fitz.open(path)  # extract_metadata_only first pages
+    first_pages = fitz.open()
+    first_pages.insert_pdf(doc, from_page=0, to_page=2)
+    first_pages.write()
+    first_pages.close()
+    doc.close()
+    opens += 1
+    with pdfplumber.open(path) as pdf:  # date extraction
+        for page in pdf.pages[:2]:
+            page.extract_text()
+            page.extract_words()
+    opens += 1
+    with open(path, 'rb') as f:  # DocAI page count and chunking
+        content = f.read()
+    len(PdfReader(io.BytesIO(content)).pages)
+    PdfReader(io.BytesIO(content))
+    opens += 2
+    return opens
+
+
+def after(path: str) -> int:
+    """The same reads served by one PDFDocument."""
+    with PDFDocument(path) as document:
+        for _ in range(2):
+            document.page_text(0)
+        for page_num in range(3):
+            document.page_text(page_num)
+        document.page_count
+        for _ in range(2):
+            document.page_count
+        document.page_range_pdf(0, 3)
+        for page_num in range(2):
+            document.layout_text(page_num)
+            document.page_words(page_num)
+        # DocAI cuts its chunks from the document, so it needs no bytes of its own
+        document.page_count
+        return sum(document.opens.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'statement.pdf')
+        make_pdf(path, args.pages)
+        print(f"{args.pages}-page PDF, {os.path.getsize(path) / 1024:.0f} KB, best of {args.runs} runs")
+
+        for name, fn in (('before', before), ('after', after)):
+            best, opens = float('inf'), 0
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                opens = fn(path)
+                best = min(best, time.perf_counter() - start)
+            print(f"{name:>7}: {opens:2d} parser opens, {best * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for PDF page rasterization.
+
+Builds a synthetic PDF with PyMuPDF and renders every page two ways:
+- "list": all pages kept in memory at once, like PDFProcessor.extract_images.
+- "stream": PDFPageImages iterated one page at a time into a reused buffer.
+
+Each mode runs in its own subprocess and reports its peak RSS. The stream figure should
+stay flat as --pages grows.
+
+Usage:
+    python benchmarks/bench_pdf_page_images.py [--pages 10 50 150] [--dpi 200]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_pdf(path: str, pages: int) -> None:
+    import fitz
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=612, height=792)
+        for row in range(40):
+            y = 72 + row * 16
+            page.draw_line((72, y), (540, y))
+            page.insert_text((76, y + 12), f"Page {page_num + 1}  Row {row + 1}  Group {row * 37 % 911}  $ {row * 123.45:,.2f}", fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def run_mode(mode: str, path: str, dpi: int) -> None:
+    from app.new_extraction_services.core.pdf_processor import PDFPageImages
+
+    start = time.perf_counter()
+    checksum = 0
+    if mode == 'list':
+        with PDFPageImages(path, dpi=dpi) as pages:
+            images = [image for _, image in pages]
+        checksum = sum(int(image[::97, ::97].sum()) for image in images)
+    else:
+        with PDFPageImages(path, dpi=dpi, reuse_buffer=True) as pages:
+            for _, image in pages:
+                checksum += int(image[::97, ::97].sum())
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.2f} {peak_mb:.0f} {checksum}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 50, 150])
+    parser.add_argument('--dpi', type=int, default=200)
+    parser.add_argument('--mode', choices=['list', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--pdf', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.pdf, args.dpi)
+        return
+
+    print(f"{'pages':>6} {'mode':>7} {'seconds':>8} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"bench_{pages}.pdf")
+            make_pdf(path, pages)
+            for mode in ('list', 'stream'):
+                out = subprocess.run(
+                    [sys.executable, __file__, '--mode', mode, '--pdf', path, '--dpi', str(args.dpi)],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                print(f"{pages:>6} {mode:>7} {float(out[0]):>8.2f} {float(out[1]):>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of rate limiting overhead per request with many distinct clients.
+
+Compares the old per-IP timestamp lists (rebuilt on every request, never evicted) with
+HttpRateLimiter on the local backend, for requests to a limited route (OTP request) and to
+an unlimited one. Reports microseconds per request and how many keys each keeps in memory.
+The postgres backend costs one round trip per limited request on top of this.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [--ips 10000] [--requests 200000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.rate_limiter import DEFAULT_POLICIES, HttpRateLimiter, LocalRateLimitBackend
+
+LIMITED_PATH = "/api/auth/otp/request"
+UNLIMITED_PATH = "/dashboard/stats"
+
+
+def legacy_check(storage, path: str, client_ip: str) -> bool:
+    """The removed rate_limit_middleware logic, matched against the real /api OTP route."""
+    current_time = time.time()
+    storage[client_ip] = [t for t in storage[client_ip] if current_time - t < 3600]
+    if path.startswith(LIMITED_PATH):
+        if len(storage[client_ip]) >= 10:
+            return False
+        storage[client_ip].append(current_time)
+    return True
+
+
+async def run_benchmark(num_ips: int, num_requests: int):
+    rng = random.Random(0)
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(num_ips)]
+    traffic = [rng.choice(ips) for _ in range(num_requests)]
+
+    print(f"{num_requests} requests from {num_ips} distinct IPs")
+    print(f"{'implementation':<16} | {'route':<10} | {'us/request':>10} | {'keys held':>9}")
+    print("-" * 56)
+
+    for label, path in (("limited", LIMITED_PATH), ("unlimited", UNLIMITED_PATH)):
+        storage = defaultdict(list)
+        started = time.perf_counter()
+        for ip in traffic:
+            legacy_check(storage, path, ip)
+        elapsed = time.perf_counter() - started
+        print(f"{'legacy lists':<16} | {label:<10} | {elapsed / num_requests * 1e6:>10.2f} | {len(storage):>9}")
+
+        limiter = HttpRateLimiter(DEFAULT_POLICIES, LocalRateLimitBackend())
+        started = time.perf_counter()
+        for ip in traffic:
+            await limiter.check(path, "POST", ip)
+        elapsed = time.perf_counter() - started
+        print(f"{'gcra (local)':<16} | {label:<10} | {elapsed / num_requests * 1e6:>10.2f} | {len(limiter.backend):>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter overhead")
+    parser.add_argument("--ips", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.ips, args.requests))
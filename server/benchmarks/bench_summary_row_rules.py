@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the compiled summary-row rule engine.
+
+Builds a synthetic commission table (detail rows with a "Total for Group" rollup, agent
+rows and a grand total sprinkled in) and times:
+- each rule class, "per row" (one re.search per pattern per row, as the detectors used
+  to do) against one RowTexts mask over the whole table
+- row_looks_like_summary called per row against summary_row_mask
+- every detector end to end: refine_summary_rows, enrich_tables_with_summary_intelligence,
+  the Mistral detector and the Claude pre/post filters
+
+Usage:
+    python benchmarks/bench_summary_row_rules.py [--rows 20000] [--runs 3]
+"""
+
+import argparse
+import copy
+import os
+import random
+import re
+import sys
+import time
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.claude.summary_row_filters import SummaryRowPostValidator, SummaryRowPreFilter
+from app.services.extraction_utils import SUMMARY_PHRASE_RULE, enrich_tables_with_summary_intelligence
+from app.services.mistral.enhanced_summary_detector import (
+    AGENT_INFO_RULE,
+    BUSINESS_TOTAL_RULE,
+    STRONG_SUMMARY_RULE,
+    EnhancedSummaryRowDetector,
+)
+from app.services.summary_row_refiner import (
+    SUMMARY_KEYWORD_RULE,
+    SUMMARY_ROW_RULE,
+    refine_summary_rows,
+    row_looks_like_summary,
+    summary_row_mask,
+)
+from app.services.summary_row_rules import RowTexts, join_cells
+
+HEADERS = ["Group No.", "Group Name", "Premium", "Commission Rate", "Paid Amount", "Agent"]
+
+
+def make_rows(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    rows = []
+    while len(rows) < count:
+        for _ in range(rng.randint(5, 30)):
+            premium = rng.uniform(100, 20000)
+            rows.append([
+                f"L{rng.randint(0, 999999):06d}",
+                f"Customer {rng.randint(1, 5000)} LLC",
+                f"${premium:,.2f}",
+                f"{rng.choice([5, 8, 10])}%",
+                f"${premium * 0.1:,.2f}",
+                rng.choice(["Jane Doe", "John Roe", ""])
+            ])
+        rows.append(["Total for Group:", "", "", "", f"${rng.uniform(1000, 90000):,.2f}", ""])
+        if rng.random() < 0.2:
+            rows.append(["Writing Agent Name: Jane Doe", "", "", "", "", ""])
+    rows = rows[:count - 1]
+    rows.append(["Grand Total", "", "", "", "$1,234,567.89", ""])
+    return rows
+
+
+def best_of(runs: int, fn) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{len(rows)} rows x {len(HEADERS)} columns, best of {args.runs} runs\n")
+
+    texts = [join_cells(row) for row in rows]
+    print(f"{'rule class':<24} {'patterns':>8} {'per row ms':>11} {'mask ms':>9} {'speedup':>8}")
+    for rule in (SUMMARY_KEYWORD_RULE, SUMMARY_ROW_RULE, SUMMARY_PHRASE_RULE,
+                 STRONG_SUMMARY_RULE, AGENT_INFO_RULE, BUSINESS_TOTAL_RULE):
+        if rule.literal:
+            def per_row():
+                return [any(pattern in text for pattern in rule.patterns) for text in texts]
+        else:
+            def per_row():
+                return [any(re.search(pattern, text, rule.flags) for pattern in rule.patterns) for text in texts]
+        expected = per_row()
+        assert RowTexts(texts).mask(rule).tolist() == expected, rule.name
+        before = best_of(args.runs, per_row)
+        after = best_of(args.runs, lambda: RowTexts(texts).mask(rule))
+        print(f"{rule.name:<24} {len(rule.patterns):>8} {before * 1000:>11.1f} {after * 1000:>9.1f} {before / after:>7.1f}x")
+
+    before = best_of(args.runs, lambda: [row_looks_like_summary(row) for row in rows])
+    after = best_of(args.runs, lambda: summary_row_mask(rows))
+    print(f"\nrow_looks_like_summary per row {before * 1000:8.1f} ms, summary_row_mask {after * 1000:8.1f} ms")
+
+    table = {"headers": HEADERS, "rows": rows, "summaryRows": []}
+    detector = EnhancedSummaryRowDetector()
+    detectors = [
+        ("refine_summary_rows", lambda: refine_summary_rows(dict(table))),
+        ("enrich_tables_with_summary_intelligence", lambda: enrich_tables_with_summary_intelligence([copy.copy(table)])),
+        ("EnhancedSummaryRowDetector", lambda: detector.detect_and_remove_summary_rows(table)),
+        ("SummaryRowPreFilter", lambda: SummaryRowPreFilter.filter_summary_rows(table)),
+        ("SummaryRowPostValidator", lambda: SummaryRowPostValidator.validate_extracted_rows({"tables": [table]})),
+    ]
+    print()
+    for name, fn in detectors:
+        print(f"{name:<40} {best_of(args.runs, fn) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+CPU benchmark for batched Table Transformer detection and structure recognition.
+
+Runs table detection over the same set of synthetic pages through the inference worker at
+several batch sizes and reports pages/sec. It also reports the worst event loop stall seen
+by a 10ms heartbeat task during the run. Inference happens on the worker thread, so the
+stall should stay near the heartbeat interval whatever the batch size.
+
+The tables found are then sent through structure recognition the way the pipeline's
+page-based extraction does it (one recognize_structures_advanced call per page, all pages
+gathered), and the batch sizes the worker actually formed are reported for both passes.
+
+Downloads the microsoft/table-transformer-detection weights on first run.
+
+Usage:
+    python benchmarks/bench_tableformer_batching.py [--pages 16] [--batch-sizes 1 2 4 8]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import torch
+from PIL import Image, ImageDraw
+
+from app.new_extraction_services.utils.config import Config
+from app.new_extraction_services.models.advanced_tableformer import ProductionTableFormer
+from app.new_extraction_services.models.inference_worker import BatchInferenceWorker
+
+
+def make_page(seed: int, size=(1275, 1650)) -> np.ndarray:
+    """Letter page at 150 DPI with one ruled table of random dimensions."""
+    rng = np.random.default_rng(seed)
+    page = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(page)
+    rows, cols = int(rng.integers(8, 30)), int(rng.integers(4, 9))
+    left, top, width, row_height = 100, 300, size[0] - 200, 32
+    for r in range(rows + 1):
+        draw.line([(left, top + r * row_height), (left + width, top + r * row_height)], fill="black")
+    for c in range(cols + 1):
+        x = left + c * width // cols
+        draw.line([(x, top), (x, top + rows * row_height)], fill="black")
+    for r in range(rows):
+        for c in range(cols):
+            draw.text((left + c * width // cols + 6, top + r * row_height + 10), f"{rng.integers(0, 99999):,}", fill="black")
+    return np.array(page)
+
+
+async def heartbeat(stop: asyncio.Event, interval: float, lags: list):
+    """Record how late each tick wakes up (event loop stall)."""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - expected)
+
+
+def format_batches(items: int, batches: int) -> str:
+    """Batch count with the average batch size actually formed."""
+    return f"{batches} (avg {items / batches:.1f})" if batches else "0"
+
+
+async def run_benchmark(num_pages: int, batch_sizes: list):
+    torch.set_num_threads(os.cpu_count() or 1)
+    config = Config()
+    config.models.device = "cpu"
+
+    print("Loading Table Transformer models...")
+    tableformer = ProductionTableFormer(config)
+    pages = [make_page(i) for i in range(num_pages)]
+
+    # Warm-up so lazy initialisation does not count against batch size 1
+    await tableformer.detect_tables_advanced(pages[0])
+
+    print(
+        f"{'batch':>5} | {'pages/sec':>9} | {'sec/page':>8} | {'detection batches':>17} | "
+        f"{'structure batches':>17} | {'max loop stall':>14}"
+    )
+    print("-" * 84)
+    for batch_size in batch_sizes:
+        worker = BatchInferenceWorker(
+            handlers={'detection': tableformer._run_detection_batch, 'structure': tableformer._run_structure_batch},
+            max_batch_size=batch_size,
+            name=f"bench-{batch_size}"
+        )
+        tableformer.inference_worker = worker
+
+        stop, lags = asyncio.Event(), []
+        ticker = asyncio.create_task(heartbeat(stop, 0.01, lags))
+        started = time.perf_counter()
+        detections = await tableformer.detect_tables_batch(pages)
+        elapsed = time.perf_counter() - started
+        detection_stats = dict(worker.stats)
+        await asyncio.gather(*(
+            tableformer.recognize_structures_advanced(page, [table['bbox'] for table in tables])
+            for page, tables in zip(pages, detections)
+        ))
+        stop.set()
+        await ticker
+        worker.close()
+
+        structure_batches = worker.stats['batches'] - detection_stats['batches']
+        structure_items = worker.stats['items'] - detection_stats['items']
+        print(
+            f"{batch_size:>5} | {num_pages / elapsed:>9.2f} | {elapsed / num_pages:>8.3f} | "
+            f"{format_batches(detection_stats['items'], detection_stats['batches']):>17} | "
+            f"{format_batches(structure_items, structure_batches):>17} | "
+            f"{max(lags, default=0.0) * 1000:>11.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched Table Transformer detection and structure recognition on CPU")
+    parser.add_argument("--pages", type=int, default=16)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.pages, args.batch_sizes))
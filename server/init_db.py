@@ -14,6 +14,12 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 from app.db.models import Base, PlanType, SummaryRowPattern, Company, CompanyFieldMapping, CompanyConfiguration, EarnedCommission
 from app.config import engine
 
+def create_missing_indexes(sync_conn):
+    """Create model indexes (e.g. expression indexes) that are missing on existing tables."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
 async def init_db():
     """Create all tables defined in the models."""
     try:
@@ -22,6 +28,8 @@ async def init_db():
         # Create all tables
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            # create_all skips indexes of tables that already exist - add any that are missing
+            await conn.run_sync(create_missing_indexes)
         
         print("✅ Database tables created successfully!")
         
@@ -33,7 +41,15 @@ async def init_db():
             'company_field_mappings',
             'company_configurations',
             'database_fields',
-            'earned_commissions'
+            'earned_commissions',
+            'commission_contributions',
+            'dashboard_stats_aggregates',
+            'statement_upload_payloads',
+            'claude_rate_limit_reservations',
+            'extraction_result_cache',
+            'http_rate_limits',
+            'extraction_jobs',
+            'progress_events'
         ]
         
         async with engine.begin() as conn:
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of statement payloads into statement_upload_payloads.
+
+Copies the inline raw_data, edited_tables, final_data, progress_data and ai_intelligence
+JSON columns of statement_uploads into compressed payload rows (version 1) and clears the
+inline columns. Uploads are processed in id order in batches, one transaction per batch.
+Safe to re-run: a kind that already has a payload row keeps it and only the stale inline
+copy is cleared.
+
+Usage:
+    python migrate_statement_payloads.py [--batch-size 100]
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from sqlalchemy import select, insert, or_
+from app.db.models import Base, StatementUploadPayload, StatementUpload, STATEMENT_PAYLOAD_KINDS
+from app.db.database import engine
+
+
+async def run_migration(batch_size: int):
+    """Create the payload table if needed and move the inline payloads in batches."""
+    try:
+        print("Ensuring statement_upload_payloads table exists...")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        uploads = StatementUpload.__table__
+        inline_columns = [uploads.c[kind] for kind in STATEMENT_PAYLOAD_KINDS]
+        stats = {'uploads_migrated': 0, 'payloads_written': 0}
+        last_id = None
+
+        print(f"Moving inline payloads (batch size: {batch_size})...")
+        while True:
+            async with engine.begin() as conn:
+                query = select(uploads.c.id, *inline_columns).where(
+                    or_(*[column.isnot(None) for column in inline_columns])
+                )
+                if last_id is not None:
+                    query = query.where(uploads.c.id > last_id)
+                rows = (await conn.execute(query.order_by(uploads.c.id).limit(batch_size))).all()
+                if not rows:
+                    break
+
+                upload_ids = [row.id for row in rows]
+                existing = {
+                    (upload_id, kind)
+                    for upload_id, kind in (await conn.execute(
+                        select(StatementUploadPayload.upload_id, StatementUploadPayload.kind)
+                        .where(StatementUploadPayload.upload_id.in_(upload_ids))
+                    )).all()
+                }
+
+                payload_rows = []
+                for row in rows:
+                    for kind in STATEMENT_PAYLOAD_KINDS:
+                        value = getattr(row, kind)
+                        if value is not None and (row.id, kind) not in existing:
+                            payload_rows.append({'upload_id': row.id, 'kind': kind, 'version': 1, 'data': value})
+
+                if payload_rows:
+                    await conn.execute(insert(StatementUploadPayload), payload_rows)
+
+                await conn.execute(
+                    uploads.update()
+                    .where(uploads.c.id.in_(upload_ids))
+                    .values({kind: None for kind in STATEMENT_PAYLOAD_KINDS})
+                )
+
+                stats['uploads_migrated'] += len(rows)
+                stats['payloads_written'] += len(payload_rows)
+                last_id = upload_ids[-1]
+                print(f"  ... {stats['uploads_migrated']} uploads, {stats['payloads_written']} payloads")
+
+        print(f"✅ Uploads migrated: {stats['uploads_migrated']}")
+        print(f"✅ Payloads written: {stats['payloads_written']}")
+        print("ℹ️  Run VACUUM (FULL) statement_uploads to reclaim the space of the cleared columns")
+
+    except Exception as e:
+        print(f"❌ Error migrating statement payloads: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move statement_uploads JSON payloads into statement_upload_payloads")
+    parser.add_argument("--batch-size", type=int, default=100, help="Uploads moved per transaction (default: 100)")
+    args = parser.parse_args()
+
+    print("🚀 Starting statement payload migration...")
+    asyncio.run(run_migration(args.batch_size))
+    print("✨ Statement payload migration complete!")
@@ -22,14 +22,25 @@ GUNICORN_TIMEOUT=${GUNICORN_TIMEOUT:-1800}           # 30 minutes (matches total
 GUNICORN_GRACEFUL_TIMEOUT=${GUNICORN_GRACEFUL_TIMEOUT:-1800}  # 30 minutes (matches uvicorn_graceful_shutdown)
 GUNICORN_KEEPALIVE=${GUNICORN_KEEPALIVE:-1800}       # 30 minutes (matches uvicorn_keepalive)
 GUNICORN_WORKERS=${GUNICORN_WORKERS:-1}              # Single worker (recommended for long-running tasks)
+# Peers allowed to set X-Forwarded-For/-Proto: the app is only reachable through the platform's
+# proxy, so the client address (and the rate limits keyed on it) comes from that header
+FORWARDED_ALLOW_IPS=${FORWARDED_ALLOW_IPS:-*}
 
 echo "🚀 Starting server with Gunicorn (optimized for 30-minute extractions):"
 echo "   - Worker timeout: ${GUNICORN_TIMEOUT}s (30 minutes)"
 echo "   - Graceful shutdown: ${GUNICORN_GRACEFUL_TIMEOUT}s (30 minutes)"
 echo "   - Keep-alive: ${GUNICORN_KEEPALIVE}s (30 minutes)"
 echo "   - Workers: ${GUNICORN_WORKERS}"
+echo "   - Forwarded allow IPs: ${FORWARDED_ALLOW_IPS}"
 echo "   - Worker class: uvicorn.workers.UvicornWorker"
 
+# Load extraction models once in the master and fork workers after (shared copy-on-write)
+GUNICORN_PRELOAD_FLAG=""
+if [ "${PRELOAD_EXTRACTION_MODELS:-false}" = "true" ]; then
+    GUNICORN_PRELOAD_FLAG="--preload"
+    echo "   - Preloading extraction models before forking workers"
+fi
+
 # Start the FastAPI application via Gunicorn/uvicorn worker
 # ✅ CRITICAL: Timeout must exceed longest extraction time (1800s)
 exec gunicorn app.main:app \
@@ -39,6 +50,8 @@ exec gunicorn app.main:app \
   --timeout ${GUNICORN_TIMEOUT} \
   --graceful-timeout ${GUNICORN_GRACEFUL_TIMEOUT} \
   --keep-alive ${GUNICORN_KEEPALIVE} \
+  --forwarded-allow-ips "${FORWARDED_ALLOW_IPS}" \
   --log-level info \
   --access-logfile - \
-  --error-logfile -
\ No newline at end of file
+  --error-logfile - \
+  ${GUNICORN_PRELOAD_FLAG}
@@ -0,0 +1,56 @@
+"""
+NOTIFY payload sizing of the Postgres progress bus.
+
+Run from the server directory:
+    python -m unittest tests.test_progress_bus
+"""
+
+import json
+import os
+import sys
+import unittest
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.progress_bus import NOTIFY_PAYLOAD_LIMIT, encode_notification, fits_notify_payload
+
+ORIGIN = 'worker-1:1234'
+UPLOAD_ID = '6f1c2f9e-2a43-4c1e-9f0b-0c3d5d1e7a10'
+
+
+def inline_payload(message: str) -> str:
+    return encode_notification(ORIGIN, UPLOAD_ID, json.dumps({'type': 'progress', 'message': message}))
+
+
+def padded_to(size: int) -> str:
+    """Inline payload of exactly size bytes."""
+    base = len(inline_payload('').encode('utf-8'))
+    return inline_payload('x' * (size - base))
+
+
+class NotifyPayloadSizeTest(unittest.TestCase):
+    def test_payload_at_limit_is_sent_inline(self):
+        payload = padded_to(NOTIFY_PAYLOAD_LIMIT)
+        self.assertEqual(len(payload.encode('utf-8')), NOTIFY_PAYLOAD_LIMIT)
+        self.assertTrue(fits_notify_payload(payload))
+
+    def test_payload_one_byte_over_limit_is_sent_by_reference(self):
+        payload = padded_to(NOTIFY_PAYLOAD_LIMIT + 1)
+        self.assertFalse(fits_notify_payload(payload))
+
+    def test_escaping_growth_is_measured(self):
+        # Quotes and backslashes are escaped again when the message is embedded, so a message
+        # well under the limit can still produce a payload over it
+        encoded = json.dumps({'type': 'progress', 'message': '"' * 3000})
+        self.assertLess(len(encoded.encode('utf-8')), NOTIFY_PAYLOAD_LIMIT)
+        self.assertFalse(fits_notify_payload(encode_notification(ORIGIN, UPLOAD_ID, encoded)))
+
+    def test_reference_payload_fits(self):
+        payload = encode_notification(ORIGIN, UPLOAD_ID, event_id=2 ** 62)
+        self.assertTrue(fits_notify_payload(payload))
+        self.assertEqual(json.loads(payload), {'o': ORIGIN, 'u': UPLOAD_ID, 'id': 2 ** 62})
+
+
+if __name__ == '__main__':
+    unittest.main()
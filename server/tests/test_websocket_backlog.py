@@ -0,0 +1,44 @@
+"""
+Progress backlog of the WebSocket connection manager at the end of an upload's stream.
+
+Run from the server directory:
+    python -m unittest tests.test_websocket_backlog
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+# Make the app package importable when run from the server directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Single-process bus: the backlog lives in memory
+os.environ.setdefault('PROGRESS_BUS_BACKEND', 'local')
+
+from app.services.websocket_service import ConnectionManager
+
+UPLOAD_ID = 'upload-1'
+
+
+def step_progress(percentage: int) -> dict:
+    return {'type': 'STEP_PROGRESS', 'percentage': percentage, 'current_stage': 'ai_extraction'}
+
+
+class FinalMessageBacklogTest(unittest.IsolatedAsyncioTestCase):
+    async def test_final_message_leaves_no_stale_progress_in_backlog(self):
+        manager = ConnectionManager()
+        await manager.broadcast_to_upload(step_progress(40), UPLOAD_ID)
+        # Within the frame interval: waits for the next flush
+        await manager.broadcast_to_upload(step_progress(60), UPLOAD_ID)
+
+        await manager.broadcast_to_upload({'type': 'EXTRACTION_COMPLETE', 'result': {}}, UPLOAD_ID)
+        await asyncio.sleep(manager._min_frame_interval * 2)
+
+        backlog = [json.loads(encoded) for encoded in await manager.progress_bus.backlog(UPLOAD_ID)]
+        self.assertEqual([message['type'] for message in backlog], ['EXTRACTION_COMPLETE'])
+
+
+if __name__ == '__main__':
+    unittest.main()